@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Invalidasi cache response analytics saat data user berubah
+        from . import cache  # noqa: F401
+        # Cek alias cache response memakai backend bersama
+        from . import checks  # noqa: F401
@@ -0,0 +1,178 @@
+# ========================================
+# api/cache.py - Cache response analytics per user dengan data version
+# ========================================
+
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from finance.models import Category, Tag, Transaction, Transfer, Wallet
+from invest.models import AssetPrice, InvestmentHolding, InvestmentPortfolio, InvestmentTransaction
+from invest.signals import holdings_changed, prices_changed, prices_deleted
+from master.models import User
+from trading.models import Trade, TradeExecution, TradingAccount, TradingPerformance, TradingStrategy
+from trading.signals import performance_changed
+
+from .jobs import ASYNC_PARAM
+
+
+# Masa simpan default response (detik); invalidasi utama lewat data version
+DEFAULT_TIMEOUT = 15 * 60
+
+# Query parameter yang tidak mempengaruhi isi response
+IGNORED_PARAMS = {ASYNC_PARAM}
+
+# Scope version global: harga asset berlaku untuk semua user
+PRICES_SCOPE = 'prices'
+
+
+def response_cache():
+    return caches[getattr(settings, 'API_RESPONSE_CACHE', 'default')]
+
+
+def _version_key(scope):
+    return f'api:data-version:{scope}'
+
+
+def data_version(scope):
+    """
+    Version data untuk satu scope (user id atau PRICES_SCOPE).
+
+    Version berupa token acak, bukan counter: jika key hilang dari cache
+    (evicted/restart) token baru otomatis tidak cocok dengan response lama.
+    """
+    cache = response_cache()
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def data_modified(scope):
+    """Waktu terakhir data scope berubah (termasuk delete), None jika tidak diketahui"""
+    return response_cache().get(f'api:data-modified:{scope}')
+
+
+def bump_data_version(*scopes):
+    """Invalidasi semua response cache milik scope (user id / PRICES_SCOPE)"""
+    now = timezone.now()
+    values = {}
+    for scope in scopes:
+        values[_version_key(scope)] = uuid.uuid4().hex
+        values[f'api:data-modified:{scope}'] = now
+    response_cache().set_many(values, None)
+
+
+def response_cache_key(request, endpoint):
+    """
+    Key cache untuk (user, endpoint, query params ternormalisasi, data version).
+
+    Query params diurutkan per nama, jadi ?a=1&b=2 dan ?b=2&a=1 berbagi entry.
+    """
+    params = sorted(
+        (key, request.query_params.getlist(key))
+        for key in request.query_params if key not in IGNORED_PARAMS
+    )
+    versions = [data_version(request.user.pk), data_version(PRICES_SCOPE)]
+    digest = hashlib.sha1(
+        json.dumps([str(request.user.pk), endpoint, params, versions]).encode()
+    ).hexdigest()
+    return f'api:response:{endpoint}:{digest}'
+
+
+def record_lookup(endpoint, hit):
+    """
+    Catat hit/miss per endpoint.
+
+    Returns:
+        tuple: (hits, misses) endpoint setelah lookup ini
+    """
+    cache = response_cache()
+    keys = {name: f'api:response-stats:{endpoint}:{name}' for name in ('hits', 'misses')}
+    counter = keys['hits' if hit else 'misses']
+    cache.add(counter, 0, None)
+    try:
+        cache.incr(counter)
+    except ValueError:
+        # Counter ter-evict di antara add dan incr
+        cache.set(counter, 1, None)
+    stats = cache.get_many(keys.values())
+    return stats.get(keys['hits'], 0), stats.get(keys['misses'], 0)
+
+
+def _wallet_users(*wallet_ids):
+    return set(Wallet.objects.filter(pk__in=wallet_ids).values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=InvestmentTransaction)
+@receiver(post_delete, sender=InvestmentTransaction)
+@receiver(post_save, sender=InvestmentHolding)
+@receiver(post_delete, sender=InvestmentHolding)
+@receiver(post_save, sender=InvestmentPortfolio)
+@receiver(post_delete, sender=InvestmentPortfolio)
+@receiver(post_save, sender=TradingAccount)
+@receiver(post_delete, sender=TradingAccount)
+@receiver(post_save, sender=TradingStrategy)
+@receiver(post_delete, sender=TradingStrategy)
+@receiver(post_save, sender=Trade)
+@receiver(post_delete, sender=Trade)
+@receiver(post_save, sender=TradingPerformance)
+@receiver(post_delete, sender=TradingPerformance)
+def invalidate_user_responses(sender, instance, **kwargs):
+    bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def reset_new_user_responses(sender, instance, created=False, raw=False, **kwargs):
+    # Primary key user yang dihapus bisa dipakai ulang (mis. SQLite)
+    if created and not raw:
+        bump_data_version(instance.pk)
+
+
+@receiver(post_save, sender=TradeExecution)
+@receiver(post_delete, sender=TradeExecution)
+def invalidate_execution_responses(sender, instance, **kwargs):
+    if TradeExecution.trade.is_cached(instance):
+        user_id = instance.trade.user_id
+    else:
+        user_id = Trade.objects.filter(pk=instance.trade_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        bump_data_version(user_id)
+
+
+@receiver(post_save, sender=Transfer)
+@receiver(post_delete, sender=Transfer)
+def invalidate_transfer_responses(sender, instance, **kwargs):
+    users = _wallet_users(instance.from_wallet_id, instance.to_wallet_id)
+    if users:
+        bump_data_version(*users)
+
+
+@receiver(holdings_changed)
+@receiver(performance_changed)
+def invalidate_bulk_user_data(sender, user_ids, **kwargs):
+    if user_ids:
+        bump_data_version(*user_ids)
+
+
+@receiver(post_save, sender=AssetPrice)
+@receiver(prices_changed)
+@receiver(prices_deleted)
+def invalidate_price_responses(sender, **kwargs):
+    bump_data_version(PRICES_SCOPE)
@@ -0,0 +1,41 @@
+# ========================================
+# api/checks.py - System check cache bersama
+# ========================================
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Backend yang menyimpan data per proses: invalidasi dari worker lain tidak terlihat
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Setting alias cache yang menyimpan data version lintas proses
+SHARED_CACHE_SETTINGS = ('API_RESPONSE_CACHE', 'INVEST_QUOTE_CACHE')
+
+
+@register()
+def check_shared_caches(app_configs, **kwargs):
+    """
+    Data version response cache dan versi quote di-bump oleh proses mana pun
+    (web, run_jobs, command CLI), jadi alias-nya harus backend bersama (file,
+    database, atau Redis).
+    """
+    errors = []
+    for setting in SHARED_CACHE_SETTINGS:
+        alias = getattr(settings, setting, 'default')
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend is None:
+            errors.append(Error(
+                f"{setting} menunjuk alias cache '{alias}' yang tidak ada di CACHES",
+                id='api.E001',
+            ))
+        elif backend in PROCESS_LOCAL_BACKENDS:
+            errors.append(Error(
+                f"{setting} memakai cache per proses ({backend})",
+                hint='Gunakan backend bersama, mis. DatabaseCache atau Redis, agar invalidasi '
+                     'dari run_jobs dan command CLI terlihat di proses web.',
+                id='api.E002',
+            ))
+    return errors
@@ -0,0 +1,186 @@
+# ========================================
+# api/jobs.py - Antrian job background berbasis database
+# ========================================
+
+import json
+import os
+import re
+import socket
+import traceback
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .models import Job
+
+
+# Query parameter yang meminta eksekusi sebagai job (tidak ikut disimpan)
+ASYNC_PARAM = 'async'
+
+MAX_ATTEMPTS = 3
+
+# Job running lebih lama dari ini dianggap ditinggal worker yang mati
+DEFAULT_STALE_TIMEOUT = timedelta(hours=1)
+
+
+def wants_async(request):
+    return request.query_params.get(ASYNC_PARAM, '').lower() == 'true'
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue_job(request, name):
+    """Simpan request API sebagai job pending untuk dijalankan worker"""
+    query = {
+        key: request.query_params.getlist(key)
+        for key in request.query_params if key != ASYNC_PARAM
+    }
+    body = None
+    if request.method not in ('GET', 'HEAD'):
+        data = request.data
+        body = data.dict() if hasattr(data, 'dict') else data
+
+    return Job.objects.create(
+        user=request.user,
+        name=name,
+        method=request.method,
+        path=request.path,
+        query=query,
+        body=body,
+    )
+
+
+def claim_jobs(limit, worker=None):
+    """
+    Ambil sampai `limit` job pending (urut waktu dibuat) untuk worker ini.
+
+    Klaim memakai UPDATE bersyarat status='pending', jadi aman dijalankan
+    beberapa worker sekaligus tanpa SELECT ... FOR UPDATE.
+
+    Returns:
+        list: ID job yang berhasil diklaim
+    """
+    worker = worker or worker_name()
+    claimed = []
+    candidates = Job.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True)
+    for pk in candidates[:limit * 2]:
+        updated = Job.objects.filter(pk=pk, status='pending').update(
+            status='running',
+            worker=worker,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+            if len(claimed) >= limit:
+                break
+    return claimed
+
+
+def requeue_stale_jobs(timeout):
+    """
+    Job running lebih lama dari `timeout` (mis. worker mati) dikembalikan ke
+    pending, atau failed jika sudah MAX_ATTEMPTS kali dicoba.
+
+    Returns:
+        int: Jumlah job yang di-requeue atau digagalkan
+    """
+    stale = Job.objects.filter(status='running', started_at__lt=timezone.now() - timeout)
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status='failed', error='Job timeout', finished_at=timezone.now()
+    )
+    return failed + stale.update(status='pending', worker='')
+
+
+def result_path(job_id):
+    return Path(settings.API_JOB_RESULTS_DIR) / str(job_id)
+
+
+def _dispatch(job):
+    """
+    Jalankan ulang request job terhadap view yang sama atas nama user job.
+
+    Request dibangun dengan APIRequestFactory dan force_authenticate sehingga
+    hasil job identik dengan response endpoint sinkron (permission, filter,
+    dan serializer yang sama), tanpa perlu token JWT user.
+    """
+    path = job.path
+    if job.query:
+        path = f'{path}?{urlencode(job.query, doseq=True)}'
+    data = json.dumps(job.body) if job.body is not None else ''
+
+    request = APIRequestFactory().generic(job.method, path, data, content_type='application/json')
+    force_authenticate(request, user=job.user)
+    match = resolve(job.path)
+    return match.func(request, *match.args, **match.kwargs)
+
+
+def _store_file(job, response):
+    """Tulis response streaming (mis. export) ke file hasil job"""
+    path = result_path(job.pk)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    size = 0
+    with open(path, 'wb') as output:
+        for chunk in response.streaming_content:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            output.write(chunk)
+            size += len(chunk)
+
+    match = re.search(r'filename="?([^";]+)"?', response.get('Content-Disposition', ''))
+    return {
+        'file': {
+            'filename': match.group(1) if match else str(job.pk),
+            'content_type': response.get('Content-Type', 'application/octet-stream'),
+            'size': size,
+        }
+    }
+
+
+def execute_job(job_id):
+    """
+    Jalankan satu job yang sudah diklaim dan simpan hasilnya.
+
+    Dipanggil di proses worker (process pool); response 4xx/5xx dari view
+    dan exception dicatat sebagai failed.
+
+    Returns:
+        str: Status akhir job
+    """
+    job = Job.objects.select_related('user').get(pk=job_id)
+    fields = {'finished_at': None, 'status_code': None, 'result': None, 'error': ''}
+    try:
+        response = _dispatch(job)
+        fields['status_code'] = response.status_code
+        if isinstance(response, StreamingHttpResponse):
+            fields['result'] = _store_file(job, response)
+        elif getattr(response, 'data', None) is not None:
+            fields['result'] = json.loads(JSONRenderer().render(response.data))
+        fields['status'] = 'succeeded' if response.status_code < 400 else 'failed'
+    except Exception:
+        fields['status'] = 'failed'
+        fields['error'] = traceback.format_exc()
+
+    fields['finished_at'] = timezone.now()
+    Job.objects.filter(pk=job_id).update(**fields)
+    return fields['status']
+
+
+def purge_jobs(older_than):
+    """Hapus job selesai yang lebih lama dari `older_than` beserta file hasilnya"""
+    jobs = Job.objects.filter(
+        status__in=['succeeded', 'failed'], finished_at__lt=timezone.now() - older_than
+    )
+    for job_id in jobs.values_list('pk', flat=True).iterator():
+        result_path(job_id).unlink(missing_ok=True)
+    return jobs.delete()[0]
@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from api.jobs import DEFAULT_STALE_TIMEOUT, claim_jobs, execute_job, purge_jobs, requeue_stale_jobs
+from api.models import Job
+
+
+def _init_worker():
+    # Proses anak (spawn) perlu setup Django sendiri; pada fork ini no-op
+    django.setup()
+
+
+class Command(BaseCommand):
+    """
+    Worker job background berbasis tabel api_jobs (tanpa broker eksternal).
+
+    Job pending diklaim dengan UPDATE bersyarat lalu dijalankan di process
+    pool, sehingga beberapa worker (atau beberapa host) bisa berjalan
+    bersamaan. Job yang ditinggal worker mati dikembalikan ke antrian.
+    """
+    help = 'Jalankan worker job background (?async=true) dengan process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                            help='Jumlah proses worker (0 = jalankan di proses ini)')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Detik antar polling antrian')
+        parser.add_argument('--once', action='store_true', help='Proses antrian sampai kosong lalu berhenti')
+        parser.add_argument('--stale-timeout', type=int, default=int(DEFAULT_STALE_TIMEOUT.total_seconds()),
+                            help='Detik sebelum job running dianggap ditinggal worker')
+        parser.add_argument('--purge-days', type=int, default=7,
+                            help='Hapus job selesai yang lebih lama dari N hari (0 = tidak dihapus)')
+
+    def handle(self, *args, **options):
+        stale = requeue_stale_jobs(timedelta(seconds=options['stale_timeout']))
+        if stale:
+            self.stdout.write(f'{stale} job ditinggal worker dikembalikan ke antrian.')
+        if options['purge_days'] > 0:
+            purged = purge_jobs(timedelta(days=options['purge_days']))
+            if purged:
+                self.stdout.write(f'{purged} job lama dihapus.')
+
+        workers = max(options['workers'], 0)
+        if workers == 0:
+            processed = self.run_inline(options)
+        else:
+            processed = self.run_pool(workers, options)
+
+        self.stdout.write(self.style.SUCCESS(f'Worker selesai, {processed} job diproses.'))
+
+    def report(self, job_id, status):
+        self.stdout.write(f'Job {job_id}: {status}')
+
+    def run_inline(self, options):
+        processed = 0
+        while True:
+            claimed = claim_jobs(1)
+            if not claimed:
+                if options['once']:
+                    return processed
+                time.sleep(options['poll_interval'])
+                continue
+            self.report(claimed[0], execute_job(claimed[0]))
+            processed += 1
+
+    def run_pool(self, workers, options):
+        processed = 0
+        # Koneksi database tidak boleh diwariskan ke proses anak
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            running = {}
+            while True:
+                for job_id in claim_jobs(workers - len(running)):
+                    running[pool.submit(execute_job, job_id)] = job_id
+
+                if not running:
+                    if options['once']:
+                        return processed
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception as exc:
+                        # Proses worker mati di tengah job
+                        Job.objects.filter(pk=job_id, status='running').update(
+                            status='failed', error=repr(exc), finished_at=timezone.now()
+                        )
+                        status = 'failed'
+                    self.report(job_id, status)
+                    processed += 1
@@ -1,3 +1,50 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
+
+from master.models import User
+
+
+class Job(models.Model):
+    """
+    Antrian job background untuk endpoint berat (lihat api.jobs).
+
+    Job menyimpan request asli (method, path, query, body) dan dijalankan
+    ulang oleh worker (`manage.py run_jobs`) atas nama user yang sama.
+    Hasil JSON disimpan di result; hasil file (mis. export) disimpan di
+    direktori API_JOB_RESULTS_DIR dan metadata-nya di result.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs')
+    name = models.CharField(max_length=100)
+    method = models.CharField(max_length=10, default='GET')
+    path = models.CharField(max_length=500)
+    query = models.JSONField(default=dict, blank=True)
+    body = models.JSONField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'api_jobs'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['user', 'created_at']),
+        ]
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -1,3 +1,17 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from .checks import check_shared_caches
+
+
+class SharedCacheCheckTest(TestCase):
+    """Test system check alias cache response harus backend bersama"""
+
+    def test_process_local_cache_is_rejected(self):
+        self.assertEqual(check_shared_caches(None), [])
+
+        with override_settings(API_RESPONSE_CACHE='default'):
+            self.assertEqual([error.id for error in check_shared_caches(None)], ['api.E002'])
+        with override_settings(API_RESPONSE_CACHE='missing'):
+            self.assertEqual([error.id for error in check_shared_caches(None)], ['api.E001'])
+        with override_settings(INVEST_QUOTE_CACHE='default'):
+            self.assertEqual([error.id for error in check_shared_caches(None)], ['api.E002'])
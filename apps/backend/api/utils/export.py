@@ -0,0 +1,145 @@
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export bersifat opsional
+    pa = None
+    pq = None
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def parquet_available():
+    """True jika pyarrow terpasang sehingga export Parquet bisa dipakai"""
+    return pq is not None
+
+
+class _Echo:
+    """Pseudo-buffer untuk csv.writer: write() langsung mengembalikan baris"""
+
+    def write(self, value):
+        return value
+
+
+class _ChunkSink:
+    """File-like sink untuk ParquetWriter yang bisa dikuras per row group"""
+
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _to_json(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(headers, rows):
+    """Generator baris CSV (header dulu) dari iterable of tuples"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow([_to_text(value) for value in row])
+
+
+def iter_ndjson(fields, rows):
+    """Generator NDJSON: satu objek JSON per baris"""
+    for row in rows:
+        yield json.dumps(
+            {field: _to_json(value) for field, value in zip(fields, row)},
+            ensure_ascii=False
+        ) + '\n'
+
+
+def iter_parquet(fields, rows, chunk_size):
+    """
+    Generator file Parquet yang ditulis per row group berukuran chunk_size,
+    sehingga memori tetap konstan berapapun jumlah barisnya.
+
+    Semua kolom disimpan sebagai string agar presisi Decimal tetap terjaga.
+    """
+    schema = pa.schema([(field, pa.string()) for field in fields])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    def to_table(batch):
+        columns = list(zip(*batch))
+        return pa.Table.from_arrays([
+            pa.array([None if value is None else _to_text(value) for value in column], type=pa.string())
+            for column in columns
+        ], schema=schema)
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            writer.write_table(to_table(batch))
+            batch = []
+            yield sink.drain()
+
+    if batch:
+        writer.write_table(to_table(batch))
+    writer.close()
+    yield sink.drain()
+
+
+def streaming_export_response(export_format, fields, headers, rows, filename, chunk_size=2000):
+    """
+    Membuat StreamingHttpResponse untuk export CSV / NDJSON / Parquet.
+
+    Args:
+        export_format: 'csv', 'ndjson', atau 'parquet'
+        fields: Nama field (key NDJSON / kolom Parquet)
+        headers: Header kolom untuk CSV
+        rows: Iterable of tuples, sebaiknya queryset.values_list(...).iterator()
+        filename: Nama file tanpa ekstensi
+        chunk_size: Ukuran row group Parquet
+    """
+    if export_format == 'ndjson':
+        content = iter_ndjson(fields, rows)
+    elif export_format == 'parquet':
+        content = iter_parquet(fields, rows, chunk_size)
+    else:
+        export_format = 'csv'
+        content = iter_csv(headers, rows)
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
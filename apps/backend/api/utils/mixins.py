@@ -1,8 +1,21 @@
+import hashlib
+import json
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from api.cache import (
+    DEFAULT_TIMEOUT, data_modified, data_version, record_lookup, response_cache, response_cache_key
+)
+from api.jobs import enqueue_job, wants_async
+
 
 class ChoicesMixin:
     """
@@ -89,4 +102,149 @@ class ChoicesMixin:
             filter_backends=[],
             search_fields=None,
             ordering_fields=None
-        )
\ No newline at end of file
+        )
+
+class AsyncJobMixin:
+    """
+    Mixin untuk menjalankan action berat sebagai job background (lihat api.jobs).
+    
+    Cara pakai:
+    1. Tambahkan mixin ke ViewSet (sebelum ViewSet dasar)
+    2. Definisikan async_actions, mis. async_actions = ['analytics', 'export']
+    
+    Request ke action tersebut dengan ?async=true tidak dijalankan di request
+    thread: request disimpan sebagai job, response 202 berisi job_id dan
+    status_url untuk polling. Worker (`manage.py run_jobs`) menjalankan ulang
+    request yang sama dan menyimpan hasilnya di job.
+    """
+    
+    async_actions = ()
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Handler diambil dispatch() setelah initial(), jadi bisa dialihkan di sini
+        if self.action in self.async_actions and wants_async(request):
+            setattr(self, request.method.lower(), self.enqueue_async_job)
+    
+    def enqueue_async_job(self, request, *args, **kwargs):
+        """Simpan request sebagai job dan kembalikan 202 dengan URL polling"""
+        if (self.lookup_url_kwarg or self.lookup_field) in kwargs:
+            # Validasi akses object sekarang, bukan saat job dijalankan
+            self.get_object()
+        
+        job = enqueue_job(request, f'{self.basename}.{self.action}')
+        return Response({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': reverse('job-detail', kwargs={'pk': job.id}, request=request),
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class CachedResponseMixin:
+    """
+    Mixin untuk cache response GET action per user (lihat api.cache).
+    
+    Cara pakai:
+    1. Tambahkan mixin ke ViewSet (sebelum ViewSet dasar)
+    2. Definisikan cached_actions, mis. cached_actions = ['analytics']
+    
+    Key cache berisi user, action, query params ternormalisasi, dan data
+    version user. Version dinaikkan signal saat transaksi, transfer, holdings,
+    portfolio, atau harga berubah, jadi response lama tidak pernah dipakai lagi.
+    Response berisi header X-Cache (HIT/MISS) dan X-Cache-Stats (jumlah hit
+    dan miss endpoint).
+    """
+    
+    cached_actions = ()
+    cache_timeout = DEFAULT_TIMEOUT
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._response_cache_key = None
+        if request.method != 'GET' or self.action not in self.cached_actions or wants_async(request):
+            return
+        
+        endpoint = f'{self.basename}.{self.action}'
+        self._response_cache_key = response_cache_key(request, endpoint)
+        cached = response_cache().get(self._response_cache_key)
+        self._response_cache_hit = cached is not None
+        self._response_cache_stats = record_lookup(endpoint, self._response_cache_hit)
+        if cached is not None:
+            # Handler diambil dispatch() setelah initial(), jadi bisa dialihkan di sini
+            self.get = lambda request, *args, **kwargs: Response(cached)
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if key is None:
+            return response
+        
+        if not self._response_cache_hit and response.status_code == status.HTTP_200_OK:
+            response_cache().set(key, response.data, self.cache_timeout)
+        hits, misses = self._response_cache_stats
+        response['X-Cache'] = 'HIT' if self._response_cache_hit else 'MISS'
+        response['X-Cache-Stats'] = f'hits={hits}; misses={misses}'
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Mixin untuk ETag dan Last-Modified di list endpoint (conditional GET).
+    
+    Cara pakai:
+    1. Tambahkan mixin ke ViewSet (sebelum ViewSet dasar)
+    2. Definisikan conditional_fields jika timestamp bukan updated_at, mis.
+       conditional_fields = ('last_updated',); lookup relasi juga boleh,
+       mis. ('updated_at', 'holdings__last_updated')
+    
+    Validator dihitung dengan satu query aggregate (jumlah row dan max
+    timestamp) atas queryset yang sudah difilter, ditambah data version user
+    dari api.cache yang berubah juga saat row dihapus atau data turunan
+    (mis. rollup holdings) berubah. Request dengan If-None-Match atau
+    If-Modified-Since yang cocok dijawab 304 sebelum pagination dan
+    serialization dijalankan.
+    """
+    
+    conditional_fields = ('updated_at',)
+    
+    def get_conditional_validators(self, queryset):
+        """
+        Returns:
+            tuple: (etag, last_modified) untuk queryset list request ini
+        """
+        if queryset.query.annotations:
+            # Anotasi (mis. rollup) tidak perlu dihitung untuk validator
+            queryset = queryset.model._default_manager.filter(pk__in=queryset.values('pk'))
+        stats = queryset.order_by().aggregate(
+            count=Count('pk', distinct=True),
+            **{f'last_{index}': Max(field) for index, field in enumerate(self.conditional_fields)}
+        )
+        user_id = self.request.user.pk
+        timestamps = [
+            value for key, value in stats.items() if key.startswith('last_') and value is not None
+        ]
+        modified = data_modified(user_id)
+        if modified is not None:
+            timestamps.append(modified)
+        last_modified = max(timestamps) if timestamps else None
+        
+        digest = hashlib.sha1(json.dumps([
+            str(user_id),
+            self.request.get_full_path(),
+            stats['count'],
+            [value.isoformat() for value in timestamps],
+            data_version(user_id),
+        ]).encode()).hexdigest()
+        return f'W/"{digest}"', last_modified
+    
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_conditional_validators(self.filter_queryset(self.get_queryset()))
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
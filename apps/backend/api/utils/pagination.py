@@ -1,5 +1,13 @@
+import base64
+import binascii
+import json
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -26,4 +34,165 @@ class SmallResultsSetPagination(PageNumberPagination):
 class LargeResultsSetPagination(PageNumberPagination):
     page_size = 100
     page_size_query_param = 'page_size'
-    max_page_size = 500
\ No newline at end of file
+    max_page_size = 500
+
+class KeysetPagination(StandardResultsSetPagination):
+    """
+    Keyset (cursor) pagination atas `ordering`, default (-transaction_date, -id).
+
+    Aktif jika request membawa ?cursor= (kosong untuk halaman pertama);
+    tanpa cursor perilakunya sama dengan StandardResultsSetPagination.
+    Halaman berikutnya difilter dengan WHERE pada key row terakhir, bukan
+    OFFSET, sehingga biaya setiap halaman konstan dan didukung index
+    (user, transaction_date, id). Cursor bersifat opaque (base64 JSON).
+
+    Query Parameters:
+    - cursor: Cursor dari next/previous (kosong untuk halaman pertama)
+    - page_size: Jumlah item per halaman
+    - count: 'exact' (COUNT(*)) atau 'approximate' (dibatasi
+      approximate_count_limit; di PostgreSQL memakai estimasi planner).
+      Tanpa parameter ini count tidak dihitung.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-transaction_date', '-id')
+    approximate_count_limit = 10000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request.query_params[self.cursor_query_param])
+        self.count, self.count_is_exact = self.get_count(queryset, request)
+
+        ordering = [self._invert(field) for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position, ordering))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Arah sebaliknya selalu ada jika halaman ini diambil dari sebuah cursor
+        has_next, has_previous = (position is not None, has_more) if reverse else (has_more, position is not None)
+        self.next_position = self._position(rows[-1]) if rows and has_next else None
+        self.previous_position = self._position(rows[0]) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        response = {
+            'next': self.encode_link(self.next_position, reverse=False),
+            'previous': self.encode_link(self.previous_position, reverse=True),
+            'results': data,
+        }
+        if self.count is not None:
+            response['count'] = self.count
+            response['count_is_exact'] = self.count_is_exact
+        return Response(response)
+
+    def get_count(self, queryset, request):
+        """(count, is_exact) sesuai parameter count, atau (None, None)"""
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count(), True
+        if mode != 'approximate':
+            return None, None
+
+        limit = self.approximate_count_limit
+        count = queryset.order_by()[:limit + 1].count()
+        if count <= limit:
+            return count, True
+        return max(self._estimated_count(queryset), limit), False
+
+    @staticmethod
+    def _estimated_count(queryset):
+        """Estimasi jumlah row dari planner PostgreSQL; backend lain tidak punya estimasi"""
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return 0
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _position(self, row):
+        return [str(getattr(row, field.lstrip('-'))) for field in self.ordering]
+
+    def _after(self, position, ordering):
+        """
+        Filter row setelah `position` menurut `ordering`:
+        (a > x) OR (a = x AND b > y) ..., dengan < untuk field descending.
+        Batas a >= x ditambahkan agar database bisa range scan pada index;
+        tanpa itu OR membuat index hanya dipakai untuk filter.
+        """
+        condition, equal = Q(), {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        first = ordering[0]
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": position[0]})
+        return bound & condition
+
+    def decode_cursor(self, encoded):
+        """
+        Returns:
+            tuple: (position, reverse); position None untuk halaman pertama
+        """
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            position, reverse = data['p'], bool(data.get('r'))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+        except (ValueError, TypeError, KeyError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_link(self, position, reverse):
+        if position is None:
+            return None
+        data = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(data.encode()).decode('ascii').rstrip('=')
+        # Count cukup dihitung sekali di halaman pertama yang memintanya
+        url = remove_query_param(self.request.build_absolute_uri(), self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        return parameters + [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor keyset pagination (kosong untuk halaman pertama)',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Hitung total: 'exact' atau 'approximate'",
+                'schema': {'type': 'string', 'enum': ['exact', 'approximate']},
+            },
+        ]
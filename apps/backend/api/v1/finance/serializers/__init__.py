@@ -1,7 +1,7 @@
 from .category import CategorySerializer
 from .wallet import WalletSerializer, WalletListSerializer
 from .tag import TagSerializer, TransactionTagSerializer
-from .transaction import TransactionSerializer, TransactionListSerializer
+from .transaction import TransactionSerializer, TransactionListSerializer, TransactionBulkItemSerializer
 from .transfer import TransferSerializer, TransferCreateSerializer
 from .report import MonthlyReportSerializer, CategorySummarySerializer, TransactionSummarySerializer
 
@@ -13,6 +13,7 @@ __all__ = [
     'TransactionTagSerializer',
     'TransactionSerializer',
     'TransactionListSerializer',
+    'TransactionBulkItemSerializer',
     'TransferSerializer',
     'TransferCreateSerializer',
     'MonthlyReportSerializer',
@@ -47,12 +47,7 @@ class TransactionSerializer(serializers.ModelSerializer):
         transaction = super().create(validated_data)
         
         # Add tags
-        for tag_id in tag_ids:
-            try:
-                tag = Tag.objects.get(id=tag_id, user=user)
-                TransactionTag.objects.create(transaction=transaction, tag=tag)
-            except Tag.DoesNotExist:
-                pass
+        self._set_tags(transaction, tag_ids, user)
                 
         return transaction
     
@@ -68,15 +63,20 @@ class TransactionSerializer(serializers.ModelSerializer):
             TransactionTag.objects.filter(transaction=transaction).delete()
             
             # Add new tags
-            for tag_id in tag_ids:
-                try:
-                    tag = Tag.objects.get(id=tag_id, user=user)
-                    TransactionTag.objects.create(transaction=transaction, tag=tag)
-                except Tag.DoesNotExist:
-                    pass
+            self._set_tags(transaction, tag_ids, user)
                     
         return transaction
 
+    def _set_tags(self, transaction, tag_ids, user):
+        """Menambahkan tag milik user ke transaksi (satu query lookup, satu insert)"""
+        if not tag_ids:
+            return
+        # ID tag yang tidak ditemukan / bukan milik user diabaikan
+        tags = Tag.objects.filter(id__in=set(tag_ids), user=user)
+        TransactionTag.objects.bulk_create([
+            TransactionTag(transaction=transaction, tag=tag) for tag in tags
+        ])
+
 
 class TransactionListSerializer(serializers.ModelSerializer):
     """
@@ -92,4 +92,66 @@ class TransactionListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = ['id', 'wallet_name', 'category_name', 'amount', 
-                  'type', 'transaction_date', 'description']
\ No newline at end of file
+                  'type', 'transaction_date', 'description']
+
+
+class TransactionBulkItemSerializer(serializers.Serializer):
+    """
+    Serializer ringan untuk satu baris bulk import transaksi.
+    
+    Wallet, kategori, dan tag di-resolve dari lookup yang sudah dimuat di context
+    (`wallets`, `categories`, `tags` berupa dict id -> object), sehingga validasi
+    ribuan baris tidak menjalankan query per baris.
+    
+    Attributes:
+        wallet (int): ID wallet milik user
+        category (int): ID kategori milik user (opsional)
+        amount (decimal): Jumlah transaksi
+        type (str): Tipe transaksi ('income' atau 'expense')
+        description (str): Deskripsi transaksi (opsional)
+        transaction_date (date): Tanggal transaksi
+        tag_ids (list): Daftar ID tag (opsional, ID yang tidak dikenal diabaikan)
+    """
+    wallet = serializers.IntegerField()
+    category = serializers.IntegerField(required=False, allow_null=True)
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2)
+    type = serializers.ChoiceField(choices=[
+        choice for choice in Transaction.TRANSACTION_TYPE_CHOICES if choice[0] != 'transfer'
+    ])
+    description = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    transaction_date = serializers.DateField()
+    tag_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+
+    def validate_wallet(self, value):
+        wallet = self.context['wallets'].get(value)
+        if wallet is None:
+            raise serializers.ValidationError("Wallet not found or you don't have access")
+        return wallet
+
+    def validate_category(self, value):
+        if value is None:
+            return None
+        category = self.context['categories'].get(value)
+        if category is None:
+            raise serializers.ValidationError("Category not found or you don't have access")
+        return category
+
+    def validate_tag_ids(self, value):
+        tags = self.context['tags']
+        return [tags[tag_id] for tag_id in dict.fromkeys(value) if tag_id in tags]
+
+    def to_instance(self, user):
+        """Membangun instance Transaction (belum disimpan) dari validated_data"""
+        data = self.validated_data
+        return Transaction(
+            user=user,
+            wallet=data['wallet'],
+            category=data.get('category'),
+            amount=data['amount'],
+            type=data['type'],
+            description=data.get('description'),
+            transaction_date=data['transaction_date'],
+        )
@@ -23,6 +23,7 @@ Endpoint yang tersedia:
 - /tags/ - Manajemen tag untuk transaksi
 
 Semua endpoint mendukung operasi CRUD standar (Create, Read, Update, Delete).
+List endpoint mengirim ETag dan Last-Modified untuk conditional GET (304 Not Modified).
 Beberapa endpoint juga memiliki actions tambahan, seperti:
 - /categories/income/ - Mendapatkan kategori pemasukan saja
 - /categories/expense/ - Mendapatkan kategori pengeluaran saja
@@ -30,6 +31,7 @@ Beberapa endpoint juga memiliki actions tambahan, seperti:
 - /transactions/summary/ - Mendapatkan ringkasan transaksi
 - /transactions/by-category/ - Mendapatkan transaksi dikelompokkan per kategori
 - /transactions/monthly-report/ - Mendapatkan laporan bulanan
+- /transactions/bulk_create/ - Import banyak transaksi sekaligus
 - /tags/{id}/transactions/ - Mendapatkan transaksi dengan tag tertentu
 """
 
@@ -5,9 +5,9 @@ from rest_framework.response import Response
 from finance.models import Category, Tag, Transaction
 from ..serializers import CategorySerializer, TagSerializer, TransactionListSerializer
 from api.utils.permissions import IsOwner
-from api.utils.mixins import ChoicesMixin
+from api.utils.mixins import ChoicesMixin, ConditionalGetMixin
 
-class CategoryViewSet(ChoicesMixin, viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, ChoicesMixin, viewsets.ModelViewSet):
     """
     manajemen kategori transaksi keuangan.
     
@@ -62,7 +62,7 @@ class CategoryViewSet(ChoicesMixin, viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     manajemen tag transaksi.
     
@@ -78,6 +78,7 @@ class TagViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
+    conditional_fields = ('created_at',)
 
     def get_queryset(self):
         """
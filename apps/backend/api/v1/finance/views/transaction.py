@@ -1,35 +1,46 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction as db_transaction
 from django.db.models import Sum, F
 from django.db.models.functions import ExtractMonth, ExtractYear
+from collections import defaultdict
 from decimal import Decimal
 from datetime import datetime
 
-from finance.models import Transaction, Tag
+from finance.models import Transaction, Tag, TransactionTag, Wallet, Category, apply_balance_delta
 from ..serializers import (
     TransactionSerializer, 
     TransactionListSerializer, 
+    TransactionBulkItemSerializer,
     CategorySummarySerializer, 
     MonthlyReportSerializer,
     TransactionSummarySerializer
 )
 from api.utils.permissions import IsOwner
-from api.utils.mixins import ChoicesMixin
+from api.cache import bump_data_version
+from api.utils.mixins import CachedResponseMixin, ChoicesMixin, ConditionalGetMixin
+from api.utils.pagination import KeysetPagination
 
-class TransactionViewSet(ChoicesMixin, viewsets.ModelViewSet):
+class TransactionViewSet(ConditionalGetMixin, CachedResponseMixin, ChoicesMixin, viewsets.ModelViewSet):
     """
     manajemen transaksi keuangan.
     
     Transaksi merepresentasikan pergerakan uang, bisa berupa pemasukan (income),
     pengeluaran (expense), atau transfer antar wallet. Ketika transaksi dibuat,
     diupdate, atau dihapus, saldo wallet terkait akan diupdate secara otomatis.
+    
+    List mendukung keyset pagination dengan ?cursor= (lihat KeysetPagination)
+    untuk history panjang tanpa OFFSET.
     """
     permission_classes = [permissions.IsAuthenticated, IsOwner]
+    pagination_class = KeysetPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['description', 'wallet__name', 'category__name']
     ordering_fields = ['transaction_date', 'amount', 'created_at']
     ordering = ['-transaction_date']
+    bulk_batch_size = 1000
+    cached_actions = ['summary']
 
     choices_config = {
         'transaction_types': {
@@ -268,4 +279,105 @@ class TransactionViewSet(ChoicesMixin, viewsets.ModelViewSet):
         result = list(months_data.values())
         
         serializer = MonthlyReportSerializer(result, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """
+        Membuat banyak transaksi sekaligus (bulk import, misalnya dari mutasi rekening).
+        
+        Wallet, kategori, dan tag milik user di-resolve dengan satu query masing-masing,
+        baris divalidasi per batch tanpa query tambahan, lalu semua transaksi disimpan
+        dengan bulk_create dalam satu database transaction. Saldo setiap wallet yang
+        terdampak diupdate sekali di akhir.
+        
+        Request Body:
+            transactions (list): Daftar data transaksi (format sama dengan create,
+                tipe 'income' atau 'expense')
+            validate_only (bool): Hanya validasi tanpa menyimpan (default: false)
+            
+        Returns:
+            dict: Transaksi yang dibuat, atau daftar error per baris jika validasi gagal
+        """
+        transactions_data = request.data.get('transactions', [])
+        validate_only = request.data.get('validate_only', False)
+        
+        if not transactions_data:
+            return Response({
+                'error': 'Transactions data is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        user = request.user
+        context = {
+            'request': request,
+            'wallets': Wallet.objects.filter(user=user).in_bulk(),
+            'categories': Category.objects.filter(user=user).in_bulk(),
+            'tags': Tag.objects.filter(user=user).in_bulk(),
+        }
+        
+        # Validate all rows in batches (tanpa query per baris)
+        transactions = []
+        transaction_tags = []
+        errors = []
+        
+        for start in range(0, len(transactions_data), self.bulk_batch_size):
+            batch = transactions_data[start:start + self.bulk_batch_size]
+            
+            for offset, transaction_data in enumerate(batch):
+                serializer = TransactionBulkItemSerializer(data=transaction_data, context=context)
+                
+                if serializer.is_valid():
+                    transactions.append(serializer.to_instance(user))
+                    transaction_tags.append(serializer.validated_data.get('tag_ids', []))
+                else:
+                    errors.append({
+                        'index': start + offset,
+                        'data': transaction_data,
+                        'errors': serializer.errors
+                    })
+        
+        if errors:
+            return Response({
+                'error': 'Validation failed for some transactions',
+                'failed_transactions': errors,
+                'successful_count': len(transactions),
+                'failed_count': len(errors)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if validate_only:
+            return Response({
+                'message': 'All transactions are valid',
+                'transaction_count': len(transactions)
+            })
+        
+        with db_transaction.atomic():
+            created_transactions = Transaction.objects.bulk_create(
+                transactions, batch_size=self.bulk_batch_size
+            )
+            
+            TransactionTag.objects.bulk_create([
+                TransactionTag(transaction=transaction, tag=tag)
+                for transaction, tags in zip(created_transactions, transaction_tags)
+                for tag in tags
+            ], batch_size=self.bulk_batch_size)
+            
+            # bulk_create tidak memanggil save(), jadi saldo diupdate sekali per wallet
+            wallet_deltas = defaultdict(Decimal)
+            for transaction in created_transactions:
+                wallet_id, delta = transaction.balance_effect()
+                wallet_deltas[wallet_id] += delta
+            
+            for wallet_id, delta in wallet_deltas.items():
+                apply_balance_delta(wallet_id, delta)
+        
+        # bulk_create tidak mengirim post_save untuk invalidasi cache response
+        bump_data_version(request.user.pk)
+        
+        response_serializer = TransactionListSerializer(created_transactions, many=True)
+        
+        return Response({
+            'message': f'Successfully created {len(created_transactions)} transactions',
+            'transactions': response_serializer.data,
+            'created_count': len(created_transactions),
+            'wallets_updated': len(wallet_deltas)
+        }, status=status.HTTP_201_CREATED)
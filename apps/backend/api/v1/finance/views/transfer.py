@@ -4,8 +4,9 @@ from rest_framework.response import Response
 from finance.models import Transfer
 from ..serializers import TransferSerializer, TransferCreateSerializer
 from api.utils.permissions import IsOwner
+from api.utils.mixins import ConditionalGetMixin
 
-class TransferViewSet(viewsets.ModelViewSet):
+class TransferViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     manajemen transfer antar wallet.
     
@@ -5,9 +5,9 @@ from rest_framework.response import Response
 from finance.models import Wallet
 from ..serializers import WalletSerializer, WalletListSerializer
 from api.utils.permissions import IsOwner
-from api.utils.mixins import ChoicesMixin
+from api.utils.mixins import ChoicesMixin, ConditionalGetMixin
 
-class WalletViewSet(ChoicesMixin, viewsets.ModelViewSet):
+class WalletViewSet(ConditionalGetMixin, ChoicesMixin, viewsets.ModelViewSet):
     """
     manajemen wallet (dompet/rekening).
     
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from invest.models import Asset, AssetPrice
+from invest.quotes import get_latest_price, get_latest_prices
 from datetime import datetime, timedelta
+from django.db import models
 from django.utils import timezone
 
 
@@ -19,6 +21,33 @@ class AssetPriceSerializer(serializers.ModelSerializer):
         
     def get_formatted_timestamp(self, obj):
         return obj.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+    
+    def validate(self, data):
+        """Satu harga per (asset, timestamp); asset diambil dari context view"""
+        asset = self.context.get('asset') or getattr(self.instance, 'asset', None)
+        timestamp = data.get('timestamp')
+        if asset is not None and timestamp is not None:
+            duplicates = AssetPrice.objects.filter(asset=asset, timestamp=timestamp)
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError({
+                    'timestamp': 'Harga asset pada timestamp ini sudah ada'
+                })
+        return data
+
+
+class LatestPriceListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer yang memuat harga terakhir semua asset dalam satu panggilan
+    get_latest_prices sebelum serialisasi, sehingga get_latest_price per item
+    dilayani dari quote cache.
+    """
+    
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+        get_latest_prices([item.pk for item in items])
+        return super().to_representation(items)
 
 
 class AssetListSerializer(serializers.ModelSerializer):
@@ -35,11 +64,11 @@ class AssetListSerializer(serializers.ModelSerializer):
         model = Asset
         fields = ['id', 'symbol', 'name', 'type', 'exchange', 'sector', 
                   'currency', 'latest_price', 'price_change_24h', 'is_active']
+        list_serializer_class = LatestPriceListSerializer
     
     def get_latest_price(self, obj):
         """Mendapatkan harga terbaru asset"""
-        latest_price = obj.prices.order_by('-timestamp').first()
-        return latest_price.price if latest_price else 0
+        return get_latest_price(obj.pk) or 0
     
     def get_price_change_24h(self, obj):
         """Menghitung perubahan harga 24 jam terakhir"""
@@ -91,8 +120,7 @@ class AssetSerializer(serializers.ModelSerializer):
     
     def get_latest_price(self, obj):
         """Mendapatkan harga terbaru asset"""
-        latest_price = obj.prices.order_by('-timestamp').first()
-        return latest_price.price if latest_price else 0
+        return get_latest_price(obj.pk) or 0
     
     def get_price_change_24h(self, obj):
         """Menghitung perubahan harga 24 jam terakhir"""
@@ -128,7 +156,7 @@ class AssetSearchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Asset
         fields = ['id', 'symbol', 'name', 'type', 'latest_price']
+        list_serializer_class = LatestPriceListSerializer
     
     def get_latest_price(self, obj):
-        latest_price = obj.prices.order_by('-timestamp').first()
-        return latest_price.price if latest_price else 0
+        return get_latest_price(obj.pk) or 0
@@ -3,6 +3,14 @@ from invest.models import InvestmentHolding
 from .asset import AssetListSerializer
 from .portfolio import InvestmentPortfolioListSerializer
 from decimal import Decimal
+from datetime import timedelta
+from django.db import models
+from django.utils import timezone
+from invest.risk import load_daily_prices, price_risk_metrics
+
+
+# Panjang history harga untuk risk metrics holding
+RISK_WINDOW_DAYS = 30
 
 
 class InvestmentHoldingListSerializer(serializers.ModelSerializer):
@@ -29,6 +37,25 @@ class InvestmentHoldingListSerializer(serializers.ModelSerializer):
         return 0
 
 
+def load_holdings_price_history(holdings):
+    """{asset_id: array harga harian} untuk holdings, dalam satu query"""
+    start = timezone.localdate() - timedelta(days=RISK_WINDOW_DAYS)
+    _, prices = load_daily_prices({holding.asset_id for holding in holdings}, start)
+    return prices
+
+
+class HoldingRiskListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer yang memuat history harga semua holdings dalam satu query
+    sebelum serialisasi, untuk dipakai get_risk_metrics per item.
+    """
+    
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+        self.context['risk_price_history'] = load_holdings_price_history(items)
+        return super().to_representation(items)
+
+
 class InvestmentHoldingDetailSerializer(serializers.ModelSerializer):
     """
     Detail serializer untuk model InvestmentHolding.
@@ -48,6 +75,7 @@ class InvestmentHoldingDetailSerializer(serializers.ModelSerializer):
                   'total_cost', 'current_price', 'current_value', 'unrealized_pnl',
                   'unrealized_pnl_percentage', 'allocation_percentage', 'last_updated',
                   'performance_metrics', 'risk_metrics']
+        list_serializer_class = HoldingRiskListSerializer
     
     def get_unrealized_pnl_percentage(self, obj):
         """Menghitung persentase unrealized P&L"""
@@ -99,47 +127,19 @@ class InvestmentHoldingDetailSerializer(serializers.ModelSerializer):
         }
     
     def get_risk_metrics(self, obj):
-        """Menghitung metrics risiko holding"""
-        # Get recent price history for volatility calculation
-        recent_prices = obj.asset.prices.order_by('-timestamp')[:30]
-        
-        if recent_prices.count() < 2:
-            return {}
-        
-        # Calculate daily returns for volatility
-        daily_returns = []
-        prices = [float(p.price) for p in recent_prices]
-        
-        for i in range(1, len(prices)):
-            daily_return = (prices[i] - prices[i-1]) / prices[i-1]
-            daily_returns.append(daily_return)
-        
-        if daily_returns:
-            # Calculate volatility (standard deviation of returns)
-            avg_return = sum(daily_returns) / len(daily_returns)
-            variance = sum((r - avg_return) ** 2 for r in daily_returns) / len(daily_returns)
-            volatility = (variance ** 0.5) * (252 ** 0.5) * 100  # Annualized volatility
-            
-            # Calculate max drawdown
-            peak = prices[0]
-            max_drawdown = 0
-            for price in prices:
-                if price > peak:
-                    peak = price
-                drawdown = (peak - price) / peak
-                max_drawdown = max(max_drawdown, drawdown)
-            
-            return {
-                'volatility': round(volatility, 2),
-                'max_drawdown': round(max_drawdown * 100, 2),
-                'price_range_30d': {
-                    'high': max(prices),
-                    'low': min(prices),
-                    'range_percentage': round(((max(prices) - min(prices)) / min(prices)) * 100, 2)
-                }
-            }
+        """
+        Menghitung metrics risiko holding dari harga harian RISK_WINDOW_DAYS
+        terakhir (invest.risk). Memakai history yang sudah dimuat sekaligus
+        untuk semua holdings (context 'risk_price_history') jika tersedia.
+        """
+        history = self.context.get('risk_price_history')
+        if history is None or obj.asset_id not in history:
+            history = load_holdings_price_history([obj])
         
-        return {}
+        metrics = price_risk_metrics(history[obj.asset_id])
+        if metrics:
+            metrics['price_range_30d'] = metrics.pop('price_range')
+        return metrics
 
 
 class HoldingRefreshSerializer(serializers.Serializer):
@@ -30,10 +30,7 @@ class InvestmentHoldingSerializer(serializers.ModelSerializer):
     
     def get_allocation_percentage(self, obj):
         """Menghitung persentase alokasi dalam portfolio"""
-        portfolio = obj.portfolio
-        total_portfolio_value = sum(
-            holding.current_value for holding in portfolio.holdings.all()
-        )
+        total_portfolio_value = obj.portfolio.get_rollup()['total_value']
         if total_portfolio_value > 0:
             return round((obj.current_value / total_portfolio_value) * 100, 2)
         return 0
@@ -58,26 +55,23 @@ class InvestmentPortfolioListSerializer(serializers.ModelSerializer):
                   'holdings_count', 'is_active', 'created_at']
     
     def get_total_value(self, obj):
-        """Menghitung total nilai portfolio saat ini"""
-        return sum(holding.current_value for holding in obj.holdings.all())
+        """Total nilai portfolio saat ini (dari rollup holdings)"""
+        return obj.get_rollup()['total_value']
     
     def get_total_pnl(self, obj):
-        """Menghitung total profit/loss portfolio"""
-        total_cost = sum(holding.total_cost for holding in obj.holdings.all())
-        current_value = self.get_total_value(obj)
-        return current_value - total_cost
+        """Total profit/loss portfolio (dari rollup holdings)"""
+        return obj.get_rollup()['total_pnl']
     
     def get_total_pnl_percentage(self, obj):
         """Menghitung persentase profit/loss portfolio"""
-        total_cost = sum(holding.total_cost for holding in obj.holdings.all())
-        if total_cost > 0:
-            pnl = self.get_total_pnl(obj)
-            return round((pnl / total_cost) * 100, 2)
+        rollup = obj.get_rollup()
+        if rollup['total_cost'] > 0:
+            return round((rollup['total_pnl'] / rollup['total_cost']) * 100, 2)
         return 0
     
     def get_holdings_count(self, obj):
-        """Menghitung jumlah holdings dalam portfolio"""
-        return obj.holdings.count()
+        """Jumlah holdings dalam portfolio (dari rollup holdings)"""
+        return obj.get_rollup()['holdings_count']
 
 
 class InvestmentPortfolioSerializer(serializers.ModelSerializer):
@@ -93,6 +87,7 @@ class InvestmentPortfolioSerializer(serializers.ModelSerializer):
         initial_capital (decimal): Modal awal portfolio
         target_allocation (json): Target alokasi aset {"stocks": 70, "bonds": 20, "crypto": 10}
         risk_level (str): Tingkat risiko ('low', 'medium', 'high')
+        cost_basis_method (str): Metode cost basis saat sell ('fifo', 'lifo', 'average')
         is_active (bool): Status aktif portfolio
         created_at (datetime): Waktu pembuatan (read-only)
         updated_at (datetime): Waktu update terakhir (read-only)
@@ -108,7 +103,7 @@ class InvestmentPortfolioSerializer(serializers.ModelSerializer):
     class Meta:
         model = InvestmentPortfolio
         fields = ['id', 'name', 'description', 'initial_capital', 'target_allocation',
-                  'risk_level', 'is_active', 'created_at', 'updated_at', 'holdings',
+                  'risk_level', 'cost_basis_method', 'is_active', 'created_at', 'updated_at', 'holdings',
                   'total_value', 'total_cost', 'total_pnl', 'total_pnl_percentage',
                   'actual_allocation', 'performance_metrics']
         read_only_fields = ['created_at', 'updated_at', 'user']
@@ -120,16 +115,16 @@ class InvestmentPortfolioSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
     
     def get_total_value(self, obj):
-        """Menghitung total nilai portfolio saat ini"""
-        return sum(holding.current_value for holding in obj.holdings.all())
+        """Total nilai portfolio saat ini (dari rollup holdings)"""
+        return obj.get_rollup()['total_value']
     
     def get_total_cost(self, obj):
-        """Menghitung total cost basis portfolio"""
-        return sum(holding.total_cost for holding in obj.holdings.all())
+        """Total cost basis portfolio (dari rollup holdings)"""
+        return obj.get_rollup()['total_cost']
     
     def get_total_pnl(self, obj):
-        """Menghitung total profit/loss portfolio"""
-        return self.get_total_value(obj) - self.get_total_cost(obj)
+        """Total profit/loss portfolio (dari rollup holdings)"""
+        return obj.get_rollup()['total_pnl']
     
     def get_total_pnl_percentage(self, obj):
         """Menghitung persentase profit/loss portfolio"""
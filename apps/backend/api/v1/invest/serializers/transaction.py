@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from invest.models import InvestmentTransaction, InvestmentPortfolio, Asset
+from invest.lots import TransactionError, check_history, open_position
 from .asset import AssetListSerializer
 from .portfolio import InvestmentPortfolioListSerializer
 from decimal import Decimal
+from django.utils import timezone
 
 
 class InvestmentTransactionListSerializer(serializers.ModelSerializer):
@@ -62,6 +64,11 @@ class InvestmentTransactionSerializer(serializers.ModelSerializer):
         """Validasi data transaksi"""
         user = self.context['request'].user
         
+        # Partial update: field yang tidak dikirim memakai nilai transaksi saat ini
+        if self.instance is not None:
+            for field in ['portfolio_id', 'asset_id', 'transaction_type', 'quantity', 'price', 'transaction_date']:
+                data.setdefault(field, getattr(self.instance, field))
+        
         # Validasi portfolio ownership
         try:
             portfolio = InvestmentPortfolio.objects.get(
@@ -79,12 +86,31 @@ class InvestmentTransactionSerializer(serializers.ModelSerializer):
         except Asset.DoesNotExist:
             raise serializers.ValidationError("Asset not found")
         
-        # Validasi quantity untuk sell transaction
-        if data['transaction_type'] == 'sell':
-            current_holding = portfolio.holdings.filter(asset=asset).first()
-            if not current_holding or current_holding.quantity < data['quantity']:
+        # History (portfolio, asset) di-replay di memory: sell tidak boleh
+        # melebihi posisi pada tanggalnya, termasuk sell sesudah transaksi
+        # yang diedit atau dipindahkan dari (portfolio, asset) lama
+        candidate = {
+            'id': self.instance.pk if self.instance is not None else None,
+            'portfolio_id': portfolio.pk,
+            'asset_id': asset.pk,
+            'transaction_type': data['transaction_type'],
+            'quantity': data['quantity'],
+            'transaction_date': data['transaction_date'],
+            'created_at': self.instance.created_at if self.instance is not None else timezone.now(),
+        }
+        checks = [(portfolio.pk, asset, candidate)]
+        exclude = None
+        if self.instance is not None:
+            exclude = self.instance.pk
+            if (self.instance.portfolio_id, self.instance.asset_id) != (portfolio.pk, asset.pk):
+                checks.append((self.instance.portfolio_id, self.instance.asset, None))
+        for portfolio_id, checked_asset, checked_candidate in checks:
+            try:
+                check_history(portfolio_id, checked_asset.pk, exclude=exclude, candidate=checked_candidate)
+            except TransactionError as exc:
                 raise serializers.ValidationError(
-                    f"Insufficient {asset.symbol} balance. Available: {current_holding.quantity if current_holding else 0}"
+                    f"Insufficient {checked_asset.symbol} balance on {exc.transaction_date}. "
+                    f"Available: {exc.available}"
                 )
         
         # Auto-calculate total_amount
@@ -143,6 +169,13 @@ class InvestmentTransactionSerializer(serializers.ModelSerializer):
             holding.quantity -= transaction.quantity
             holding.total_cost = holding.quantity * holding.average_price
             
+            # Cost basis sisa dari lot terbuka (FIFO/LIFO/average) jika lot
+            # mencakup seluruh holding; holding lama tanpa lot tetap average
+            lot_quantity, lot_cost = open_position(transaction.portfolio_id, transaction.asset_id)
+            if holding.quantity > 0 and lot_quantity == holding.quantity:
+                holding.total_cost = lot_cost.quantize(Decimal('0.01'))
+                holding.average_price = (lot_cost / lot_quantity).quantize(Decimal('0.01'))
+            
             # Delete holding if quantity becomes 0
             if holding.quantity <= 0:
                 holding.delete()
@@ -10,9 +10,10 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from decimal import Decimal
-from datetime import date
+from datetime import date, timedelta
+from django.utils import timezone
 
-from invest.models import Asset, InvestmentPortfolio, InvestmentTransaction, InvestmentHolding
+from invest.models import Asset, AssetPrice, InvestmentPortfolio, InvestmentTransaction, InvestmentHolding
 
 User = get_user_model()
 
@@ -82,6 +83,150 @@ class AssetAPITest(InvestmentAPITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['symbol'], 'BBRI')
 
+    def test_add_price_updates_latest_price(self):
+        """Test add_price memperbarui AssetQuote dan latest_price asset"""
+        self.user.is_staff = True
+        self.user.save()
+
+        url = reverse('asset-add-price', kwargs={'pk': self.asset.id})
+        response = self.client.post(url, {'price': '4800.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.asset.quote.price, Decimal('4800.00'))
+        response = self.client.get(reverse('asset-list'))
+        self.assertEqual(response.data['results'][0]['latest_price'], Decimal('4800.00'))
+
+    def test_add_price_duplicate_timestamp_is_rejected(self):
+        """Test add_price dengan timestamp yang sudah ada ditolak 400"""
+        self.user.is_staff = True
+        self.user.save()
+
+        url = reverse('asset-add-price', kwargs={'pk': self.asset.id})
+        payload = {'price': '4800.00', 'timestamp': '2025-01-02T09:00:00Z'}
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(url, {**payload, 'price': '4900.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('timestamp', response.data)
+        self.assertEqual(self.asset.prices.get().price, Decimal('4800.00'))
+
+    def _create_intraday_prices(self):
+        day = (timezone.now() - timedelta(days=5)).replace(hour=0, minute=0, second=0, microsecond=0)
+        rows = [
+            (day.replace(hour=9), '100.00', '10'),
+            (day.replace(hour=9, minute=20), '120.00', '5'),
+            (day.replace(hour=12), '90.00', '1'),
+            (day.replace(hour=15), '110.00', '4'),
+            (day + timedelta(days=1, hours=9), '130.00', None),
+        ]
+        for timestamp, price, volume in rows:
+            AssetPrice.objects.create(
+                asset=self.asset,
+                price=Decimal(price),
+                volume=Decimal(volume) if volume else None,
+                timestamp=timestamp
+            )
+        return day
+
+    def test_price_history_daily_ohlc(self):
+        """Test OHLC harian dihitung di database dengan window function"""
+        day = self._create_intraday_prices()
+        url = reverse('asset-prices', kwargs={'pk': self.asset.id})
+
+        response = self.client.get(url, {'interval': 'daily'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        history = response.data['price_history']
+        self.assertEqual(len(history), 2)
+        self.assertEqual(history[0]['timestamp'], day)
+        self.assertEqual(
+            [history[0][key] for key in ('open', 'high', 'low', 'close', 'volume')],
+            [Decimal('100.00'), Decimal('120.00'), Decimal('90.00'), Decimal('110.00'), Decimal('20.00')]
+        )
+        self.assertEqual(history[0]['price'], Decimal('110.00'))
+        self.assertIsNone(history[1]['volume'])
+
+    def test_price_history_minute_buckets_and_max_points(self):
+        """Test bucket N-menit dan mode max_points (LTTB)"""
+        day = self._create_intraday_prices()
+        url = reverse('asset-prices', kwargs={'pk': self.asset.id})
+
+        response = self.client.get(url, {'interval': 'minutes', 'minutes': 240})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        history = response.data['price_history']
+        # 08:00-12:00, 12:00-16:00, dan 08:00-12:00 hari berikutnya
+        self.assertEqual([bucket['timestamp'] for bucket in history], [
+            day.replace(hour=8), day.replace(hour=12), day + timedelta(days=1, hours=8)
+        ])
+        self.assertEqual(history[0]['close'], Decimal('120.00'))
+        self.assertEqual(history[1]['open'], Decimal('90.00'))
+
+        response = self.client.get(url, {'interval': 'raw', 'max_points': 3})
+        self.assertEqual(response.data['points'], 3)
+        self.assertEqual(response.data['price_history'][0]['price'], Decimal('100.00'))
+        self.assertEqual(response.data['price_history'][-1]['price'], Decimal('130.00'))
+
+        response = self.client.get(url, {'interval': 'minutes'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_ingest_csv(self):
+        """Test bulk ingest harga dari raw CSV dengan dedupe dan error per baris"""
+        self.user.is_staff = True
+        self.user.save()
+        csv_body = (
+            'symbol,timestamp,price,volume,market_cap\n'
+            'BBRI,2025-01-02,4500,1000000,\n'
+            'bbri,2025-01-03T16:00:00+07:00,4550.50,,\n'
+            'BBRI,2025-01-02,4999,,\n'
+            'XXXX,2025-01-02,100,,\n'
+            'BBRI,not-a-date,100,,\n'
+        )
+        url = reverse('asset-bulk-ingest')
+        response = self.client.generic('POST', url, csv_body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['rows_received'], 5)
+        self.assertEqual(response.data['rows_accepted'], 2)
+        self.assertEqual(response.data['duplicate_rows'], 1)
+        self.assertEqual(response.data['invalid_rows'], 2)
+        self.assertEqual(response.data['unknown_symbols'], ['XXXX'])
+        self.assertEqual(response.data['errors'][1]['line'], 6)
+        self.assertIn('rows_per_second', response.data)
+
+        self.assertEqual(self.asset.prices.count(), 2)
+        self.assertEqual(self.asset.prices.get(timestamp__date=date(2025, 1, 2)).price, Decimal('4500.00'))
+        self.assertEqual(self.asset.quote.price, Decimal('4550.50'))
+
+        # Ingest ulang data yang sama tidak menduplikasi harga
+        response = self.client.generic('POST', url, csv_body, content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rows_accepted'], 0)
+        self.assertEqual(response.data['duplicate_rows'], 3)
+        self.assertEqual(self.asset.prices.count(), 2)
+
+    def test_bulk_ingest_ndjson_upload(self):
+        """Test bulk ingest harga dari upload file NDJSON"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        self.user.is_staff = True
+        self.user.save()
+        upload = SimpleUploadedFile(
+            'prices.ndjson',
+            b'{"symbol": "BBRI", "timestamp": "2025-02-01", "price": "4700"}\n'
+            b'\n'
+            b'{"symbol": "BBRI", "timestamp": "2025-02-02", "price": "4725", "volume": 5000}\n',
+            content_type='application/x-ndjson'
+        )
+        response = self.client.post(reverse('asset-bulk-ingest'), {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['ingest_format'], 'ndjson')
+        self.assertEqual(response.data['rows_accepted'], 2)
+        self.assertEqual(self.asset.quote.price, Decimal('4725.00'))
+
+    def test_bulk_ingest_requires_staff(self):
+        """Test bulk ingest hanya untuk admin"""
+        response = self.client.generic('POST', reverse('asset-bulk-ingest'), '', content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
 
 class PortfolioAPITest(InvestmentAPITestCase):
     """Test untuk Portfolio API endpoints"""
@@ -134,6 +279,98 @@ class PortfolioAPITest(InvestmentAPITestCase):
         self.assertIn('total_return_percentage', response.data)
         self.assertIn('period', response.data)
 
+    def test_portfolio_risk_metrics(self):
+        """Test performance dengan benchmark/rolling window dan action risk"""
+        InvestmentHolding.objects.create(
+            user=self.user, portfolio=self.portfolio, asset=self.asset,
+            quantity=Decimal('100'), average_price=Decimal('4500.00'), total_cost=Decimal('450000.00'),
+            current_price=Decimal('4750.00'), current_value=Decimal('475000.00'),
+            unrealized_pnl=Decimal('25000.00')
+        )
+        url = reverse('portfolio-performance', kwargs={'pk': self.portfolio.id})
+        response = self.client.get(url, {'benchmark': self.asset.symbol.lower(), 'rolling_window': '5'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['benchmark'], self.asset.symbol)
+        self.assertIn('sortino_ratio', response.data)
+        self.assertIsInstance(response.data['rolling'], list)
+
+        self.assertEqual(self.client.get(url, {'benchmark': 'NOPE'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'rolling_window': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        url = reverse('portfolio-risk', kwargs={'pk': self.portfolio.id})
+        response = self.client.get(url, {'benchmark': self.asset.symbol})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['holdings'][0]['symbol'], self.asset.symbol)
+        self.assertEqual(response.data['holdings'][0]['weight'], Decimal('100.00'))
+        self.assertIn('max_drawdown', response.data['portfolio_metrics'])
+        self.assertEqual(self.client.get(url, {'days': '1'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def _create_rollup_holdings(self):
+        """Dua portfolio dengan beberapa holdings untuk test rollup"""
+        other_portfolio = InvestmentPortfolio.objects.create(user=self.user, name='Growth Portfolio')
+        for index, (portfolio, cost, value) in enumerate([
+            (self.portfolio, '450000.00', '475000.00'),
+            (self.portfolio, '200000.00', '150000.00'),
+            (other_portfolio, '1000000.00', '1300000.00'),
+        ]):
+            asset = Asset.objects.create(symbol=f'RLP{index}', name=f'Rollup Asset {index}', type='stock')
+            InvestmentHolding.objects.create(
+                user=self.user,
+                portfolio=portfolio,
+                asset=asset,
+                quantity=Decimal('100.00000000'),
+                average_price=Decimal('1000.00'),
+                total_cost=Decimal(cost),
+                current_value=Decimal(value),
+                unrealized_pnl=Decimal(value) - Decimal(cost)
+            )
+        return other_portfolio
+
+    def test_list_portfolios_uses_rollups(self):
+        """Test list portfolio dengan rollup holdings dalam jumlah query konstan"""
+        self._create_rollup_holdings()
+        url = reverse('portfolio-list')
+
+        # validator ETag + count pagination + satu query portfolio beranotasi
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'ordering': 'name'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = {item['name']: item for item in response.data['results']}
+        self.assertEqual(results['Test Portfolio']['total_value'], Decimal('625000.00'))
+        self.assertEqual(results['Test Portfolio']['total_pnl'], Decimal('-25000.00'))
+        self.assertEqual(results['Test Portfolio']['holdings_count'], 2)
+        self.assertEqual(results['Growth Portfolio']['total_pnl_percentage'], Decimal('30.00'))
+
+    def test_filter_portfolios_by_value(self):
+        """Test filter min_value/max_value memakai anotasi rollup"""
+        self._create_rollup_holdings()
+        url = reverse('portfolio-list')
+
+        response = self.client.get(url, {'min_value': '1000000'})
+        self.assertEqual([item['name'] for item in response.data['results']], ['Growth Portfolio'])
+
+        response = self.client.get(url, {'max_value': '700000'})
+        self.assertEqual([item['name'] for item in response.data['results']], ['Test Portfolio'])
+
+        response = self.client.get(url, {'min_value': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_portfolio_overview(self):
+        """Test overview portfolio dalam satu query"""
+        self._create_rollup_holdings()
+        url = reverse('portfolio-overview')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_portfolios'], 2)
+        self.assertEqual(response.data['total_value'], Decimal('1925000.00'))
+        self.assertEqual(response.data['total_cost'], Decimal('1650000.00'))
+        self.assertEqual(response.data['total_holdings'], 3)
+        self.assertEqual(response.data['best_performing']['name'], 'Growth Portfolio')
+
 
 class TransactionAPITest(InvestmentAPITestCase):
     """Test untuk Transaction API endpoints"""
@@ -170,7 +407,12 @@ class TransactionAPITest(InvestmentAPITestCase):
     
     def test_create_sell_transaction(self):
         """Test create sell transaction"""
-        # First create a holding
+        # First create a holding (dengan buy yang mendasarinya)
+        InvestmentTransaction.objects.create(
+            user=self.user, portfolio=self.portfolio, asset=self.asset,
+            transaction_type='buy', quantity=Decimal('200'), price=Decimal('4000.00'),
+            total_amount=Decimal('800000.00'), transaction_date=date(2025, 6, 1)
+        )
         InvestmentHolding.objects.create(
             user=self.user,
             portfolio=self.portfolio,
@@ -205,6 +447,133 @@ class TransactionAPITest(InvestmentAPITestCase):
         
         self.assertEqual(holding.quantity, Decimal('150.00000000'))
     
+    def test_realized_gains_ledger(self):
+        """Test realized P&L per lot (FIFO) di ledger dan by_asset"""
+        self.portfolio.cost_basis_method = 'fifo'
+        self.portfolio.save()
+        url = reverse('transaction-list')
+        for transaction_type, quantity, price, day in [
+            ('buy', '100', '4000.00', '2025-06-01'),
+            ('buy', '100', '5000.00', '2025-06-02'),
+            ('sell', '150', '6000.00', '2025-06-03'),
+        ]:
+            response = self.client.post(url, {
+                'portfolio_id': str(self.portfolio.id), 'asset_id': str(self.asset.id),
+                'transaction_type': transaction_type, 'quantity': quantity, 'price': price,
+                'transaction_date': day
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        # Sisa holding memakai cost lot FIFO yang tersisa: 50 @ 5000
+        holding = InvestmentHolding.objects.get(portfolio=self.portfolio, asset=self.asset)
+        self.assertEqual(holding.total_cost, Decimal('250000.00'))
+        self.assertEqual(holding.average_price, Decimal('5000.00'))
+        
+        response = self.client.get(reverse('transaction-realized-gains'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        # 100 * (6000 - 4000) + 50 * (6000 - 5000)
+        self.assertEqual(response.data['total_realized_pnl'], Decimal('250000.00'))
+        self.assertEqual(response.data['results'][-1]['holding_days'], 2)
+        
+        response = self.client.get(reverse('transaction-by-asset'))
+        self.assertEqual(response.data['asset_groups'][0]['realized_pnl'], Decimal('250000.00'))
+        self.assertEqual(response.data['asset_groups'][0]['current_holding'], Decimal('50'))
+    
+    def test_update_and_delete_rebuild_holdings(self):
+        """Test update/delete transaksi membatalkan efeknya pada holdings"""
+        url = reverse('transaction-list')
+        created = []
+        for transaction_type, quantity, price, day in [
+            ('buy', '100', '4000.00', '2025-06-01'),
+            ('buy', '50', '5000.00', '2025-06-02'),
+            ('sell', '30', '6000.00', '2025-06-03'),
+        ]:
+            response = self.client.post(url, {
+                'portfolio_id': str(self.portfolio.id), 'asset_id': str(self.asset.id),
+                'transaction_type': transaction_type, 'quantity': quantity, 'price': price,
+                'transaction_date': day
+            }, format='json')
+            created.append(response.data['id'])
+        
+        detail_url = reverse('transaction-detail', kwargs={'pk': created[2]})
+        response = self.client.patch(detail_url, {'quantity': '60'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        holding = InvestmentHolding.objects.get(portfolio=self.portfolio, asset=self.asset)
+        self.assertEqual(holding.quantity, Decimal('90'))
+        
+        response = self.client.delete(reverse('transaction-detail', kwargs={'pk': created[1]}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        holding.refresh_from_db()
+        self.assertEqual(holding.quantity, Decimal('40'))
+        self.assertEqual(holding.total_cost, Decimal('160000.00'))
+        
+        self.client.delete(detail_url)
+        self.client.delete(reverse('transaction-detail', kwargs={'pk': created[0]}))
+        self.assertFalse(InvestmentHolding.objects.filter(portfolio=self.portfolio).exists())
+    
+    def test_history_is_replayed_before_changes(self):
+        """Test buy yang menjadi dasar sell sesudahnya tidak bisa dihapus/dikecilkan"""
+        url = reverse('transaction-list')
+        created = []
+        for transaction_type, quantity, day in [
+            ('buy', '10', '2025-06-01'),
+            ('sell', '8', '2025-06-03'),
+        ]:
+            response = self.client.post(url, {
+                'portfolio_id': str(self.portfolio.id), 'asset_id': str(self.asset.id),
+                'transaction_type': transaction_type, 'quantity': quantity, 'price': '4000.00',
+                'transaction_date': day
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            created.append(response.data['id'])
+        buy_url = reverse('transaction-detail', kwargs={'pk': created[0]})
+        
+        response = self.client.delete(buy_url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(buy_url, {'quantity': '5'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # Buy dipindah sesudah sell juga membuat sell tidak tertutup
+        response = self.client.patch(buy_url, {'transaction_date': '2025-06-05'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        # Sell backdated sebelum buy ditolak walau holding saat ini cukup
+        response = self.client.post(url, {
+            'portfolio_id': str(self.portfolio.id), 'asset_id': str(self.asset.id),
+            'transaction_type': 'sell', 'quantity': '1', 'price': '4000.00',
+            'transaction_date': '2025-05-31'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        self.assertEqual(InvestmentTransaction.objects.filter(portfolio=self.portfolio).count(), 2)
+        holding = InvestmentHolding.objects.get(portfolio=self.portfolio, asset=self.asset)
+        self.assertEqual(holding.quantity, Decimal('2'))
+        
+        # Sell dihapus dulu, baru buy boleh dihapus
+        self.client.delete(reverse('transaction-detail', kwargs={'pk': created[1]}))
+        self.assertEqual(self.client.delete(buy_url).status_code, status.HTTP_204_NO_CONTENT)
+    
+    def test_failed_holdings_rebuild_rolls_back_transaction_change(self):
+        """Test perubahan transaksi dibatalkan jika rebuild holdings gagal"""
+        from unittest import mock
+        response = self.client.post(reverse('transaction-list'), {
+            'portfolio_id': str(self.portfolio.id), 'asset_id': str(self.asset.id),
+            'transaction_type': 'buy', 'quantity': '100', 'price': '4000.00',
+            'transaction_date': '2025-06-01'
+        }, format='json')
+        detail_url = reverse('transaction-detail', kwargs={'pk': response.data['id']})
+        
+        with mock.patch('api.v1.invest.views.transaction.rebuild_portfolio_holdings', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.patch(detail_url, {'quantity': '60'}, format='json')
+            with self.assertRaises(RuntimeError):
+                self.client.delete(detail_url)
+        
+        transaction = InvestmentTransaction.objects.get(pk=response.data['id'])
+        self.assertEqual(transaction.quantity, Decimal('100'))
+        holding = InvestmentHolding.objects.get(portfolio=self.portfolio, asset=self.asset)
+        self.assertEqual(holding.quantity, Decimal('100'))
+    
     def test_transaction_summary(self):
         """Test transaction summary endpoint"""
         # Create some test transactions first
@@ -228,6 +597,118 @@ class TransactionAPITest(InvestmentAPITestCase):
         self.assertIn('total_buy_amount', response.data)
         self.assertEqual(response.data['total_transactions'], 1)
 
+    
+    def _create_export_transactions(self, count):
+        for i in range(count):
+            InvestmentTransaction.objects.create(
+                user=self.user,
+                portfolio=self.portfolio,
+                asset=self.asset,
+                transaction_type='buy' if i % 2 == 0 else 'dividend',
+                quantity=Decimal('10.00000000'),
+                price=Decimal('4500.00'),
+                total_amount=Decimal('45000.00'),
+                fees=Decimal('100.00'),
+                transaction_date=date(2025, 1, i + 1),
+                notes=f'row {i}, "quoted"'
+            )
+    
+    def test_export_streams_csv(self):
+        """Test export CSV streaming dengan jumlah query konstan"""
+        self._create_export_transactions(5)
+        url = reverse('transaction-export')
+        
+        response = self.client.get(url, {'transaction_type': 'buy'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        
+        with self.assertNumQueries(1):
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        
+        self.assertEqual(lines[0].split(',')[:3], ['Date', 'Portfolio', 'Asset Symbol'])
+        self.assertEqual(len(lines), 4)  # header + 3 buy transactions
+        self.assertTrue(lines[1].startswith('2025-01-05,Test Portfolio,BBRI'))
+        self.assertIn('"row 4, ""quoted"""', lines[1])
+    
+    def test_export_streams_ndjson(self):
+        """Test export NDJSON"""
+        import json
+        self._create_export_transactions(3)
+        url = reverse('transaction-export')
+        
+        response = self.client.get(url, {'export_format': 'ndjson', 'ordering': 'transaction_date'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['date'], '2025-01-01')
+        self.assertEqual(rows[0]['asset_symbol'], 'BBRI')
+        self.assertEqual(rows[0]['total_amount'], '45000.00')
+    
+    def test_export_rejects_unknown_format(self):
+        """Test export dengan format yang tidak didukung"""
+        response = self.client.get(reverse('transaction-export'), {'export_format': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_monthly_report_multi_year_by_portfolio(self):
+        """Test monthly report multi-tahun dengan breakdown per portfolio dalam 2 query"""
+        other_portfolio = InvestmentPortfolio.objects.create(user=self.user, name='Second Portfolio')
+        other_asset = Asset.objects.create(symbol='TLKM', name='Telkom Indonesia Tbk', type='stock')
+        rows = [
+            (self.portfolio, self.asset, 'buy', '450000.00', date(2024, 3, 5)),
+            (self.portfolio, other_asset, 'buy', '300000.00', date(2024, 3, 20)),
+            (other_portfolio, other_asset, 'sell', '100000.00', date(2024, 3, 21)),
+            (other_portfolio, self.asset, 'dividend', '25000.00', date(2025, 1, 10)),
+        ]
+        for portfolio, asset, transaction_type, amount, transaction_date in rows:
+            InvestmentTransaction.objects.create(
+                user=self.user,
+                portfolio=portfolio,
+                asset=asset,
+                transaction_type=transaction_type,
+                quantity=Decimal('10.00000000'),
+                price=Decimal('1000.00'),
+                total_amount=Decimal(amount),
+                transaction_date=transaction_date
+            )
+
+        url = reverse('transaction-monthly-report')
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'start_year': 2024, 'end_year': 2025, 'by_portfolio': 'true'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['monthly_data']), 24)
+
+        march = response.data['monthly_data']['2024-03']
+        self.assertEqual(march['total_transactions'], 3)
+        self.assertEqual(march['total_buy_amount'], Decimal('750000.00'))
+        self.assertEqual(march['net_investment'], Decimal('650000.00'))
+        self.assertEqual(march['most_traded_asset'], 'TLKM - Telkom Indonesia Tbk')
+
+        self.assertEqual(response.data['yearly_totals']['2025']['total_dividend'], Decimal('25000.00'))
+        self.assertEqual(response.data['year_totals']['year'], '2024-2025')
+        self.assertEqual(response.data['year_totals']['total_transactions'], 4)
+
+        breakdown = {item['portfolio_name']: item for item in response.data['portfolio_breakdown']}
+        self.assertEqual(breakdown['Test Portfolio']['totals']['total_buy_amount'], Decimal('750000.00'))
+        self.assertEqual(
+            breakdown['Second Portfolio']['monthly_data']['2024-03']['most_traded_asset'],
+            'TLKM - Telkom Indonesia Tbk'
+        )
+
+    def test_monthly_report_rejects_invalid_range(self):
+        """Test monthly report dengan rentang tahun tidak valid"""
+        url = reverse('transaction-monthly-report')
+        response = self.client.get(url, {'start_year': 2025, 'end_year': 2024})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(url, {'year': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for params in ({'start_year': 0}, {'start_year': 9999, 'end_year': 10000}, {'year': 10000}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 class HoldingAPITest(InvestmentAPITestCase):
     """Test untuk Holding API endpoints"""
@@ -283,6 +764,47 @@ class HoldingAPITest(InvestmentAPITestCase):
         self.assertIn('total_value', response.data)
         self.assertIn('allocation_by_type', response.data)
     
+    def test_holdings_analytics_kernel(self):
+        """Test analytics, diversification, dan performance dari kernel analytics (satu query holdings)"""
+        other_portfolio = InvestmentPortfolio.objects.create(user=self.user, name='Other Portfolio')
+        for symbol, sector, portfolio, cost, value in [
+            ('TLKM', 'Telecom', self.portfolio, '300000.00', '250000.00'),
+            ('BTC', '', other_portfolio, '100000.00', '275000.00'),
+        ]:
+            asset = Asset.objects.create(symbol=symbol, name=symbol, type='crypto' if symbol == 'BTC' else 'stock', sector=sector)
+            InvestmentHolding.objects.create(
+                user=self.user, portfolio=portfolio, asset=asset,
+                quantity=Decimal('1'), average_price=Decimal(cost), total_cost=Decimal(cost),
+                current_price=Decimal(value), current_value=Decimal(value),
+                unrealized_pnl=Decimal(value) - Decimal(cost)
+            )
+
+        response = self.client.get(reverse('holding-analytics'))
+        self.assertEqual(response.data['total_portfolios'], 2)
+        self.assertEqual(response.data['total_value'], Decimal('1000000.00'))
+        self.assertEqual([p['symbol'] for p in response.data['top_performers']], ['BTC', 'BBRI', 'TLKM'])
+        self.assertEqual(response.data['worst_performers'][0]['symbol'], 'TLKM')
+        self.assertEqual(response.data['allocation_by_type'], {'stock': Decimal('72.50'), 'crypto': Decimal('27.50')})
+        self.assertEqual(response.data['allocation_by_sector']['Other'], Decimal('27.50'))
+
+        # holdings + history harga untuk correlation matrix; berikutnya dari cache
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('holding-diversification'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('holding-diversification'))
+        self.assertEqual(set(response.data['correlation_matrix']['BTC']), {'BBRI', 'TLKM', 'BTC'})
+        # 0.475^2 + 0.25^2 + 0.275^2
+        self.assertEqual(response.data['metrics']['hhi_index'], Decimal('0.3638'))
+        self.assertEqual(response.data['metrics']['largest_holding_percentage'], Decimal('47.50'))
+        self.assertEqual(response.data['metrics']['top_5_concentration'], Decimal('100.00'))
+        self.assertEqual(response.data['rebalancing_recommendations'][0]['type'], 'reduce_concentration')
+
+        response = self.client.get(reverse('holding-performance'))
+        self.assertEqual(response.data['total_return'], Decimal('150000.00'))
+        self.assertEqual(round(response.data['win_rate'], 2), 66.67)
+        # (25000 + 175000) / 50000
+        self.assertEqual(response.data['profit_factor'], Decimal('4.00'))
+
     def test_holdings_refresh(self):
         """Test holdings refresh endpoint"""
         url = reverse('holding-refresh')
@@ -430,3 +952,220 @@ class PermissionTest(InvestmentAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)  # Hanya portfolio sendiri
         self.assertEqual(response.data['results'][0]['name'], 'Test Portfolio')
+
+
+class AsyncJobAPITest(InvestmentAPITestCase):
+    """Test mode ?async=true, worker run_jobs, dan polling job"""
+    
+    def run_worker(self):
+        from django.core.management import call_command
+        from io import StringIO
+        call_command('run_jobs', once=True, workers=0, stdout=StringIO())
+    
+    def test_async_analytics_matches_sync_response(self):
+        """Test analytics async menghasilkan response yang sama dengan sinkron"""
+        InvestmentHolding.objects.create(
+            user=self.user, portfolio=self.portfolio, asset=self.asset,
+            quantity=Decimal('100'), average_price=Decimal('4500.00'), total_cost=Decimal('450000.00'),
+            current_price=Decimal('4750.00'), current_value=Decimal('475000.00'),
+            unrealized_pnl=Decimal('25000.00')
+        )
+        url = reverse('holding-analytics')
+        response = self.client.get(url, {'async': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_url = response.data['status_url']
+        self.assertEqual(self.client.get(job_url).data['status'], 'pending')
+        
+        self.run_worker()
+        
+        job = self.client.get(job_url).data
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['status_code'], 200)
+        self.assertEqual(Decimal(job['result']['total_value']), Decimal('475000.00'))
+        self.assertEqual(job['result']['top_performers'][0]['symbol'], 'BBRI')
+        self.assertIsNone(job['download_url'])
+    
+    def test_async_export_and_download(self):
+        """Test export async menulis file hasil yang bisa di-download"""
+        import tempfile
+        from django.test import override_settings
+        InvestmentTransaction.objects.create(
+            user=self.user, portfolio=self.portfolio, asset=self.asset, transaction_type='buy',
+            quantity=Decimal('10'), price=Decimal('4500.00'), total_amount=Decimal('45000.00'),
+            transaction_date=date(2025, 6, 1)
+        )
+        with tempfile.TemporaryDirectory() as directory, override_settings(API_JOB_RESULTS_DIR=directory):
+            response = self.client.get(reverse('transaction-export'), {'async': 'true', 'export_format': 'ndjson'})
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.run_worker()
+            
+            job = self.client.get(reverse('job-detail', kwargs={'pk': response.data['job_id']})).data
+            self.assertEqual(job['result']['file']['content_type'], 'application/x-ndjson')
+            download = self.client.get(job['download_url'])
+            self.assertEqual(download.status_code, status.HTTP_200_OK)
+            content = b''.join(download.streaming_content).decode()
+            self.assertIn('"asset_symbol": "BBRI"', content)
+    
+    def test_async_detail_action_checks_access(self):
+        """Test job untuk portfolio user lain ditolak sebelum masuk antrian"""
+        other_user = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        other_portfolio = InvestmentPortfolio.objects.create(user=other_user, name='Other')
+        
+        url = reverse('portfolio-performance', kwargs={'pk': other_portfolio.id})
+        response = self.client.get(url, {'async': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        url = reverse('portfolio-performance', kwargs={'pk': self.portfolio.id})
+        response = self.client.get(url, {'async': 'true', 'period': '3M'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.run_worker()
+        job = self.client.get(response.data['status_url']).data
+        self.assertEqual(job['query'], {'period': ['3M']})
+        self.assertEqual(job['result']['period'], '3M')
+        
+        # Job user lain tidak terlihat
+        self.client.force_authenticate(user=other_user)
+        self.assertEqual(self.client.get(response.data['status_url']).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ResponseCacheAPITest(InvestmentAPITestCase):
+    """Test cache response analytics per user dan invalidasinya"""
+    
+    def setUp(self):
+        super().setUp()
+        self.holding = InvestmentHolding.objects.create(
+            user=self.user, portfolio=self.portfolio, asset=self.asset,
+            quantity=Decimal('100'), average_price=Decimal('4500.00'), total_cost=Decimal('450000.00'),
+            current_price=Decimal('4750.00'), current_value=Decimal('475000.00'),
+            unrealized_pnl=Decimal('25000.00')
+        )
+    
+    def test_analytics_cache_hit_and_price_invalidation(self):
+        """Test analytics di-cache lalu diinvalidasi oleh harga baru dan refresh bulk"""
+        from invest.holdings import refresh_holdings
+        url = reverse('holding-analytics')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(Decimal(response.data['total_value']), Decimal('475000.00'))
+        
+        AssetPrice.objects.create(asset=self.asset, price=Decimal('5000.00'), timestamp=timezone.now())
+        refresh_holdings(InvestmentHolding.objects.filter(pk=self.holding.pk))
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(Decimal(response.data['total_value']), Decimal('500000.00'))
+    
+    def test_overview_cache_is_per_user(self):
+        """Test cache overview terpisah per user dan diinvalidasi perubahan portfolio"""
+        url = reverse('portfolio-overview')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        
+        other_user = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total_portfolios'], 0)
+        
+        self.client.force_authenticate(user=self.user)
+        InvestmentPortfolio.objects.create(user=self.user, name='Second')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total_portfolios'], 2)
+
+
+
+class ConditionalGetAPITest(InvestmentAPITestCase):
+    """Test ETag/Last-Modified dan response 304 di list endpoint"""
+    
+    def test_holdings_list_not_modified_until_data_changes(self):
+        """Test If-None-Match dijawab 304 tanpa serialization sampai holdings berubah"""
+        holding = InvestmentHolding.objects.create(
+            user=self.user, portfolio=self.portfolio, asset=self.asset,
+            quantity=Decimal('100'), average_price=Decimal('4500.00'), total_cost=Decimal('450000.00'),
+            current_price=Decimal('4750.00'), current_value=Decimal('475000.00'),
+            unrealized_pnl=Decimal('25000.00')
+        )
+        url = reverse('holding-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+        
+        # Hanya query validator, tanpa count pagination dan query holdings
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        
+        # Filter berbeda punya ETag sendiri
+        response = self.client.get(url, {'portfolio': self.portfolio.id}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        holding.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+    
+    def test_transactions_list_if_modified_since(self):
+        """Test If-Modified-Since memakai max timestamp dan waktu perubahan data"""
+        InvestmentTransaction.objects.create(
+            user=self.user, portfolio=self.portfolio, asset=self.asset, transaction_type='buy',
+            quantity=Decimal('10'), price=Decimal('4500.00'), total_amount=Decimal('45000.00'),
+            transaction_date=date(2025, 6, 1)
+        )
+        url = reverse('transaction-list')
+        last_modified = self.client.get(url)['Last-Modified']
+        
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2024 00:00:00 GMT')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+
+class KeysetPaginationAPITest(InvestmentAPITestCase):
+    """Test keyset pagination history transaksi investasi"""
+    
+    def test_cursor_pages_and_approximate_count(self):
+        """Test cursor melewati tanggal yang sama tanpa duplikasi dan count approximate"""
+        from api.utils.pagination import KeysetPagination
+        for day in (1, 1, 1, 2, 3):
+            InvestmentTransaction.objects.create(
+                user=self.user, portfolio=self.portfolio, asset=self.asset, transaction_type='buy',
+                quantity=Decimal('1'), price=Decimal('4500.00'), total_amount=Decimal('4500.00'),
+                transaction_date=date(2025, 6, day)
+            )
+        expected = [
+            str(pk) for pk in InvestmentTransaction.objects.filter(user=self.user)
+            .order_by('-transaction_date', '-id').values_list('id', flat=True)
+        ]
+        
+        url = reverse('transaction-list')
+        response = self.client.get(url, {'cursor': '', 'page_size': 2, 'count': 'approximate'})
+        self.assertEqual(response.data['count'], 5)
+        seen = [item['id'] for item in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += [item['id'] for item in response.data['results']]
+            self.assertNotIn('count', response.data)
+        self.assertEqual(seen, expected)
+        
+        # Melewati batas: count tidak exact (SQLite tidak punya estimasi planner)
+        KeysetPagination.approximate_count_limit = 3
+        try:
+            response = self.client.get(url, {'cursor': '', 'count': 'approximate'})
+        finally:
+            KeysetPagination.approximate_count_limit = 10000
+        self.assertEqual(response.data['count'], 3)
+        self.assertFalse(response.data['count_is_exact'])
+        
+        # Tanpa cursor tetap page number pagination
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 5)
+        self.assertIn('total_pages', response.data)
@@ -24,8 +24,9 @@ Endpoint yang tersedia:
 - GET /assets/ - List semua asset dengan filtering
 - GET /assets/{id}/ - Detail asset dengan price history
 - GET /assets/search/ - Pencarian asset untuk autocomplete
-- GET /assets/{id}/prices/ - Price history asset
+- GET /assets/{id}/prices/ - Price history asset (OHLC per interval, max_points)
 - POST /assets/{id}/add_price/ - Add price data (admin only)
+- POST /assets/bulk_ingest/ - Bulk ingest price CSV/NDJSON (admin only)
 - GET /assets/by_type/ - Asset grouped by type
 - GET /assets/statistics/ - Asset statistics
 
@@ -36,6 +37,7 @@ Endpoint yang tersedia:
 - PUT /portfolios/{id}/ - Update portfolio
 - DELETE /portfolios/{id}/ - Delete portfolio
 - GET /portfolios/{id}/performance/ - Performance analysis
+- GET /portfolios/{id}/risk/ - Risk metrics per holding dan portfolio
 - GET /portfolios/{id}/allocation/ - Asset allocation breakdown
 - POST /portfolios/{id}/rebalance/ - Rebalancing recommendations
 - GET /portfolios/overview/ - Overview semua portfolio
@@ -44,13 +46,14 @@ Endpoint yang tersedia:
 - GET /transactions/ - List transaksi dengan filtering
 - POST /transactions/ - Create transaksi baru (auto-update holdings)
 - GET /transactions/{id}/ - Detail transaksi
-- PUT /transactions/{id}/ - Update transaksi
-- DELETE /transactions/{id}/ - Delete transaksi
+- PUT /transactions/{id}/ - Update transaksi (rebuild holdings portfolio)
+- DELETE /transactions/{id}/ - Delete transaksi (rebuild holdings portfolio)
 - GET /transactions/summary/ - Transaction summary
 - GET /transactions/by_asset/ - Transactions grouped by asset
-- GET /transactions/monthly_report/ - Monthly transaction report
+- GET /transactions/realized_gains/ - Ledger realized P&L per lot (FIFO/LIFO/average)
+- GET /transactions/monthly_report/ - Monthly transaction report (multi-year, per portfolio)
 - POST /transactions/bulk_create/ - Bulk import transactions
-- GET /transactions/export/ - Export to CSV
+- GET /transactions/export/ - Streaming export (CSV/NDJSON/Parquet)
 
 ## Holdings Endpoints (Read-Only):
 - GET /holdings/ - List current holdings dengan metrics
@@ -61,6 +64,15 @@ Endpoint yang tersedia:
 - GET /holdings/diversification/ - Diversification analysis
 - GET /holdings/performance/ - Performance analysis
 
+Endpoint berat (holdings refresh/analytics, portfolio performance, transaction export)
+mendukung ?async=true: response 202 berisi job_id, status dipantau lewat /api/v1/jobs/{id}/.
+
+Response /holdings/analytics/ dan /portfolios/overview/ di-cache per user sampai data
+berubah (header X-Cache: HIT/MISS, lihat api.cache).
+
+List endpoint mengirim ETag dan Last-Modified; request dengan If-None-Match /
+If-Modified-Since yang cocok dijawab 304 Not Modified.
+
 Semua endpoint mendukung pagination, searching, dan ordering.
 Filter parameters tersedia untuk setiap endpoint sesuai kebutuhan.
 """
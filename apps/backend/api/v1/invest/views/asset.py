@@ -1,11 +1,17 @@
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Count, Avg, Max, Min
+from rest_framework.parsers import MultiPartParser
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Count, Avg, Min
 from django.utils import timezone
 from datetime import timedelta
+import io
 
 from invest.models import Asset, AssetPrice
+from invest.ingest import INGEST_FORMATS, PriceIngestor, iter_price_records
+from invest import price_store
+from invest.timeseries import lttb, ohlc_buckets
 from ..serializers import (
     AssetSerializer,
     AssetListSerializer, 
@@ -37,6 +43,15 @@ class AssetViewSet(ChoicesMixin, viewsets.ModelViewSet):
     ordering_fields = ['symbol', 'name', 'created_at']
     ordering = ['symbol']
     
+    ingest_batch_size = 5000
+    # interval query parameter -> bucket invest.timeseries.ohlc_buckets
+    price_intervals = {
+        'daily': 'day',
+        'weekly': 'week',
+        'monthly': 'month',
+        'minutes': 'minutes',
+    }
+    
     choices_config = {
         'asset_types': {
             'choices': Asset.TYPE_CHOICES,
@@ -128,45 +143,74 @@ class AssetViewSet(ChoicesMixin, viewsets.ModelViewSet):
         
         Query Parameters:
         - days: Jumlah hari ke belakang (default: 30)
-        - interval: Interval data ('daily', 'weekly', 'monthly')
+        - interval: Interval data ('raw', 'daily', 'weekly', 'monthly', 'minutes')
+          (default: 'daily')
+        - minutes: Panjang bucket dalam menit untuk interval 'minutes' (1-1440)
+        - max_points: Jumlah titik maksimal (LTTB downsampling, minimal 3)
+        
+        Interval selain 'raw' mengembalikan OHLC per bucket (open, high, low,
+        close, volume) yang dihitung di database; field price = close.
         """
         asset = self.get_object()
-        days = int(request.query_params.get('days', 30))
         interval = request.query_params.get('interval', 'daily')
         
+        try:
+            days = int(request.query_params.get('days', 30))
+            minutes = int(request.query_params.get('minutes', 0)) or None
+            max_points = int(request.query_params.get('max_points', 0)) or None
+        except ValueError:
+            return Response(
+                {'error': 'days, minutes, dan max_points harus berupa angka'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if interval != 'raw' and interval not in self.price_intervals:
+            return Response(
+                {'error': f"interval harus salah satu dari: raw, {', '.join(self.price_intervals)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if max_points is not None and max_points < 3:
+            return Response({'error': 'max_points minimal 3'}, status=status.HTTP_400_BAD_REQUEST)
+        
         end_date = timezone.now()
         start_date = end_date - timedelta(days=days)
         
-        prices = asset.prices.filter(
-            timestamp__gte=start_date,
-            timestamp__lte=end_date
-        ).order_by('-timestamp')
-        
-        # Group by interval if needed
-        if interval == 'weekly':
-            # Get one price per week (latest price of each week)
-            prices = prices.extra(
-                select={'week': "strftime('%Y-%W', timestamp)"}
-            ).values('week').annotate(
-                latest_timestamp=Max('timestamp')
-            ).values_list('latest_timestamp', flat=True)
-            prices = asset.prices.filter(timestamp__in=prices).order_by('-timestamp')
-        
-        elif interval == 'monthly':
-            # Get one price per month (latest price of each month)
-            prices = prices.extra(
-                select={'month': "strftime('%Y-%m', timestamp)"}
-            ).values('month').annotate(
-                latest_timestamp=Max('timestamp')
-            ).values_list('latest_timestamp', flat=True)
-            prices = asset.prices.filter(timestamp__in=prices).order_by('-timestamp')
-        
-        serializer = AssetPriceSerializer(prices, many=True)
+        prices = price_store.price_history(asset, start_date, end_date)
+        
+        if interval == 'raw':
+            if max_points:
+                points = list(prices.order_by('timestamp').values('timestamp', 'price', 'volume'))
+                price_history = lttb(
+                    points, max_points,
+                    x=lambda point: point['timestamp'].timestamp(),
+                    y=lambda point: point['price']
+                )
+            else:
+                price_history = AssetPriceSerializer(prices.order_by('-timestamp'), many=True).data
+        else:
+            try:
+                price_history = ohlc_buckets(prices, self.price_intervals[interval], minutes=minutes)
+            except ValueError as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            
+            if max_points:
+                price_history = lttb(
+                    price_history, max_points,
+                    x=lambda bucket: bucket['timestamp'].timestamp(),
+                    y=lambda bucket: bucket['close']
+                )
+            for bucket in price_history:
+                bucket['price'] = bucket['close']
+        
         return Response({
             'asset': AssetListSerializer(asset).data,
-            'price_history': serializer.data,
+            'price_history': price_history,
             'period': f"{days} days",
-            'interval': interval
+            'interval': interval,
+            'minutes': minutes if interval == 'minutes' else None,
+            'points': len(price_history),
+            'max_points': max_points
         })
     
     @action(detail=True, methods=['post'])
@@ -198,12 +242,81 @@ class AssetViewSet(ChoicesMixin, viewsets.ModelViewSet):
             'source': request.data.get('source', 'manual')
         }
         
-        serializer = AssetPriceSerializer(data=price_data)
+        serializer = AssetPriceSerializer(data=price_data, context={'asset': asset})
         if serializer.is_valid():
-            serializer.save()
+            # Harga dan AssetQuote (via signal) ditulis dalam satu transaksi;
+            # IntegrityError = harga dengan timestamp sama ditulis bersamaan
+            try:
+                with transaction.atomic():
+                    serializer.save(asset=asset)
+            except IntegrityError:
+                return Response(
+                    {'timestamp': ['Harga asset pada timestamp ini sudah ada']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def bulk_ingest(self, request):
+        """
+        Bulk ingest time series harga asset (admin/system only).
+        
+        Request Body (salah satu):
+        - multipart/form-data dengan field `file` berisi CSV/NDJSON
+        - raw body dengan Content-Type text/csv atau application/x-ndjson
+        
+        Query Parameters:
+        - ingest_format: 'csv' atau 'ndjson' (default: dari Content-Type / nama file)
+        - batch_size: Jumlah baris per bulk_create (default: 5000, maks 20000)
+        - source: Sumber data jika kolom source kosong (default: 'bulk')
+        
+        Kolom: symbol, timestamp, price, volume (optional), market_cap (optional).
+        Duplikat (asset, timestamp) diabaikan. Returns statistik ingest termasuk
+        rows_per_second.
+        """
+        if not request.user.is_staff:
+            return Response(
+                {"error": "Only admin can add price data"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        content_type = request.content_type or ''
+        if content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'error': 'File wajib diupload pada field file'}, status=status.HTTP_400_BAD_REQUEST)
+            raw, filename = upload.file, upload.name
+        else:
+            raw, filename = io.BytesIO(request.body), ''
+        
+        ingest_format = request.query_params.get('ingest_format')
+        if not ingest_format:
+            is_ndjson = 'ndjson' in content_type or filename.endswith(('.ndjson', '.jsonl'))
+            ingest_format = 'ndjson' if is_ndjson else 'csv'
+        if ingest_format not in INGEST_FORMATS:
+            return Response(
+                {'error': f"ingest_format harus salah satu dari: {', '.join(INGEST_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            batch_size = min(max(int(request.query_params.get('batch_size', self.ingest_batch_size)), 1), 20000)
+        except ValueError:
+            return Response({'error': 'batch_size harus berupa angka'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        ingestor = PriceIngestor(batch_size=batch_size, source=request.query_params.get('source', 'bulk'))
+        try:
+            stats = ingestor.ingest(iter_price_records(stream, ingest_format))
+        except UnicodeDecodeError:
+            return Response({'error': 'File harus ber-encoding UTF-8'}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            stream.detach()
+        
+        stats['ingest_format'] = ingest_format
+        return Response(stats, status=status.HTTP_201_CREATED if stats['rows_accepted'] else status.HTTP_200_OK)
+    
     @action(detail=False, methods=['get'])
     def by_type(self, request):
         """
@@ -5,7 +5,14 @@ from django.db.models import Q, Sum, Count, Avg
 from django.utils import timezone
 from decimal import Decimal
 
-from invest.models import InvestmentHolding, Asset, AssetPrice
+from invest.models import InvestmentHolding, InvestmentPortfolio, Asset, AssetPrice
+from invest.analytics import holdings_summary
+from invest.holdings import refresh_holdings
+from invest.risk import CORRELATION_WINDOW_DAYS, correlation_matrix, resolve_benchmark
+from invest.snapshots import (
+    PERIOD_DAYS, portfolio_series, series_statistics,
+    monthly_performance as monthly_performance_from_series
+)
 from ..serializers import (
     InvestmentHoldingListSerializer,
     InvestmentHoldingDetailSerializer,
@@ -15,10 +22,10 @@ from ..serializers import (
     PerformanceAnalysisSerializer
 )
 from api.utils.permissions import IsOwner
-from api.utils.mixins import ChoicesMixin
+from api.utils.mixins import AsyncJobMixin, CachedResponseMixin, ChoicesMixin, ConditionalGetMixin
 
 
-class InvestmentHoldingViewSet(ChoicesMixin, viewsets.ReadOnlyModelViewSet):
+class InvestmentHoldingViewSet(ConditionalGetMixin, CachedResponseMixin, AsyncJobMixin, ChoicesMixin, viewsets.ReadOnlyModelViewSet):
     """
     Investment Holdings Management (Read-Only).
     
@@ -38,6 +45,15 @@ class InvestmentHoldingViewSet(ChoicesMixin, viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['current_value', 'unrealized_pnl', 'last_updated']
     ordering = ['-current_value']
     
+    refresh_chunk_size = 1000
+    # Action yang bisa dijalankan sebagai job background dengan ?async=true
+    async_actions = ['refresh', 'analytics']
+    cached_actions = ['analytics']
+    conditional_fields = ('last_updated',)
+    analytics_top_n = 5
+    # Default window (hari) correlation matrix pada diversification
+    correlation_window_days = CORRELATION_WINDOW_DAYS
+    
     def get_serializer_class(self):
         """Menggunakan serializer yang berbeda untuk list dan detail view"""
         if self.action == 'list':
@@ -86,6 +102,14 @@ class InvestmentHoldingViewSet(ChoicesMixin, viewsets.ReadOnlyModelViewSet):
         
         return queryset
     
+    def get_snapshot_portfolios(self):
+        """Portfolio user (mengikuti filter ?portfolio) untuk series NAV harian"""
+        portfolios = InvestmentPortfolio.objects.filter(user=self.request.user).only('pk')
+        portfolio_id = self.request.query_params.get('portfolio')
+        if portfolio_id:
+            portfolios = portfolios.filter(pk=portfolio_id)
+        return portfolios
+    
     @action(detail=False, methods=['get'])
     def by_portfolio(self, request):
         """
@@ -171,7 +195,12 @@ class InvestmentHoldingViewSet(ChoicesMixin, viewsets.ReadOnlyModelViewSet):
         - portfolio_ids: List of portfolio IDs to refresh (optional, default: all)
         - force_update: Force update even if recently updated (default: false)
         
-        Updates current_price, current_value, dan unrealized_pnl untuk holdings.
+        Query Parameters:
+        - async: true untuk menjalankan sebagai job background (polling via /jobs/{id}/)
+        
+        Updates current_price, current_value, dan unrealized_pnl untuk holdings
+        secara batch: satu query harga terakhir per chunk dan bulk_update.
+        Total value before/after dihitung atas holdings yang di-refresh.
         """
         portfolio_ids = request.data.get('portfolio_ids', [])
         force_update = request.data.get('force_update', False)
@@ -187,31 +216,10 @@ class InvestmentHoldingViewSet(ChoicesMixin, viewsets.ReadOnlyModelViewSet):
             one_hour_ago = timezone.now() - timezone.timedelta(hours=1)
             queryset = queryset.filter(last_updated__lt=one_hour_ago)
         
-        holdings_updated = 0
-        total_value_before = sum(h.current_value for h in queryset)
-        
-        for holding in queryset:
-            # Get latest price for the asset
-            latest_price = holding.asset.prices.order_by('-timestamp').first()
-            
-            if latest_price:
-                old_value = holding.current_value
-                
-                # Update current price and calculate new values
-                holding.current_price = latest_price.price
-                holding.current_value = holding.quantity * holding.current_price
-                holding.unrealized_pnl = holding.current_value - holding.total_cost
-                holding.last_updated = timezone.now()
-                
-                holding.save()
-                holdings_updated += 1
-        
-        # Calculate totals after update
-        refreshed_holdings = self.get_queryset()
-        if portfolio_ids:
-            refreshed_holdings = refreshed_holdings.filter(portfolio_id__in=portfolio_ids)
+        stats = refresh_holdings(queryset, chunk_size=self.refresh_chunk_size)
         
-        total_value_after = sum(h.current_value for h in refreshed_holdings)
+        total_value_before = stats['total_value_before']
+        total_value_after = stats['total_value_after']
         value_change = total_value_after - total_value_before
         value_change_percentage = 0
         
@@ -219,7 +227,7 @@ class InvestmentHoldingViewSet(ChoicesMixin, viewsets.ReadOnlyModelViewSet):
             value_change_percentage = (value_change / total_value_before) * 100
         
         refresh_data = {
-            'holdings_updated': holdings_updated,
+            'holdings_updated': stats['holdings_updated'],
             'total_value_before': total_value_before,
             'total_value_after': total_value_after,
             'value_change': value_change,
@@ -234,102 +242,54 @@ class InvestmentHoldingViewSet(ChoicesMixin, viewsets.ReadOnlyModelViewSet):
         """
         Mendapatkan comprehensive analytics untuk semua holdings user.
         
+        Query Parameters:
+        - async: true untuk menjalankan sebagai job background (polling via /jobs/{id}/)
+        
         Returns overview analytics termasuk allocation, performance, top performers, dll.
+        Holdings dimuat sekali (satu query) dan semua metrik dihitung oleh
+        invest.analytics dalam satu pass.
         """
-        queryset = self.get_queryset()
+        frame, summary = holdings_summary(self.get_queryset(), top_n=self.analytics_top_n)
         
-        if not queryset.exists():
+        if not summary['holdings_count']:
             return Response({
                 'message': 'No holdings found',
                 'analytics': {}
             })
         
-        # Calculate basic metrics
-        total_portfolios = queryset.values('portfolio').distinct().count()
-        total_value = sum(h.current_value for h in queryset)
-        total_cost = sum(h.total_cost for h in queryset)
-        total_pnl = total_value - total_cost
+        total_value = summary['total_value']
+        total_cost = summary['total_cost']
+        total_pnl = summary['total_pnl']
         total_pnl_percentage = (total_pnl / total_cost) * 100 if total_cost > 0 else 0
         
-        # Top performers
-        top_performers = sorted(queryset, key=lambda h: h.unrealized_pnl, reverse=True)[:5]
-        top_performers_data = []
-        
-        for holding in top_performers:
-            pnl_percentage = (holding.unrealized_pnl / holding.total_cost) * 100 if holding.total_cost > 0 else 0
-            top_performers_data.append({
-                'symbol': holding.asset.symbol,
-                'name': holding.asset.name,
-                'pnl': holding.unrealized_pnl,
+        def performer(index):
+            cost, pnl = frame.cost[index], frame.pnl[index]
+            pnl_percentage = (pnl / cost) * 100 if cost > 0 else 0
+            return {
+                'symbol': frame.symbol[index],
+                'name': frame.name[index],
+                'pnl': pnl,
                 'pnl_percentage': round(pnl_percentage, 2),
-                'portfolio': holding.portfolio.name
-            })
-        
-        # Worst performers
-        worst_performers = sorted(queryset, key=lambda h: h.unrealized_pnl)[:5]
-        worst_performers_data = []
-        
-        for holding in worst_performers:
-            pnl_percentage = (holding.unrealized_pnl / holding.total_cost) * 100 if holding.total_cost > 0 else 0
-            worst_performers_data.append({
-                'symbol': holding.asset.symbol,
-                'name': holding.asset.name,
-                'pnl': holding.unrealized_pnl,
-                'pnl_percentage': round(pnl_percentage, 2),
-                'portfolio': holding.portfolio.name
-            })
+                'portfolio': frame.portfolio_name[index]
+            }
         
-        # Allocation by asset type
-        allocation_by_type = {}
-        for holding in queryset:
-            asset_type = holding.asset.type
-            if asset_type not in allocation_by_type:
-                allocation_by_type[asset_type] = 0
-            allocation_by_type[asset_type] += holding.current_value
-        
-        # Convert to percentages
-        for asset_type in allocation_by_type:
-            allocation_by_type[asset_type] = round(
-                (allocation_by_type[asset_type] / total_value) * 100, 2
-            ) if total_value > 0 else 0
-        
-        # Allocation by sector
-        allocation_by_sector = {}
-        for holding in queryset:
-            sector = holding.asset.sector or 'Other'
-            if sector not in allocation_by_sector:
-                allocation_by_sector[sector] = 0
-            allocation_by_sector[sector] += holding.current_value
-        
-        # Convert to percentages
-        for sector in allocation_by_sector:
-            allocation_by_sector[sector] = round(
-                (allocation_by_sector[sector] / total_value) * 100, 2
-            ) if total_value > 0 else 0
-        
-        # Monthly performance (simplified)
-        monthly_performance = []
-        current_month = timezone.now().replace(day=1)
-        
-        for i in range(12):
-            month = current_month - timezone.timedelta(days=30 * i)
-            # In real implementation, you'd track historical portfolio values
-            monthly_performance.append({
-                'month': month.strftime('%Y-%m'),
-                'value': total_value,  # Placeholder
-                'return_percentage': 0  # Placeholder
-            })
+        # Nilai akhir bulan dan return time-weighted dari snapshot NAV harian
+        series = portfolio_series(
+            self.get_snapshot_portfolios(),
+            start=timezone.localdate().replace(day=1) - timezone.timedelta(days=366)
+        )
+        monthly_performance = monthly_performance_from_series(series, months=12)
         
         analytics_data = {
-            'total_portfolios': total_portfolios,
+            'total_portfolios': summary['portfolios_count'],
             'total_value': total_value,
             'total_cost': total_cost,
             'total_pnl': total_pnl,
             'total_pnl_percentage': round(total_pnl_percentage, 2),
-            'top_performers': top_performers_data,
-            'worst_performers': worst_performers_data,
-            'allocation_by_type': allocation_by_type,
-            'allocation_by_sector': allocation_by_sector,
+            'top_performers': [performer(index) for index in summary['top_pnl']],
+            'worst_performers': [performer(index) for index in summary['worst_pnl']],
+            'allocation_by_type': summary['allocation_percentage']['type'],
+            'allocation_by_sector': summary['allocation_percentage']['sector'],
             'monthly_performance': monthly_performance,
             'generated_at': timezone.now()
         }
@@ -341,78 +301,53 @@ class InvestmentHoldingViewSet(ChoicesMixin, viewsets.ReadOnlyModelViewSet):
         """
         Mendapatkan analisis diversifikasi portfolio.
         
+        Query Parameters:
+        - correlation_days: Window history harga untuk correlation matrix (default: 90)
+        
         Returns metrics diversifikasi dan rekomendasi untuk improvement.
         """
-        queryset = self.get_queryset()
+        try:
+            window_days = int(request.query_params.get('correlation_days', self.correlation_window_days))
+        except ValueError:
+            return Response({'error': 'correlation_days harus berupa angka'}, status=status.HTTP_400_BAD_REQUEST)
+        if window_days < 2:
+            return Response({'error': 'correlation_days minimal 2'}, status=status.HTTP_400_BAD_REQUEST)
         
-        if not queryset.exists():
+        frame, summary = holdings_summary(self.get_queryset(), top_n=self.analytics_top_n)
+        
+        if not summary['holdings_count']:
             return Response({
                 'message': 'No holdings found for diversification analysis',
                 'diversification': {}
             })
         
-        total_value = sum(h.current_value for h in queryset)
+        total_value = summary['total_value']
+        holdings_count = summary['holdings_count']
+        allocation = summary['allocation_percentage']
         
-        # Calculate Herfindahl-Hirschman Index for concentration
-        holdings_weights = [(h.current_value / total_value) for h in queryset if total_value > 0]
-        hhi = sum(w ** 2 for w in holdings_weights)
+        # Herfindahl-Hirschman Index untuk konsentrasi
+        hhi = summary['hhi']
         diversification_score = round((1 - hhi) * 100, 2)
         concentration_risk = round(hhi * 100, 2)
         
-        # Sector diversification
-        sector_diversification = {}
-        for holding in queryset:
-            sector = holding.asset.sector or 'Other'
-            if sector not in sector_diversification:
-                sector_diversification[sector] = 0
-            sector_diversification[sector] += holding.current_value
-        
-        # Convert to percentages and find concentration
         max_sector_allocation = 0
-        for sector in sector_diversification:
-            percentage = (sector_diversification[sector] / total_value) * 100 if total_value > 0 else 0
-            sector_diversification[sector] = round(percentage, 2)
-            max_sector_allocation = max(max_sector_allocation, percentage)
-        
-        # Asset type diversification
-        asset_type_diversification = {}
-        for holding in queryset:
-            asset_type = holding.asset.type
-            if asset_type not in asset_type_diversification:
-                asset_type_diversification[asset_type] = 0
-            asset_type_diversification[asset_type] += holding.current_value
-        
-        # Convert to percentages
-        for asset_type in asset_type_diversification:
-            percentage = (asset_type_diversification[asset_type] / total_value) * 100 if total_value > 0 else 0
-            asset_type_diversification[asset_type] = round(percentage, 2)
-        
-        # Geographic diversification (simplified by currency)
-        geographic_diversification = {}
-        for holding in queryset:
-            currency = holding.asset.currency
-            if currency not in geographic_diversification:
-                geographic_diversification[currency] = 0
-            geographic_diversification[currency] += holding.current_value
-        
-        # Convert to percentages
-        for currency in geographic_diversification:
-            percentage = (geographic_diversification[currency] / total_value) * 100 if total_value > 0 else 0
-            geographic_diversification[currency] = round(percentage, 2)
+        if total_value > 0:
+            max_sector_allocation = max(
+                (value / total_value) * 100 for value in summary['allocation']['sector'].values()
+            )
         
         # Rebalancing recommendations
         recommendations = []
         
         # Check for over-concentration
-        largest_holding = max(queryset, key=lambda h: h.current_value) if queryset else None
-        if largest_holding:
-            largest_percentage = (largest_holding.current_value / total_value) * 100 if total_value > 0 else 0
-            if largest_percentage > 20:  # If single holding > 20%
-                recommendations.append({
-                    'type': 'reduce_concentration',
-                    'message': f'Consider reducing {largest_holding.asset.symbol} position ({largest_percentage:.1f}% of portfolio)',
-                    'priority': 'high' if largest_percentage > 30 else 'medium'
-                })
+        largest = summary['largest']
+        largest_percentage = (frame.value[largest] / total_value) * 100 if total_value > 0 else 0
+        if largest_percentage > 20:  # If single holding > 20%
+            recommendations.append({
+                'type': 'reduce_concentration',
+                'message': f'Consider reducing {frame.symbol[largest]} position ({largest_percentage:.1f}% of portfolio)',
+                'priority': 'high' if largest_percentage > 30 else 'medium'
+            })
         
         # Check sector concentration
         if max_sector_allocation > 40:
@@ -423,43 +358,41 @@ class InvestmentHoldingViewSet(ChoicesMixin, viewsets.ReadOnlyModelViewSet):
             })
         
         # Check number of holdings
-        if len(queryset) < 5:
+        if holdings_count < 5:
             recommendations.append({
                 'type': 'add_holdings',
                 'message': 'Consider adding more holdings to improve diversification',
                 'priority': 'medium'
             })
-        elif len(queryset) > 50:
+        elif holdings_count > 50:
             recommendations.append({
                 'type': 'reduce_holdings',
                 'message': 'Consider consolidating positions for better management',
                 'priority': 'low'
             })
         
-        # Correlation matrix (simplified placeholder)
-        correlation_matrix = {}
-        symbols = [h.asset.symbol for h in queryset]
-        for symbol1 in symbols:
-            correlation_matrix[symbol1] = {}
-            for symbol2 in symbols:
-                # In real implementation, calculate actual correlation
-                correlation_matrix[symbol1][symbol2] = 0.5 if symbol1 != symbol2 else 1.0
+        # Korelasi return harian antar asset (di-cache per hari, lihat invest.risk)
+        correlations = correlation_matrix(frame.asset_id, window_days=window_days)
+        symbols = {str(asset_id): symbol for asset_id, symbol in zip(frame.asset_id, frame.symbol)}
+        correlation_data = {
+            symbols[first]: {symbols[second]: value for second, value in row.items()}
+            for first, row in correlations.items()
+        }
         
         diversification_data = {
             'diversification_score': diversification_score,
             'concentration_risk': concentration_risk,
-            'sector_diversification': sector_diversification,
-            'geographic_diversification': geographic_diversification,
-            'asset_type_diversification': asset_type_diversification,
-            'correlation_matrix': correlation_matrix,
+            'sector_diversification': allocation['sector'],
+            'geographic_diversification': allocation['currency'],
+            'asset_type_diversification': allocation['type'],
+            'correlation_matrix': correlation_data,
             'rebalancing_recommendations': recommendations,
             'metrics': {
-                'total_holdings': len(queryset),
+                'total_holdings': holdings_count,
                 'hhi_index': round(hhi, 4),
-                'largest_holding_percentage': round((largest_holding.current_value / total_value) * 100, 2) if largest_holding else 0,
+                'largest_holding_percentage': round(largest_percentage, 2),
                 'top_5_concentration': round(sum(
-                    (h.current_value / total_value) * 100 
-                    for h in sorted(queryset, key=lambda x: x.current_value, reverse=True)[:5]
+                    (frame.value[index] / total_value) * 100 for index in summary['top_value']
                 ), 2) if total_value > 0 else 0
             },
             'generated_at': timezone.now()
@@ -474,57 +407,69 @@ class InvestmentHoldingViewSet(ChoicesMixin, viewsets.ReadOnlyModelViewSet):
         
         Query Parameters:
         - period: Period analisis ('1M', '3M', '6M', '1Y', 'ALL')
+        - benchmark: Symbol asset pembanding untuk beta/alpha (optional)
         
-        Returns comprehensive performance metrics.
+        Returns comprehensive performance metrics. Risk metrics dihitung dari
+        snapshot NAV harian; metrik yang belum bisa dihitung bernilai null.
         """
-        queryset = self.get_queryset()
+        _, summary = holdings_summary(self.get_queryset(), top_n=self.analytics_top_n)
         period = request.query_params.get('period', '1Y')
         
-        if not queryset.exists():
+        if not summary['holdings_count']:
             return Response({
                 'message': 'No holdings found for performance analysis',
                 'performance': {}
             })
         
         # Calculate basic performance metrics
-        total_value = sum(h.current_value for h in queryset)
-        total_cost = sum(h.total_cost for h in queryset)
-        total_return = total_value - total_cost
+        total_cost = summary['total_cost']
+        total_return = summary['total_pnl']
         total_return_percentage = (total_return / total_cost) * 100 if total_cost > 0 else 0
         
         # Calculate win rate
-        winning_positions = sum(1 for h in queryset if h.unrealized_pnl > 0)
-        total_positions = len(queryset)
-        win_rate = (winning_positions / total_positions) * 100 if total_positions > 0 else 0
+        total_positions = summary['holdings_count']
+        win_rate = (summary['winning_positions'] / total_positions) * 100
         
         # Calculate profit factor
-        total_gains = sum(h.unrealized_pnl for h in queryset if h.unrealized_pnl > 0)
-        total_losses = abs(sum(h.unrealized_pnl for h in queryset if h.unrealized_pnl < 0))
+        total_gains = summary['total_gains']
+        total_losses = summary['total_losses']
         profit_factor = total_gains / total_losses if total_losses > 0 else float('inf')
         
-        # Simplified metrics (in real implementation, use historical data)
-        annualized_return = total_return_percentage  # Placeholder
-        volatility = 15.0  # Placeholder
-        risk_free_rate = 6.0  # Assume 6% risk-free rate
+        benchmark = None
+        benchmark_symbol = request.query_params.get('benchmark')
+        if benchmark_symbol:
+            benchmark = resolve_benchmark(benchmark_symbol)
+            if benchmark is None:
+                return Response(
+                    {'error': f'Benchmark asset {benchmark_symbol} tidak ditemukan'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        # Risk metrics dari series NAV harian (snapshot) dalam periode, lewat invest.risk
+        start_date = None
+        if period in PERIOD_DAYS:
+            start_date = timezone.localdate() - timezone.timedelta(days=PERIOD_DAYS[period])
+        series_stats = series_statistics(
+            portfolio_series(self.get_snapshot_portfolios(), start=start_date),
+            benchmark=benchmark
+        )
         
-        sharpe_ratio = (annualized_return - risk_free_rate) / volatility if volatility > 0 else 0
-        sortino_ratio = annualized_return / volatility if volatility > 0 else 0  # Placeholder
-        max_drawdown = 10.0  # Placeholder
-        calmar_ratio = annualized_return / max_drawdown if max_drawdown > 0 else 0
-        alpha = 2.0  # Placeholder
-        beta = 1.0  # Placeholder
+        def rounded(key):
+            value = series_stats[key]
+            return None if value is None else round(value, 2)
         
         performance_data = {
             'total_return': total_return,
             'total_return_percentage': round(total_return_percentage, 2),
-            'annualized_return': round(annualized_return, 2),
-            'volatility': round(volatility, 2),
-            'sharpe_ratio': round(sharpe_ratio, 2),
-            'sortino_ratio': round(sortino_ratio, 2),
-            'max_drawdown': round(max_drawdown, 2),
-            'calmar_ratio': round(calmar_ratio, 2),
-            'alpha': round(alpha, 2),
-            'beta': round(beta, 2),
+            'annualized_return': rounded('annualized_return'),
+            'volatility': rounded('volatility'),
+            'sharpe_ratio': rounded('sharpe_ratio'),
+            'sortino_ratio': rounded('sortino_ratio'),
+            'max_drawdown': rounded('max_drawdown'),
+            'calmar_ratio': rounded('calmar_ratio'),
+            'alpha': rounded('alpha'),
+            'beta': rounded('beta'),
+            'benchmark': benchmark.symbol if benchmark else None,
             'win_rate': round(win_rate, 2),
             'profit_factor': round(profit_factor, 2) if profit_factor != float('inf') else 'N/A',
             'period': period,
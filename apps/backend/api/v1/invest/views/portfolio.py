@@ -1,11 +1,14 @@
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from django.db.models import Q, Sum, Count, Avg
 from django.utils import timezone
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 
 from invest.models import InvestmentPortfolio, InvestmentHolding, Asset
+from invest.risk import load_daily_prices, price_risk_metrics, resolve_benchmark
+from invest.snapshots import portfolio_series, rolling_statistics, series_statistics
 from ..serializers import (
     InvestmentPortfolioSerializer,
     InvestmentPortfolioListSerializer,
@@ -14,10 +17,10 @@ from ..serializers import (
     InvestmentHoldingSerializer
 )
 from api.utils.permissions import IsOwner
-from api.utils.mixins import ChoicesMixin
+from api.utils.mixins import AsyncJobMixin, CachedResponseMixin, ChoicesMixin, ConditionalGetMixin
 
 
-class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
+class InvestmentPortfolioViewSet(ConditionalGetMixin, CachedResponseMixin, AsyncJobMixin, ChoicesMixin, viewsets.ModelViewSet):
     """
     Investment Portfolio Management.
     
@@ -38,10 +41,21 @@ class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
     ordering_fields = ['name', 'created_at', 'initial_capital']
     ordering = ['-created_at']
     
+    # Action yang bisa dijalankan sebagai job background dengan ?async=true
+    async_actions = ['performance']
+    cached_actions = ['overview']
+    conditional_fields = ('updated_at', 'holdings__last_updated')
+    # Default panjang history harga (hari) untuk action risk
+    risk_window_days = 90
+    
     choices_config = {
         'risk_levels': {
             'choices': InvestmentPortfolio.RISK_LEVEL_CHOICES,
             'description': 'Level risiko portfolio yang tersedia'
+        },
+        'cost_basis_methods': {
+            'choices': InvestmentPortfolio.COST_BASIS_CHOICES,
+            'description': 'Metode pemilihan lot untuk cost basis saat sell'
         }
     }
     
@@ -62,7 +76,12 @@ class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
         - min_value: Minimum total value portfolio
         - max_value: Maximum total value portfolio
         """
-        queryset = InvestmentPortfolio.objects.filter(user=self.request.user)
+        queryset = InvestmentPortfolio.annotate_rollups(
+            InvestmentPortfolio.objects.filter(user=self.request.user)
+        )
+        
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('holdings__asset')
         
         # Filter by is_active
         is_active = self.request.query_params.get('is_active')
@@ -75,26 +94,14 @@ class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
         if risk_level:
             queryset = queryset.filter(risk_level=risk_level)
         
-        # Filter by portfolio value range
-        min_value = self.request.query_params.get('min_value')
-        max_value = self.request.query_params.get('max_value')
-        
-        if min_value or max_value:
-            # Calculate portfolio values for filtering
-            portfolio_ids = []
-            for portfolio in queryset:
-                total_value = sum(h.current_value for h in portfolio.holdings.all())
-                
-                include_portfolio = True
-                if min_value and total_value < Decimal(min_value):
-                    include_portfolio = False
-                if max_value and total_value > Decimal(max_value):
-                    include_portfolio = False
-                
-                if include_portfolio:
-                    portfolio_ids.append(portfolio.id)
-            
-            queryset = queryset.filter(id__in=portfolio_ids)
+        # Filter by portfolio value range (anotasi rollup, tetap satu query)
+        for param, lookup in (('min_value', 'total_value__gte'), ('max_value', 'total_value__lte')):
+            value = self.request.query_params.get(param)
+            if value:
+                try:
+                    queryset = queryset.filter(**{lookup: Decimal(value)})
+                except InvalidOperation:
+                    raise ValidationError({param: 'Harus berupa angka'})
         
         return queryset
     
@@ -105,6 +112,9 @@ class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
         
         Query Parameters:
         - period: Period analisis ('1M', '3M', '6M', '1Y', 'YTD', 'ALL')
+        - benchmark: Symbol asset pembanding untuk beta/alpha (optional)
+        - rolling_window: Panjang window (hari) untuk rolling metrics (optional)
+        - async: true untuk menjalankan sebagai job background (polling via /jobs/{id}/)
         
         Returns comprehensive performance analysis including:
         - Total return, ROI, annualized return
@@ -115,6 +125,21 @@ class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
         portfolio = self.get_object()
         period = request.query_params.get('period', '1Y')
         
+        try:
+            rolling_window = int(request.query_params.get('rolling_window', 0))
+        except ValueError:
+            return Response({'error': 'rolling_window harus berupa angka'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        benchmark = None
+        benchmark_symbol = request.query_params.get('benchmark')
+        if benchmark_symbol:
+            benchmark = resolve_benchmark(benchmark_symbol)
+            if benchmark is None:
+                return Response(
+                    {'error': f'Benchmark asset {benchmark_symbol} tidak ditemukan'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
         # Calculate basic metrics
         holdings = portfolio.holdings.all()
         total_cost = sum(h.total_cost for h in holdings)
@@ -157,20 +182,17 @@ class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
         # Calculate annualized return
         holding_period_days = (end_date - start_date).days
         if holding_period_days > 0 and total_cost > 0:
-            annualized_return = ((total_value / total_cost) ** (365 / holding_period_days) - 1) * 100
+            annualized_return = (float(total_value / total_cost) ** (365 / holding_period_days) - 1) * 100
         else:
             annualized_return = 0
         
-        # Calculate volatility (simplified version)
-        # In real implementation, you'd use daily portfolio values
-        volatility = 0  # Placeholder
+        # Risk metrics dari snapshot NAV harian lewat invest.risk
+        series = portfolio_series([portfolio], start=start_date, end=end_date)
+        series_stats = series_statistics(series, benchmark=benchmark)
         
-        # Calculate Sharpe ratio (simplified)
-        risk_free_rate = 6.0  # Assume 6% risk-free rate
-        if volatility > 0:
-            sharpe_ratio = (annualized_return - risk_free_rate) / volatility
-        else:
-            sharpe_ratio = 0
+        def rounded(key):
+            value = series_stats[key]
+            return None if value is None else round(value, 2)
         
         # Best and worst performing holdings
         best_performer = None
@@ -199,11 +221,17 @@ class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
             'total_return': total_pnl,
             'total_return_percentage': round(total_return_pct, 2),
             'annualized_return': round(annualized_return, 2),
-            'volatility': round(volatility, 2),
-            'sharpe_ratio': round(sharpe_ratio, 2),
-            'max_drawdown': 0,  # Placeholder
-            'best_day': 0,  # Placeholder
-            'worst_day': 0,  # Placeholder
+            'volatility': rounded('volatility'),
+            'sharpe_ratio': rounded('sharpe_ratio'),
+            'sortino_ratio': rounded('sortino_ratio'),
+            'max_drawdown': rounded('max_drawdown'),
+            'calmar_ratio': rounded('calmar_ratio'),
+            'beta': rounded('beta'),
+            'alpha': rounded('alpha'),
+            'benchmark': benchmark.symbol if benchmark else None,
+            'best_day': rounded('best_day'),
+            'worst_day': rounded('worst_day'),
+            'rolling': rolling_statistics(series, rolling_window) if rolling_window > 1 else None,
             'period_investment': period_investment,
             'period_withdrawal': period_withdrawal,
             'best_performer': best_performer,
@@ -214,6 +242,74 @@ class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
         
         return Response(performance_data)
     
+    @action(detail=True, methods=['get'])
+    def risk(self, request, pk=None):
+        """
+        Risk metrics per holding dan untuk portfolio secara keseluruhan.
+        
+        Query Parameters:
+        - days: Panjang history harga (default: 90)
+        - benchmark: Symbol asset pembanding untuk beta/alpha (optional)
+        
+        History harga semua holdings (dan benchmark) dimuat dalam satu query;
+        metrics dihitung secara vectorized oleh invest.risk.
+        """
+        portfolio = self.get_object()
+        
+        try:
+            days = int(request.query_params.get('days', self.risk_window_days))
+        except ValueError:
+            return Response({'error': 'days harus berupa angka'}, status=status.HTTP_400_BAD_REQUEST)
+        if days < 2:
+            return Response({'error': 'days minimal 2'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        benchmark = None
+        benchmark_symbol = request.query_params.get('benchmark')
+        if benchmark_symbol:
+            benchmark = resolve_benchmark(benchmark_symbol)
+            if benchmark is None:
+                return Response(
+                    {'error': f'Benchmark asset {benchmark_symbol} tidak ditemukan'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        holdings = list(portfolio.holdings.filter(quantity__gt=0).select_related('asset'))
+        end_date = timezone.localdate()
+        start_date = end_date - timezone.timedelta(days=days)
+        
+        asset_ids = {holding.asset_id for holding in holdings}
+        if benchmark:
+            asset_ids.add(benchmark.pk)
+        _, prices = load_daily_prices(asset_ids, start_date, end_date)
+        benchmark_prices = prices.get(benchmark.pk) if benchmark else None
+        
+        total_value = sum(holding.current_value for holding in holdings)
+        holdings_risk = []
+        for holding in holdings:
+            holdings_risk.append({
+                'symbol': holding.asset.symbol,
+                'name': holding.asset.name,
+                'weight': round((holding.current_value / total_value) * 100, 2) if total_value > 0 else 0,
+                'risk_metrics': price_risk_metrics(prices[holding.asset_id], benchmark_prices),
+            })
+        
+        series_stats = series_statistics(
+            portfolio_series([portfolio], start=start_date, end=end_date),
+            benchmark=benchmark
+        )
+        
+        return Response({
+            'portfolio_id': portfolio.id,
+            'days': days,
+            'benchmark': benchmark.symbol if benchmark else None,
+            'portfolio_metrics': {
+                key: None if value is None else round(value, 2)
+                for key, value in series_stats.items()
+            },
+            'holdings': holdings_risk,
+            'generated_at': timezone.now()
+        })
+    
     @action(detail=True, methods=['get'])
     def allocation(self, request, pk=None):
         """
@@ -411,12 +507,12 @@ class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
         
         Returns ringkasan portfolio dengan metrics utama.
         """
-        portfolios = self.get_queryset()
+        portfolios = list(self.get_queryset())
         
-        total_portfolios = portfolios.count()
-        active_portfolios = portfolios.filter(is_active=True).count()
+        total_portfolios = len(portfolios)
+        active_portfolios = sum(1 for portfolio in portfolios if portfolio.is_active)
         
-        # Calculate totals across all portfolios
+        # Calculate totals across all portfolios (dari anotasi rollup)
         total_value = 0
         total_cost = 0
         total_holdings = 0
@@ -424,14 +520,13 @@ class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
         portfolio_summaries = []
         
         for portfolio in portfolios:
-            holdings = portfolio.holdings.all()
-            portfolio_value = sum(h.current_value for h in holdings)
-            portfolio_cost = sum(h.total_cost for h in holdings)
-            portfolio_pnl = portfolio_value - portfolio_cost
+            portfolio_value = portfolio.total_value
+            portfolio_cost = portfolio.total_cost
+            portfolio_pnl = portfolio.total_pnl
             
             total_value += portfolio_value
             total_cost += portfolio_cost
-            total_holdings += holdings.count()
+            total_holdings += portfolio.holdings_count
             
             portfolio_summaries.append({
                 'id': str(portfolio.id),
@@ -440,7 +535,7 @@ class InvestmentPortfolioViewSet(ChoicesMixin, viewsets.ModelViewSet):
                 'cost': portfolio_cost,
                 'pnl': portfolio_pnl,
                 'pnl_percentage': round((portfolio_pnl / portfolio_cost) * 100, 2) if portfolio_cost > 0 else 0,
-                'holdings_count': holdings.count(),
+                'holdings_count': portfolio.holdings_count,
                 'risk_level': portfolio.risk_level,
                 'is_active': portfolio.is_active
             })
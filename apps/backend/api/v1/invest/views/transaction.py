@@ -1,12 +1,17 @@
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from django.db import transaction as db_transaction
 from django.db.models import Q, Sum, Count, Avg
 from django.utils import timezone
-from datetime import timedelta
+from datetime import MAXYEAR, MINYEAR, timedelta
 from decimal import Decimal
 
-from invest.models import InvestmentTransaction, InvestmentPortfolio, Asset
+from invest.models import InvestmentTransaction, InvestmentPortfolio, Asset, RealizedGain
+from invest.holdings import rebuild_portfolio_holdings
+from invest.lots import TransactionError, check_history
+from invest.reports import monthly_transaction_report
 from ..serializers import (
     InvestmentTransactionSerializer,
     InvestmentTransactionListSerializer,
@@ -14,10 +19,12 @@ from ..serializers import (
     TransactionsByAssetSerializer
 )
 from api.utils.permissions import IsOwner
-from api.utils.mixins import ChoicesMixin
+from api.utils.mixins import AsyncJobMixin, ChoicesMixin, ConditionalGetMixin
+from api.utils.pagination import KeysetPagination
+from api.utils.export import EXPORT_CONTENT_TYPES, parquet_available, streaming_export_response
 
 
-class InvestmentTransactionViewSet(ChoicesMixin, viewsets.ModelViewSet):
+class InvestmentTransactionViewSet(ConditionalGetMixin, AsyncJobMixin, ChoicesMixin, viewsets.ModelViewSet):
     """
     Investment Transaction Management.
     
@@ -26,17 +33,39 @@ class InvestmentTransactionViewSet(ChoicesMixin, viewsets.ModelViewSet):
     
     Features:
     - CRUD operations untuk transaksi investasi
-    - Auto-update holdings setelah transaksi
+    - Auto-update holdings setelah transaksi (rebuild dari transaksi saat update/delete)
     - Transaction summary dan analytics
     - Grouping berdasarkan asset, portfolio, periode
     - Import/export capabilities
+    - Keyset pagination dengan ?cursor= untuk history panjang
     """
     permission_classes = [permissions.IsAuthenticated, IsOwner]
+    pagination_class = KeysetPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['asset__symbol', 'asset__name', 'portfolio__name', 'broker', 'notes']
     ordering_fields = ['transaction_date', 'total_amount', 'created_at']
     ordering = ['-transaction_date']
     
+    export_chunk_size = 2000
+    # Action yang bisa dijalankan sebagai job background dengan ?async=true
+    async_actions = ['export']
+    conditional_fields = ('created_at',)
+    monthly_report_max_years = 20
+    # (field, header CSV, lookup values_list)
+    export_columns = [
+        ('date', 'Date', 'transaction_date'),
+        ('portfolio', 'Portfolio', 'portfolio__name'),
+        ('asset_symbol', 'Asset Symbol', 'asset__symbol'),
+        ('asset_name', 'Asset Name', 'asset__name'),
+        ('type', 'Type', 'transaction_type'),
+        ('quantity', 'Quantity', 'quantity'),
+        ('price', 'Price', 'price'),
+        ('total_amount', 'Total Amount', 'total_amount'),
+        ('fees', 'Fees', 'fees'),
+        ('broker', 'Broker', 'broker'),
+        ('notes', 'Notes', 'notes'),
+    ]
+    
     choices_config = {
         'transaction_types': {
             'choices': InvestmentTransaction.TRANSACTION_TYPE_CHOICES,
@@ -107,6 +136,33 @@ class InvestmentTransactionViewSet(ChoicesMixin, viewsets.ModelViewSet):
         
         return queryset
     
+    def perform_update(self, serializer):
+        """Update transaksi lalu rebuild holdings portfolio lama dan baru dari transaksi"""
+        previous_portfolio = serializer.instance.portfolio
+        # Transaksi dan holdings disimpan atomik; rebuild yang gagal
+        # membatalkan perubahan transaksi
+        with db_transaction.atomic():
+            transaction = serializer.save()
+            
+            rebuild_portfolio_holdings(transaction.portfolio)
+            if previous_portfolio.pk != transaction.portfolio_id:
+                rebuild_portfolio_holdings(previous_portfolio)
+    
+    def perform_destroy(self, instance):
+        """Hapus transaksi lalu rebuild holdings portfolio agar efeknya ikut dibatalkan"""
+        portfolio = instance.portfolio
+        # Sell sesudahnya harus tetap tertutup posisi tanpa transaksi ini
+        try:
+            check_history(instance.portfolio_id, instance.asset_id, exclude=instance.pk)
+        except TransactionError as exc:
+            raise ValidationError(
+                f"Insufficient {instance.asset.symbol} balance on {exc.transaction_date}. "
+                f"Available: {exc.available}"
+            )
+        with db_transaction.atomic():
+            instance.delete()
+            rebuild_portfolio_holdings(portfolio)
+    
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """
@@ -204,69 +260,51 @@ class InvestmentTransactionViewSet(ChoicesMixin, viewsets.ModelViewSet):
         
         Query Parameters sama dengan endpoint utama.
         
-        Returns total transaksi, volume, dan P&L per asset.
+        Returns total transaksi, volume, dan P&L per asset. Realized P&L
+        diambil dari ledger lot (lihat endpoint realized_gains).
         """
         queryset = self.get_queryset()
         
-        # Group transactions by asset
-        asset_groups = {}
+        # Agregasi per asset dalam satu grouped query
+        groups = queryset.order_by().values('asset_id').annotate(
+            transaction_count=Count('id'),
+            total_quantity_bought=Sum('quantity', filter=Q(transaction_type='buy')),
+            total_quantity_sold=Sum('quantity', filter=Q(transaction_type='sell')),
+            total_buy_amount=Sum('total_amount', filter=Q(transaction_type='buy')),
+            total_sell_amount=Sum('total_amount', filter=Q(transaction_type='sell')),
+            total_dividend=Sum('total_amount', filter=Q(transaction_type='dividend')),
+        )
         
-        for transaction in queryset:
-            asset_id = str(transaction.asset.id)
-            
-            if asset_id not in asset_groups:
-                asset_groups[asset_id] = {
-                    'asset': transaction.asset,
-                    'transactions': [],
-                    'transaction_count': 0,
-                    'total_quantity_bought': 0,
-                    'total_quantity_sold': 0,
-                    'total_buy_amount': 0,
-                    'total_sell_amount': 0,
-                    'total_dividend': 0
-                }
-            
-            group = asset_groups[asset_id]
-            group['transactions'].append(transaction)
-            group['transaction_count'] += 1
-            
-            if transaction.transaction_type == 'buy':
-                group['total_quantity_bought'] += transaction.quantity
-                group['total_buy_amount'] += transaction.total_amount
-            elif transaction.transaction_type == 'sell':
-                group['total_quantity_sold'] += transaction.quantity
-                group['total_sell_amount'] += transaction.total_amount
-            elif transaction.transaction_type == 'dividend':
-                group['total_dividend'] += transaction.total_amount
-        
-        # Calculate additional metrics for each asset
-        results = []
+        # Realized P&L dari ledger lot (sesuai cost_basis_method portfolio)
+        realized = dict(
+            RealizedGain.objects.filter(
+                transaction__in=queryset.filter(transaction_type='sell')
+            ).order_by().values('asset_id').annotate(
+                total=Sum('realized_pnl')
+            ).values_list('asset_id', 'total')
+        )
         
-        for asset_id, group in asset_groups.items():
-            # Calculate realized P&L
-            realized_pnl = group['total_sell_amount'] - (
-                group['total_quantity_sold'] * 
-                (group['total_buy_amount'] / group['total_quantity_bought'] if group['total_quantity_bought'] > 0 else 0)
-            )
-            
-            # Get current holding
-            current_holding = group['total_quantity_bought'] - group['total_quantity_sold']
-            
-            from ..serializers import AssetListSerializer
+        groups = list(groups)
+        assets = Asset.objects.in_bulk([group['asset_id'] for group in groups])
+        
+        from ..serializers import AssetListSerializer
+        
+        results = []
+        for group in groups:
+            total_quantity_bought = group['total_quantity_bought'] or Decimal('0')
+            total_quantity_sold = group['total_quantity_sold'] or Decimal('0')
             
-            result = {
-                'asset': AssetListSerializer(group['asset']).data,
+            results.append({
+                'asset': AssetListSerializer(assets[group['asset_id']]).data,
                 'transaction_count': group['transaction_count'],
-                'total_quantity_bought': group['total_quantity_bought'],
-                'total_quantity_sold': group['total_quantity_sold'],
-                'total_buy_amount': group['total_buy_amount'],
-                'total_sell_amount': group['total_sell_amount'],
-                'total_dividend': group['total_dividend'],
-                'realized_pnl': realized_pnl,
-                'current_holding': current_holding
-            }
-            
-            results.append(result)
+                'total_quantity_bought': total_quantity_bought,
+                'total_quantity_sold': total_quantity_sold,
+                'total_buy_amount': group['total_buy_amount'] or Decimal('0'),
+                'total_sell_amount': group['total_sell_amount'] or Decimal('0'),
+                'total_dividend': group['total_dividend'] or Decimal('0'),
+                'realized_pnl': realized.get(group['asset_id'], Decimal('0')),
+                'current_holding': total_quantity_bought - total_quantity_sold
+            })
         
         # Sort by total buy amount
         results.sort(key=lambda x: x['total_buy_amount'], reverse=True)
@@ -277,6 +315,59 @@ class InvestmentTransactionViewSet(ChoicesMixin, viewsets.ModelViewSet):
             'generated_at': timezone.now()
         })
     
+    @action(detail=False, methods=['get'])
+    def realized_gains(self, request):
+        """
+        Ledger realized P&L per lot dari transaksi sell.
+        
+        Query Parameters sama dengan endpoint utama (portfolio, asset,
+        start_date, end_date, dll).
+        
+        Setiap sell menghasilkan satu baris per lot yang dikonsumsi sesuai
+        cost_basis_method portfolio (FIFO, LIFO, atau average cost).
+        """
+        sells = self.get_queryset().filter(transaction_type='sell')
+        ledger = RealizedGain.objects.filter(transaction__in=sells).order_by('-date', '-id')
+        
+        totals = ledger.aggregate(
+            total_proceeds=Sum('proceeds'),
+            total_cost_basis=Sum('cost_basis'),
+            total_realized_pnl=Sum('realized_pnl'),
+        )
+        
+        rows = ledger.values(
+            'id', 'transaction_id', 'portfolio__name', 'asset__symbol', 'date', 'acquired_date',
+            'method', 'quantity', 'proceeds', 'cost_basis', 'realized_pnl'
+        )
+        page = self.paginate_queryset(rows)
+        entries = [
+            {
+                'id': row['id'],
+                'transaction_id': row['transaction_id'],
+                'portfolio_name': row['portfolio__name'],
+                'asset_symbol': row['asset__symbol'],
+                'date': row['date'],
+                'acquired_date': row['acquired_date'],
+                'holding_days': (row['date'] - row['acquired_date']).days,
+                'method': row['method'],
+                'quantity': row['quantity'],
+                'proceeds': row['proceeds'],
+                'cost_basis': row['cost_basis'].quantize(Decimal('0.01')),
+                'realized_pnl': row['realized_pnl'],
+            }
+            for row in (page if page is not None else rows)
+        ]
+        
+        summary = {
+            key: (value or Decimal('0')).quantize(Decimal('0.01'))
+            for key, value in totals.items()
+        }
+        if page is not None:
+            response = self.get_paginated_response(entries)
+            response.data.update(summary)
+            return response
+        return Response({'results': entries, **summary})
+    
     @action(detail=False, methods=['get'])
     def monthly_report(self, request):
         """
@@ -284,85 +375,67 @@ class InvestmentTransactionViewSet(ChoicesMixin, viewsets.ModelViewSet):
         
         Query Parameters:
         - year: Tahun untuk laporan (default: tahun saat ini)
+        - start_year / end_year: Rentang multi-tahun (override year, maks 20 tahun)
         - portfolio: Portfolio ID (optional)
+        - by_portfolio: true untuk menyertakan breakdown per portfolio
         
-        Returns breakdown transaksi per bulan dalam tahun tertentu.
+        Returns breakdown transaksi per bulan dalam rentang tahun. Seluruh
+        laporan dihitung dengan dua grouped query berapapun panjang rentangnya.
         """
-        year = int(request.query_params.get('year', timezone.now().year))
-        portfolio_id = request.query_params.get('portfolio')
+        try:
+            year = int(request.query_params.get('year', timezone.now().year))
+            start_year = int(request.query_params.get('start_year', year))
+            end_year = int(request.query_params.get('end_year', start_year))
+        except ValueError:
+            return Response(
+                {'error': 'year, start_year, dan end_year harus berupa angka'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        queryset = self.get_queryset().filter(
-            transaction_date__year=year
-        )
+        if not (MINYEAR <= start_year <= MAXYEAR and MINYEAR <= end_year <= MAXYEAR):
+            return Response(
+                {'error': f'start_year dan end_year harus di antara {MINYEAR} dan {MAXYEAR}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        if portfolio_id:
-            queryset = queryset.filter(portfolio_id=portfolio_id)
+        if start_year > end_year:
+            return Response(
+                {'error': 'start_year tidak boleh lebih besar dari end_year'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Group by month
-        monthly_data = {}
+        if end_year - start_year >= self.monthly_report_max_years:
+            return Response(
+                {'error': f'Rentang laporan maksimal {self.monthly_report_max_years} tahun'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        for month in range(1, 13):
-            month_transactions = queryset.filter(transaction_date__month=month)
-            
-            total_buy = month_transactions.filter(
-                transaction_type='buy'
-            ).aggregate(total=Sum('total_amount'))['total'] or 0
-            
-            total_sell = month_transactions.filter(
-                transaction_type='sell'
-            ).aggregate(total=Sum('total_amount'))['total'] or 0
-            
-            total_dividend = month_transactions.filter(
-                transaction_type='dividend'
-            ).aggregate(total=Sum('total_amount'))['total'] or 0
-            
-            monthly_data[f"{year}-{month:02d}"] = {
-                'month': f"{year}-{month:02d}",
-                'total_transactions': month_transactions.count(),
-                'total_buy_amount': total_buy,
-                'total_sell_amount': total_sell,
-                'total_dividend': total_dividend,
-                'net_investment': total_buy - total_sell,
-                'most_traded_asset': None
-            }
-            
-            # Get most traded asset for the month
-            most_traded = month_transactions.values(
-                'asset__symbol', 'asset__name'
-            ).annotate(
-                count=Count('id')
-            ).order_by('-count').first()
-            
-            if most_traded:
-                monthly_data[f"{year}-{month:02d}"]['most_traded_asset'] = (
-                    f"{most_traded['asset__symbol']} - {most_traded['asset__name']}"
-                )
-        
-        # Calculate year totals
-        year_totals = {
-            'year': year,
-            'total_transactions': queryset.count(),
-            'total_buy_amount': queryset.filter(
-                transaction_type='buy'
-            ).aggregate(total=Sum('total_amount'))['total'] or 0,
-            'total_sell_amount': queryset.filter(
-                transaction_type='sell'
-            ).aggregate(total=Sum('total_amount'))['total'] or 0,
-            'total_dividend': queryset.filter(
-                transaction_type='dividend'
-            ).aggregate(total=Sum('total_amount'))['total'] or 0,
-        }
+        by_portfolio = request.query_params.get('by_portfolio', '').lower() == 'true'
+        portfolio_id = request.query_params.get('portfolio')
         
-        year_totals['net_investment'] = (
-            year_totals['total_buy_amount'] - year_totals['total_sell_amount']
+        report = monthly_transaction_report(
+            self.get_queryset(), start_year, end_year, by_portfolio=by_portfolio
         )
         
-        return Response({
+        # year_totals: total seluruh rentang (kompatibel dengan laporan satu tahun)
+        year_totals = {'year': start_year, **report['range_totals']}
+        if end_year != start_year:
+            year_totals['year'] = f"{start_year}-{end_year}"
+        
+        response_data = {
             'year_totals': year_totals,
-            'monthly_data': monthly_data,
+            'yearly_totals': report['yearly_totals'],
+            'monthly_data': report['monthly_data'],
+            'start_year': start_year,
+            'end_year': end_year,
             'portfolio_id': portfolio_id,
             'generated_at': timezone.now()
-        })
+        }
+        
+        if by_portfolio:
+            response_data['portfolio_breakdown'] = list(report['portfolio_breakdown'].values())
+        
+        return Response(response_data)
     
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
@@ -437,40 +510,45 @@ class InvestmentTransactionViewSet(ChoicesMixin, viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def export(self, request):
         """
-        Export transaksi ke format CSV.
-        
-        Query Parameters sama dengan filtering utama.
+        Export transaksi sebagai file streaming (CSV, NDJSON, atau Parquet).
         
-        Returns CSV data untuk download.
+        Query Parameters:
+        - export_format: 'csv' (default), 'ndjson', atau 'parquet' (butuh pyarrow)
+        - chunk_size: Jumlah baris per fetch dari database (default: 2000)
+        - Semua filter, search, dan ordering sama dengan endpoint list
+        - async: true untuk menjalankan sebagai job background (polling via /jobs/{id}/)
+        
+        Data dibaca dengan values_list().iterator() sehingga memori tetap konstan
+        berapapun jumlah riwayat transaksi, dan portfolio/asset di-join dalam query
+        yang sama (tanpa query per baris).
         """
-        queryset = self.get_queryset()
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        if export_format not in EXPORT_CONTENT_TYPES:
+            return Response({
+                'error': f"Unsupported export_format '{export_format}'. Use csv, ndjson, or parquet"
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Prepare CSV data
-        csv_data = []
-        csv_headers = [
-            'Date', 'Portfolio', 'Asset Symbol', 'Asset Name', 'Type',
-            'Quantity', 'Price', 'Total Amount', 'Fees', 'Broker', 'Notes'
-        ]
+        if export_format == 'parquet' and not parquet_available():
+            return Response({
+                'error': 'Parquet export requires pyarrow to be installed'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        for transaction in queryset:
-            csv_data.append([
-                transaction.transaction_date.strftime('%Y-%m-%d'),
-                transaction.portfolio.name,
-                transaction.asset.symbol,
-                transaction.asset.name,
-                transaction.transaction_type,
-                str(transaction.quantity),
-                str(transaction.price),
-                str(transaction.total_amount),
-                str(transaction.fees),
-                transaction.broker or '',
-                transaction.notes or ''
-            ])
+        try:
+            chunk_size = int(request.query_params.get('chunk_size', self.export_chunk_size))
+        except ValueError:
+            chunk_size = self.export_chunk_size
+        chunk_size = max(100, min(chunk_size, 20000))
         
-        return Response({
-            'headers': csv_headers,
-            'data': csv_data,
-            'total_records': len(csv_data),
-            'generated_at': timezone.now(),
-            'filename': f'investment_transactions_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        })
+        fields = [field for field, _, _ in self.export_columns]
+        headers = [header for _, header, _ in self.export_columns]
+        lookups = [lookup for _, _, lookup in self.export_columns]
+        
+        # Lookup portfolio__/asset__ di-join langsung dalam satu query
+        rows = self.filter_queryset(self.get_queryset()).values_list(
+            *lookups
+        ).iterator(chunk_size=chunk_size)
+        
+        filename = f'investment_transactions_{timezone.now().strftime("%Y%m%d_%H%M%S")}'
+        return streaming_export_response(
+            export_format, fields, headers, rows, filename, chunk_size=chunk_size
+        )
@@ -0,0 +1,30 @@
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+from api.models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Serializer status dan hasil job background.
+    
+    Attributes:
+        name (str): Action yang dijalankan, mis. 'holding.analytics'
+        status (str): 'pending', 'running', 'succeeded', atau 'failed'
+        status_code (int): HTTP status response action saat dijalankan worker
+        result (json): Response action; untuk export berisi metadata file
+        download_url (str): URL download jika hasil berupa file
+    """
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'method', 'path', 'query', 'status', 'status_code',
+                  'result', 'error', 'attempts', 'created_at', 'started_at',
+                  'finished_at', 'download_url']
+        read_only_fields = fields
+    
+    def get_download_url(self, obj):
+        if obj.status == 'succeeded' and obj.result and 'file' in obj.result:
+            return reverse('job-download', kwargs={'pk': obj.pk}, request=self.context.get('request'))
+        return None
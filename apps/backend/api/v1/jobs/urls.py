@@ -0,0 +1,21 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import JobViewSet
+
+"""
+Job API Endpoints
+
+Polling status dan hasil job background dari endpoint yang dipanggil
+dengan ?async=true.
+
+- GET /jobs/ - List job milik user (filter: status, name)
+- GET /jobs/{id}/ - Status dan hasil job
+- GET /jobs/{id}/download/ - Download hasil job berupa file (export)
+"""
+
+router = DefaultRouter()
+router.register(r'jobs', JobViewSet, basename='job')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,54 @@
+from django.http import FileResponse
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from api.jobs import result_path
+from api.models import Job
+from api.utils.permissions import IsOwner
+from .serializers import JobSerializer
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Status dan hasil job background (Read-Only).
+    
+    Job dibuat oleh endpoint yang dipanggil dengan ?async=true (mis.
+    holdings/analytics, holdings/refresh, portfolios/{id}/performance,
+    transactions/export) dan dijalankan oleh worker `manage.py run_jobs`.
+    
+    Query Parameters:
+    - status: Filter berdasarkan status job
+    - name: Filter berdasarkan nama action
+    """
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    
+    def get_queryset(self):
+        queryset = Job.objects.filter(user=self.request.user).order_by('-created_at')
+        
+        job_status = self.request.query_params.get('status')
+        if job_status:
+            queryset = queryset.filter(status=job_status)
+        
+        name = self.request.query_params.get('name')
+        if name:
+            queryset = queryset.filter(name=name)
+        
+        return queryset
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download hasil job berupa file (mis. export transaksi)"""
+        job = self.get_object()
+        file_info = (job.result or {}).get('file') if job.status == 'succeeded' else None
+        path = result_path(job.pk)
+        if not file_info or not path.exists():
+            return Response({'error': 'Job tidak memiliki file hasil'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=file_info['filename'],
+            content_type=file_info['content_type']
+        )
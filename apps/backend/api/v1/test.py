@@ -265,6 +265,64 @@ class TransactionApiTests(FinanceApiTestCase):
         self.assertEqual(response.data['expense'], '300000.00')
         self.assertEqual(response.data['balance'], '4700000.00')
     
+    def test_transaction_summary_is_cached_until_data_changes(self):
+        url = '/api/v1/finance/transactions/summary/'
+        response = self.client.get(url, {'start_date': '2025-05-01', 'wallet': self.wallet.id})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        
+        # Urutan query params berbeda tetap memakai entry yang sama
+        response = self.client.get(f'{url}?wallet={self.wallet.id}&start_date=2025-05-01')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['income'], '5000000.00')
+        self.assertIn('hits=', response['X-Cache-Stats'])
+        
+        # Bulk create tidak mengirim signal, tapi tetap menginvalidasi cache
+        self.client.post('/api/v1/finance/transactions/bulk_create/', {
+            'transactions': [{
+                'wallet': self.wallet.id,
+                'category': self.expense_category.id,
+                'amount': '250000',
+                'type': 'expense',
+                'description': 'Groceries',
+                'transaction_date': '2025-05-05'
+            }]
+        }, format='json')
+        response = self.client.get(url, {'start_date': '2025-05-01', 'wallet': self.wallet.id})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['expense'], '250000.00')
+    
+    def test_keyset_pagination_walks_history(self):
+        for day in (2, 2, 3, 4):
+            Transaction.objects.create(
+                user=self.user, wallet=self.wallet, category=self.expense_category,
+                amount=Decimal("1000"), type="expense", transaction_date=f"2025-05-0{day}"
+            )
+        expected = list(
+            Transaction.objects.filter(user=self.user)
+            .order_by('-transaction_date', '-id').values_list('id', flat=True)
+        )
+        
+        url = '/api/v1/finance/transactions/?cursor=&page_size=2&count=exact'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            url = response.data['next']
+        
+        self.assertEqual([item['id'] for page in pages for item in page['results']], expected)
+        self.assertEqual(pages[0]['count'], 5)
+        self.assertTrue(pages[0]['count_is_exact'])
+        self.assertIsNone(pages[0]['previous'])
+        
+        # Kembali ke halaman sebelumnya lewat cursor previous
+        response = self.client.get(pages[2]['previous'])
+        self.assertEqual([item['id'] for item in response.data['results']], expected[2:4])
+        self.assertIsNotNone(response.data['previous'])
+        
+        response = self.client.get('/api/v1/finance/transactions/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
     def test_get_transactions_by_category(self):
         # Tambahkan beberapa transaksi dengan kategori yang sama
         for i in range(3):
@@ -331,6 +389,64 @@ class TransactionApiTests(FinanceApiTestCase):
         self.assertEqual(june_data['expense'], '400000.00')
         self.assertEqual(june_data['balance'], '-400000.00')
 
+    
+    def test_bulk_create_transactions(self):
+        other_tag = Tag.objects.create(user=self.user, name="Groceries")
+        url = '/api/v1/finance/transactions/bulk_create/'
+        rows = [
+            {
+                'wallet': self.wallet.id,
+                'category': self.expense_category.id,
+                'amount': '10000',
+                'type': 'expense',
+                'description': f'Statement row {i}',
+                'transaction_date': '2025-05-10',
+                'tag_ids': [self.tag.id, other_tag.id]
+            }
+            for i in range(20)
+        ]
+        rows.append({
+            'wallet': self.wallet2.id,
+            'amount': '250000',
+            'type': 'income',
+            'transaction_date': '2025-05-11'
+        })
+        
+        # Jumlah query tidak bergantung pada jumlah baris
+        with self.assertNumQueries(10):
+            response = self.client.post(url, {'transactions': rows}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created_count'], 21)
+        self.assertEqual(response.data['wallets_updated'], 2)
+        self.assertEqual(TransactionTag.objects.filter(tag=other_tag).count(), 20)
+        
+        self.wallet.refresh_from_db()
+        self.wallet2.refresh_from_db()
+        # Wallet 1: initial (1,000,000) + income (5,000,000) - 20 x 10,000
+        self.assertEqual(self.wallet.current_balance, Decimal('5800000.00'))
+        self.assertEqual(self.wallet2.current_balance, Decimal('350000.00'))
+    
+    def test_bulk_create_reports_row_errors(self):
+        other_user = User.objects.create_user('bulkother', 'bulkother@test.com', 'pass')
+        other_wallet = Wallet.objects.create(user=other_user, name="Other Wallet")
+        url = '/api/v1/finance/transactions/bulk_create/'
+        rows = [
+            {'wallet': self.wallet.id, 'amount': '1000', 'type': 'expense', 'transaction_date': '2025-05-10'},
+            {'wallet': other_wallet.id, 'amount': '1000', 'type': 'expense', 'transaction_date': '2025-05-10'},
+            {'wallet': self.wallet.id, 'amount': 'abc', 'type': 'transfer', 'transaction_date': '2025-05-10'},
+        ]
+        
+        response = self.client.post(url, {'transactions': rows}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['failed_count'], 2)
+        self.assertEqual([row['index'] for row in response.data['failed_transactions']], [1, 2])
+        self.assertIn('wallet', response.data['failed_transactions'][0]['errors'])
+        self.assertIn('amount', response.data['failed_transactions'][1]['errors'])
+        self.assertIn('type', response.data['failed_transactions'][1]['errors'])
+        # Tidak ada yang disimpan jika ada baris gagal
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
 
 class TransferApiTests(FinanceApiTestCase):
     def test_create_transfer(self):
@@ -0,0 +1,32 @@
+# Trading Journal Module Serializers
+
+from .account import (
+    TradingAccountSerializer,
+    TradingStrategySerializer
+)
+
+from .trade import (
+    TradeSerializer,
+    TradeListSerializer,
+    TradeExecutionSerializer
+)
+
+from .performance import (
+    TradingPerformanceSerializer,
+    PerformanceRollupSerializer
+)
+
+__all__ = [
+    # Account & strategy serializers
+    'TradingAccountSerializer',
+    'TradingStrategySerializer',
+    
+    # Trade serializers
+    'TradeSerializer',
+    'TradeListSerializer',
+    'TradeExecutionSerializer',
+    
+    # Performance serializers
+    'TradingPerformanceSerializer',
+    'PerformanceRollupSerializer',
+]
@@ -0,0 +1,50 @@
+from rest_framework import serializers
+from trading.models import TradingAccount, TradingStrategy
+
+
+class TradingAccountSerializer(serializers.ModelSerializer):
+    """
+    Serializer untuk model TradingAccount.
+    
+    Attributes:
+        account_name (str): Nama akun trading
+        broker (str): Nama broker
+        account_type (str): Tipe akun ('stock', 'crypto', 'forex', 'futures')
+        initial_balance (decimal): Saldo awal
+        current_balance (decimal): Saldo saat ini (default: initial_balance)
+        max_daily_loss (decimal): Batas kerugian harian (opsional)
+        max_position_size (decimal): Batas ukuran posisi dalam persen (opsional)
+        risk_enforcement (str): 'reject' (entry yang melanggar batas ditolak)
+            atau 'flag' (entry disimpan dan ditandai)
+        open_exposure (decimal): Cost basis posisi terbuka (read-only)
+        daily_realized_pnl (decimal): Realized P&L pada daily_pnl_date (read-only)
+    """
+    current_balance = serializers.DecimalField(max_digits=15, decimal_places=2, required=False)
+    
+    class Meta:
+        model = TradingAccount
+        fields = ['id', 'account_name', 'broker', 'account_type', 'initial_balance',
+                  'current_balance', 'available_margin', 'max_daily_loss', 'max_position_size',
+                  'risk_enforcement', 'open_exposure', 'daily_realized_pnl', 'daily_pnl_date',
+                  'is_active', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'open_exposure', 'daily_realized_pnl', 'daily_pnl_date',
+                            'created_at', 'updated_at']
+    
+    def create(self, validated_data):
+        validated_data.setdefault('current_balance', validated_data['initial_balance'])
+        validated_data['user'] = self.context['request'].user
+        return super().create(validated_data)
+
+
+class TradingStrategySerializer(serializers.ModelSerializer):
+    """Serializer untuk model TradingStrategy"""
+    
+    class Meta:
+        model = TradingStrategy
+        fields = ['id', 'name', 'description', 'rules', 'risk_reward_ratio',
+                  'win_rate_target', 'timeframe', 'is_active', 'created_at']
+        read_only_fields = ['id', 'created_at']
+    
+    def create(self, validated_data):
+        validated_data['user'] = self.context['request'].user
+        return super().create(validated_data)
@@ -0,0 +1,39 @@
+from rest_framework import serializers
+from trading.models import TradingPerformance
+
+
+class TradingPerformanceSerializer(serializers.ModelSerializer):
+    """
+    Serializer untuk row rollup harian TradingPerformance (read-only).
+    
+    Row dihitung oleh trading.performance dari trade closed per tanggal exit.
+    """
+    account_name = serializers.CharField(source='trading_account.account_name', read_only=True)
+    
+    class Meta:
+        model = TradingPerformance
+        fields = ['id', 'trading_account', 'account_name', 'date', 'starting_balance',
+                  'ending_balance', 'daily_pnl', 'daily_pnl_percentage', 'total_trades',
+                  'winning_trades', 'losing_trades', 'win_rate', 'max_drawdown',
+                  'max_risk_per_trade', 'created_at']
+        read_only_fields = fields
+
+
+class PerformanceRollupSerializer(serializers.Serializer):
+    """
+    Parameter rollup on-demand.
+    
+    Attributes:
+        start_date (date): Tanggal awal (default: sehari sebelum end_date)
+        end_date (date): Tanggal akhir (default: hari ini)
+        account (uuid): Batasi ke satu trading account (opsional)
+    """
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    account = serializers.UUIDField(required=False)
+    
+    def validate(self, data):
+        start_date, end_date = data.get('start_date'), data.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError({'start_date': 'start_date harus sebelum atau sama dengan end_date'})
+        return data
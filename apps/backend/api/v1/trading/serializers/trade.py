@@ -0,0 +1,184 @@
+from rest_framework import serializers
+from invest.models import Asset
+from trading.aggregation import ExecutionError, check_executions
+from trading.risk import check_entry, flag_trade
+from trading.models import Trade, TradeExecution, TradingAccount, TradingStrategy
+
+
+# Field agregat yang dihitung dari fill (trading.aggregation), tidak bisa diisi client
+AGGREGATE_FIELDS = ['status', 'total_quantity', 'average_entry_price', 'average_exit_price',
+                    'total_fees', 'open_quantity', 'exit_quantity', 'realized_pnl',
+                    'pnl_percentage', 'holding_time', 'entered_at', 'exited_at']
+
+
+class RiskCheckMixin:
+    """
+    Guardrail batas akun (trading.risk) saat order entry.
+    
+    Pelanggaran ditolak dengan 400 jika risk_enforcement akun 'reject', atau
+    disimpan di risk_breaches trade jika 'flag'.
+    """
+    
+    def check_risk(self, account, value, trade=None):
+        breaches = check_entry(account, value, trade)
+        if breaches and account.risk_enforcement == 'reject':
+            raise serializers.ValidationError({'risk_breaches': [breach['message'] for breach in breaches]})
+        self.risk_breaches = breaches
+    
+    def flag_risk(self, trade):
+        breaches = getattr(self, 'risk_breaches', None)
+        if breaches:
+            flag_trade(trade, breaches)
+
+
+class TradeExecutionSerializer(RiskCheckMixin, serializers.ModelSerializer):
+    """
+    Serializer untuk model TradeExecution (fill).
+    
+    Setiap fill yang disimpan langsung memperbarui agregat trade-nya. Fill
+    entry baru dicek terhadap batas akun (max_position_size, max_daily_loss).
+    
+    Attributes:
+        trade (uuid): ID trade
+        execution_type (str): 'entry', 'exit', atau 'partial_exit'
+        quantity (decimal): Jumlah unit (> 0)
+        price (decimal): Harga fill (> 0)
+        fees (decimal): Biaya fill
+        executed_at (datetime): Waktu eksekusi
+    """
+    trade = serializers.PrimaryKeyRelatedField(queryset=Trade.objects.all())
+    
+    class Meta:
+        model = TradeExecution
+        fields = ['id', 'trade', 'execution_type', 'quantity', 'price', 'fees',
+                  'executed_at', 'notes', 'created_at']
+        read_only_fields = ['id', 'created_at']
+    
+    def validate_trade(self, trade):
+        if trade.user_id != self.context['request'].user.pk:
+            raise serializers.ValidationError("Trade not found or you don't have access")
+        if trade.status == 'cancelled':
+            raise serializers.ValidationError('Trade sudah dibatalkan')
+        return trade
+    
+    def validate(self, data):
+        """Validasi quantity/harga dan posisi terbuka trade"""
+        if self.instance is not None:
+            for field in ['trade', 'execution_type', 'quantity', 'price', 'fees', 'executed_at']:
+                data.setdefault(field, getattr(self.instance, field))
+        
+        if data['quantity'] <= 0:
+            raise serializers.ValidationError({'quantity': 'Quantity harus lebih dari 0'})
+        if data['price'] <= 0:
+            raise serializers.ValidationError({'price': 'Price harus lebih dari 0'})
+        if data.get('fees', 0) < 0:
+            raise serializers.ValidationError({'fees': 'Fees tidak boleh negatif'})
+        
+        trade = data['trade']
+        if self.instance is not None and self.instance.trade_id != trade.pk:
+            raise serializers.ValidationError({'trade': 'Fill tidak bisa dipindah ke trade lain'})
+        if self.instance is None and data['execution_type'] == 'entry':
+            self.check_risk(trade.trading_account, data['quantity'] * data['price'], trade)
+        
+        appended = self.instance is None and not trade.executions.filter(executed_at__gt=data['executed_at']).exists()
+        if appended:
+            # Fill baru di akhir history: cukup dibandingkan dengan posisi terbuka (O(1))
+            if data['execution_type'] != 'entry' and data['quantity'] > trade.open_quantity:
+                raise serializers.ValidationError({
+                    'quantity': f'Quantity exit melebihi posisi terbuka ({trade.open_quantity})'
+                })
+            return data
+        
+        # Fill diedit/disisipkan di tengah history: replay di memory
+        executions = [execution for execution in trade.executions.all()
+                      if self.instance is None or execution.pk != self.instance.pk]
+        candidate = TradeExecution(**{
+            field: data[field] for field in ['trade', 'execution_type', 'quantity', 'price', 'executed_at']
+        }, fees=data.get('fees', 0))
+        if self.instance is not None:
+            candidate.pk, candidate.created_at = self.instance.pk, self.instance.created_at
+        try:
+            check_executions(trade, executions + [candidate])
+        except ExecutionError as exc:
+            raise serializers.ValidationError({'quantity': str(exc)})
+        return data
+    
+    def create(self, validated_data):
+        execution = super().create(validated_data)
+        self.flag_risk(validated_data['trade'])
+        return execution
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if getattr(self, 'risk_breaches', None):
+            # Pelanggaran yang di-flag pada fill ini (mode flag)
+            data['risk_breaches'] = self.risk_breaches
+        return data
+
+
+class TradeListSerializer(serializers.ModelSerializer):
+    """Lightweight serializer untuk list trade"""
+    asset_symbol = serializers.CharField(source='asset.symbol', read_only=True)
+    account_name = serializers.CharField(source='trading_account.account_name', read_only=True)
+    strategy_name = serializers.CharField(source='strategy.name', read_only=True, default=None)
+    
+    class Meta:
+        model = Trade
+        fields = ['id', 'asset_symbol', 'account_name', 'strategy_name', 'side', 'status',
+                  'total_quantity', 'open_quantity', 'average_entry_price', 'average_exit_price',
+                  'realized_pnl', 'pnl_percentage', 'entered_at', 'exited_at']
+
+
+class TradeSerializer(RiskCheckMixin, serializers.ModelSerializer):
+    """
+    Full serializer untuk model Trade.
+    
+    Quantity, harga rata-rata, fee, P&L, status open/closed, dan holding
+    time dihitung dari fill (lihat /executions/) dan read-only. Rencana
+    trade baru (planned_quantity x planned_entry) dicek terhadap batas akun.
+    
+    Attributes:
+        trading_account (uuid): ID akun trading
+        asset (uuid): ID asset
+        strategy (uuid): ID strategi (opsional)
+        side (str): 'long' atau 'short'
+        planned_* : Rencana entry, target, stop loss, quantity, dan risk
+    """
+    trading_account = serializers.PrimaryKeyRelatedField(queryset=TradingAccount.objects.all())
+    asset = serializers.PrimaryKeyRelatedField(queryset=Asset.objects.all())
+    strategy = serializers.PrimaryKeyRelatedField(
+        queryset=TradingStrategy.objects.all(), required=False, allow_null=True
+    )
+    asset_symbol = serializers.CharField(source='asset.symbol', read_only=True)
+    executions = TradeExecutionSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = Trade
+        fields = ['id', 'trading_account', 'asset', 'asset_symbol', 'strategy',
+                  'planned_entry', 'planned_target', 'planned_stop_loss', 'planned_quantity',
+                  'planned_risk_amount', 'side', *AGGREGATE_FIELDS,
+                  'market_condition', 'emotional_state', 'setup_quality', 'execution_quality',
+                  'notes', 'screenshot_urls', 'risk_breaches', 'planned_at', 'executions',
+                  'created_at', 'updated_at']
+        read_only_fields = ['id', *AGGREGATE_FIELDS, 'risk_breaches', 'created_at', 'updated_at']
+    
+    def validate_trading_account(self, account):
+        if account.user_id != self.context['request'].user.pk:
+            raise serializers.ValidationError("Trading account not found or you don't have access")
+        return account
+    
+    def validate_strategy(self, strategy):
+        if strategy is not None and strategy.user_id != self.context['request'].user.pk:
+            raise serializers.ValidationError("Strategy not found or you don't have access")
+        return strategy
+    
+    def validate(self, data):
+        if self.instance is None and data.get('planned_quantity') and data.get('planned_entry'):
+            self.check_risk(data['trading_account'], data['planned_quantity'] * data['planned_entry'])
+        return data
+    
+    def create(self, validated_data):
+        validated_data['user'] = self.context['request'].user
+        trade = super().create(validated_data)
+        self.flag_risk(trade)
+        return trade
@@ -0,0 +1,299 @@
+"""
+Basic tests untuk Trading Journal Module API
+"""
+
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from decimal import Decimal
+
+from invest.models import Asset
+from trading.models import Trade, TradingAccount, TradingPerformance
+
+User = get_user_model()
+
+
+class TradingAPITestCase(APITestCase):
+    """Base test case untuk Trading API"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='trader',
+            email='trader@example.com',
+            password='testpass123'
+        )
+        self.asset = Asset.objects.create(
+            symbol='BBCA',
+            name='Bank Central Asia Tbk',
+            type='stock',
+            exchange='IDX',
+            currency='IDR'
+        )
+        self.account = TradingAccount.objects.create(
+            user=self.user,
+            account_name='Main Account',
+            broker='Test Broker',
+            account_type='stock',
+            initial_balance=Decimal('100000000.00'),
+            current_balance=Decimal('100000000.00')
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def create_trade(self, side='long'):
+        response = self.client.post(reverse('trade-list'), {
+            'trading_account': str(self.account.id),
+            'asset': str(self.asset.id),
+            'side': side,
+            'planned_entry': '9000.00',
+            'planned_stop_loss': '8800.00',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+    
+    def add_execution(self, trade_id, execution_type, quantity, price, executed_at, fees='0'):
+        return self.client.post(reverse('trade-execution-list'), {
+            'trade': trade_id,
+            'execution_type': execution_type,
+            'quantity': quantity,
+            'price': price,
+            'fees': fees,
+            'executed_at': executed_at,
+        }, format='json')
+
+
+class TradeAPITest(TradingAPITestCase):
+    """Test trade dan fill lewat API"""
+    
+    def test_trade_lifecycle_from_executions(self):
+        """Test trade dibuat, diisi fill, dan ditutup dengan agregat otomatis"""
+        trade_id = self.create_trade()
+        
+        response = self.add_execution(trade_id, 'entry', '100', '9000.00', '2025-06-02T02:00:00Z', fees='900')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.add_execution(trade_id, 'partial_exit', '40', '9300.00', '2025-06-02T03:00:00Z')
+        
+        response = self.client.get(reverse('trade-detail', kwargs={'pk': trade_id}))
+        self.assertEqual(response.data['status'], 'open')
+        self.assertEqual(Decimal(response.data['open_quantity']), Decimal('60'))
+        self.assertEqual(Decimal(response.data['realized_pnl']), Decimal('11100.00'))
+        self.assertEqual(len(response.data['executions']), 2)
+        
+        # Exit melebihi posisi terbuka ditolak
+        response = self.add_execution(trade_id, 'exit', '70', '9400.00', '2025-06-02T04:00:00Z')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', response.data)
+        
+        self.add_execution(trade_id, 'exit', '60', '9400.00', '2025-06-02T04:00:00Z')
+        response = self.client.get(reverse('trade-list'), {'status': 'closed'})
+        self.assertEqual(response.data['count'], 1)
+        trade = response.data['results'][0]
+        self.assertEqual(Decimal(trade['average_exit_price']), Decimal('9360.00'))
+        self.assertEqual(Decimal(trade['realized_pnl']), Decimal('35100.00'))
+    
+    def test_aggregate_fields_are_read_only(self):
+        """Test field agregat tidak bisa diisi client"""
+        trade_id = self.create_trade()
+        response = self.client.patch(reverse('trade-detail', kwargs={'pk': trade_id}), {
+            'realized_pnl': '999999',
+            'notes': 'Breakout setup'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.data['realized_pnl']), Decimal('0'))
+        self.assertEqual(response.data['notes'], 'Breakout setup')
+    
+    def test_backdated_edit_is_validated_by_replay(self):
+        """Test edit fill yang membuat posisi negatif ditolak"""
+        trade_id = self.create_trade(side='short')
+        entry = self.add_execution(trade_id, 'entry', '10', '5000.00', '2025-06-02T02:00:00Z').data
+        self.add_execution(trade_id, 'exit', '10', '4800.00', '2025-06-02T05:00:00Z')
+        
+        url = reverse('trade-execution-detail', kwargs={'pk': entry['id']})
+        response = self.client.patch(url, {'quantity': '5'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.patch(url, {'price': '5100.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        trade = Trade.objects.get(pk=trade_id)
+        self.assertEqual(trade.realized_pnl, Decimal('3000.00'))
+    
+    def test_delete_entry_backing_exit_is_rejected(self):
+        """Test hapus entry yang menjadi dasar exit ditolak tanpa mengubah data"""
+        trade_id = self.create_trade()
+        entry = self.add_execution(trade_id, 'entry', '10', '9000.00', '2025-06-02T02:00:00Z').data
+        self.add_execution(trade_id, 'exit', '10', '9200.00', '2025-06-02T05:00:00Z')
+        
+        response = self.client.delete(reverse('trade-execution-detail', kwargs={'pk': entry['id']}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', response.data)
+        trade = Trade.objects.get(pk=trade_id)
+        self.assertEqual(trade.executions.count(), 2)
+        self.assertEqual(trade.status, 'closed')
+        self.assertEqual(trade.realized_pnl, Decimal('2000.00'))
+    
+    def test_other_user_cannot_use_account_or_trade(self):
+        """Test akun dan trade user lain tidak bisa dipakai"""
+        trade_id = self.create_trade()
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.client.force_authenticate(user=other)
+        
+        response = self.client.post(reverse('trade-list'), {
+            'trading_account': str(self.account.id), 'asset': str(self.asset.id), 'side': 'long'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.add_execution(trade_id, 'entry', '1', '9000.00', '2025-06-02T02:00:00Z')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse('trade-detail', kwargs={'pk': trade_id})).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+
+class AccountRiskAPITest(TradingAPITestCase):
+    """Test guardrail batas akun saat order entry dan endpoint utilisasi"""
+    
+    def setUp(self):
+        super().setUp()
+        # Maksimum posisi 1% x 100 juta = 1 juta
+        self.account.max_position_size = Decimal('1.00')
+        self.account.save()
+    
+    def test_reject_mode_blocks_oversized_entry(self):
+        """Test rencana dan fill entry yang melebihi max_position_size ditolak"""
+        response = self.client.post(reverse('trade-list'), {
+            'trading_account': str(self.account.id), 'asset': str(self.asset.id), 'side': 'long',
+            'planned_entry': '9000.00', 'planned_quantity': '200',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('risk_breaches', response.data)
+        
+        trade_id = self.create_trade()
+        response = self.add_execution(trade_id, 'entry', '100', '9000.00', '2025-06-02T02:00:00Z')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.add_execution(trade_id, 'entry', '20', '9000.00', '2025-06-02T03:00:00Z')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Trade.objects.get(pk=trade_id).total_quantity, Decimal('100'))
+    
+    def test_flag_mode_records_breach_and_utilization(self):
+        """Test mode flag menyimpan entry beserta pelanggaran, dan utilisasi akun"""
+        self.account.risk_enforcement = 'flag'
+        self.account.save()
+        trade_id = self.create_trade()
+        response = self.add_execution(trade_id, 'entry', '120', '9000.00', '2025-06-02T02:00:00Z')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['risk_breaches'][0]['limit'], 'max_position_size')
+        
+        response = self.client.get(reverse('trade-detail', kwargs={'pk': trade_id}))
+        self.assertEqual(len(response.data['risk_breaches']), 1)
+        
+        response = self.client.get(reverse('trading-account-risk', kwargs={'pk': self.account.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.data['open_exposure']), Decimal('1080000.00'))
+        self.assertEqual(Decimal(response.data['max_position_value']), Decimal('1000000.00'))
+        self.assertFalse(response.data['entries_blocked'])
+
+
+class EquityCurveAPITest(TradingAPITestCase):
+    """Test equity curve akun lewat API"""
+    
+    def test_equity_curve_downsampled_with_statistics(self):
+        """Test series equity dari trade closed, downsampling, dan validasi parameter"""
+        for day, exit_price in ((2, '9100.00'), (3, '8900.00'), (4, '8950.00'), (5, '9300.00')):
+            trade_id = self.create_trade()
+            self.add_execution(trade_id, 'entry', '100', '9000.00', f'2025-06-0{day}T02:00:00Z')
+            self.add_execution(trade_id, 'exit', '100', exit_price, f'2025-06-0{day}T05:00:00Z')
+        
+        url = reverse('trading-account-equity', kwargs={'pk': self.account.id})
+        response = self.client.get(url, {'max_points': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['points_count'], 4)
+        self.assertEqual(len(response.data['equity_curve']), 3)
+        self.assertEqual(Decimal(response.data['equity_curve'][-1]['balance']), Decimal('100025000.00'))
+        self.assertEqual(response.data['statistics']['max_drawdown'], 15000.0)
+        self.assertEqual(response.data['statistics']['max_time_under_water_days'], 3.0)
+        
+        response = self.client.get(url, {'start_date': '2025-06-04'})
+        self.assertEqual(response.data['points_count'], 2)
+        
+        self.assertEqual(self.client.get(url, {'max_points': 2}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'end_date': 'kemarin'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StrategyStatisticsAPITest(TradingAPITestCase):
+    """Test statistik strategi lewat API"""
+    
+    def test_statistics_compares_plan_and_outcome(self):
+        """Test statistics strategi dari trade closed dan akses user lain"""
+        strategy = self.client.post(reverse('trading-strategy-list'), {
+            'name': 'Breakout', 'risk_reward_ratio': '2.00', 'win_rate_target': '40.00'
+        }, format='json').data
+        trade_id = self.create_trade()
+        self.client.patch(reverse('trade-detail', kwargs={'pk': trade_id}), {
+            'strategy': strategy['id'], 'setup_quality': 'A'
+        }, format='json')
+        self.add_execution(trade_id, 'entry', '100', '9000.00', '2025-06-02T02:00:00Z')
+        self.add_execution(trade_id, 'exit', '100', '9400.00', '2025-06-03T02:00:00Z')
+        
+        url = reverse('trading-strategy-statistics', kwargs={'pk': strategy['id']})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['summary']['trades'], 1)
+        self.assertEqual(response.data['summary']['win_rate'], 100.0)
+        # 1R = (9000 - 8800) x 100 = 20000; P&L 40000
+        self.assertEqual(response.data['summary']['average_r_multiple'], 2.0)
+        self.assertEqual(response.data['plan_vs_actual']['win_rate_gap'], 60.0)
+        self.assertEqual(response.data['breakdowns']['setup_quality'][0]['label'], 'Excellent')
+        
+        # Target strategi yang diedit langsung terlihat (cache di-invalidasi)
+        self.client.patch(reverse('trading-strategy-detail', kwargs={'pk': strategy['id']}), {
+            'win_rate_target': '70.00'
+        }, format='json')
+        response = self.client.get(url)
+        self.assertEqual(Decimal(response.data['plan_vs_actual']['win_rate_target']), Decimal('70.00'))
+        self.assertEqual(response.data['plan_vs_actual']['win_rate_gap'], 30.0)
+        
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TradingPerformanceAPITest(TradingAPITestCase):
+    """Test rollup dan pembacaan performa harian lewat API"""
+    
+    def test_rollup_then_list_and_summary(self):
+        """Test rollup on-demand mengisi row yang dibaca list dan summary"""
+        trade_id = self.create_trade()
+        self.add_execution(trade_id, 'entry', '100', '9000.00', '2025-06-02T02:00:00Z')
+        self.add_execution(trade_id, 'exit', '100', '9100.00', '2025-06-03T02:00:00Z')
+        
+        summary_url = reverse('trading-performance-summary')
+        self.assertEqual(self.client.get(summary_url).data['trading_days'], 0)
+        
+        response = self.client.post(reverse('trading-performance-rollup'), {
+            'start_date': '2025-06-01', 'end_date': '2025-06-30'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rows_upserted'], 1)
+        
+        response = self.client.get(reverse('trading-performance-list'), {'account': str(self.account.id)})
+        self.assertEqual(response.data['count'], 1)
+        row = response.data['results'][0]
+        self.assertEqual(row['date'], '2025-06-03')
+        self.assertEqual(Decimal(row['daily_pnl']), Decimal('10000.00'))
+        self.assertEqual(Decimal(row['ending_balance']), Decimal('100010000.00'))
+        
+        # Cache summary diinvalidasi oleh rollup
+        response = self.client.get(summary_url)
+        self.assertEqual(response.data['trading_days'], 1)
+        self.assertEqual(Decimal(response.data['win_rate']), Decimal('100.00'))
+    
+    def test_rollup_validates_range_and_account(self):
+        """Test rentang terbalik dan akun user lain ditolak"""
+        url = reverse('trading-performance-rollup')
+        response = self.client.post(url, {'start_date': '2025-06-30', 'end_date': '2025-06-01'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.client.force_authenticate(user=other)
+        response = self.client.post(url, {'account': str(self.account.id)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(TradingPerformance.objects.exists())
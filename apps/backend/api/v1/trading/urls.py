@@ -0,0 +1,67 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import (
+    TradingAccountViewSet,
+    TradingStrategyViewSet,
+    TradeViewSet,
+    TradeExecutionViewSet,
+    TradingPerformanceViewSet
+)
+
+"""
+Trading Journal API Endpoints
+
+Endpoint yang tersedia:
+
+- /accounts/ - Manajemen akun trading (saldo, batas risiko)
+- /strategies/ - Manajemen strategi trading
+- /trades/ - Trading journal (rencana, hasil, dan analisis trade)
+- /executions/ - Fill trade (entry/exit/partial_exit)
+- /performance/ - Performa harian akun trading (rollup)
+
+## Account Endpoints:
+- GET /accounts/{id}/risk/ - Utilisasi batas risiko live (exposure, P&L harian, entry diblokir)
+- GET /accounts/{id}/equity/ - Equity curve (saldo, puncak, drawdown per trade closed),
+  di-downsample dengan max_points, beserta max drawdown dan time-under-water
+
+## Strategy Endpoints:
+- GET /strategies/{id}/statistics/ - Win rate, expectancy, profit factor, R-multiple,
+  breakdown per emosi/kualitas setup/kondisi market/kualitas eksekusi
+
+## Trade Endpoints:
+- GET /trades/ - List trade dengan filtering (account, strategy, status, side, tanggal)
+- POST /trades/ - Create trade (rencana)
+- GET /trades/{id}/ - Detail trade beserta fill
+- PUT /trades/{id}/ - Update rencana/analisis trade
+- DELETE /trades/{id}/ - Delete trade
+- POST /trades/{id}/rebuild/ - Hitung ulang agregat trade dari fill
+- GET /trades/choices/ - Pilihan side, status, kondisi market, emosi, kualitas
+
+## Execution Endpoints:
+- GET /executions/?trade={id} - List fill trade
+- POST /executions/ - Tambah fill (agregat trade diperbarui O(1))
+- PUT /executions/{id}/ - Edit fill (trade di-replay)
+- DELETE /executions/{id}/ - Hapus fill (trade di-replay)
+
+## Performance Endpoints:
+- GET /performance/ - List row performa harian (filter account, start_date, end_date)
+- GET /performance/summary/ - Ringkasan P&L, win rate, drawdown dari row harian
+- POST /performance/rollup/ - Hitung ulang rentang tanggal on-demand (?async=true untuk job)
+
+Quantity, harga rata-rata entry/exit, fee, realized P&L, status open/closed,
+dan holding time trade dihitung dari fill dan read-only. Entry (rencana
+trade dan fill entry) yang melanggar max_position_size atau max_daily_loss
+ditolak atau ditandai di risk_breaches sesuai risk_enforcement akun. Row performa
+dihitung tiap malam oleh `manage.py rollup_trading_performance`.
+"""
+
+router = DefaultRouter()
+router.register(r'accounts', TradingAccountViewSet, basename='trading-account')
+router.register(r'strategies', TradingStrategyViewSet, basename='trading-strategy')
+router.register(r'trades', TradeViewSet, basename='trade')
+router.register(r'executions', TradeExecutionViewSet, basename='trade-execution')
+router.register(r'performance', TradingPerformanceViewSet, basename='trading-performance')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,13 @@
+# Trading Journal Module Views
+
+from .account import TradingAccountViewSet, TradingStrategyViewSet
+from .trade import TradeViewSet, TradeExecutionViewSet
+from .performance import TradingPerformanceViewSet
+
+__all__ = [
+    'TradingAccountViewSet',
+    'TradingStrategyViewSet',
+    'TradeViewSet',
+    'TradeExecutionViewSet',
+    'TradingPerformanceViewSet',
+]
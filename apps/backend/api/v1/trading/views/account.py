@@ -0,0 +1,173 @@
+from datetime import date
+
+from rest_framework import viewsets, permissions, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from invest.timeseries import lttb
+from trading.models import TradingAccount, TradingStrategy
+from trading.equity import drawdown_statistics, equity_series
+from trading.risk import account_utilization
+from trading.statistics import strategy_statistics
+from ..serializers import TradingAccountSerializer, TradingStrategySerializer
+from api.utils.permissions import IsOwner
+from api.utils.mixins import ChoicesMixin, ConditionalGetMixin
+
+
+class TradingAccountViewSet(ConditionalGetMixin, ChoicesMixin, viewsets.ModelViewSet):
+    """
+    Manajemen akun trading.
+    
+    Akun trading menyimpan saldo dan batas risiko (max daily loss, max
+    position size) untuk trade yang dijalankan di broker tertentu. Batas
+    dicek saat order entry dari counter exposure dan P&L harian akun yang
+    diperbarui setiap fill (lihat trading.risk).
+    """
+    serializer_class = TradingAccountSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ['account_name', 'broker']
+    ordering_fields = ['account_name', 'created_at', 'current_balance']
+    ordering = ['account_name']
+    
+    # Default jumlah titik maksimal equity curve (downsampling LTTB)
+    equity_max_points = 500
+    
+    choices_config = {
+        'account_types': {
+            'choices': TradingAccount.ACCOUNT_TYPE_CHOICES,
+            'description': 'Tipe akun trading yang tersedia'
+        },
+        'risk_enforcements': {
+            'choices': TradingAccount.RISK_ENFORCEMENT_CHOICES,
+            'description': 'Tindakan saat entry melanggar batas risiko akun'
+        }
+    }
+    
+    def get_queryset(self):
+        """
+        Query Parameters:
+        - is_active: Filter berdasarkan status aktif (true/false)
+        - account_type: Filter berdasarkan tipe akun
+        """
+        queryset = TradingAccount.objects.filter(user=self.request.user)
+        
+        is_active = self.request.query_params.get('is_active')
+        if is_active is not None:
+            queryset = queryset.filter(is_active=is_active.lower() == 'true')
+        
+        account_type = self.request.query_params.get('account_type')
+        if account_type:
+            queryset = queryset.filter(account_type=account_type)
+        
+        return queryset
+    
+    @action(detail=True, methods=['get'])
+    def risk(self, request, pk=None):
+        """
+        Utilisasi batas risiko akun secara live.
+        
+        Dibaca dari counter akun (open exposure, realized P&L hari ini) tanpa
+        scan trade: exposure terhadap saldo, pemakaian max_daily_loss, nilai
+        posisi maksimum, dan apakah entry baru sedang diblokir.
+        """
+        account = self.get_object()
+        return Response({
+            'account_id': account.id,
+            'account_name': account.account_name,
+            'current_balance': account.current_balance,
+            **account_utilization(account)
+        })
+    
+    @action(detail=True, methods=['get'])
+    def equity(self, request, pk=None):
+        """
+        Equity curve akun: saldo setelah setiap trade closed, puncak, dan drawdown.
+        
+        Series dibaca dari tabel titik equity yang di-append saat trade
+        ditutup (lihat trading.equity); statistik drawdown dihitung dari
+        series penuh, lalu series di-downsample dengan LTTB.
+        
+        Query Parameters:
+        - start_date: Titik sejak tanggal ini (YYYY-MM-DD)
+        - end_date: Titik sampai tanggal ini (YYYY-MM-DD)
+        - max_points: Jumlah titik maksimal (minimal 3, default 500)
+        """
+        account = self.get_object()
+        
+        try:
+            max_points = int(request.query_params.get('max_points', self.equity_max_points))
+        except ValueError:
+            return Response({'error': 'max_points harus berupa angka'}, status=status.HTTP_400_BAD_REQUEST)
+        if max_points < 3:
+            return Response({'error': 'max_points minimal 3'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            start_date, end_date = (
+                date.fromisoformat(value) if value else None
+                for value in (request.query_params.get('start_date'), request.query_params.get('end_date'))
+            )
+        except ValueError:
+            return Response({'error': 'Format tanggal harus YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        series = equity_series(account, start=start_date, end=end_date)
+        points = lttb(series, max_points, x=lambda point: point['timestamp'].timestamp(),
+                      y=lambda point: point['balance'])
+        
+        return Response({
+            'account_id': account.id,
+            'initial_balance': account.initial_balance,
+            'points_count': len(series),
+            'statistics': drawdown_statistics(series),
+            'equity_curve': points,
+        })
+
+
+class TradingStrategyViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """
+    Manajemen strategi trading (rules, target risk/reward dan win rate).
+    
+    Action statistics membandingkan rencana strategi dengan hasil trade
+    closed (win rate, expectancy, profit factor, R-multiple).
+    """
+    serializer_class = TradingStrategySerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ['name', 'description']
+    ordering_fields = ['name', 'created_at']
+    ordering = ['name']
+    conditional_fields = ('created_at',)
+    
+    def get_queryset(self):
+        """
+        Query Parameters:
+        - is_active: Filter berdasarkan status aktif (true/false)
+        """
+        queryset = TradingStrategy.objects.filter(user=self.request.user)
+        
+        is_active = self.request.query_params.get('is_active')
+        if is_active is not None:
+            queryset = queryset.filter(is_active=is_active.lower() == 'true')
+        
+        return queryset
+    
+    @action(detail=True, methods=['get'])
+    def statistics(self, request, pk=None):
+        """
+        Statistik strategi dari trade closed.
+        
+        Response berisi summary (win rate, expectancy, profit factor, payoff
+        ratio, rata-rata R-multiple), plan_vs_actual terhadap win_rate_target
+        dan risk_reward_ratio, breakdowns per emotional_state, setup_quality,
+        market_condition dan execution_quality, serta distribution (percentile
+        P&L dan R, streak, max drawdown). Di-cache per strategi sampai ada
+        trade strategi ini yang ditutup atau diubah (lihat trading.statistics).
+        """
+        strategy = self.get_object()
+        return Response({
+            'strategy': {
+                'id': strategy.id,
+                'name': strategy.name,
+            },
+            **strategy_statistics(strategy)
+        })
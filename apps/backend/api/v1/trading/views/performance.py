@@ -0,0 +1,119 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from rest_framework import viewsets, permissions, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from trading.models import TradingAccount, TradingPerformance
+from trading.performance import rollup_performance
+from ..serializers import TradingPerformanceSerializer, PerformanceRollupSerializer
+from api.utils.mixins import AsyncJobMixin, CachedResponseMixin, ConditionalGetMixin
+
+
+class TradingPerformanceViewSet(ConditionalGetMixin, CachedResponseMixin, AsyncJobMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Performa harian akun trading (dashboard).
+    
+    Row dihitung di muka oleh rollup (`manage.py rollup_trading_performance`
+    tiap malam, atau POST /performance/rollup/ on-demand) dengan satu grouped
+    query atas trade closed, jadi dashboard hanya membaca row yang sudah jadi.
+    """
+    serializer_class = TradingPerformanceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['date', 'daily_pnl', 'win_rate', 'max_drawdown']
+    ordering = ['-date']
+    
+    # Action yang bisa dijalankan sebagai job background dengan ?async=true
+    async_actions = ['rollup']
+    cached_actions = ['summary']
+    conditional_fields = ('created_at',)
+    
+    def get_queryset(self):
+        """
+        Query Parameters:
+        - account: Filter berdasarkan trading account ID
+        - start_date: Row sejak tanggal ini (YYYY-MM-DD)
+        - end_date: Row sampai tanggal ini (YYYY-MM-DD)
+        """
+        queryset = TradingPerformance.objects.filter(user=self.request.user).select_related('trading_account')
+    
+        params = self.request.query_params
+        for param, lookup in (('account', 'trading_account_id'), ('start_date', 'date__gte'),
+                              ('end_date', 'date__lte')):
+            value = params.get(param)
+            if value:
+                queryset = queryset.filter(**{lookup: value})
+    
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Ringkasan performa dari row rollup (filter sama dengan list).
+    
+        Satu query aggregate atas row harian, tanpa menyentuh tabel trade.
+        """
+        stats = self.get_queryset().order_by().aggregate(
+            trading_days=Count('id'),
+            total_pnl=Sum('daily_pnl'),
+            total_trades=Sum('total_trades'),
+            winning_trades=Sum('winning_trades'),
+            losing_trades=Sum('losing_trades'),
+            max_drawdown=Max('max_drawdown'),
+            max_risk_per_trade=Max('max_risk_per_trade'),
+        )
+        total_trades = stats['total_trades'] or 0
+        winning_trades = stats['winning_trades'] or 0
+        win_rate = (
+            (Decimal(winning_trades) / total_trades * 100).quantize(Decimal('0.01')) if total_trades else Decimal('0')
+        )
+    
+        return Response({
+            'trading_days': stats['trading_days'],
+            'total_pnl': stats['total_pnl'] or Decimal('0'),
+            'total_trades': total_trades,
+            'winning_trades': winning_trades,
+            'losing_trades': stats['losing_trades'] or 0,
+            'win_rate': win_rate,
+            'max_drawdown': stats['max_drawdown'] or Decimal('0'),
+            'max_risk_per_trade': stats['max_risk_per_trade'] or Decimal('0'),
+        })
+    
+    @action(detail=False, methods=['post'])
+    def rollup(self, request):
+        """
+        Hitung ulang row performa untuk rentang tanggal (idempotent).
+    
+        Body:
+        - start_date: Tanggal awal (default: sehari sebelum end_date)
+        - end_date: Tanggal akhir (default: hari ini)
+        - account: Batasi ke satu trading account (opsional)
+        """
+        serializer = PerformanceRollupSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+    
+        end_date = params.get('end_date') or timezone.localdate()
+        start_date = params.get('start_date') or end_date - timedelta(days=1)
+        if start_date > end_date:
+            return Response(
+                {'error': 'start_date harus sebelum atau sama dengan end_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+        accounts = TradingAccount.objects.filter(user=request.user)
+        if 'account' in params:
+            accounts = accounts.filter(pk=params['account'])
+            if not accounts.exists():
+                return Response({'error': 'Trading account tidak ditemukan'}, status=status.HTTP_400_BAD_REQUEST)
+    
+        stats = rollup_performance(start_date, end_date, accounts)
+        return Response({
+            'start_date': start_date,
+            'end_date': end_date,
+            **stats,
+        })
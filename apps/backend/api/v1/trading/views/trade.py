@@ -0,0 +1,171 @@
+from rest_framework import viewsets, permissions, filters
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from django.db import transaction as db_transaction
+
+from trading.aggregation import ExecutionError, check_executions, rebuild_trade
+from trading.models import Trade, TradeExecution
+from ..serializers import TradeSerializer, TradeListSerializer, TradeExecutionSerializer
+from api.utils.permissions import IsOwner
+from api.utils.mixins import ChoicesMixin, ConditionalGetMixin
+
+
+class TradeViewSet(ConditionalGetMixin, ChoicesMixin, viewsets.ModelViewSet):
+    """
+    Trading journal: rencana, eksekusi, dan analisis trade.
+    
+    Trade dibuat dengan rencana (entry, target, stop loss) lalu diisi fill
+    lewat /executions/. Quantity, harga rata-rata entry/exit, fee, realized
+    P&L, status open/closed, dan holding time diperbarui otomatis setiap
+    kali fill ditambahkan (lihat trading.aggregation).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ['asset__symbol', 'asset__name', 'notes']
+    ordering_fields = ['entered_at', 'exited_at', 'realized_pnl', 'pnl_percentage', 'created_at']
+    ordering = ['-created_at']
+    
+    choices_config = {
+        'sides': {
+            'choices': Trade.SIDE_CHOICES,
+            'description': 'Arah posisi trade'
+        },
+        'statuses': {
+            'choices': Trade.STATUS_CHOICES,
+            'description': 'Status trade'
+        },
+        'market_conditions': {
+            'choices': Trade.MARKET_CONDITION_CHOICES,
+            'description': 'Kondisi market saat trade'
+        },
+        'emotional_states': {
+            'choices': Trade.EMOTIONAL_STATE_CHOICES,
+            'description': 'Kondisi emosi saat trade'
+        },
+        'setup_qualities': {
+            'choices': Trade.QUALITY_CHOICES,
+            'description': 'Kualitas setup trade'
+        },
+        'execution_qualities': {
+            'choices': Trade.EXECUTION_QUALITY_CHOICES,
+            'description': 'Kualitas eksekusi trade'
+        },
+        'execution_types': {
+            'choices': TradeExecution.EXECUTION_TYPE_CHOICES,
+            'description': 'Tipe fill'
+        }
+    }
+    
+    def get_serializer_class(self):
+        """Menggunakan serializer yang berbeda untuk list dan detail view"""
+        if self.action == 'list':
+            return TradeListSerializer
+        return TradeSerializer
+    
+    def get_queryset(self):
+        """
+        Filter queryset untuk hanya menampilkan trade milik user saat ini.
+        
+        Query Parameters:
+        - account: Filter berdasarkan trading account ID
+        - strategy: Filter berdasarkan strategy ID
+        - asset: Filter berdasarkan asset ID
+        - status: Filter berdasarkan status (planned/open/closed/cancelled)
+        - side: Filter berdasarkan side (long/short)
+        - start_date: Trade yang di-entry sejak tanggal ini (YYYY-MM-DD)
+        - end_date: Trade yang di-entry sampai tanggal ini (YYYY-MM-DD)
+        """
+        queryset = Trade.objects.filter(user=self.request.user).select_related(
+            'asset', 'trading_account', 'strategy'
+        )
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('executions')
+        
+        params = self.request.query_params
+        for param, lookup in (('account', 'trading_account_id'), ('strategy', 'strategy_id'),
+                              ('asset', 'asset_id'), ('status', 'status'), ('side', 'side'),
+                              ('start_date', 'entered_at__date__gte'), ('end_date', 'entered_at__date__lte')):
+            value = params.get(param)
+            if value:
+                queryset = queryset.filter(**{lookup: value})
+        
+        return queryset
+    
+    def perform_update(self, serializer):
+        """Side yang diganti mengubah arah P&L semua fill, jadi trade di-rebuild"""
+        previous_side = serializer.instance.side
+        with db_transaction.atomic():
+            trade = serializer.save()
+            if trade.side != previous_side:
+                rebuild_trade(trade)
+    
+    @action(detail=True, methods=['post'])
+    def rebuild(self, request, pk=None):
+        """
+        Hitung ulang agregat trade dari seluruh fill.
+        
+        Normalnya tidak diperlukan (agregat diperbarui setiap fill); berguna
+        untuk data lama yang di-import tanpa melewati engine.
+        """
+        trade = self.get_object()
+        executions_count = rebuild_trade(trade)
+        serializer = TradeSerializer(trade, context=self.get_serializer_context())
+        return Response({
+            'executions_count': executions_count,
+            'trade': serializer.data
+        })
+
+
+class TradeExecutionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """
+    Fill (eksekusi) trade.
+    
+    Fill entry menambah posisi; exit dan partial_exit menutup sebagian atau
+    seluruh posisi pada average cost. Fill baru yang ditambahkan di akhir
+    history diterapkan langsung ke running sums trade (O(1)); fill yang
+    diedit, dihapus, atau disisipkan di tengah history memicu replay trade.
+    """
+    serializer_class = TradeExecutionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['executed_at', 'created_at']
+    ordering = ['executed_at', 'created_at']
+    conditional_fields = ('created_at', 'trade__updated_at')
+    
+    def get_queryset(self):
+        """
+        Query Parameters:
+        - trade: Filter berdasarkan trade ID
+        """
+        queryset = TradeExecution.objects.filter(trade__user=self.request.user)
+        trade_id = self.request.query_params.get('trade')
+        if trade_id:
+            queryset = queryset.filter(trade_id=trade_id)
+        return queryset
+    
+    def perform_create(self, serializer):
+        self._save_execution(serializer)
+    
+    def perform_update(self, serializer):
+        self._save_execution(serializer)
+    
+    def perform_destroy(self, instance):
+        # Fill yang tersisa di-replay dulu: menghapus entry yang menjadi dasar
+        # exit sesudahnya akan membuat posisi negatif
+        remaining = instance.trade.executions.exclude(pk=instance.pk)
+        try:
+            check_executions(instance.trade, list(remaining))
+            with db_transaction.atomic():
+                instance.delete()
+        except ExecutionError as exc:
+            raise ValidationError({'quantity': str(exc)})
+    
+    def _save_execution(self, serializer):
+        # Fill dan agregat trade disimpan atomik; fill konkuren yang membuat
+        # posisi negatif dibatalkan seluruhnya
+        try:
+            with db_transaction.atomic():
+                serializer.save()
+        except ExecutionError as exc:
+            raise ValidationError({'quantity': str(exc)})
@@ -5,4 +5,6 @@ urlpatterns = [
     # path('dashboard/', include('api.v1.dashboard.urls')),
     path('finance/', include('api.v1.finance.urls')),
     path('invest/', include('api.v1.invest.urls')),
+    path('trading/', include('api.v1.trading.urls')),
+    path('', include('api.v1.jobs.urls')),
 ]
\ No newline at end of file
@@ -0,0 +1,111 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.utils.pagination import KeysetPagination
+from finance.models import Transaction, Wallet
+from master.models import User
+
+
+class Command(BaseCommand):
+    """
+    Benchmark pagination history transaksi: PageNumberPagination (COUNT + OFFSET)
+    vs KeysetPagination (WHERE pada (transaction_date, id)) di beberapa kedalaman
+    halaman.
+
+    Tanpa --user, data sintetis dibuat di dalam transaksi yang di-rollback
+    sehingga database tidak berubah.
+    """
+    help = 'Bandingkan latency halaman dalam OFFSET pagination vs keyset pagination'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Gunakan data user ID ini alih-alih data sintetis')
+        parser.add_argument('--rows', type=int, default=1000000, help='Jumlah transaksi sintetis')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument(
+            '--pages', type=int, nargs='+', default=[1, 100, 1000, 10000],
+            help='Nomor halaman yang diukur'
+        )
+        parser.add_argument('--runs', type=int, default=3, help='Jumlah pengulangan per pengukuran')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            self.run_benchmark(Transaction.objects.filter(user_id=options['user']), options)
+            return
+
+        with transaction.atomic():
+            user = self.seed(options)
+            self.run_benchmark(Transaction.objects.filter(user=user), options)
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        rng = random.Random(42)
+        user = User.objects.create_user(username='__benchmark_pagination__', password=None)
+        wallet = Wallet.objects.create(user=user, name='Benchmark', wallet_type='bank')
+
+        start = date.today() - timedelta(days=3650)
+        batch_size = 5000
+        for offset in range(0, options['rows'], batch_size):
+            Transaction.objects.bulk_create([
+                Transaction(
+                    user=user,
+                    wallet=wallet,
+                    amount=Decimal(rng.randint(1, 1000) * 1000),
+                    type=rng.choice(['income', 'expense', 'expense']),
+                    transaction_date=start + timedelta(days=rng.randint(0, 3650)),
+                )
+                for _ in range(min(batch_size, options['rows'] - offset))
+            ])
+
+        self.stdout.write(f"Seeded {options['rows']} transaksi sintetis.")
+        return user
+
+    def measure(self, label, func, runs):
+        timings = []
+        for _ in range(runs):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+        best = min(timings) * 1000
+        self.stdout.write(f'{label:<28} queries={len(context.captured_queries):<3} best={best:.1f} ms')
+        return best
+
+    def run_benchmark(self, queryset, options):
+        page_size = options['page_size']
+        runs = max(options['runs'], 1)
+        paginator = KeysetPagination()
+        ordering = list(paginator.ordering)
+        ordered = queryset.order_by(*ordering)
+        total = queryset.count()
+
+        for page in options['pages']:
+            offset = (page - 1) * page_size
+            if offset >= total:
+                self.stdout.write(f'Halaman {page} melewati {total} row, dilewati.')
+                continue
+
+            def offset_page():
+                # Perilaku StandardResultsSetPagination: COUNT(*) lalu OFFSET
+                queryset.count()
+                list(ordered[offset:offset + page_size])
+
+            # Cursor halaman ini = key row terakhir halaman sebelumnya (tidak ikut diukur)
+            filtered = ordered
+            if offset:
+                row = ordered[offset - 1]
+                filtered = ordered.filter(paginator._after(paginator._position(row), ordering))
+
+            def keyset_page():
+                list(filtered[:page_size + 1])
+
+            self.stdout.write(f'Halaman {page} (offset {offset}):')
+            offset_ms = self.measure('  offset (count + OFFSET)', offset_page, runs)
+            keyset_ms = self.measure('  keyset (cursor)', keyset_page, runs)
+            if keyset_ms:
+                self.stdout.write(self.style.SUCCESS(f'  Speedup: {offset_ms / keyset_ms:.1f}x'))
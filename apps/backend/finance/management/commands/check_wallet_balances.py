@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from finance.models import Wallet
+
+
+class Command(BaseCommand):
+    """
+    Drift check untuk saldo wallet.
+
+    Membandingkan current_balance (dikelola incremental lewat delta) dengan
+    saldo hasil rebuild penuh dari transaksi dan transfer, lalu melaporkan
+    wallet yang berbeda. Gunakan --fix untuk menulis ulang saldo yang drift.
+    """
+    help = 'Laporkan (dan opsional perbaiki) wallet yang saldonya drift dari hasil rebuild penuh'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Batasi pengecekan ke user ID tertentu')
+        parser.add_argument('--wallet', type=int, help='Batasi pengecekan ke wallet ID tertentu')
+        parser.add_argument('--fix', action='store_true', help='Rebuild saldo wallet yang drift')
+
+    def handle(self, *args, **options):
+        queryset = Wallet.objects.all()
+        if options.get('user'):
+            queryset = queryset.filter(user_id=options['user'])
+        if options.get('wallet'):
+            queryset = queryset.filter(pk=options['wallet'])
+
+        drifted = Wallet.find_balance_drift(queryset)
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Semua saldo wallet konsisten.'))
+            return
+
+        for row in drifted:
+            self.stdout.write(
+                f"Wallet #{row['wallet_id']} ({row['name']}, user {row['user_id']}): "
+                f"current={row['current_balance']} rebuilt={row['rebuilt_balance']} "
+                f"drift={row['drift']}"
+            )
+
+        if options['fix']:
+            for wallet in Wallet.objects.filter(pk__in=[row['wallet_id'] for row in drifted]):
+                wallet.update_balance()
+            self.stdout.write(self.style.SUCCESS(f'{len(drifted)} wallet diperbaiki.'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} wallet drift ditemukan.'))
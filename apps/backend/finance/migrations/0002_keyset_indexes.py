@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-17 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_date', 'id'], name='finance_tra_user_id_572229_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['wallet', 'transaction_date', 'id'], name='finance_tra_wallet__7a31b3_idx'),
+        ),
+    ]
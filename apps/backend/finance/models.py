@@ -1,9 +1,40 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction as db_transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 # from django.contrib.auth.models import User
 from master.models import User
 from django.utils import timezone
 
 
+def apply_balance_delta(wallet_id, delta):
+    """
+    Menambahkan delta bertanda ke current_balance wallet secara atomik.
+
+    Menggunakan ekspresi F() sehingga tidak ada read-modify-write di Python
+    dan aman terhadap penulisan paralel pada wallet yang sama.
+    """
+    if not wallet_id or not delta:
+        return
+    Wallet.objects.filter(pk=wallet_id).update(
+        current_balance=F('current_balance') + delta,
+        updated_at=timezone.now()
+    )
+
+
+def balance_delta_for(transaction_type, amount):
+    """Delta saldo bertanda untuk satu transaksi income/expense"""
+    amount = Decimal(str(amount))
+    if transaction_type == 'income':
+        return amount
+    if transaction_type == 'expense':
+        return -amount
+    return Decimal('0')
+
+
 class Category(models.Model):
     CATEGORY_TYPE_CHOICES = [
         ('income', 'Pemasukan'),
@@ -54,43 +85,121 @@ class Wallet(models.Model):
     def save(self, *args, **kwargs):
         if self.pk is None:  # jika ini wallet baru
             self.current_balance = self.initial_balance
-        super().save(*args, **kwargs)
-    
-    def update_balance(self):
-        """Update current_balance based on all transactions"""
-        from decimal import Decimal
-        
-        # Get initial balance
-        balance = self.initial_balance
-        
-        # Add all income transactions
-        income = self.transactions.filter(type='income').aggregate(
-            total=models.Sum('amount'))['total'] or Decimal('0')
-        balance += income
-        
-        # Subtract all expense transactions
-        expenses = self.transactions.filter(type='expense').aggregate(
-            total=models.Sum('amount'))['total'] or Decimal('0')
-        balance -= expenses
-        
-        # Handle transfers
-        incoming = Transfer.objects.filter(to_wallet=self).aggregate(
-            total=models.Sum('amount'))['total'] or Decimal('0')
-        outgoing = Transfer.objects.filter(from_wallet=self).aggregate(
-            total=models.Sum('amount'))['total'] or Decimal('0')
-        outgoing_fees = Transfer.objects.filter(from_wallet=self).aggregate(
-            total=models.Sum('fee'))['total'] or Decimal('0')
-        
-        balance += incoming - outgoing - outgoing_fees
+            super().save(*args, **kwargs)
+            return
+
+        previous_initial = None
+        if kwargs.get('update_fields') is None:
+            previous_initial = Wallet.objects.filter(pk=self.pk).values_list(
+                'initial_balance', flat=True).first()
+
+        if previous_initial is None:
+            super().save(*args, **kwargs)
+            return
 
-        Wallet.objects.filter(pk=self.pk).update(
-            current_balance=balance,
-            updated_at=timezone.now()
+        # current_balance dikelola lewat delta F(), jadi jangan ditimpa dengan
+        # nilai in-memory yang mungkin sudah basi.
+        kwargs['update_fields'] = [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name != 'current_balance'
+        ]
+        with db_transaction.atomic():
+            super().save(*args, **kwargs)
+            delta = self.initial_balance - previous_initial
+            if delta:
+                apply_balance_delta(self.pk, delta)
+        self.refresh_from_db(fields=['current_balance'])
+
+    @staticmethod
+    def annotate_rebuilt_balance(queryset):
+        """
+        Menambahkan anotasi `rebuilt_balance` ke queryset wallet, yaitu saldo hasil
+        hitung ulang penuh dari semua transaksi dan transfer, dalam satu query.
+        """
+        amount_field = models.DecimalField(max_digits=15, decimal_places=2)
+
+        def total(subquery):
+            return Coalesce(
+                Subquery(subquery, output_field=amount_field),
+                Decimal('0'),
+                output_field=amount_field
+            )
+
+        def transaction_total(transaction_type):
+            return total(
+                Transaction.objects.filter(wallet=OuterRef('pk'), type=transaction_type)
+                .order_by().values('wallet').annotate(total=Sum('amount')).values('total')
+            )
+
+        incoming = total(
+            Transfer.objects.filter(to_wallet=OuterRef('pk'))
+            .order_by().values('to_wallet').annotate(total=Sum('amount')).values('total')
         )
-        
-        # Update current balance
+        outgoing = total(
+            Transfer.objects.filter(from_wallet=OuterRef('pk'))
+            .order_by().values('from_wallet').annotate(total=Sum(F('amount') + F('fee'))).values('total')
+        )
+
+        return queryset.annotate(
+            rebuilt_balance=models.ExpressionWrapper(
+                F('initial_balance')
+                + transaction_total('income')
+                - transaction_total('expense')
+                + incoming
+                - outgoing,
+                output_field=amount_field
+            )
+        )
+
+    def calculate_balance(self):
+        """Menghitung saldo penuh dari initial_balance, transaksi, dan transfer (tanpa menyimpan)"""
+        return Wallet.annotate_rebuilt_balance(
+            Wallet.objects.filter(pk=self.pk)
+        ).values_list('rebuilt_balance', flat=True).get()
+
+    def update_balance(self):
+        """
+        Full rebuild: hitung ulang current_balance dari seluruh riwayat transaksi.
+
+        Operasi normal memakai delta incremental (lihat `apply_balance_delta`);
+        method ini dipakai untuk recalculate manual dan memperbaiki drift.
+        """
+        balance = self.calculate_balance()
+        now = timezone.now()
+        Wallet.objects.filter(pk=self.pk).update(current_balance=balance, updated_at=now)
         self.current_balance = balance
-        self.save(update_fields=['current_balance', 'updated_at'])
+        self.updated_at = now
+        return balance
+
+    @classmethod
+    def find_balance_drift(cls, queryset=None):
+        """
+        Mencari wallet yang current_balance (hasil delta incremental) berbeda
+        dengan saldo hasil rebuild penuh.
+
+        Returns:
+            list: dict berisi wallet_id, user_id, name, current_balance,
+            rebuilt_balance, dan drift untuk setiap wallet yang tidak cocok
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+
+        rows = cls.annotate_rebuilt_balance(queryset).values_list(
+            'pk', 'user_id', 'name', 'current_balance', 'rebuilt_balance'
+        )
+
+        drifted = []
+        for wallet_id, user_id, name, current_balance, rebuilt_balance in rows.iterator():
+            if current_balance != rebuilt_balance:
+                drifted.append({
+                    'wallet_id': wallet_id,
+                    'user_id': user_id,
+                    'name': name,
+                    'current_balance': current_balance,
+                    'rebuilt_balance': rebuilt_balance,
+                    'drift': current_balance - rebuilt_balance,
+                })
+        return drifted
 
 
 class Transaction(models.Model):
@@ -110,22 +219,45 @@ class Transaction(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        # Mendukung keyset pagination (-transaction_date, -id) per user / per wallet
+        indexes = [
+            models.Index(fields=['user', 'transaction_date', 'id']),
+            models.Index(fields=['wallet', 'transaction_date', 'id']),
+        ]
+    
     def __str__(self):
         return f"{self.get_type_display()}: {self.amount} ({self.wallet.name})"
     
+    def balance_effect(self):
+        """
+        Efek transaksi terhadap saldo wallet sebagai (wallet_id, delta).
+
+        Transaksi tipe 'transfer' tidak berefek di sini karena saldo kedua wallet
+        sudah diatur oleh record Transfer terkait.
+        """
+        return self.wallet_id, balance_delta_for(self.type, self.amount)
+
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
-        
-        # Update wallet balance after saving
-        self.wallet.update_balance()
-        
-        # If this is a transfer transaction, make sure the transfer record exists
-        if is_new and self.type == 'transfer':
-            # Check if this transaction is already linked to a transfer
-            if not hasattr(self, 'transfer'):
-                # The related Transfer object will be created in the Transfer's save method
-                pass
+        with db_transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = Transaction.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('wallet_id', 'type', 'amount').first()
+
+            super().save(*args, **kwargs)
+
+            # Update wallet balance secara incremental (O(1)), bukan re-aggregate
+            deltas = {}
+            if previous:
+                old_wallet_id, old_type, old_amount = previous
+                deltas[old_wallet_id] = -balance_delta_for(old_type, old_amount)
+            wallet_id, delta = self.balance_effect()
+            deltas[wallet_id] = deltas.get(wallet_id, Decimal('0')) + delta
+
+            for wallet_id, delta in deltas.items():
+                apply_balance_delta(wallet_id, delta)
 
 
 class Transfer(models.Model):
@@ -140,25 +272,49 @@ class Transfer(models.Model):
     def __str__(self):
         return f"Transfer: {self.amount} from {self.from_wallet.name} to {self.to_wallet.name}"
     
+    def balance_effects(self):
+        """Efek transfer terhadap saldo sebagai list (wallet_id, delta)"""
+        amount = Decimal(str(self.amount))
+        fee = Decimal(str(self.fee))
+        return [
+            (self.from_wallet_id, -(amount + fee)),
+            (self.to_wallet_id, amount),
+        ]
+
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         
-        # If this is a new transfer, create the main transaction if it doesn't exist
-        if is_new and not hasattr(self, 'transaction'):
-            self.transaction = Transaction.objects.create(
-                user=self.from_wallet.user,
-                wallet=self.from_wallet,
-                amount=self.amount + self.fee,
-                type='transfer',
-                description=f"Transfer to {self.to_wallet.name}",
-                transaction_date=timezone.now().date()
-            )
-        
-        super().save(*args, **kwargs)
-        
-        # Update balances for both wallets
-        self.from_wallet.update_balance()
-        self.to_wallet.update_balance()
+        with db_transaction.atomic():
+            # If this is a new transfer, create the main transaction if it doesn't exist
+            if is_new and not hasattr(self, 'transaction'):
+                self.transaction = Transaction.objects.create(
+                    user=self.from_wallet.user,
+                    wallet=self.from_wallet,
+                    amount=self.amount + self.fee,
+                    type='transfer',
+                    description=f"Transfer to {self.to_wallet.name}",
+                    transaction_date=timezone.now().date()
+                )
+
+            previous = None
+            if not is_new:
+                previous = Transfer.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('from_wallet_id', 'to_wallet_id', 'amount', 'fee').first()
+
+            super().save(*args, **kwargs)
+
+            # Update balances for both wallets secara incremental
+            deltas = {}
+            if previous:
+                old_from, old_to, old_amount, old_fee = previous
+                deltas[old_from] = deltas.get(old_from, Decimal('0')) + old_amount + old_fee
+                deltas[old_to] = deltas.get(old_to, Decimal('0')) - old_amount
+            for wallet_id, delta in self.balance_effects():
+                deltas[wallet_id] = deltas.get(wallet_id, Decimal('0')) + delta
+
+            for wallet_id, delta in deltas.items():
+                apply_balance_delta(wallet_id, delta)
 
 
 class Tag(models.Model):
@@ -181,4 +337,18 @@ class TransactionTag(models.Model):
         unique_together = ['transaction', 'tag']
     
     def __str__(self):
-        return f"{self.transaction} - {self.tag}"
\ No newline at end of file
+        return f"{self.transaction} - {self.tag}"
+
+
+@receiver(post_delete, sender=Transaction)
+def reverse_transaction_balance(sender, instance, **kwargs):
+    """Membalik efek saldo saat transaksi dihapus (termasuk cascade delete)"""
+    wallet_id, delta = instance.balance_effect()
+    apply_balance_delta(wallet_id, -delta)
+
+
+@receiver(post_delete, sender=Transfer)
+def reverse_transfer_balance(sender, instance, **kwargs):
+    """Membalik efek saldo kedua wallet saat transfer dihapus"""
+    for wallet_id, delta in instance.balance_effects():
+        apply_balance_delta(wallet_id, -delta)
@@ -1,3 +1,115 @@
 from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from master.models import User
+from finance.models import Category, Wallet, Transaction, Transfer
+
+
+class WalletBalanceEngineTestCase(TestCase):
+    """Test incremental balance (delta F()) dan mode full rebuild pada Wallet"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='balance_user',
+            email='balance@test.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(user=self.user, name='Food', type='expense')
+        self.wallet = Wallet.objects.create(
+            user=self.user,
+            name='Bank',
+            initial_balance=Decimal('1000000')
+        )
+        self.wallet2 = Wallet.objects.create(
+            user=self.user,
+            name='Cash',
+            initial_balance=Decimal('50000')
+        )
+
+    def create_transaction(self, amount, transaction_type='expense', wallet=None):
+        return Transaction.objects.create(
+            user=self.user,
+            wallet=wallet or self.wallet,
+            category=self.category,
+            amount=Decimal(amount),
+            type=transaction_type,
+            transaction_date='2025-05-01'
+        )
+
+    def assertBalance(self, wallet, expected):
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.current_balance, Decimal(expected))
+        self.assertEqual(wallet.calculate_balance(), Decimal(expected))
+
+    def test_create_applies_delta(self):
+        self.create_transaction('200000', 'income')
+        self.create_transaction('50000', 'expense')
+        self.assertBalance(self.wallet, '1150000.00')
+
+    def test_create_does_not_reaggregate(self):
+        self.create_transaction('100')
+        # savepoint + insert + satu UPDATE saldo; tidak ada SUM atas riwayat
+        with self.assertNumQueries(4):
+            self.create_transaction('100')
+
+    def test_update_amount_type_and_wallet(self):
+        transaction = self.create_transaction('100000', 'expense')
+
+        transaction.amount = Decimal('40000')
+        transaction.type = 'income'
+        transaction.save()
+        self.assertBalance(self.wallet, '1040000.00')
+
+        transaction.wallet = self.wallet2
+        transaction.save()
+        self.assertBalance(self.wallet, '1000000.00')
+        self.assertBalance(self.wallet2, '90000.00')
+
+    def test_delete_reverses_delta(self):
+        transaction = self.create_transaction('100000', 'expense')
+        transaction.delete()
+        self.assertBalance(self.wallet, '1000000.00')
+
+    def test_transfer_create_update_delete(self):
+        transfer = Transfer.objects.create(
+            from_wallet=self.wallet,
+            to_wallet=self.wallet2,
+            amount=Decimal('100000'),
+            fee=Decimal('2500')
+        )
+        self.assertBalance(self.wallet, '897500.00')
+        self.assertBalance(self.wallet2, '150000.00')
+
+        transfer.amount = Decimal('200000')
+        transfer.save()
+        self.assertBalance(self.wallet, '797500.00')
+        self.assertBalance(self.wallet2, '250000.00')
+
+        # Menghapus transaksi induk ikut menghapus transfer (cascade)
+        transfer.transaction.delete()
+        self.assertBalance(self.wallet, '1000000.00')
+        self.assertBalance(self.wallet2, '50000.00')
+
+    def test_stale_wallet_save_keeps_balance(self):
+        stale_wallet = Wallet.objects.get(pk=self.wallet.pk)
+        self.create_transaction('100000', 'income')
+
+        stale_wallet.name = 'Bank Renamed'
+        stale_wallet.initial_balance = Decimal('1500000')
+        stale_wallet.save()
+
+        self.assertEqual(stale_wallet.current_balance, Decimal('1600000.00'))
+        self.assertBalance(self.wallet, '1600000.00')
+
+    def test_find_balance_drift_and_rebuild(self):
+        self.create_transaction('100000', 'expense')
+        Wallet.objects.filter(pk=self.wallet.pk).update(current_balance=Decimal('1'))
+
+        drifted = Wallet.find_balance_drift(Wallet.objects.filter(user=self.user))
+        self.assertEqual(len(drifted), 1)
+        self.assertEqual(drifted[0]['wallet_id'], self.wallet.pk)
+        self.assertEqual(drifted[0]['rebuilt_balance'], Decimal('900000.00'))
+        self.assertEqual(drifted[0]['drift'], Decimal('-899999.00'))
+
+        self.wallet.update_balance()
+        self.assertEqual(Wallet.find_balance_drift(), [])
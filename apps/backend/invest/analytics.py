@@ -0,0 +1,140 @@
+# ========================================
+# invest/analytics.py - Kernel analytics holdings (single pass)
+# ========================================
+
+import heapq
+from decimal import Decimal
+
+
+ZERO = Decimal('0')
+
+HOLDING_COLUMNS = [
+    'portfolio_id', 'portfolio__name',
+    'asset_id', 'asset__symbol', 'asset__name', 'asset__type', 'asset__sector', 'asset__currency',
+    'current_value', 'total_cost', 'unrealized_pnl',
+]
+
+
+class HoldingsFrame:
+    """
+    Snapshot kolumnar holdings: satu list per kolom, dimuat dengan satu query
+    values_list (asset dan portfolio ikut di-join), tanpa instance model.
+    """
+
+    def __init__(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * len(HOLDING_COLUMNS)
+        (
+            self.portfolio_id, self.portfolio_name,
+            self.asset_id, self.symbol, self.name, self.type, self.sector, self.currency,
+            self.value, self.cost, self.pnl,
+        ) = columns
+
+    @classmethod
+    def from_queryset(cls, queryset):
+        return cls(list(queryset.order_by().values_list(*HOLDING_COLUMNS)))
+
+    def __len__(self):
+        return len(self.symbol)
+
+
+def _push(heap, item, size):
+    """Pertahankan `size` item terbesar di min-heap"""
+    if len(heap) < size:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+def _ranked(heap):
+    """Index holding dari heap (value, -index), urut dari yang terbesar"""
+    return [-index for _, index in sorted(heap, reverse=True)]
+
+
+def _percentages(totals, total_value):
+    return {
+        key: round((value / total_value) * 100, 2) if total_value > 0 else 0
+        for key, value in totals.items()
+    }
+
+
+def summarize_holdings(frame, top_n=5):
+    """
+    Hitung semua metrik analytics holdings dalam satu pass atas frame.
+
+    Args:
+        frame: HoldingsFrame
+        top_n: Jumlah top/worst performers dan holdings terbesar
+
+    Returns:
+        dict: holdings_count, portfolios_count, total_value, total_cost, total_pnl,
+        winning_positions, total_gains, total_losses, allocation dan
+        allocation_percentage (per type/sector/currency), hhi, largest (index
+        holding terbesar), top_value/top_pnl/worst_pnl (list index holding, urut)
+    """
+    total_value = total_cost = ZERO
+    total_gains = total_losses = ZERO
+    sum_squares = ZERO
+    winning_positions = 0
+    portfolios = set()
+    by_type, by_sector, by_currency = {}, {}, {}
+    top_value, top_pnl, worst_pnl = [], [], []
+
+    for index in range(len(frame)):
+        value = frame.value[index]
+        pnl = frame.pnl[index]
+
+        total_value += value
+        total_cost += frame.cost[index]
+        sum_squares += value * value
+        portfolios.add(frame.portfolio_id[index])
+
+        if pnl > 0:
+            winning_positions += 1
+            total_gains += pnl
+        elif pnl < 0:
+            total_losses -= pnl
+
+        asset_type = frame.type[index]
+        sector = frame.sector[index] or 'Other'
+        currency = frame.currency[index]
+        by_type[asset_type] = by_type.get(asset_type, ZERO) + value
+        by_sector[sector] = by_sector.get(sector, ZERO) + value
+        by_currency[currency] = by_currency.get(currency, ZERO) + value
+
+        # -index sebagai tie-break: urutan sama seperti sorted() yang stabil
+        _push(top_value, (value, -index), top_n)
+        _push(top_pnl, (pnl, -index), top_n)
+        _push(worst_pnl, (-pnl, -index), top_n)
+
+    return {
+        'holdings_count': len(frame),
+        'portfolios_count': len(portfolios),
+        'total_value': total_value,
+        'total_cost': total_cost,
+        'total_pnl': total_value - total_cost,
+        'winning_positions': winning_positions,
+        'total_gains': total_gains,
+        'total_losses': total_losses,
+        'allocation': {
+            'type': by_type,
+            'sector': by_sector,
+            'currency': by_currency,
+        },
+        'allocation_percentage': {
+            'type': _percentages(by_type, total_value),
+            'sector': _percentages(by_sector, total_value),
+            'currency': _percentages(by_currency, total_value),
+        },
+        # Herfindahl-Hirschman Index atas bobot nilai tiap holding
+        'hhi': sum_squares / (total_value * total_value) if total_value > 0 else ZERO,
+        'largest': _ranked(top_value)[0] if top_value else None,
+        'top_value': _ranked(top_value),
+        'top_pnl': _ranked(top_pnl),
+        'worst_pnl': _ranked(worst_pnl),
+    }
+
+
+def holdings_summary(queryset, top_n=5):
+    """Muat holdings dari queryset (satu query) lalu ringkas dengan summarize_holdings"""
+    frame = HoldingsFrame.from_queryset(queryset)
+    return frame, summarize_holdings(frame, top_n=top_n)
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class InvestConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'invest'
+
+    def ready(self):
+        # Kumpulkan harga yang dihapus menjadi satu prices_deleted per operasi
+        from . import signals  # noqa: F401
+        # Register signal receivers untuk latest-price store (AssetQuote)
+        from . import quotes  # noqa: F401
+        # Mirror harga ke storage compact (INVEST_PRICE_STORAGE = 'compact')
+        from . import price_store  # noqa: F401
+        # Invalidasi snapshot NAV saat transaksi berubah
+        from . import snapshots  # noqa: F401
+        # Lot cost basis dan ledger realized P&L mengikuti transaksi
+        from . import lots  # noqa: F401
+        # Tandai checkpoint rebuild holdings saat transaksi berubah
+        from . import holdings  # noqa: F401
@@ -0,0 +1,227 @@
+# ========================================
+# invest/holdings.py - Engine refresh harga holdings
+# ========================================
+
+import uuid
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import F, Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import HoldingCheckpoint, InvestmentHolding, InvestmentPortfolio, InvestmentTransaction, TaxLot
+from .quotes import get_latest_prices
+from .signals import holdings_changed
+from .snapshots import TRANSACTION_FIELDS, apply_transaction
+
+
+CENT = Decimal('0.01')
+
+HOLDING_FIELDS = ['quantity', 'average_price', 'total_cost', 'current_price', 'current_value', 'unrealized_pnl']
+
+REFRESH_FIELDS = ['current_price', 'current_value', 'unrealized_pnl', 'last_updated']
+
+
+def refresh_holdings(queryset=None, chunk_size=1000, now=None):
+    """
+    Refresh current_price, current_value, dan unrealized_pnl untuk holdings.
+
+    Holdings diproses per chunk (keyset pada primary key). Harga terakhir per
+    chunk diambil lewat get_latest_prices (quote cache, paling banyak satu query)
+    dan ditulis dengan satu bulk_update, sehingga jumlah query sebanding dengan
+    jumlah chunk, bukan jumlah holdings.
+
+    Args:
+        queryset: Holdings yang akan di-refresh (default: semua holdings)
+        chunk_size: Jumlah holdings per chunk
+        now: Timestamp last_updated (default: timezone.now())
+
+    Returns:
+        dict: holdings_count, holdings_updated, total_value_before, total_value_after
+    """
+    if queryset is None:
+        queryset = InvestmentHolding.objects.all()
+    now = now or timezone.now()
+
+    queryset = queryset.order_by('pk').only(
+        'pk', 'user_id', 'asset_id', 'quantity', 'total_cost', *REFRESH_FIELDS
+    )
+
+    stats = {
+        'holdings_count': 0,
+        'holdings_updated': 0,
+        'total_value_before': Decimal('0'),
+        'total_value_after': Decimal('0'),
+    }
+
+    last_pk = None
+    while True:
+        chunk_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(chunk_queryset[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+
+        prices = get_latest_prices({holding.asset_id for holding in chunk})
+
+        updated = []
+        for holding in chunk:
+            stats['holdings_count'] += 1
+            stats['total_value_before'] += holding.current_value
+
+            price = prices.get(holding.asset_id)
+            if price is not None:
+                holding.current_price = price
+                holding.current_value = (holding.quantity * price).quantize(CENT)
+                holding.unrealized_pnl = holding.current_value - holding.total_cost
+                holding.last_updated = now
+                updated.append(holding)
+
+            stats['total_value_after'] += holding.current_value
+
+        if updated:
+            InvestmentHolding.objects.bulk_update(updated, REFRESH_FIELDS)
+            stats['holdings_updated'] += len(updated)
+            holdings_changed.send(sender=InvestmentHolding, user_ids={holding.user_id for holding in updated})
+
+        if len(chunk) < chunk_size:
+            break
+
+    return stats
+
+
+def portfolios_to_rebuild(portfolios=None):
+    """Portfolio tanpa checkpoint atau dengan transaksi yang berubah sejak rebuild terakhir"""
+    if portfolios is None:
+        portfolios = InvestmentPortfolio.objects.all()
+    return portfolios.filter(
+        Q(holding_checkpoint__isnull=True)
+        | Q(holding_checkpoint__version__gt=F('holding_checkpoint__rebuilt_version'))
+    )
+
+
+def _replay_positions(portfolio, chunk_size):
+    """Replay transaksi portfolio (stream, urut tanggal) menjadi {asset_id: [quantity, cost]}"""
+    positions = {}
+    count = 0
+    rows = portfolio.transactions.order_by('transaction_date', 'created_at', 'pk').values(*TRANSACTION_FIELDS)
+    for row in rows.iterator(chunk_size=chunk_size):
+        apply_transaction(positions, row)
+        count += 1
+    return positions, count
+
+
+def rebuild_portfolio_holdings(portfolio, chunk_size=2000, now=None):
+    """
+    Hitung ulang holdings satu portfolio dari seluruh transaksinya.
+
+    Quantity dan cost dihitung dengan average cost seperti update holdings
+    saat create; untuk portfolio FIFO/LIFO cost sisa diambil dari lot terbuka
+    (invest.lots). Holdings yang sudah tidak punya posisi dihapus, dan harga
+    holdings baru/berubah diisi dari harga terakhir.
+
+    Returns:
+        dict: transactions_count, holdings_created, holdings_updated, holdings_deleted
+    """
+    now = now or timezone.now()
+    checkpoint, _ = HoldingCheckpoint.objects.get_or_create(portfolio=portfolio)
+    # Perubahan selama rebuild tetap menandai portfolio untuk rebuild berikutnya
+    version = checkpoint.version
+
+    with db_transaction.atomic():
+        positions, transactions_count = _replay_positions(portfolio, chunk_size)
+        positions = {uuid.UUID(asset_id): position for asset_id, position in positions.items() if position[0] > 0}
+
+        if portfolio.cost_basis_method != 'average' and positions:
+            lots = (
+                TaxLot.objects.filter(portfolio=portfolio, remaining_quantity__gt=0).order_by()
+                .values('asset_id').annotate(quantity=Sum('remaining_quantity'), cost=Sum('remaining_cost'))
+            )
+            # Hanya jika lot mencakup seluruh posisi (data lama bisa belum punya lot)
+            for lot in lots:
+                position = positions.get(lot['asset_id'])
+                if position and position[0] == lot['quantity']:
+                    position[1] = lot['cost']
+
+        existing = {holding.asset_id: holding for holding in portfolio.holdings.all()}
+        prices = get_latest_prices(positions)
+
+        created, updated = [], []
+        for asset_id, (quantity, cost) in positions.items():
+            holding = existing.pop(asset_id, None)
+            if holding is None:
+                holding = InvestmentHolding(user_id=portfolio.user_id, portfolio=portfolio, asset_id=asset_id)
+                created.append(holding)
+            elif holding.quantity == quantity and holding.total_cost == cost.quantize(CENT):
+                continue
+            else:
+                updated.append(holding)
+
+            price = prices.get(asset_id, holding.current_price)
+            holding.quantity = quantity
+            holding.total_cost = cost.quantize(CENT)
+            holding.average_price = (cost / quantity).quantize(CENT)
+            holding.current_price = price
+            holding.current_value = (quantity * price).quantize(CENT)
+            holding.unrealized_pnl = holding.current_value - holding.total_cost if price > 0 else Decimal('0')
+            holding.last_updated = now
+
+        InvestmentHolding.objects.bulk_create(created)
+        InvestmentHolding.objects.bulk_update(updated, HOLDING_FIELDS + ['last_updated'])
+        if existing:
+            InvestmentHolding.objects.filter(pk__in=[holding.pk for holding in existing.values()]).delete()
+
+        HoldingCheckpoint.objects.filter(portfolio=portfolio).update(
+            rebuilt_version=version, transactions_count=transactions_count, rebuilt_at=now
+        )
+
+    if created or updated or existing:
+        holdings_changed.send(sender=InvestmentHolding, user_ids={portfolio.user_id})
+
+    return {
+        'transactions_count': transactions_count,
+        'holdings_created': len(created),
+        'holdings_updated': len(updated),
+        'holdings_deleted': len(existing),
+    }
+
+
+def rebuild_holdings(portfolios=None, force=False, chunk_size=2000):
+    """
+    Rebuild holdings untuk banyak portfolio (semua, per user, atau per portfolio).
+
+    Tanpa force hanya portfolio yang transaksinya berubah sejak checkpoint
+    terakhir yang di-replay.
+
+    Returns:
+        dict: portfolios_count (yang di-rebuild) ditambah total statistik
+        rebuild_portfolio_holdings
+    """
+    if portfolios is None:
+        portfolios = InvestmentPortfolio.objects.all()
+    if not force:
+        portfolios = portfolios_to_rebuild(portfolios)
+
+    stats = {
+        'portfolios_count': 0,
+        'transactions_count': 0,
+        'holdings_created': 0,
+        'holdings_updated': 0,
+        'holdings_deleted': 0,
+    }
+    for portfolio in portfolios.order_by('pk').iterator():
+        for key, value in rebuild_portfolio_holdings(portfolio, chunk_size=chunk_size).items():
+            stats[key] += value
+        stats['portfolios_count'] += 1
+    return stats
+
+
+@receiver(post_save, sender=InvestmentTransaction)
+@receiver(post_delete, sender=InvestmentTransaction)
+def mark_portfolio_changed(sender, instance, raw=False, **kwargs):
+    """Naikkan version checkpoint portfolio agar rebuild berikutnya me-replay-nya"""
+    if raw:
+        return
+    HoldingCheckpoint.objects.filter(portfolio_id=instance.portfolio_id).update(version=F('version') + 1)
@@ -0,0 +1,229 @@
+# ========================================
+# invest/ingest.py - Bulk ingest time series harga asset
+# ========================================
+
+import csv
+import json
+import time
+from datetime import datetime, time as dt_time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Asset, AssetPrice
+from .price_store import mirror_prices
+from .quotes import update_quotes
+from .signals import prices_changed
+
+
+INGEST_FORMATS = ['csv', 'ndjson']
+
+MAX_REPORTED_ERRORS = 50
+
+# Jumlah key (asset, timestamp) per query cek duplikat; setiap key memakai
+# paling banyak dua parameter (batas SQLite lama 999 parameter per query)
+KEY_LOOKUP_SIZE = 450
+
+
+class PriceRowError(ValueError):
+    """Baris harga tidak valid"""
+
+
+def iter_price_records(stream, ingest_format):
+    """
+    Generator (line_number, record) dari stream teks CSV (dengan header) atau
+    NDJSON. Record yang tidak bisa di-parse di-yield sebagai PriceRowError.
+    """
+    if ingest_format == 'ndjson':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield line_number, PriceRowError(f'JSON tidak valid: {exc}')
+                continue
+            if not isinstance(record, dict):
+                yield line_number, PriceRowError('Setiap baris NDJSON harus berupa object')
+                continue
+            yield line_number, record
+    else:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            # line_num menunjuk baris fisik terakhir yang dibaca (header = 1)
+            yield reader.line_num, record
+
+
+def _parse_decimal(value, field, required=False):
+    if value in (None, ''):
+        if required:
+            raise PriceRowError(f'{field} wajib diisi')
+        return None
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise PriceRowError(f'{field} harus berupa angka')
+    if not number.is_finite() or number < 0:
+        raise PriceRowError(f'{field} harus berupa angka positif')
+    return number
+
+
+def _parse_timestamp(value):
+    if value in (None, ''):
+        raise PriceRowError('timestamp wajib diisi')
+    value = str(value).strip()
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, dt_time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise PriceRowError('timestamp harus berformat ISO 8601 (YYYY-MM-DD[THH:MM:SS])')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class PriceIngestor:
+    """
+    Bulk ingest harga asset dari record (symbol, timestamp, price, volume, market_cap).
+
+    - Symbol di-resolve ke Asset id dengan satu query (di-cache per ingestor)
+    - Duplikat (asset, timestamp) dalam stream dan terhadap data yang sudah
+      ada dibuang dan dihitung sebagai duplicate_rows; rows_accepted hanya
+      baris yang benar-benar di-insert
+    - Ditulis per batch dengan bulk_create (juga ke storage compact jika aktif),
+      lalu AssetQuote diupdate dalam transaksi yang sama
+    """
+
+    def __init__(self, batch_size=5000, source=''):
+        self.batch_size = batch_size
+        self.source = source
+        self._symbols = None
+        self._seen = set()
+        self.stats = {
+            'rows_received': 0,
+            'rows_accepted': 0,
+            'duplicate_rows': 0,
+            'invalid_rows': 0,
+            'unknown_symbols': set(),
+            'batches': 0,
+            'quotes_updated': 0,
+            'errors': [],
+        }
+
+    @property
+    def symbols(self):
+        if self._symbols is None:
+            self._symbols = {symbol.upper(): asset_id for symbol, asset_id in Asset.objects.values_list('symbol', 'id')}
+        return self._symbols
+
+    def _record_error(self, line_number, message):
+        self.stats['invalid_rows'] += 1
+        if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+            self.stats['errors'].append({'line': line_number, 'error': message})
+
+    def build_price(self, record):
+        symbol = str(record.get('symbol') or '').strip().upper()
+        if not symbol:
+            raise PriceRowError('symbol wajib diisi')
+        asset_id = self.symbols.get(symbol)
+        if asset_id is None:
+            self.stats['unknown_symbols'].add(symbol)
+            raise PriceRowError(f'Asset dengan symbol {symbol} tidak ditemukan')
+
+        return AssetPrice(
+            asset_id=asset_id,
+            timestamp=_parse_timestamp(record.get('timestamp')),
+            price=_parse_decimal(record.get('price'), 'price', required=True),
+            volume=_parse_decimal(record.get('volume'), 'volume'),
+            market_cap=_parse_decimal(record.get('market_cap'), 'market_cap'),
+            source=str(record.get('source') or self.source)[:50],
+        )
+
+    def existing_keys(self, batch):
+        """
+        (asset_id, timestamp) batch yang sudah ada di database. Key dicari
+        persis (timestamp__in per asset), bukan rentang timestamp batch yang
+        ikut memuat seluruh history di antaranya.
+        """
+        keys = sorted({(price.asset_id, price.timestamp) for price in batch})
+        existing = set()
+        for start in range(0, len(keys), KEY_LOOKUP_SIZE):
+            timestamps = {}
+            for asset_id, timestamp in keys[start:start + KEY_LOOKUP_SIZE]:
+                timestamps.setdefault(asset_id, []).append(timestamp)
+            condition = Q()
+            for asset_id, values in timestamps.items():
+                condition |= Q(asset_id=asset_id, timestamp__in=values)
+            existing.update(AssetPrice.objects.filter(condition).values_list('asset_id', 'timestamp'))
+        return existing
+
+    def flush(self, batch):
+        if not batch:
+            return
+        with transaction.atomic():
+            # Baris yang sudah ada tidak dihitung diterima dan tidak ikut
+            # di-mirror/mengubah quote; ignore_conflicts tetap menangani
+            # insert konkuren
+            existing = self.existing_keys(batch)
+            if existing:
+                self.stats['duplicate_rows'] += sum((price.asset_id, price.timestamp) in existing for price in batch)
+                batch = [price for price in batch if (price.asset_id, price.timestamp) not in existing]
+            AssetPrice.objects.bulk_create(batch, batch_size=self.batch_size, ignore_conflicts=True)
+            mirror_prices(batch, batch_size=self.batch_size)
+            self.stats['quotes_updated'] += update_quotes(batch)
+        if batch:
+            since = {}
+            for price in batch:
+                if price.asset_id not in since or price.timestamp < since[price.asset_id]:
+                    since[price.asset_id] = price.timestamp
+            prices_changed.send(sender=AssetPrice, asset_ids=set(since), since=since)
+        self.stats['rows_accepted'] += len(batch)
+        self.stats['batches'] += 1
+
+    def ingest(self, records):
+        """
+        Ingest iterable (line_number, record) dari iter_price_records.
+
+        Returns:
+            dict: Statistik ingest termasuk rows_per_second
+        """
+        started = time.perf_counter()
+        batch = []
+
+        for line_number, record in records:
+            self.stats['rows_received'] += 1
+            if isinstance(record, PriceRowError):
+                self._record_error(line_number, str(record))
+                continue
+            try:
+                price = self.build_price(record)
+            except PriceRowError as exc:
+                self._record_error(line_number, str(exc))
+                continue
+
+            key = (price.asset_id, price.timestamp)
+            if key in self._seen:
+                self.stats['duplicate_rows'] += 1
+                continue
+            self._seen.add(key)
+
+            batch.append(price)
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+
+        self.flush(batch)
+
+        elapsed = time.perf_counter() - started
+        stats = dict(self.stats)
+        stats['unknown_symbols'] = sorted(stats['unknown_symbols'])
+        stats['elapsed_seconds'] = round(elapsed, 3)
+        stats['rows_per_second'] = round(stats['rows_received'] / elapsed, 1) if elapsed > 0 else 0
+        return stats
@@ -0,0 +1,361 @@
+# ========================================
+# invest/lots.py - Engine lot cost basis (FIFO/LIFO/average) dan ledger realized P&L
+# ========================================
+
+import threading
+from decimal import ROUND_DOWN, Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import InvestmentPortfolio, InvestmentTransaction, RealizedGain, TaxLot
+
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+UNIT = Decimal('0.00000001')
+
+COST_BASIS_METHODS = [method for method, _ in InvestmentPortfolio.COST_BASIS_CHOICES]
+
+# Posisi undo yang menunggu replay per (portfolio, asset) selama satu delete
+_pending_deletes = threading.local()
+
+TRANSACTION_FIELDS = [
+    'id', 'portfolio_id', 'asset_id', 'transaction_type', 'quantity',
+    'total_amount', 'fees', 'transaction_date', 'created_at',
+]
+
+
+def transaction_key(transaction):
+    """Urutan replay transaksi: tanggal, waktu input, lalu id sebagai tie-break"""
+    if isinstance(transaction, dict):
+        return (transaction['transaction_date'], transaction['created_at'], str(transaction['id']))
+    return (transaction.transaction_date, transaction.created_at, str(transaction.pk))
+
+
+class TransactionError(ValueError):
+    """History transaksi tidak valid (mis. sell melebihi posisi pada tanggalnya)"""
+
+    def __init__(self, row, available):
+        self.transaction_date = row['transaction_date']
+        self.available = available
+        super().__init__(
+            f"Sell {row['quantity']} pada {row['transaction_date']} melebihi posisi ({available})"
+        )
+
+
+def check_transactions(rows):
+    """
+    Replay quantity transaksi satu (portfolio, asset) di memory (tanpa
+    menyimpan) untuk validasi history yang diubah, mis. transaksi backdated,
+    diedit, atau dihapus.
+
+    Raises:
+        TransactionError: Ada sell yang melebihi posisi pada tanggalnya
+    """
+    quantity = ZERO
+    for row in sorted(rows, key=transaction_key):
+        transaction_type = row['transaction_type']
+        if transaction_type == 'buy':
+            quantity += row['quantity']
+        elif transaction_type == 'sell':
+            if row['quantity'] > quantity:
+                raise TransactionError(row, quantity)
+            quantity -= row['quantity']
+        elif transaction_type in ('split', 'bonus') and row['quantity'] > 0:
+            quantity *= row['quantity']
+
+
+def check_history(portfolio_id, asset_id, exclude=None, candidate=None):
+    """
+    Validasi history (portfolio, asset) tanpa transaksi `exclude` (pk) dan
+    dengan `candidate` (dict TRANSACTION_FIELDS) jika ada.
+
+    Raises:
+        TransactionError: Lihat check_transactions
+    """
+    rows = [
+        row for row in InvestmentTransaction.objects.filter(
+            portfolio_id=portfolio_id, asset_id=asset_id
+        ).values(*TRANSACTION_FIELDS)
+        if exclude is None or row['id'] != exclude
+    ]
+    if candidate is not None:
+        rows.append(candidate)
+    check_transactions(rows)
+
+
+def _transactions_from(portfolio_id, asset_id, key, until=None):
+    """Transaksi (portfolio, asset) dengan key <= urutan < until, terurut untuk replay"""
+    rows = InvestmentTransaction.objects.filter(
+        portfolio_id=portfolio_id, asset_id=asset_id, transaction_date__gte=key[0]
+    ).values(*TRANSACTION_FIELDS)
+    return sorted(
+        (row for row in rows if key <= transaction_key(row) and (until is None or transaction_key(row) < until)),
+        key=transaction_key
+    )
+
+
+def _open_lots(portfolio_id, asset_id, method):
+    lots = TaxLot.objects.filter(portfolio_id=portfolio_id, asset_id=asset_id, remaining_quantity__gt=0)
+    # id lot naik mengikuti urutan replay buy
+    return list(lots.order_by('-id' if method == 'lifo' else 'id'))
+
+
+def _allocate(lots, quantity, method):
+    """
+    Pilih konsumsi lot untuk sell sebanyak `quantity`.
+
+    Returns:
+        list: (lot, quantity, cost_basis); total quantity bisa kurang dari
+        `quantity` jika lot terbuka tidak mencukupi
+    """
+    if method == 'average':
+        # Pro-rata dari semua lot terbuka: average cost pool tetap sama
+        available = sum(lot.remaining_quantity for lot in lots)
+        if available <= 0:
+            return []
+        quantity = min(quantity, available)
+        allocations, allocated = [], ZERO
+        for index, lot in enumerate(lots):
+            if index == len(lots) - 1:
+                taken = min(quantity - allocated, lot.remaining_quantity)
+            else:
+                taken = (lot.remaining_quantity * quantity / available).quantize(UNIT, rounding=ROUND_DOWN)
+            allocated += taken
+            allocations.append((lot, taken))
+    else:
+        allocations, remaining = [], quantity
+        for lot in lots:
+            if remaining <= 0:
+                break
+            taken = min(remaining, lot.remaining_quantity)
+            remaining -= taken
+            allocations.append((lot, taken))
+
+    return [
+        (lot, taken, lot.remaining_cost if taken == lot.remaining_quantity
+         else (lot.remaining_cost * taken / lot.remaining_quantity).quantize(UNIT))
+        for lot, taken in allocations if taken > 0
+    ]
+
+
+def _apply(row, method):
+    """Terapkan satu transaksi ke state lot"""
+    transaction_type = row['transaction_type']
+    portfolio_id, asset_id = row['portfolio_id'], row['asset_id']
+
+    if transaction_type == 'buy':
+        TaxLot.objects.create(
+            portfolio_id=portfolio_id,
+            asset_id=asset_id,
+            transaction_id=row['id'],
+            acquired_date=row['transaction_date'],
+            remaining_quantity=row['quantity'],
+            remaining_cost=row['total_amount'] + row['fees'],
+        )
+
+    elif transaction_type == 'sell':
+        allocations = _allocate(_open_lots(portfolio_id, asset_id, method), row['quantity'], method)
+        net_proceeds = row['total_amount'] - row['fees']
+        matched = sum(taken for _, taken, _ in allocations)
+        entries, allocated = [], ZERO
+        for index, (lot, taken, cost_basis) in enumerate(allocations):
+            if index == len(allocations) - 1 and matched == row['quantity']:
+                proceeds = net_proceeds - allocated
+            else:
+                proceeds = (net_proceeds * taken / row['quantity']).quantize(CENT)
+            allocated += proceeds
+            lot.remaining_quantity -= taken
+            lot.remaining_cost -= cost_basis
+            entries.append(RealizedGain(
+                portfolio_id=portfolio_id,
+                asset_id=asset_id,
+                transaction_id=row['id'],
+                lot=lot,
+                date=row['transaction_date'],
+                acquired_date=lot.acquired_date,
+                method=method,
+                quantity=taken,
+                proceeds=proceeds,
+                cost_basis=cost_basis,
+                realized_pnl=(proceeds - cost_basis).quantize(CENT),
+            ))
+        TaxLot.objects.bulk_update([lot for lot, _, _ in allocations], ['remaining_quantity', 'remaining_cost'])
+        RealizedGain.objects.bulk_create(entries)
+
+    elif transaction_type in ('split', 'bonus') and row['quantity'] > 0:
+        # quantity transaksi split/bonus dipakai sebagai ratio; cost tidak berubah
+        lots = _open_lots(portfolio_id, asset_id, method)
+        for lot in lots:
+            lot.remaining_quantity *= row['quantity']
+        TaxLot.objects.bulk_update(lots, ['remaining_quantity'])
+
+
+def _undo(row, method):
+    """Kebalikan _apply; transaksi harus di-undo dari yang terakhir"""
+    transaction_type = row['transaction_type']
+
+    if transaction_type == 'buy':
+        TaxLot.objects.filter(transaction_id=row['id']).delete()
+
+    elif transaction_type == 'sell':
+        entries = list(RealizedGain.objects.filter(transaction_id=row['id']).select_related('lot'))
+        for entry in entries:
+            entry.lot.remaining_quantity += entry.quantity
+            entry.lot.remaining_cost += entry.cost_basis
+        TaxLot.objects.bulk_update([entry.lot for entry in entries], ['remaining_quantity', 'remaining_cost'])
+        RealizedGain.objects.filter(transaction_id=row['id']).delete()
+
+    elif transaction_type in ('split', 'bonus') and row['quantity'] > 0:
+        lots = _open_lots(row['portfolio_id'], row['asset_id'], method)
+        for lot in lots:
+            lot.remaining_quantity = (lot.remaining_quantity / row['quantity']).quantize(UNIT)
+        TaxLot.objects.bulk_update(lots, ['remaining_quantity'])
+
+
+def _method(portfolio_id):
+    return InvestmentPortfolio.objects.filter(pk=portfolio_id).values_list('cost_basis_method', flat=True).first()
+
+
+def undo_from(portfolio_id, asset_id, key, until=None):
+    """Undo transaksi (portfolio, asset) dengan urutan >= key (dan < until), dari yang terakhir"""
+    method = _method(portfolio_id)
+    with db_transaction.atomic():
+        for row in reversed(_transactions_from(portfolio_id, asset_id, key, until)):
+            _undo(row, method)
+
+
+def apply_from(portfolio_id, asset_id, key):
+    """Replay semua transaksi (portfolio, asset) dengan urutan >= key"""
+    method = _method(portfolio_id)
+    with db_transaction.atomic():
+        for row in _transactions_from(portfolio_id, asset_id, key):
+            _apply(row, method)
+
+
+def rebuild_lots(portfolio, asset_ids=None):
+    """
+    Bangun ulang lot dan ledger realized P&L portfolio dari seluruh transaksi,
+    mis. untuk backfill data lama atau setelah cost_basis_method diganti.
+
+    Returns:
+        int: Jumlah transaksi yang di-replay
+    """
+    lots = TaxLot.objects.filter(portfolio=portfolio)
+    transactions = portfolio.transactions.all()
+    if asset_ids is not None:
+        lots = lots.filter(asset_id__in=asset_ids)
+        transactions = transactions.filter(asset_id__in=asset_ids)
+
+    rows = sorted(transactions.values(*TRANSACTION_FIELDS), key=transaction_key)
+    with db_transaction.atomic():
+        # Ledger ikut terhapus lewat cascade lot
+        lots.delete()
+        for row in rows:
+            _apply(row, portfolio.cost_basis_method)
+    return len(rows)
+
+
+def open_position(portfolio_id, asset_id):
+    """(quantity, cost) dari lot terbuka (portfolio, asset)"""
+    totals = TaxLot.objects.filter(
+        portfolio_id=portfolio_id, asset_id=asset_id, remaining_quantity__gt=0
+    ).aggregate(quantity=Sum('remaining_quantity'), cost=Sum('remaining_cost'))
+    return totals['quantity'] or ZERO, totals['cost'] or ZERO
+
+
+def _replay_targets(instance):
+    """(portfolio_id, asset_id, key) yang perlu di-replay karena perubahan instance"""
+    targets = {(instance.portfolio_id, instance.asset_id): transaction_key(instance)}
+    if not instance._state.adding:
+        previous = InvestmentTransaction.objects.filter(pk=instance.pk).values(*TRANSACTION_FIELDS).first()
+        if previous:
+            pair = (previous['portfolio_id'], previous['asset_id'])
+            key = transaction_key(previous)
+            targets[pair] = min(key, targets.get(pair, key))
+    return [(portfolio_id, asset_id, key) for (portfolio_id, asset_id), key in targets.items()]
+
+
+@receiver(pre_save, sender=InvestmentTransaction)
+def undo_before_save(sender, instance, raw=False, **kwargs):
+    """
+    Transaksi baru/diedit: undo transaksi sejak posisi terawal yang terdampak,
+    lalu post_save me-replay dari posisi yang sama (termasuk transaksi ini).
+    Transaksi yang ditambahkan di akhir history tidak meng-undo apa pun.
+    Keduanya berjalan di dalam atomic InvestmentTransaction.save().
+    """
+    if raw:
+        return
+    instance._lot_replays = _replay_targets(instance)
+    for portfolio_id, asset_id, key in instance._lot_replays:
+        undo_from(portfolio_id, asset_id, key)
+
+
+@receiver(post_save, sender=InvestmentTransaction)
+def replay_after_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for portfolio_id, asset_id, key in getattr(instance, '_lot_replays', []):
+        apply_from(portfolio_id, asset_id, key)
+
+
+def _pending_keys(origin, instance):
+    """
+    Posisi undo milik operasi delete yang sedang berjalan. State operasi
+    sebelumnya yang gagal sebelum post_delete (undo-nya ikut di-rollback)
+    dibuang: operasi baru dikenali dari origin yang berbeda atau transaksi
+    yang sudah pernah dikirim pre_delete.
+    """
+    state = _pending_deletes.__dict__
+    if state.get('origin') is not origin or instance.pk in state.get('seen', ()):
+        state.update(origin=origin, seen=set(), keys={})
+    state['seen'].add(instance.pk)
+    return state['keys']
+
+
+@receiver(pre_delete, sender=InvestmentTransaction)
+def undo_before_delete(sender, instance, origin=None, **kwargs):
+    """
+    Django mengirim pre_delete untuk semua transaksi sebelum menghapusnya
+    (dalam satu transaksi database), jadi undo per (portfolio, asset) cukup
+    diperluas ke posisi terawal yang dihapus; replay dijalankan sekali di
+    post_delete pertama setelah semuanya terhapus.
+    """
+    pending = _pending_keys(origin, instance)
+    pair = (instance.portfolio_id, instance.asset_id)
+    key = transaction_key(instance)
+    if pair not in pending:
+        undo_from(*pair, key)
+    elif key < pending[pair]:
+        undo_from(*pair, key, until=pending[pair])
+    pending[pair] = min(key, pending.get(pair, key))
+
+
+@receiver(post_delete, sender=InvestmentTransaction)
+def replay_after_delete(sender, instance, **kwargs):
+    state = _pending_deletes.__dict__
+    pending = state.get('keys', {})
+    key = pending.pop((instance.portfolio_id, instance.asset_id), None)
+    if not pending:
+        state.clear()
+    if key is not None:
+        apply_from(instance.portfolio_id, instance.asset_id, key)
+
+
+@receiver(pre_save, sender=InvestmentPortfolio)
+def remember_cost_basis_method(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._previous_cost_basis_method = (
+        InvestmentPortfolio.objects.filter(pk=instance.pk).values_list('cost_basis_method', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=InvestmentPortfolio)
+def rebuild_on_method_change(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_cost_basis_method', None)
+    if not raw and previous and previous != instance.cost_basis_method:
+        rebuild_lots(instance)
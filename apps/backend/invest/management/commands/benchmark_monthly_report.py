@@ -0,0 +1,154 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.test.utils import CaptureQueriesContext
+
+from invest.models import Asset, InvestmentPortfolio, InvestmentTransaction
+from invest.reports import monthly_transaction_report
+from master.models import User
+
+
+def legacy_monthly_report(queryset, year):
+    """
+    Implementasi lama monthly_report (per bulan x per tipe transaksi).
+    Disimpan hanya sebagai pembanding benchmark.
+    """
+    queryset = queryset.filter(transaction_date__year=year)
+    monthly_data = {}
+
+    for month in range(1, 13):
+        month_transactions = queryset.filter(transaction_date__month=month)
+        total_buy = month_transactions.filter(
+            transaction_type='buy'
+        ).aggregate(total=Sum('total_amount'))['total'] or 0
+        total_sell = month_transactions.filter(
+            transaction_type='sell'
+        ).aggregate(total=Sum('total_amount'))['total'] or 0
+        total_dividend = month_transactions.filter(
+            transaction_type='dividend'
+        ).aggregate(total=Sum('total_amount'))['total'] or 0
+
+        monthly_data[f"{year}-{month:02d}"] = {
+            'total_transactions': month_transactions.count(),
+            'total_buy_amount': total_buy,
+            'total_sell_amount': total_sell,
+            'total_dividend': total_dividend,
+            'net_investment': total_buy - total_sell,
+        }
+        month_transactions.values(
+            'asset__symbol', 'asset__name'
+        ).annotate(count=Count('id')).order_by('-count').first()
+
+    year_totals = {
+        'total_transactions': queryset.count(),
+        'total_buy_amount': queryset.filter(
+            transaction_type='buy'
+        ).aggregate(total=Sum('total_amount'))['total'] or 0,
+        'total_sell_amount': queryset.filter(
+            transaction_type='sell'
+        ).aggregate(total=Sum('total_amount'))['total'] or 0,
+        'total_dividend': queryset.filter(
+            transaction_type='dividend'
+        ).aggregate(total=Sum('total_amount'))['total'] or 0,
+    }
+    return year_totals, monthly_data
+
+
+class Command(BaseCommand):
+    """
+    Benchmark monthly_report: implementasi lama (loop per bulan) vs grouped
+    query di invest.reports.
+
+    Tanpa --user, data sintetis dibuat di dalam transaksi yang di-rollback
+    sehingga database tidak berubah.
+    """
+    help = 'Bandingkan jumlah query dan latency monthly_report lama vs baru'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Gunakan data user ID ini alih-alih data sintetis')
+        parser.add_argument('--transactions', type=int, default=20000, help='Jumlah transaksi sintetis')
+        parser.add_argument('--start-year', type=int, default=date.today().year - 2)
+        parser.add_argument('--end-year', type=int, default=date.today().year)
+        parser.add_argument('--runs', type=int, default=3, help='Jumlah pengulangan per implementasi')
+
+    def handle(self, *args, **options):
+        if options['start_year'] > options['end_year']:
+            raise CommandError('--start-year tidak boleh lebih besar dari --end-year')
+
+        if options['user']:
+            queryset = InvestmentTransaction.objects.filter(user_id=options['user'])
+            self.run_benchmark(queryset, options)
+            return
+
+        with transaction.atomic():
+            user = self.seed(options)
+            self.run_benchmark(InvestmentTransaction.objects.filter(user=user), options)
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        rng = random.Random(42)
+        user = User.objects.create_user(username='__benchmark_monthly_report__', password=None)
+        portfolios = [
+            InvestmentPortfolio.objects.create(user=user, name=f'Benchmark {index}')
+            for index in range(3)
+        ]
+        assets = Asset.objects.bulk_create([
+            Asset(symbol=f'BMR{index:03d}', name=f'Benchmark Asset {index}', type='stock')
+            for index in range(20)
+        ])
+
+        start = date(options['start_year'], 1, 1)
+        span = (date(options['end_year'], 12, 31) - start).days
+        InvestmentTransaction.objects.bulk_create([
+            InvestmentTransaction(
+                user=user,
+                portfolio=rng.choice(portfolios),
+                asset=rng.choice(assets),
+                transaction_type=rng.choice(['buy', 'buy', 'sell', 'dividend']),
+                quantity=Decimal('100'),
+                price=Decimal('1000'),
+                total_amount=Decimal(rng.randint(1, 1000) * 1000),
+                transaction_date=start + timedelta(days=rng.randint(0, span)),
+            )
+            for _ in range(options['transactions'])
+        ], batch_size=2000)
+
+        self.stdout.write(f"Seeded {options['transactions']} transaksi sintetis.")
+        return user
+
+    def measure(self, label, func, runs):
+        timings = []
+        for _ in range(runs):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+        best = min(timings) * 1000
+        self.stdout.write(f'{label:<24} queries={len(context.captured_queries):<5} best={best:.1f} ms')
+        return best
+
+    def run_benchmark(self, queryset, options):
+        start_year, end_year = options['start_year'], options['end_year']
+        runs = max(options['runs'], 1)
+
+        def legacy():
+            for year in range(start_year, end_year + 1):
+                legacy_monthly_report(queryset, year)
+
+        legacy_ms = self.measure('legacy (per bulan)', legacy, runs)
+        grouped_ms = self.measure(
+            'grouped', lambda: monthly_transaction_report(queryset, start_year, end_year), runs
+        )
+        self.measure(
+            'grouped + by_portfolio',
+            lambda: monthly_transaction_report(queryset, start_year, end_year, by_portfolio=True),
+            runs
+        )
+
+        if grouped_ms:
+            self.stdout.write(self.style.SUCCESS(f'Speedup: {legacy_ms / grouped_ms:.1f}x'))
@@ -0,0 +1,130 @@
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from invest.models import Asset, AssetPrice, CompactAssetPrice
+from invest.price_store import sync_compact_prices
+from invest.timeseries import ohlc_buckets
+
+
+class Command(BaseCommand):
+    """
+    Benchmark range scan history harga: asset_prices vs asset_prices_compact.
+
+    Data sintetis (harga harian banyak asset, ditulis per hari seperti ingest
+    harian) dibuat di dalam transaksi yang di-rollback sehingga database tidak
+    berubah. Setiap window diukur sebagai fetch baris mentah dan sebagai OHLC
+    mingguan (invest.timeseries.ohlc_buckets).
+    """
+    help = 'Bandingkan latency range scan 1y/5y storage harga default vs compact'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assets', type=int, default=50, help='Jumlah asset sintetis')
+        parser.add_argument('--years', type=int, default=6, help='Panjang history per asset (tahun)')
+        parser.add_argument('--runs', type=int, default=3, help='Jumlah pengulangan per pengukuran')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            asset = self.seed(options)
+            self.run_benchmark(asset, options)
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        rng = random.Random(42)
+        assets = Asset.objects.bulk_create([
+            Asset(symbol=f'BPS{index:03d}', name=f'Benchmark Asset {index}', type='stock')
+            for index in range(max(options['assets'], 1))
+        ])
+
+        days = max(options['years'], 1) * 365
+        start = timezone.make_aware(datetime.combine(timezone.now().date(), datetime.min.time())) - timedelta(days=days)
+        levels = {asset.pk: 1000.0 for asset in assets}
+
+        started = time.perf_counter()
+        batch = []
+        for day in range(days):
+            timestamp = start + timedelta(days=day)
+            for asset in assets:
+                levels[asset.pk] *= 1 + rng.gauss(0, 0.02)
+                batch.append(AssetPrice(
+                    asset_id=asset.pk,
+                    timestamp=timestamp,
+                    price=Decimal(f'{levels[asset.pk]:.2f}'),
+                    volume=Decimal(rng.randint(1000, 1000000)),
+                    source='benchmark',
+                ))
+            if len(batch) >= 5000:
+                AssetPrice.objects.bulk_create(batch)
+                batch = []
+        AssetPrice.objects.bulk_create(batch)
+
+        rows = days * len(assets)
+        self.stdout.write(f'Seeded {rows} harga ({len(assets)} asset x {days} hari) '
+                          f'dalam {time.perf_counter() - started:.1f} s.')
+
+        started = time.perf_counter()
+        sync_compact_prices(AssetPrice.objects.filter(asset__in=assets))
+        self.stdout.write(f'Backfill compact dalam {time.perf_counter() - started:.1f} s.')
+        self.report_sizes()
+
+        return assets[len(assets) // 2]
+
+    def report_sizes(self):
+        tables = [AssetPrice._meta.db_table, CompactAssetPrice._meta.db_table]
+        with connection.cursor() as cursor:
+            for table in tables:
+                try:
+                    if connection.vendor == 'postgresql':
+                        cursor.execute('SELECT pg_total_relation_size(%s)', [table])
+                    elif connection.vendor == 'sqlite':
+                        # Tabel + index; membutuhkan SQLite dengan dbstat
+                        cursor.execute(
+                            'SELECT SUM(pgsize) FROM dbstat WHERE name = %s OR name IN '
+                            '(SELECT name FROM sqlite_master WHERE type = %s AND tbl_name = %s)',
+                            [table, 'index', table]
+                        )
+                    else:
+                        return
+                    size = cursor.fetchone()[0] or 0
+                except Exception:
+                    return
+                self.stdout.write(f'{table:<24} size={size / 1024 / 1024:.1f} MB')
+
+    def measure(self, label, func, runs):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            rows = func()
+            timings.append(time.perf_counter() - started)
+        best = min(timings) * 1000
+        self.stdout.write(f'{label:<32} rows={rows:<6} best={best:.1f} ms')
+        return best
+
+    def run_benchmark(self, asset, options):
+        runs = max(options['runs'], 1)
+        end = timezone.now()
+
+        for years in (1, 5):
+            start = end - timedelta(days=365 * years)
+            results = {}
+            for label, model in (('default', AssetPrice), ('compact', CompactAssetPrice)):
+                queryset = model.objects.filter(asset=asset, timestamp__gte=start, timestamp__lte=end)
+                results[label] = self.measure(
+                    f'{years}y raw     {label}',
+                    lambda: len(list(queryset.order_by('timestamp').values_list('timestamp', 'price'))),
+                    runs
+                )
+                self.measure(
+                    f'{years}y weekly  {label}',
+                    lambda: len(ohlc_buckets(queryset, 'week')),
+                    runs
+                )
+            if results['compact']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{years}y raw scan speedup: {results['default'] / results['compact']:.2f}x"
+                ))
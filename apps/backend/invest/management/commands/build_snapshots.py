@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from invest.models import InvestmentPortfolio
+from invest.snapshots import build_snapshots
+
+
+class Command(BaseCommand):
+    """
+    Build snapshot NAV harian semua portfolio (dijalankan harian, mis. via cron).
+
+    Incremental: setiap portfolio dilanjutkan dari snapshot terakhirnya, jadi
+    run harian hanya menambah satu baris per portfolio. Portfolio tanpa
+    snapshot di-replay dari transaksi pertamanya.
+    """
+    help = 'Build snapshot nilai portfolio harian dari transaksi dan history harga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Batasi ke user ID tertentu')
+        parser.add_argument('--portfolio', help='Batasi ke portfolio ID tertentu')
+        parser.add_argument('--until', help='Build sampai tanggal YYYY-MM-DD (default: hari ini)')
+
+    def handle(self, *args, **options):
+        until = None
+        if options.get('until'):
+            until = parse_date(options['until'])
+            if until is None:
+                raise CommandError('--until harus berformat YYYY-MM-DD')
+
+        portfolios = InvestmentPortfolio.objects.all()
+        if options.get('user'):
+            portfolios = portfolios.filter(user_id=options['user'])
+        if options.get('portfolio'):
+            portfolios = portfolios.filter(pk=options['portfolio'])
+
+        portfolios_count = written = 0
+        for portfolio in portfolios.iterator():
+            written += build_snapshots(portfolio, until=until)
+            portfolios_count += 1
+
+        self.stdout.write(f'{written} snapshot ditulis untuk {portfolios_count} portfolio.')
+        self.stdout.write(self.style.SUCCESS('Build snapshot selesai.'))
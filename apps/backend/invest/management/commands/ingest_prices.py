@@ -0,0 +1,55 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from invest.ingest import INGEST_FORMATS, PriceIngestor, iter_price_records
+
+
+class Command(BaseCommand):
+    """
+    Bulk ingest harga asset dari file CSV (dengan header) atau NDJSON.
+
+    Kolom: symbol, timestamp, price, volume (optional), market_cap (optional),
+    source (optional). Gunakan '-' sebagai path untuk membaca dari stdin.
+    """
+    help = 'Bulk ingest time series harga asset dari CSV/NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path file CSV/NDJSON, atau '-' untuk stdin")
+        parser.add_argument('--format', dest='ingest_format', choices=INGEST_FORMATS,
+                            help='Format input (default: dari ekstensi file, atau csv)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Jumlah baris per bulk_create')
+        parser.add_argument('--source', default='import', help='Sumber data jika kolom source kosong')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        ingest_format = options['ingest_format']
+        if not ingest_format:
+            ingest_format = 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+        ingestor = PriceIngestor(batch_size=max(options['batch_size'], 1), source=options['source'])
+
+        if path == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+            stats = ingestor.ingest(iter_price_records(stream, ingest_format))
+        else:
+            try:
+                with open(path, encoding='utf-8-sig', newline='') as stream:
+                    stats = ingestor.ingest(iter_price_records(stream, ingest_format))
+            except OSError as exc:
+                raise CommandError(f'Tidak bisa membaca {path}: {exc}')
+
+        for error in stats['errors']:
+            self.stdout.write(self.style.WARNING(f"Baris {error['line']}: {error['error']}"))
+
+        self.stdout.write(
+            f"{stats['rows_received']} baris dibaca, {stats['rows_accepted']} diterima, "
+            f"{stats['duplicate_rows']} duplikat, {stats['invalid_rows']} tidak valid "
+            f"dalam {stats['batches']} batch ({stats['quotes_updated']} quote diupdate)."
+        )
+        if stats['unknown_symbols']:
+            self.stdout.write(self.style.WARNING(f"Symbol tidak dikenal: {', '.join(stats['unknown_symbols'])}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Selesai dalam {stats['elapsed_seconds']} detik ({stats['rows_per_second']} baris/detik)."
+        ))
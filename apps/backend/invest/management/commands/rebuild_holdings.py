@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from invest.holdings import rebuild_holdings
+from invest.models import InvestmentPortfolio
+
+
+class Command(BaseCommand):
+    """
+    Rebuild holdings dari seluruh transaksi (mis. setelah data drift atau import).
+
+    Transaksi di-stream dengan iterator per portfolio. Tanpa --force hanya
+    portfolio yang transaksinya berubah sejak checkpoint terakhir (atau belum
+    pernah di-rebuild) yang di-replay.
+    """
+    help = 'Hitung ulang holdings dari transaksi dengan checkpoint per portfolio'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Batasi rebuild ke user ID tertentu')
+        parser.add_argument('--portfolio', help='Batasi rebuild ke portfolio ID tertentu')
+        parser.add_argument('--force', action='store_true', help='Rebuild semua portfolio walau checkpoint terbaru')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Jumlah transaksi per fetch')
+
+    def handle(self, *args, **options):
+        portfolios = InvestmentPortfolio.objects.all()
+        if options.get('user'):
+            portfolios = portfolios.filter(user_id=options['user'])
+        if options.get('portfolio'):
+            portfolios = portfolios.filter(pk=options['portfolio'])
+
+        stats = rebuild_holdings(portfolios, force=options['force'], chunk_size=max(options['chunk_size'], 1))
+
+        self.stdout.write(
+            f"{stats['portfolios_count']} portfolio di-rebuild dari {stats['transactions_count']} transaksi: "
+            f"{stats['holdings_created']} dibuat, {stats['holdings_updated']} diupdate, "
+            f"{stats['holdings_deleted']} dihapus."
+        )
+        self.stdout.write(self.style.SUCCESS('Rebuild holdings selesai.'))
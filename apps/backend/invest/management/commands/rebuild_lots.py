@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from invest.lots import rebuild_lots
+from invest.models import InvestmentPortfolio
+
+
+class Command(BaseCommand):
+    """
+    Bangun ulang lot cost basis dan ledger realized P&L dari seluruh transaksi.
+
+    Dipakai untuk backfill transaksi yang dibuat sebelum engine lot ada (atau
+    lewat bulk_create yang tidak mengirim signal). Setelah itu lot dijaga
+    otomatis oleh invest.lots setiap transaksi dibuat, diedit, atau dihapus.
+    """
+    help = 'Bangun ulang tax lot dan ledger realized P&L dari transaksi'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Batasi ke user ID tertentu')
+        parser.add_argument('--portfolio', help='Batasi ke portfolio ID tertentu')
+
+    def handle(self, *args, **options):
+        portfolios = InvestmentPortfolio.objects.all()
+        if options.get('user'):
+            portfolios = portfolios.filter(user_id=options['user'])
+        if options.get('portfolio'):
+            portfolios = portfolios.filter(pk=options['portfolio'])
+
+        portfolios_count = replayed = 0
+        for portfolio in portfolios.iterator():
+            replayed += rebuild_lots(portfolio)
+            portfolios_count += 1
+
+        self.stdout.write(f'{replayed} transaksi di-replay untuk {portfolios_count} portfolio.')
+        self.stdout.write(self.style.SUCCESS('Rebuild lot selesai.'))
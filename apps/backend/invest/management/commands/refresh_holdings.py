@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from invest.holdings import refresh_holdings
+from invest.models import InvestmentHolding
+
+
+class Command(BaseCommand):
+    """
+    Refresh harga holdings semua user secara batch.
+
+    Holdings diproses per chunk: satu query harga terakhir untuk asset di
+    chunk tersebut lalu satu bulk_update.
+    """
+    help = 'Refresh current_price, current_value, dan unrealized_pnl holdings dari harga terakhir'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Batasi refresh ke user ID tertentu')
+        parser.add_argument('--portfolio', help='Batasi refresh ke portfolio ID tertentu')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Jumlah holdings per chunk')
+
+    def handle(self, *args, **options):
+        queryset = InvestmentHolding.objects.filter(quantity__gt=0)
+        if options.get('user'):
+            queryset = queryset.filter(user_id=options['user'])
+        if options.get('portfolio'):
+            queryset = queryset.filter(portfolio_id=options['portfolio'])
+
+        stats = refresh_holdings(queryset, chunk_size=max(options['chunk_size'], 1))
+
+        self.stdout.write(
+            f"{stats['holdings_updated']}/{stats['holdings_count']} holdings di-refresh. "
+            f"Total value: {stats['total_value_before']} -> {stats['total_value_after']}"
+        )
+        self.stdout.write(self.style.SUCCESS('Refresh holdings selesai.'))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from invest.models import AssetPrice
+from invest.price_store import price_storage, sync_compact_prices
+
+
+class Command(BaseCommand):
+    """
+    Backfill asset_prices ke storage compact (asset_prices_compact).
+
+    Idempotent: baris yang sudah ada di storage compact dilewati, sehingga
+    aman dijalankan ulang (mis. dengan --since setelah INVEST_PRICE_STORAGE
+    diaktifkan untuk mengejar harga yang masuk selama backfill).
+    """
+    help = 'Salin history harga asset ke storage compact'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asset', action='append', dest='symbols', default=[],
+                            help='Hanya asset dengan symbol ini (bisa diulang)')
+        parser.add_argument('--since', help='Hanya harga dengan tanggal >= YYYY-MM-DD')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Jumlah baris per chunk')
+
+    def handle(self, *args, **options):
+        queryset = AssetPrice.objects.all()
+        if options['symbols']:
+            queryset = queryset.filter(asset__symbol__in=[symbol.upper() for symbol in options['symbols']])
+
+        since = None
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError('--since harus berformat YYYY-MM-DD')
+
+        stats = sync_compact_prices(queryset, since=since, chunk_size=max(options['chunk_size'], 1))
+
+        self.stdout.write(f"{stats['rows_scanned']} harga disalin dalam {stats['chunks']} chunk.")
+        if price_storage() != 'compact':
+            self.stdout.write(self.style.WARNING(
+                "INVEST_PRICE_STORAGE masih 'default': history dibaca dari asset_prices "
+                "dan harga baru belum disalin otomatis."
+            ))
@@ -0,0 +1,58 @@
+# Generated by Django 4.1.13 on 2026-10-17 13:22
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def populate_quotes(apps, schema_editor):
+    """Isi asset_quotes dari harga terakhir setiap asset di asset_prices"""
+    Asset = apps.get_model('invest', 'Asset')
+    AssetPrice = apps.get_model('invest', 'AssetPrice')
+    AssetQuote = apps.get_model('invest', 'AssetQuote')
+
+    latest = AssetPrice.objects.filter(asset=OuterRef('pk')).order_by('-timestamp').values('pk')[:1]
+    price_ids = list(
+        Asset.objects.annotate(latest_price_id=Subquery(latest))
+        .exclude(latest_price_id=None)
+        .values_list('latest_price_id', flat=True)
+    )
+
+    for start in range(0, len(price_ids), 1000):
+        AssetQuote.objects.bulk_create([
+            AssetQuote(
+                asset_id=price.asset_id,
+                price=price.price,
+                volume=price.volume,
+                market_cap=price.market_cap,
+                timestamp=price.timestamp,
+                source=price.source,
+            )
+            for price in AssetPrice.objects.filter(pk__in=price_ids[start:start + 1000])
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invest', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetQuote',
+            fields=[
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='quote', serialize=False, to='invest.asset')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('volume', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('market_cap', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('timestamp', models.DateTimeField()),
+                ('source', models.CharField(blank=True, max_length=50)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'asset_quotes',
+            },
+        ),
+        migrations.RunPython(populate_quotes, migrations.RunPython.noop),
+    ]
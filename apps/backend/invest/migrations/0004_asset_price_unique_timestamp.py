@@ -0,0 +1,41 @@
+# Generated by Django 4.1.13 on 2026-10-17 13:25
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_prices(apps, schema_editor):
+    """Sisakan satu harga per (asset, timestamp) sebelum unique constraint dibuat"""
+    AssetPrice = apps.get_model('invest', 'AssetPrice')
+
+    duplicates = (
+        AssetPrice.objects.values('asset_id', 'timestamp')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in list(duplicates):
+        prices = AssetPrice.objects.filter(
+            asset_id=duplicate['asset_id'],
+            timestamp=duplicate['timestamp'],
+        )
+        keep_id = prices.order_by('pk').values_list('pk', flat=True).first()
+        prices.exclude(pk=keep_id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invest', '0003_asset_quote'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_prices, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='assetprice',
+            name='asset_price_asset_i_4e40a8_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='assetprice',
+            constraint=models.UniqueConstraint(fields=('asset', 'timestamp'), name='unique_asset_price_timestamp'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.1.13 on 2026-10-17 13:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BRIN_INDEX = 'asset_prices_compact_timestamp_brin'
+
+
+def create_brin_index(apps, schema_editor):
+    """BRIN index pada timestamp (PostgreSQL saja; database lain cukup unique index)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {BRIN_INDEX} ON asset_prices_compact '
+        f'USING brin (timestamp) WITH (pages_per_range = 32)'
+    )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {BRIN_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invest', '0004_asset_price_unique_timestamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompactAssetPrice',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('timestamp', models.DateTimeField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('volume', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('market_cap', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('source', models.CharField(blank=True, max_length=50)),
+                ('asset', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='compact_prices', to='invest.asset')),
+            ],
+            options={
+                'db_table': 'asset_prices_compact',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='compactassetprice',
+            constraint=models.UniqueConstraint(fields=('asset', 'timestamp'), name='unique_compact_price_timestamp'),
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
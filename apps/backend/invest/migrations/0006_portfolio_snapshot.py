@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-17 13:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invest', '0005_compact_asset_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSnapshot',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('market_value', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('total_cost', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('net_flow', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('positions', models.JSONField(default=dict)),
+                ('portfolio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='invest.investmentportfolio')),
+            ],
+            options={
+                'db_table': 'portfolio_snapshots',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='portfoliosnapshot',
+            constraint=models.UniqueConstraint(fields=('portfolio', 'date'), name='unique_portfolio_snapshot_date'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.1.13 on 2026-10-17 13:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invest', '0006_portfolio_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='investmentportfolio',
+            name='cost_basis_method',
+            field=models.CharField(choices=[('fifo', 'FIFO'), ('lifo', 'LIFO'), ('average', 'Average Cost')], default='average', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='TaxLot',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('acquired_date', models.DateField()),
+                ('remaining_quantity', models.DecimalField(decimal_places=8, max_digits=18)),
+                ('remaining_cost', models.DecimalField(decimal_places=8, max_digits=24)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='invest.asset')),
+                ('portfolio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='invest.investmentportfolio')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='invest.investmenttransaction')),
+            ],
+            options={
+                'db_table': 'investment_tax_lots',
+            },
+        ),
+        migrations.CreateModel(
+            name='RealizedGain',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('acquired_date', models.DateField()),
+                ('method', models.CharField(choices=[('fifo', 'FIFO'), ('lifo', 'LIFO'), ('average', 'Average Cost')], max_length=10)),
+                ('quantity', models.DecimalField(decimal_places=8, max_digits=18)),
+                ('proceeds', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('cost_basis', models.DecimalField(decimal_places=8, max_digits=24)),
+                ('realized_pnl', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='realized_gains', to='invest.asset')),
+                ('lot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='realized_gains', to='invest.taxlot')),
+                ('portfolio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='realized_gains', to='invest.investmentportfolio')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='realized_gains', to='invest.investmenttransaction')),
+            ],
+            options={
+                'db_table': 'investment_realized_gains',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='taxlot',
+            index=models.Index(fields=['portfolio', 'asset', 'acquired_date'], name='investment__portfol_31df5b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='realizedgain',
+            index=models.Index(fields=['portfolio', 'date'], name='investment__portfol_a0569a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='realizedgain',
+            index=models.Index(fields=['asset', 'date'], name='investment__asset_i_930c61_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.1.13 on 2026-10-17 13:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invest', '0007_tax_lots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HoldingCheckpoint',
+            fields=[
+                ('portfolio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='holding_checkpoint', serialize=False, to='invest.investmentportfolio')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('rebuilt_version', models.PositiveBigIntegerField(default=0)),
+                ('transactions_count', models.PositiveIntegerField(default=0)),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'holding_checkpoints',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-17 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invest', '0008_holding_checkpoint'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='investmenttransaction',
+            name='investment__user_id_65fa0d_idx',
+        ),
+        migrations.AddIndex(
+            model_name='investmenttransaction',
+            index=models.Index(fields=['user', 'transaction_date', 'id'], name='investment__user_id_3c9c7a_idx'),
+        ),
+    ]
@@ -3,7 +3,10 @@
 # ========================================
 
 import uuid
-from django.db import models
+from decimal import Decimal
+from django.db import models, transaction as db_transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from master.models import User
 
@@ -42,6 +45,12 @@ class InvestmentPortfolio(models.Model):
         ('high', 'High Risk'),
     ]
 
+    COST_BASIS_CHOICES = [
+        ('fifo', 'FIFO'),
+        ('lifo', 'LIFO'),
+        ('average', 'Average Cost'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='investment_portfolios')
     name = models.CharField(max_length=255)
@@ -49,6 +58,8 @@ class InvestmentPortfolio(models.Model):
     initial_capital = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     target_allocation = models.JSONField(blank=True, null=True)  # {"stocks": 70, "bonds": 20, "crypto": 10}
     risk_level = models.CharField(max_length=10, choices=RISK_LEVEL_CHOICES, blank=True)
+    # Metode pemilihan lot saat sell (lihat invest.lots)
+    cost_basis_method = models.CharField(max_length=10, choices=COST_BASIS_CHOICES, default='average')
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
@@ -59,6 +70,54 @@ class InvestmentPortfolio(models.Model):
     def __str__(self):
         return f"{self.user.full_name} - {self.name}"
 
+    ROLLUP_FIELDS = ['total_value', 'total_cost', 'total_pnl', 'holdings_count']
+
+    @staticmethod
+    def annotate_rollups(queryset):
+        """
+        Menambahkan anotasi rollup holdings ke queryset portfolio dalam satu query:
+        total_value, total_cost, total_pnl, dan holdings_count.
+
+        Anotasi bisa langsung dipakai untuk filter/ordering
+        (mis. filter(total_value__gte=...)).
+        """
+        amount_field = models.DecimalField(max_digits=15, decimal_places=2)
+        holdings = InvestmentHolding.objects.filter(portfolio=OuterRef('pk')).order_by().values('portfolio')
+
+        def total(expression):
+            return Coalesce(
+                Subquery(holdings.annotate(total=Sum(expression)).values('total'), output_field=amount_field),
+                Decimal('0'),
+                output_field=amount_field
+            )
+
+        return queryset.annotate(
+            total_value=total('current_value'),
+            total_cost=total('total_cost'),
+            holdings_count=Coalesce(
+                Subquery(holdings.annotate(total=Count('id')).values('total')),
+                0
+            ),
+        ).annotate(
+            total_pnl=models.ExpressionWrapper(
+                F('total_value') - F('total_cost'),
+                output_field=amount_field
+            )
+        )
+
+    def get_rollup(self):
+        """
+        Rollup holdings portfolio. Memakai anotasi dari annotate_rollups jika ada,
+        jika tidak dihitung dengan satu query dan disimpan di instance.
+        """
+        if not all(hasattr(self, field) for field in self.ROLLUP_FIELDS):
+            rollup = InvestmentPortfolio.annotate_rollups(
+                InvestmentPortfolio.objects.filter(pk=self.pk)
+            ).values(*self.ROLLUP_FIELDS).get()
+            for field, value in rollup.items():
+                setattr(self, field, value)
+        return {field: getattr(self, field) for field in self.ROLLUP_FIELDS}
+
 
 class InvestmentTransaction(models.Model):
     TRANSACTION_TYPE_CHOICES = [
@@ -86,7 +145,7 @@ class InvestmentTransaction(models.Model):
     class Meta:
         db_table = 'investment_transactions'
         indexes = [
-            models.Index(fields=['user', 'transaction_date']),
+            models.Index(fields=['user', 'transaction_date', 'id']),
             models.Index(fields=['portfolio', 'transaction_date']),
             models.Index(fields=['asset', 'transaction_date']),
         ]
@@ -94,6 +153,16 @@ class InvestmentTransaction(models.Model):
     def __str__(self):
         return f"{self.transaction_type} {self.quantity} {self.asset.symbol}"
 
+    def save(self, *args, **kwargs):
+        # Undo lot (pre_save), tulis baris, dan replay lot (post_save) di
+        # invest.lots berhasil atau gagal bersama; begitu juga delete
+        with db_transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with db_transaction.atomic():
+            return super().delete(*args, **kwargs)
+
 
 class InvestmentHolding(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -116,6 +185,112 @@ class InvestmentHolding(models.Model):
         return f"{self.asset.symbol} - {self.quantity}"
 
 
+class HoldingCheckpoint(models.Model):
+    """
+    Checkpoint rebuild holdings per portfolio (lihat invest.holdings.rebuild_holdings).
+
+    version dinaikkan setiap kali transaksi portfolio berubah; portfolio perlu
+    di-rebuild jika belum punya checkpoint atau version != rebuilt_version.
+    """
+    portfolio = models.OneToOneField(
+        InvestmentPortfolio, on_delete=models.CASCADE, primary_key=True, related_name='holding_checkpoint'
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    rebuilt_version = models.PositiveBigIntegerField(default=0)
+    transactions_count = models.PositiveIntegerField(default=0)
+    rebuilt_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'holding_checkpoints'
+
+    def __str__(self):
+        return f"{self.portfolio_id} - v{self.rebuilt_version}/{self.version}"
+
+
+class TaxLot(models.Model):
+    """
+    Lot pembelian yang masih (atau pernah) terbuka per (portfolio, asset).
+
+    Dibuat oleh transaksi buy dan dikurangi oleh sell sesuai cost_basis_method
+    portfolio; dikelola oleh invest.lots. remaining_cost adalah cost basis
+    untuk remaining_quantity (termasuk fees pembelian).
+    """
+    id = models.BigAutoField(primary_key=True)
+    portfolio = models.ForeignKey(InvestmentPortfolio, on_delete=models.CASCADE, related_name='lots')
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='lots')
+    transaction = models.ForeignKey(InvestmentTransaction, on_delete=models.CASCADE, related_name='lots')
+    acquired_date = models.DateField()
+    remaining_quantity = models.DecimalField(max_digits=18, decimal_places=8)
+    remaining_cost = models.DecimalField(max_digits=24, decimal_places=8)
+
+    class Meta:
+        db_table = 'investment_tax_lots'
+        indexes = [
+            models.Index(fields=['portfolio', 'asset', 'acquired_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} - {self.remaining_quantity} @ {self.acquired_date}"
+
+
+class RealizedGain(models.Model):
+    """
+    Ledger realized P&L: satu baris per lot yang dikonsumsi oleh transaksi sell.
+
+    quantity dan cost_basis disimpan presisi penuh agar sell bisa di-undo
+    saat replay transaksi backdated (lihat invest.lots).
+    """
+    id = models.BigAutoField(primary_key=True)
+    portfolio = models.ForeignKey(InvestmentPortfolio, on_delete=models.CASCADE, related_name='realized_gains')
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='realized_gains')
+    transaction = models.ForeignKey(InvestmentTransaction, on_delete=models.CASCADE, related_name='realized_gains')
+    lot = models.ForeignKey(TaxLot, on_delete=models.CASCADE, related_name='realized_gains')
+    date = models.DateField()
+    acquired_date = models.DateField()
+    method = models.CharField(max_length=10, choices=InvestmentPortfolio.COST_BASIS_CHOICES)
+    quantity = models.DecimalField(max_digits=18, decimal_places=8)
+    proceeds = models.DecimalField(max_digits=15, decimal_places=2)
+    cost_basis = models.DecimalField(max_digits=24, decimal_places=8)
+    realized_pnl = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        db_table = 'investment_realized_gains'
+        indexes = [
+            models.Index(fields=['portfolio', 'date']),
+            models.Index(fields=['asset', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} {self.date}: {self.realized_pnl}"
+
+
+class PortfolioSnapshot(models.Model):
+    """
+    Snapshot harian nilai portfolio (NAV), hasil replay transaksi terhadap
+    history harga (lihat invest.snapshots).
+
+    positions menyimpan state posisi akhir hari ({asset_id: [quantity, cost]})
+    sehingga snapshot hari berikutnya cukup dilanjutkan dari snapshot terakhir.
+    """
+    id = models.BigAutoField(primary_key=True)
+    portfolio = models.ForeignKey(InvestmentPortfolio, on_delete=models.CASCADE, related_name='snapshots')
+    date = models.DateField()
+    market_value = models.DecimalField(max_digits=18, decimal_places=2)
+    total_cost = models.DecimalField(max_digits=18, decimal_places=2)
+    # Arus dana bersih hari itu: buy (+fees) - sell proceeds - dividend
+    net_flow = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    positions = models.JSONField(default=dict)
+
+    class Meta:
+        db_table = 'portfolio_snapshots'
+        constraints = [
+            models.UniqueConstraint(fields=['portfolio', 'date'], name='unique_portfolio_snapshot_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.portfolio_id} - {self.date}: {self.market_value}"
+
+
 class AssetPrice(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='prices')
@@ -127,9 +302,61 @@ class AssetPrice(models.Model):
 
     class Meta:
         db_table = 'asset_prices'
-        indexes = [
-            models.Index(fields=['asset', 'timestamp']),
+        constraints = [
+            # Juga berfungsi sebagai index (asset, timestamp) untuk range scan
+            models.UniqueConstraint(fields=['asset', 'timestamp'], name='unique_asset_price_timestamp'),
         ]
 
     def __str__(self):
         return f"{self.asset.symbol} - {self.price} at {self.timestamp}"
+
+
+class CompactAssetPrice(models.Model):
+    """
+    Storage history harga yang lebih ringkas untuk range scan (opsional).
+
+    Primary key bigint (bukan UUID) dan tanpa index terpisah untuk FK asset;
+    range scan dilayani oleh unique (asset, timestamp), ditambah BRIN index
+    pada timestamp di PostgreSQL (lihat migration 0005). Read replica dari
+    AssetPrice (sumber kebenaran) yang dijaga oleh invest.price_store saat
+    INVEST_PRICE_STORAGE = 'compact'.
+    """
+    id = models.BigAutoField(primary_key=True)
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='compact_prices', db_index=False)
+    timestamp = models.DateTimeField()
+    price = models.DecimalField(max_digits=15, decimal_places=2)
+    volume = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    market_cap = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    source = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        db_table = 'asset_prices_compact'
+        constraints = [
+            models.UniqueConstraint(fields=['asset', 'timestamp'], name='unique_compact_price_timestamp'),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} - {self.price} at {self.timestamp}"
+
+
+class AssetQuote(models.Model):
+    """
+    Harga terakhir per asset (latest-price store).
+
+    Dikelola oleh invest.quotes: diupdate setiap kali AssetPrice yang lebih baru
+    ditulis (single insert maupun bulk ingest), sehingga "harga saat ini" cukup
+    dibaca dengan primary key lookup tanpa ORDER BY timestamp di asset_prices.
+    """
+    asset = models.OneToOneField(Asset, on_delete=models.CASCADE, primary_key=True, related_name='quote')
+    price = models.DecimalField(max_digits=15, decimal_places=2)
+    volume = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    market_cap = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    timestamp = models.DateTimeField()
+    source = models.CharField(max_length=50, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'asset_quotes'
+
+    def __str__(self):
+        return f"{self.asset_id} - {self.price} at {self.timestamp}"
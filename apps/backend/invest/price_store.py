@@ -0,0 +1,160 @@
+# ========================================
+# invest/price_store.py - Storage backend history harga asset
+# ========================================
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .models import AssetPrice, CompactAssetPrice
+from .signals import prices_deleted
+
+
+PRICE_STORAGES = ['default', 'compact']
+
+PRICE_FIELDS = ['price', 'volume', 'market_cap', 'source']
+
+
+def price_storage():
+    """
+    Storage history harga aktif (setting INVEST_PRICE_STORAGE).
+
+    - 'default': history dibaca dari asset_prices
+    - 'compact': asset_prices_compact menjadi read replica untuk range scan
+      history. asset_prices tetap sumber kebenaran (semua write, quote, dan
+      ingest memakainya); create, edit, dan delete harga lewat ORM atau
+      PriceIngestor di-mirror ke replica. Write yang melewati signal
+      (bulk_update, SQL langsung) perlu disusul dengan sync_compact_prices.
+
+    Migrasi: jalankan `manage.py sync_compact_prices` untuk backfill, aktifkan
+    INVEST_PRICE_STORAGE = 'compact', lalu jalankan sync sekali lagi dengan
+    --since untuk mengejar harga yang masuk selama backfill.
+    """
+    storage = getattr(settings, 'INVEST_PRICE_STORAGE', 'default')
+    if storage not in PRICE_STORAGES:
+        raise ImproperlyConfigured(
+            f"INVEST_PRICE_STORAGE harus salah satu dari: {', '.join(PRICE_STORAGES)}"
+        )
+    return storage
+
+
+def compact_enabled():
+    return price_storage() == 'compact'
+
+
+def price_model():
+    """Model history harga untuk storage aktif"""
+    return CompactAssetPrice if compact_enabled() else AssetPrice
+
+
+def price_history(asset, start=None, end=None):
+    """Queryset history harga asset dari storage aktif, difilter rentang timestamp"""
+    queryset = price_model().objects.filter(asset=asset)
+    if start is not None:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end is not None:
+        queryset = queryset.filter(timestamp__lte=end)
+    return queryset
+
+
+def to_compact(price):
+    return CompactAssetPrice(
+        asset_id=price.asset_id,
+        timestamp=price.timestamp,
+        **{field: getattr(price, field) for field in PRICE_FIELDS}
+    )
+
+
+def mirror_prices(prices, batch_size=5000):
+    """
+    Tulis harga baru ke storage compact (jika aktif). Duplikat (asset, timestamp)
+    diabaikan, sama seperti asset_prices.
+
+    Returns:
+        int: Jumlah baris yang dikirim ke storage compact
+    """
+    if not compact_enabled():
+        return 0
+    rows = [to_compact(price) for price in prices]
+    CompactAssetPrice.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+    return len(rows)
+
+
+def sync_compact_prices(queryset=None, since=None, chunk_size=5000):
+    """
+    Backfill asset_prices ke asset_prices_compact secara idempotent.
+
+    Baris disalin per chunk dengan keyset (timestamp, pk) sehingga urutan fisik
+    tabel compact mengikuti timestamp (syarat agar BRIN index efektif).
+
+    Args:
+        queryset: Queryset AssetPrice sumber (default: semua harga)
+        since: Hanya salin harga dengan timestamp >= since
+        chunk_size: Jumlah baris per chunk
+
+    Returns:
+        dict: rows_scanned, chunks
+    """
+    if queryset is None:
+        queryset = AssetPrice.objects.all()
+    if since is not None:
+        queryset = queryset.filter(timestamp__gte=since)
+    queryset = queryset.order_by('timestamp', 'pk').only('pk', 'asset_id', 'timestamp', *PRICE_FIELDS)
+
+    stats = {'rows_scanned': 0, 'chunks': 0}
+    last = None
+    while True:
+        chunk_queryset = queryset
+        if last is not None:
+            chunk_queryset = queryset.filter(
+                Q(timestamp__gt=last.timestamp) | Q(timestamp=last.timestamp, pk__gt=last.pk)
+            )
+        chunk = list(chunk_queryset[:chunk_size])
+        if not chunk:
+            break
+        last = chunk[-1]
+
+        CompactAssetPrice.objects.bulk_create(
+            [to_compact(price) for price in chunk], ignore_conflicts=True
+        )
+        stats['rows_scanned'] += len(chunk)
+        stats['chunks'] += 1
+
+    return stats
+
+
+@receiver(pre_save, sender=AssetPrice)
+def remember_price_key(sender, instance, raw=False, **kwargs):
+    """Simpan (asset, timestamp) lama harga yang diedit agar baris replica-nya bisa dipindah"""
+    if raw or instance._state.adding or not compact_enabled():
+        return
+    instance._previous_compact_key = (
+        AssetPrice.objects.filter(pk=instance.pk).values_list('asset_id', 'timestamp').first()
+    )
+
+
+@receiver(post_save, sender=AssetPrice)
+def mirror_saved_price(sender, instance, created, raw=False, **kwargs):
+    """Harga yang ditulis lewat ORM (mis. add_price) ikut disalin ke storage compact"""
+    if raw or not compact_enabled():
+        return
+    previous = getattr(instance, '_previous_compact_key', None)
+    if previous is not None and previous != (instance.asset_id, instance.timestamp):
+        CompactAssetPrice.objects.filter(asset_id=previous[0], timestamp=previous[1]).delete()
+    CompactAssetPrice.objects.update_or_create(
+        asset_id=instance.asset_id,
+        timestamp=instance.timestamp,
+        defaults={field: getattr(instance, field) for field in PRICE_FIELDS}
+    )
+
+
+@receiver(prices_deleted)
+def remove_mirrored_prices(sender, prices, **kwargs):
+    if not compact_enabled():
+        return
+    condition = Q()
+    for asset_id, timestamps in prices.items():
+        condition |= Q(asset_id=asset_id, timestamp__in=timestamps)
+    CompactAssetPrice.objects.filter(condition).delete()
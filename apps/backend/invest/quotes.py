@@ -0,0 +1,233 @@
+# ========================================
+# invest/quotes.py - Latest price store dan quote cache
+# ========================================
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Asset, AssetPrice, AssetQuote
+from .signals import prices_deleted
+
+
+QUOTE_VERSION_KEY = 'invest:asset_quotes:version'
+
+QUOTE_FIELDS = ['price', 'volume', 'market_cap', 'timestamp', 'source']
+
+
+class QuoteCache:
+    """
+    LRU cache in-process untuk harga terakhir asset.
+
+    Setiap entry menyimpan versi global quote saat dibaca. Entry dianggap
+    basi jika TTL habis atau versinya berbeda dengan versi saat ini, sehingga
+    menaikkan versi (lewat cache bersama INVEST_QUOTE_CACHE) menginvalidasi
+    cache di semua proses.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys, version):
+        """Returns (hits, misses); hits bisa berisi None untuk asset tanpa harga"""
+        now = time.monotonic()
+        hits, misses = {}, []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or entry[1] < now or entry[2] != version:
+                    misses.append(key)
+                    continue
+                self._entries.move_to_end(key)
+                hits[key] = entry[0]
+        return hits, misses
+
+    def set_many(self, values, version):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (value, expires_at, version)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys=None):
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+                return
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+quote_cache = QuoteCache()
+
+
+def _as_uuid(value):
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def version_cache():
+    """Cache bersama (INVEST_QUOTE_CACHE) untuk versi quote lintas proses"""
+    return caches[getattr(settings, 'INVEST_QUOTE_CACHE', 'default')]
+
+
+def current_version():
+    return version_cache().get_or_set(QUOTE_VERSION_KEY, 1, timeout=None)
+
+
+def bump_version():
+    try:
+        version_cache().incr(QUOTE_VERSION_KEY)
+    except ValueError:
+        version_cache().set(QUOTE_VERSION_KEY, 2, timeout=None)
+
+
+def invalidate_quotes(asset_ids=None):
+    """
+    Invalidasi quote cache untuk asset tertentu (atau semua).
+
+    Dijalankan langsung dan sekali lagi setelah commit, agar pembaca yang
+    sempat meng-cache nilai lama di antara write dan commit ikut terinvalidasi.
+    """
+    def invalidate():
+        quote_cache.invalidate(asset_ids)
+        bump_version()
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def get_latest_prices(asset_ids):
+    """
+    Harga terakhir untuk banyak asset sekaligus.
+
+    Dibaca dari quote cache; asset yang belum ada di cache diambil dari
+    AssetQuote dalam satu query.
+
+    Returns:
+        dict: {asset_id (UUID): price}; asset tanpa data harga tidak disertakan
+    """
+    asset_ids = {_as_uuid(asset_id) for asset_id in asset_ids}
+    if not asset_ids:
+        return {}
+
+    version = current_version()
+    prices, missing = quote_cache.get_many(asset_ids, version)
+
+    if missing:
+        found = dict(AssetQuote.objects.filter(asset_id__in=missing).values_list('asset_id', 'price'))
+        fetched = {asset_id: found.get(asset_id) for asset_id in missing}
+        quote_cache.set_many(fetched, version)
+        prices.update(fetched)
+
+    return {asset_id: price for asset_id, price in prices.items() if price is not None}
+
+
+def get_latest_price(asset_id):
+    """Harga terakhir satu asset, atau None jika belum ada data harga"""
+    return get_latest_prices([asset_id]).get(_as_uuid(asset_id))
+
+
+def update_quotes(prices):
+    """
+    Terapkan harga baru ke AssetQuote: hanya harga yang lebih baru dari quote
+    saat ini yang menggantikan quote. Timestamp yang sama tidak menggantikan
+    quote karena (asset, timestamp) unik di asset_prices (harga pertama menang).
+
+    Args:
+        prices: Iterable AssetPrice (boleh belum/tanpa primary key, mis. hasil bulk ingest)
+
+    Returns:
+        int: Jumlah quote yang dibuat atau diupdate
+    """
+    newest = {}
+    for price in prices:
+        current = newest.get(price.asset_id)
+        if current is None or price.timestamp > current.timestamp:
+            newest[price.asset_id] = price
+
+    if not newest:
+        return 0
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = AssetQuote.objects.select_for_update().in_bulk(list(newest))
+
+        to_create, to_update = [], []
+        for asset_id, price in newest.items():
+            quote = existing.get(asset_id)
+            if quote is None:
+                quote = AssetQuote(asset_id=asset_id)
+                to_create.append(quote)
+            elif price.timestamp <= quote.timestamp:
+                continue
+            else:
+                to_update.append(quote)
+
+            for field in QUOTE_FIELDS:
+                setattr(quote, field, getattr(price, field))
+            quote.updated_at = now
+
+        AssetQuote.objects.bulk_create(to_create, ignore_conflicts=True)
+        AssetQuote.objects.bulk_update(to_update, QUOTE_FIELDS + ['updated_at'])
+
+    changed = [quote.asset_id for quote in to_create + to_update]
+    if changed:
+        invalidate_quotes(changed)
+    return len(changed)
+
+
+def rebuild_quotes(asset_ids):
+    """
+    Hitung ulang quote dari asset_prices untuk asset tertentu, mis. setelah
+    harga terakhir dihapus atau diubah. Asset tanpa harga kehilangan quote-nya.
+    """
+    asset_ids = list(asset_ids)
+    latest = AssetPrice.objects.filter(asset=OuterRef('pk')).order_by('-timestamp').values('pk')[:1]
+    price_ids = Asset.objects.filter(pk__in=asset_ids).annotate(
+        latest_price_id=Subquery(latest)
+    ).exclude(latest_price_id=None).values_list('latest_price_id', flat=True)
+
+    with transaction.atomic():
+        AssetQuote.objects.filter(asset_id__in=asset_ids).delete()
+        AssetQuote.objects.bulk_create([
+            AssetQuote(asset_id=price.asset_id, updated_at=timezone.now(), **{
+                field: getattr(price, field) for field in QUOTE_FIELDS
+            })
+            for price in AssetPrice.objects.filter(pk__in=list(price_ids))
+        ])
+
+    invalidate_quotes(asset_ids)
+
+
+@receiver(post_save, sender=AssetPrice)
+def apply_price_to_quote(sender, instance, created, raw=False, **kwargs):
+    """Harga baru memperbarui quote; perubahan harga lama memicu rebuild"""
+    if raw:
+        return
+    if created:
+        update_quotes([instance])
+    else:
+        rebuild_quotes([instance.asset_id])
+
+
+@receiver(prices_deleted)
+def remove_prices_from_quotes(sender, prices, **kwargs):
+    """Asset yang quote saat ininya ikut dihapus di-rebuild sekali dari harga sebelumnya"""
+    quotes = AssetQuote.objects.filter(asset_id__in=prices).values_list('asset_id', 'timestamp')
+    asset_ids = [asset_id for asset_id, timestamp in quotes if timestamp <= max(prices[asset_id])]
+    if asset_ids:
+        rebuild_quotes(asset_ids)
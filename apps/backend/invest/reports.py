@@ -0,0 +1,134 @@
+# ========================================
+# invest/reports.py - Reporting engine untuk transaksi investasi
+# ========================================
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+ZERO = Decimal('0')
+
+TOTAL_FIELDS = ['total_buy_amount', 'total_sell_amount', 'total_dividend']
+
+
+def _empty_totals():
+    return {
+        'total_transactions': 0,
+        'total_buy_amount': ZERO,
+        'total_sell_amount': ZERO,
+        'total_dividend': ZERO,
+        'net_investment': ZERO,
+    }
+
+
+def _accumulate(target, row):
+    target['total_transactions'] += row['total_transactions']
+    for field in TOTAL_FIELDS:
+        target[field] += row[field] or ZERO
+    target['net_investment'] = target['total_buy_amount'] - target['total_sell_amount']
+
+
+def _top_asset(counts):
+    """Asset dengan jumlah transaksi terbanyak (tie-break: symbol)"""
+    if not counts:
+        return None
+    (symbol, name), _ = min(counts.items(), key=lambda item: (-item[1], item[0][0]))
+    return f"{symbol} - {name}"
+
+
+def monthly_transaction_report(queryset, start_year, end_year, by_portfolio=False):
+    """
+    Laporan transaksi bulanan untuk rentang tahun [start_year, end_year].
+
+    Semua angka dihitung dengan dua grouped query, berapapun panjang rentangnya:
+    1. total buy/sell/dividend dan jumlah transaksi per bulan (TruncMonth +
+       Sum(..., filter=Q(...)))
+    2. jumlah transaksi per (bulan, asset) untuk menentukan most traded asset
+
+    Jika by_portfolio=True, kedua query juga di-group per portfolio sehingga
+    breakdown per portfolio tersedia tanpa query tambahan.
+
+    Returns:
+        dict: monthly_data (semua bulan dalam rentang), yearly_totals,
+        range_totals, dan portfolio_breakdown (jika diminta)
+    """
+    queryset = queryset.filter(
+        transaction_date__gte=date(start_year, 1, 1),
+        transaction_date__lte=date(end_year, 12, 31),
+    ).order_by().annotate(month=TruncMonth('transaction_date'))
+
+    group_fields = ['month']
+    if by_portfolio:
+        group_fields += ['portfolio_id', 'portfolio__name']
+
+    monthly_rows = queryset.values(*group_fields).annotate(
+        total_transactions=Count('id'),
+        total_buy_amount=Sum('total_amount', filter=Q(transaction_type='buy')),
+        total_sell_amount=Sum('total_amount', filter=Q(transaction_type='sell')),
+        total_dividend=Sum('total_amount', filter=Q(transaction_type='dividend')),
+    )
+
+    asset_rows = queryset.values(*group_fields, 'asset__symbol', 'asset__name').annotate(
+        transaction_count=Count('id'),
+    )
+
+    # Initialize semua bulan dalam rentang dengan nol
+    monthly_data = {}
+    yearly_totals = {}
+    for year in range(start_year, end_year + 1):
+        yearly_totals[str(year)] = {'year': year, **_empty_totals()}
+        for month in range(1, 13):
+            key = f"{year}-{month:02d}"
+            monthly_data[key] = {'month': key, **_empty_totals(), 'most_traded_asset': None}
+
+    range_totals = _empty_totals()
+    portfolio_breakdown = {}
+
+    for row in monthly_rows:
+        key = row['month'].strftime('%Y-%m')
+        _accumulate(monthly_data[key], row)
+        _accumulate(yearly_totals[str(row['month'].year)], row)
+        _accumulate(range_totals, row)
+
+        if by_portfolio:
+            portfolio_id = str(row['portfolio_id'])
+            portfolio = portfolio_breakdown.setdefault(portfolio_id, {
+                'portfolio_id': portfolio_id,
+                'portfolio_name': row['portfolio__name'],
+                'totals': _empty_totals(),
+                'monthly_data': {},
+            })
+            _accumulate(portfolio['totals'], row)
+            month_data = portfolio['monthly_data'].setdefault(
+                key, {'month': key, **_empty_totals(), 'most_traded_asset': None}
+            )
+            _accumulate(month_data, row)
+
+    month_asset_counts = defaultdict(lambda: defaultdict(int))
+    portfolio_asset_counts = defaultdict(lambda: defaultdict(int))
+
+    for row in asset_rows:
+        key = row['month'].strftime('%Y-%m')
+        asset = (row['asset__symbol'], row['asset__name'])
+        month_asset_counts[key][asset] += row['transaction_count']
+        if by_portfolio:
+            portfolio_asset_counts[(str(row['portfolio_id']), key)][asset] += row['transaction_count']
+
+    for key, counts in month_asset_counts.items():
+        monthly_data[key]['most_traded_asset'] = _top_asset(counts)
+
+    for (portfolio_id, key), counts in portfolio_asset_counts.items():
+        portfolio_breakdown[portfolio_id]['monthly_data'][key]['most_traded_asset'] = _top_asset(counts)
+
+    report = {
+        'monthly_data': monthly_data,
+        'yearly_totals': yearly_totals,
+        'range_totals': range_totals,
+    }
+    if by_portfolio:
+        report['portfolio_breakdown'] = portfolio_breakdown
+    return report
@@ -0,0 +1,298 @@
+# ========================================
+# invest/risk.py - Risk engine (vectorized dengan NumPy)
+# ========================================
+
+import hashlib
+import uuid
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Asset
+from .price_store import price_model
+
+
+TRADING_DAYS = 252
+
+# Risk-free rate tahunan (desimal), dipakai Sharpe, Sortino, dan alpha
+RISK_FREE_RATE = 0.06
+
+# Window default (hari) dan masa simpan cache correlation matrix
+CORRELATION_WINDOW_DAYS = 90
+CORRELATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+RISK_METRICS = [
+    'total_return', 'annualized_return', 'volatility', 'sharpe_ratio', 'sortino_ratio',
+    'max_drawdown', 'calmar_ratio', 'beta', 'alpha',
+]
+
+
+def price_returns(prices):
+    """Simple return antar titik harga; titik tanpa harga (NaN) menghasilkan NaN"""
+    prices = np.asarray(prices, dtype=float)
+    if prices.size < 2:
+        return np.empty(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = prices[1:] / prices[:-1] - 1
+    returns[~np.isfinite(returns)] = np.nan
+    return returns
+
+
+def nav_returns(values, flows=None):
+    """
+    Return time-weighted dari series NAV, disesuaikan dengan arus dana:
+    r_t = (V_t - flow_t) / V_{t-1} - 1. Titik dengan V_{t-1} <= 0 menjadi NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.size < 2:
+        return np.empty(0)
+    flows = np.zeros_like(values) if flows is None else np.asarray(flows, dtype=float)
+    previous = values[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(previous > 0, (values[1:] - flows[1:]) / previous - 1, np.nan)
+    return returns
+
+
+def drawdowns(returns):
+    """Drawdown (desimal, >= 0) di setiap titik atas wealth index dari returns"""
+    returns = np.nan_to_num(np.asarray(returns, dtype=float))
+    wealth = np.concatenate(([1.0], np.cumprod(1 + returns)))
+    peaks = np.maximum.accumulate(wealth)
+    return (1 - wealth / peaks)[1:]
+
+
+def risk_metrics(returns, benchmark_returns=None, risk_free_rate=RISK_FREE_RATE, periods=TRADING_DAYS):
+    """
+    Metrik risiko dari array return periodik. Return NaN diabaikan.
+
+    Args:
+        returns: Array return (mis. dari price_returns atau nav_returns)
+        benchmark_returns: Array return benchmark sejajar dengan returns (untuk beta/alpha)
+        risk_free_rate: Risk-free rate tahunan (desimal)
+        periods: Jumlah periode per tahun untuk annualisasi
+
+    Returns:
+        dict: RISK_METRICS dalam persen (kecuali rasio dan beta) dan jumlah
+        observasi; metrik yang tidak bisa dihitung bernilai None
+    """
+    returns = np.asarray(returns, dtype=float)
+    valid = np.isfinite(returns)
+    sample = returns[valid]
+    metrics = dict.fromkeys(RISK_METRICS)
+    metrics['observations'] = int(sample.size)
+    if sample.size == 0:
+        return metrics
+
+    growth = np.prod(1 + sample)
+    annualized = growth ** (periods / sample.size) - 1 if growth > 0 else -1.0
+    metrics['total_return'] = (growth - 1) * 100
+    metrics['annualized_return'] = annualized * 100
+
+    max_drawdown = float(drawdowns(sample).max())
+    metrics['max_drawdown'] = max_drawdown * 100
+    if max_drawdown > 0:
+        metrics['calmar_ratio'] = annualized / max_drawdown
+
+    if sample.size > 1:
+        volatility = sample.std(ddof=1) * np.sqrt(periods)
+        metrics['volatility'] = volatility * 100
+        if volatility > 0:
+            metrics['sharpe_ratio'] = (annualized - risk_free_rate) / volatility
+
+        excess = sample - risk_free_rate / periods
+        downside = np.sqrt(np.mean(np.minimum(excess, 0) ** 2)) * np.sqrt(periods)
+        if downside > 0:
+            metrics['sortino_ratio'] = (annualized - risk_free_rate) / downside
+
+    if benchmark_returns is not None:
+        benchmark = np.asarray(benchmark_returns, dtype=float)
+        paired = valid & np.isfinite(benchmark)
+        if paired.sum() > 1:
+            asset, market = returns[paired], benchmark[paired]
+            variance = market.var(ddof=1)
+            if variance > 0:
+                beta = np.cov(asset, market, ddof=1)[0, 1] / variance
+                market_growth = np.prod(1 + market)
+                market_annualized = market_growth ** (periods / market.size) - 1 if market_growth > 0 else -1.0
+                # Jensen's alpha, annualized
+                metrics['beta'] = beta
+                metrics['alpha'] = (annualized - (risk_free_rate + beta * (market_annualized - risk_free_rate))) * 100
+
+    return {key: float(value) if isinstance(value, np.floating) else value for key, value in metrics.items()}
+
+
+def rolling_metrics(returns, window, risk_free_rate=RISK_FREE_RATE, periods=TRADING_DAYS):
+    """
+    Volatility, Sharpe, dan max drawdown per rolling window (tanpa loop Python).
+
+    Returns:
+        dict: array volatility (%), sharpe_ratio, max_drawdown (%) dengan panjang
+        len(returns) - window + 1; elemen ke-i mencakup returns[i:i + window]
+    """
+    returns = np.nan_to_num(np.asarray(returns, dtype=float))
+    if window < 2 or returns.size < window:
+        empty = np.empty(0)
+        return {'volatility': empty, 'sharpe_ratio': empty, 'max_drawdown': empty}
+
+    windows = np.lib.stride_tricks.sliding_window_view(returns, window)
+    volatility = windows.std(axis=1, ddof=1) * np.sqrt(periods)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(volatility > 0, (windows.mean(axis=1) * periods - risk_free_rate) / volatility, np.nan)
+
+    wealth = np.cumprod(1 + windows, axis=1)
+    wealth = np.concatenate((np.ones((wealth.shape[0], 1)), wealth), axis=1)
+    max_drawdown = (1 - wealth / np.maximum.accumulate(wealth, axis=1)).max(axis=1)
+
+    return {
+        'volatility': volatility * 100,
+        'sharpe_ratio': sharpe,
+        'max_drawdown': max_drawdown * 100,
+    }
+
+
+def load_daily_prices(asset_ids, start, end=None, dates=None):
+    """
+    Harga penutupan harian banyak asset sekaligus dalam satu query.
+
+    Args:
+        asset_ids: Asset yang dimuat
+        start, end: Rentang tanggal (inklusif; end default hari ini)
+        dates: Grid tanggal output (harga di luar grid diabaikan). Default:
+            semua tanggal yang punya harga untuk salah satu asset (hari bursa)
+
+    Returns:
+        tuple: (dates, {asset_id: np.ndarray}) dengan array sejajar dates,
+        forward-filled; NaN sebelum harga pertama asset dalam rentang
+    """
+    asset_ids = list(asset_ids)
+    end = end or timezone.localdate()
+    closes = {}
+    if asset_ids:
+        rows = price_model().objects.filter(
+            asset_id__in=asset_ids,
+            timestamp__gte=timezone.make_aware(datetime.combine(start, time.min)),
+            timestamp__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+        ).order_by('timestamp').values_list('asset_id', 'timestamp', 'price')
+        for asset_id, timestamp, price in rows.iterator(chunk_size=5000):
+            closes.setdefault(asset_id, {})[timezone.localtime(timestamp).date()] = float(price)
+
+    if dates is None:
+        dates = sorted({day for series in closes.values() for day in series})
+    dates = list(dates)
+
+    positions = {day: index for index, day in enumerate(dates)}
+    matrix = {}
+    for asset_id in asset_ids:
+        values = np.full(len(dates), np.nan)
+        for day, price in closes.get(asset_id, {}).items():
+            if day in positions:
+                values[positions[day]] = price
+        matrix[asset_id] = forward_fill(values)
+    return dates, matrix
+
+
+def forward_fill(values):
+    """Isi NaN dengan nilai valid terakhir sebelumnya (NaN di awal tetap NaN)"""
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(values.size), 0)
+    np.maximum.accumulate(index, out=index)
+    filled = values[index]
+    filled[~np.maximum.accumulate(valid)] = np.nan
+    return filled
+
+
+def _rounded(value, digits=2):
+    return None if value is None else round(value, digits)
+
+
+def price_risk_metrics(prices, benchmark_prices=None, risk_free_rate=RISK_FREE_RATE):
+    """
+    Ringkasan risiko satu asset dari array harga harian (mis. hasil
+    load_daily_prices), dibulatkan untuk response API.
+
+    Returns:
+        dict: volatility, max_drawdown, sharpe_ratio, sortino_ratio, beta,
+        alpha, dan price_range (high, low, range_percentage); dict kosong
+        jika harga valid kurang dari dua
+    """
+    prices = np.asarray(prices, dtype=float)
+    valid = prices[np.isfinite(prices)]
+    if valid.size < 2:
+        return {}
+
+    benchmark_returns = None if benchmark_prices is None else price_returns(benchmark_prices)
+    metrics = risk_metrics(price_returns(prices), benchmark_returns, risk_free_rate=risk_free_rate)
+    high, low = float(valid.max()), float(valid.min())
+    return {
+        'volatility': _rounded(metrics['volatility']),
+        'max_drawdown': _rounded(metrics['max_drawdown']),
+        'sharpe_ratio': _rounded(metrics['sharpe_ratio']),
+        'sortino_ratio': _rounded(metrics['sortino_ratio']),
+        'beta': _rounded(metrics['beta']),
+        'alpha': _rounded(metrics['alpha']),
+        'price_range': {
+            'high': high,
+            'low': low,
+            'range_percentage': round((high - low) / low * 100, 2) if low > 0 else 0,
+        },
+    }
+
+
+def _correlation_cache_key(asset_ids, window_days, as_of):
+    digest = hashlib.sha1(','.join(sorted(str(asset_id) for asset_id in asset_ids)).encode()).hexdigest()
+    return f'invest:correlation:{digest}:{window_days}:{as_of.isoformat()}'
+
+
+def correlation_matrix(asset_ids, window_days=CORRELATION_WINDOW_DAYS, as_of=None):
+    """
+    Korelasi return harian antar asset selama `window_days` hari sampai as_of.
+
+    Harga semua asset dimuat dalam satu query, disejajarkan pada grid tanggal
+    bersama, lalu matrix dihitung dengan satu np.corrcoef atas tanggal di mana
+    semua asset punya return. Asset tanpa history cukup (atau harga konstan)
+    berkorelasi None. Hasil di-cache per (set asset, window, as_of), jadi
+    pemanggilan berulang dalam hari yang sama tidak menyentuh database.
+
+    Returns:
+        dict: {asset_id: {asset_id: float | None}} (key berupa string)
+    """
+    asset_ids = sorted({str(asset_id) for asset_id in asset_ids})
+    as_of = as_of or timezone.localdate()
+    key = _correlation_cache_key(asset_ids, window_days, as_of)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    _, prices = load_daily_prices(
+        [uuid.UUID(asset_id) for asset_id in asset_ids], as_of - timedelta(days=window_days), as_of
+    )
+    returns = {str(asset_id): price_returns(series) for asset_id, series in prices.items()}
+    included = [asset_id for asset_id in asset_ids if np.isfinite(returns[asset_id]).sum() > 1]
+
+    values = {}
+    if included:
+        matrix = np.vstack([returns[asset_id] for asset_id in included])
+        matrix = matrix[:, np.isfinite(matrix).all(axis=0)]
+        if matrix.shape[1] > 1:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                coefficients = np.atleast_2d(np.corrcoef(matrix))
+            for row, first in enumerate(included):
+                for column, second in enumerate(included):
+                    value = coefficients[row, column]
+                    if np.isfinite(value):
+                        values[first, second] = round(float(value), 4)
+
+    result = {
+        first: {second: values.get((first, second)) for second in asset_ids}
+        for first in asset_ids
+    }
+    cache.set(key, result, CORRELATION_CACHE_TIMEOUT)
+    return result
+
+
+def resolve_benchmark(symbol):
+    """Asset benchmark berdasarkan symbol (case-insensitive), atau None"""
+    return Asset.objects.filter(symbol__iexact=symbol.strip()).first()
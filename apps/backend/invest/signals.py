@@ -0,0 +1,61 @@
+# ========================================
+# invest/signals.py - Signal perubahan data untuk operasi bulk
+# ========================================
+
+import threading
+
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import Signal, receiver
+
+from .models import AssetPrice
+
+
+# bulk_create/bulk_update tidak mengirim post_save, jadi engine yang menulis
+# holdings atau harga secara bulk mengirim signal ini setelah selesai.
+
+# Dikirim dengan user_ids: holdings user tersebut berubah
+holdings_changed = Signal()
+
+# Dikirim dengan asset_ids: harga asset tersebut berubah, dan since:
+# {asset_id: timestamp harga paling awal yang ditulis}
+prices_changed = Signal()
+
+# Dikirim sekali per operasi delete AssetPrice (satu harga maupun queryset)
+# dengan prices: {asset_id: [timestamp harga yang terhapus, ...]}
+prices_deleted = Signal()
+
+# Harga yang terkumpul di pre_delete selama satu operasi delete
+_price_deletes = threading.local()
+
+
+@receiver(pre_delete, sender=AssetPrice)
+def collect_deleted_price(sender, instance, origin=None, **kwargs):
+    """
+    Kumpulkan harga yang akan dihapus per operasi delete. Django mengirim
+    pre_delete untuk semua baris sebelum menghapusnya dan post_delete
+    sesudah semuanya terhapus, jadi receiver per baris cukup mengumpulkan
+    dan pekerjaannya dijalankan sekali lewat prices_deleted.
+
+    Harga yang ikut terhapus karena asset dihapus (cascade) dilewati:
+    quote dan storage compact ikut terhapus lewat cascade yang sama.
+    """
+    origin_model = getattr(origin, 'model', type(origin))
+    if origin is not None and origin_model is not AssetPrice:
+        return
+    state = _price_deletes.__dict__
+    # Operasi baru dikenali dari origin berbeda atau harga yang sudah pernah
+    # dikirim pre_delete (operasi sebelumnya gagal sebelum post_delete)
+    if state.get('origin') is not origin or instance.pk in state.get('seen', ()):
+        state.update(origin=origin, seen=set(), prices={})
+    state['seen'].add(instance.pk)
+    state['prices'].setdefault(instance.asset_id, []).append(instance.timestamp)
+
+
+@receiver(post_delete, sender=AssetPrice)
+def send_prices_deleted(sender, instance, **kwargs):
+    state = _price_deletes.__dict__
+    prices = state.get('prices')
+    if not prices:
+        return
+    state.clear()
+    prices_deleted.send(sender=AssetPrice, prices=prices)
@@ -0,0 +1,372 @@
+# ========================================
+# invest/snapshots.py - Snapshot NAV harian portfolio
+# ========================================
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import numpy as np
+
+from django.db import transaction as db_transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Asset, AssetPrice, InvestmentPortfolio, InvestmentTransaction, PortfolioSnapshot
+from .price_store import price_model
+from .risk import load_daily_prices, nav_returns, price_returns, risk_metrics, rolling_metrics
+from .signals import prices_changed, prices_deleted
+
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+
+# Snapshot dibuat per hari kalender (termasuk akhir pekan)
+CALENDAR_DAYS = 365
+
+PERIOD_DAYS = {'1M': 30, '3M': 90, '6M': 180, '1Y': 365}
+
+TRANSACTION_FIELDS = ['transaction_date', 'asset_id', 'transaction_type', 'quantity', 'total_amount', 'fees']
+
+
+def _decode_positions(positions):
+    return {asset_id: [Decimal(quantity), Decimal(cost)] for asset_id, (quantity, cost) in positions.items()}
+
+
+def _encode_positions(positions):
+    return {asset_id: [str(quantity), str(cost)] for asset_id, (quantity, cost) in positions.items()}
+
+
+def apply_transaction(positions, transaction):
+    """
+    Terapkan satu transaksi ke positions ({asset_id: [quantity, cost]}) dengan
+    metode average cost yang sama seperti update holdings.
+
+    Returns:
+        Decimal: Arus dana bersih transaksi (positif = dana masuk ke portfolio)
+    """
+    asset_id = str(transaction['asset_id'])
+    quantity, cost = positions.get(asset_id, [ZERO, ZERO])
+    transaction_type = transaction['transaction_type']
+    amount, fees = transaction['total_amount'], transaction['fees']
+
+    if transaction_type == 'buy':
+        positions[asset_id] = [quantity + transaction['quantity'], cost + amount + fees]
+        return amount + fees
+
+    if transaction_type == 'sell':
+        average_price = cost / quantity if quantity > 0 else ZERO
+        quantity -= transaction['quantity']
+        if quantity > 0:
+            positions[asset_id] = [quantity, quantity * average_price]
+        else:
+            positions.pop(asset_id, None)
+        return -(amount - fees)
+
+    if transaction_type == 'dividend':
+        return -amount
+
+    if transaction_type in ('split', 'bonus') and asset_id in positions:
+        # quantity transaksi split/bonus dipakai sebagai ratio
+        positions[asset_id] = [quantity * transaction['quantity'], cost]
+    return ZERO
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _seed_prices(asset_ids, before):
+    """Harga terakhir sebelum `before` per asset, dalam satu query"""
+    model = price_model()
+    latest = model.objects.filter(
+        asset=OuterRef('pk'), timestamp__lt=before
+    ).order_by('-timestamp').values('price')[:1]
+    return {
+        str(asset_id): price
+        for asset_id, price in Asset.objects.filter(pk__in=asset_ids).annotate(
+            seed_price=Subquery(latest)
+        ).exclude(seed_price=None).values_list('pk', 'seed_price')
+    }
+
+
+def _daily_closes(asset_ids, start, end):
+    """{date: {asset_id: harga terakhir hari itu}} untuk rentang [start, end]"""
+    model = price_model()
+    closes = {}
+    rows = model.objects.filter(
+        asset_id__in=asset_ids,
+        timestamp__gte=_start_of_day(start),
+        timestamp__lt=_start_of_day(end + timedelta(days=1))
+    ).order_by('timestamp').values_list('asset_id', 'timestamp', 'price')
+    for asset_id, timestamp, price in rows.iterator(chunk_size=5000):
+        closes.setdefault(timezone.localtime(timestamp).date(), {})[str(asset_id)] = price
+    return closes
+
+
+def build_snapshots(portfolio, until=None):
+    """
+    Tambahkan snapshot harian portfolio sampai tanggal `until` (default hari ini).
+
+    Dilanjutkan dari snapshot terakhir (state positions tersimpan), sehingga
+    pemanggilan harian hanya menambah satu baris. Snapshot hari ini bersifat
+    sementara dan dihitung ulang setiap build karena harga masih bisa berubah.
+    Hari tanpa harga memakai harga terakhir yang diketahui; asset yang belum
+    pernah punya harga dinilai pada cost-nya.
+
+    Returns:
+        int: Jumlah snapshot yang ditulis
+    """
+    # Baris portfolio dikunci agar dua build bersamaan (mis. dua GET
+    # performance) tidak menulis snapshot hari yang sama dua kali
+    with db_transaction.atomic():
+        InvestmentPortfolio.objects.select_for_update().filter(pk=portfolio.pk).exists()
+        return _build_snapshots(portfolio, until)
+
+
+def _build_snapshots(portfolio, until):
+    today = timezone.localdate()
+    until = min(until or today, today)
+    portfolio.snapshots.filter(date__gte=today).delete()
+
+    last = portfolio.snapshots.only('date', 'positions').order_by('-date').first()
+    if last:
+        start = last.date + timedelta(days=1)
+        positions = _decode_positions(last.positions)
+    else:
+        start = portfolio.transactions.order_by('transaction_date').values_list('transaction_date', flat=True).first()
+        positions = {}
+        if start is None:
+            return 0
+    if start > until:
+        return 0
+
+    transactions = list(
+        portfolio.transactions.filter(transaction_date__gte=start, transaction_date__lte=until)
+        .order_by('transaction_date', 'created_at', 'pk')
+        .values(*TRANSACTION_FIELDS)
+    )
+    asset_ids = set(positions) | {str(transaction['asset_id']) for transaction in transactions}
+
+    last_prices = {}
+    closes = {}
+    if asset_ids:
+        last_prices = _seed_prices(asset_ids, _start_of_day(start))
+        closes = _daily_closes(asset_ids, start, until)
+
+    snapshots = []
+    index = 0
+    day = start
+    while day <= until:
+        net_flow = ZERO
+        while index < len(transactions) and transactions[index]['transaction_date'] == day:
+            net_flow += apply_transaction(positions, transactions[index])
+            index += 1
+
+        last_prices.update(closes.get(day, {}))
+
+        market_value = total_cost = ZERO
+        for asset_id, (quantity, cost) in positions.items():
+            price = last_prices.get(asset_id)
+            market_value += quantity * price if price is not None else cost
+            total_cost += cost
+
+        snapshots.append(PortfolioSnapshot(
+            portfolio=portfolio,
+            date=day,
+            market_value=market_value.quantize(CENT),
+            total_cost=total_cost.quantize(CENT),
+            net_flow=net_flow.quantize(CENT),
+            positions=_encode_positions(positions),
+        ))
+        day += timedelta(days=1)
+
+    PortfolioSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return len(snapshots)
+
+
+def invalidate_snapshots(portfolio_id, from_date):
+    """Hapus snapshot mulai from_date; build berikutnya me-replay dari snapshot sebelumnya"""
+    PortfolioSnapshot.objects.filter(portfolio_id=portfolio_id, date__gte=from_date).delete()
+
+
+def invalidate_asset_snapshots(asset_dates):
+    """
+    Invalidasi snapshot semua portfolio yang pernah bertransaksi asset,
+    mulai tanggal harga asset berubah ({asset_id: date}). Satu DELETE per
+    asset; snapshot hari ini selalu dihitung ulang build, jadi harga hari
+    ini tidak perlu invalidasi.
+    """
+    today = timezone.localdate()
+    for asset_id, from_date in asset_dates.items():
+        if from_date >= today:
+            continue
+        portfolio_ids = InvestmentTransaction.objects.filter(asset_id=asset_id).values('portfolio_id')
+        PortfolioSnapshot.objects.filter(portfolio_id__in=portfolio_ids, date__gte=from_date).delete()
+
+
+def portfolio_series(portfolios, start=None, end=None):
+    """
+    Series NAV harian (gabungan beberapa portfolio) setelah snapshot di-build.
+
+    Returns:
+        list: dict date, market_value, total_cost, net_flow urut berdasarkan tanggal
+    """
+    portfolios = list(portfolios)
+    for portfolio in portfolios:
+        build_snapshots(portfolio)
+
+    queryset = PortfolioSnapshot.objects.filter(portfolio__in=portfolios)
+    if start is not None:
+        queryset = queryset.filter(date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date__lte=end)
+    return list(
+        queryset.values('date').annotate(
+            market_value=Sum('market_value'),
+            total_cost=Sum('total_cost'),
+            net_flow=Sum('net_flow'),
+        ).order_by('date')
+    )
+
+
+def series_returns(series):
+    """Return harian time-weighted (NumPy array) dari series NAV, disesuaikan dengan arus dana"""
+    return nav_returns(
+        [row['market_value'] for row in series],
+        [row['net_flow'] for row in series]
+    )
+
+
+def series_statistics(series, benchmark=None):
+    """
+    Statistik risiko series NAV lewat invest.risk (semua dalam persen kecuali
+    rasio dan beta): time_weighted_return, annualized_return, volatility,
+    max_drawdown, best_day, worst_day, sharpe_ratio, sortino_ratio,
+    calmar_ratio, beta, alpha.
+
+    Args:
+        series: Hasil portfolio_series
+        benchmark: Asset pembanding untuk beta/alpha (optional)
+    """
+    returns = series_returns(series)
+    benchmark_returns = None
+    if benchmark is not None and series:
+        dates, prices = load_daily_prices(
+            [benchmark.pk], series[0]['date'], series[-1]['date'],
+            dates=[row['date'] for row in series]
+        )
+        benchmark_returns = price_returns(prices[benchmark.pk])
+
+    metrics = risk_metrics(returns, benchmark_returns, periods=CALENDAR_DAYS)
+    valid = returns[np.isfinite(returns)]
+    stats = {key: metrics[key] for key in ('sharpe_ratio', 'sortino_ratio', 'calmar_ratio', 'beta', 'alpha')}
+    stats.update({
+        'time_weighted_return': metrics['total_return'] or 0.0,
+        'annualized_return': metrics['annualized_return'] or 0.0,
+        'volatility': metrics['volatility'] or 0.0,
+        'max_drawdown': metrics['max_drawdown'] or 0.0,
+        'best_day': float(valid.max()) * 100 if valid.size else 0.0,
+        'worst_day': float(valid.min()) * 100 if valid.size else 0.0,
+        'days': len(series),
+    })
+    return stats
+
+
+def rolling_statistics(series, window):
+    """Rolling volatility, Sharpe, dan max drawdown series NAV, per tanggal akhir window"""
+    rolling = rolling_metrics(series_returns(series), window, periods=CALENDAR_DAYS)
+    # returns[i] milik series[i + 1], jadi window ke-i berakhir di series[i + window]
+    return [
+        {
+            'date': series[index + window]['date'],
+            'volatility': round(float(rolling['volatility'][index]), 2),
+            'sharpe_ratio': None if np.isnan(rolling['sharpe_ratio'][index]) else round(float(rolling['sharpe_ratio'][index]), 2),
+            'max_drawdown': round(float(rolling['max_drawdown'][index]), 2),
+        }
+        for index in range(len(rolling['volatility']))
+    ]
+
+
+def monthly_performance(series, months=12):
+    """
+    Nilai akhir bulan dan return time-weighted per bulan dari series NAV,
+    paling banyak `months` bulan terakhir, urut dari bulan terbaru.
+    """
+    results = {}
+    previous = None
+    for row in series:
+        month = row['date'].strftime('%Y-%m')
+        entry = results.setdefault(month, {'month': month, 'value': row['market_value'], 'growth': 1.0})
+        entry['value'] = row['market_value']
+        if previous is not None and previous['market_value'] > 0:
+            entry['growth'] *= float((row['market_value'] - row['net_flow']) / previous['market_value'])
+        previous = row
+
+    return [
+        {
+            'month': entry['month'],
+            'value': entry['value'],
+            'return_percentage': round((entry['growth'] - 1) * 100, 2),
+        }
+        for entry in sorted(results.values(), key=lambda entry: entry['month'], reverse=True)[:months]
+    ]
+
+
+@receiver(pre_save, sender=InvestmentTransaction)
+def remember_transaction_date(sender, instance, raw=False, **kwargs):
+    """
+    Simpan portfolio dan tanggal lama transaksi yang diedit agar snapshot
+    sejak tanggal itu ikut di-invalidasi, juga di portfolio lama jika
+    transaksi dipindahkan
+    """
+    if raw or instance._state.adding:
+        return
+    instance._previous_snapshot_state = (
+        InvestmentTransaction.objects.filter(pk=instance.pk).values_list('portfolio_id', 'transaction_date').first()
+    )
+
+
+@receiver(post_save, sender=InvestmentTransaction)
+def invalidate_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    targets = {instance.portfolio_id: instance.transaction_date}
+    previous = getattr(instance, '_previous_snapshot_state', None)
+    if previous is not None:
+        portfolio_id, transaction_date = previous
+        targets[portfolio_id] = min(transaction_date, targets.get(portfolio_id, transaction_date))
+    for portfolio_id, from_date in targets.items():
+        invalidate_snapshots(portfolio_id, from_date)
+
+
+@receiver(post_delete, sender=InvestmentTransaction)
+def invalidate_on_delete(sender, instance, **kwargs):
+    invalidate_snapshots(instance.portfolio_id, instance.transaction_date)
+
+
+@receiver(post_save, sender=AssetPrice)
+def invalidate_on_price_change(sender, instance, raw=False, **kwargs):
+    """Harga backdated (koreksi, EOD yang terlambat) mengubah nilai snapshot sejak tanggalnya"""
+    if raw:
+        return
+    invalidate_asset_snapshots({instance.asset_id: timezone.localtime(instance.timestamp).date()})
+
+
+@receiver(prices_deleted)
+def invalidate_on_prices_deleted(sender, prices, **kwargs):
+    invalidate_asset_snapshots({
+        asset_id: timezone.localtime(min(timestamps)).date() for asset_id, timestamps in prices.items()
+    })
+
+
+@receiver(prices_changed)
+def invalidate_on_prices_changed(sender, asset_ids, since=None, **kwargs):
+    # since: {asset_id: timestamp harga paling awal}; tanpa since seluruh
+    # history asset dianggap berubah
+    since = since or {}
+    invalidate_asset_snapshots({
+        asset_id: timezone.localtime(since[asset_id]).date() if asset_id in since else date.min
+        for asset_id in asset_ids
+    })
@@ -4,6 +4,7 @@ from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 from decimal import Decimal
+from io import StringIO
 
 from invest.models import Asset, AssetPrice, InvestmentPortfolio, InvestmentHolding, InvestmentTransaction
 from api.v1.invest.serializers.asset import AssetListSerializer, AssetSerializer
@@ -344,4 +345,576 @@ class AssetModelTestCase(TestCase):
         serializer = AssetSerializer(self.asset)
         actual_change = Decimal(str(serializer.data['price_change_24h']))
         
-        self.assertAlmostEqual(float(actual_change), float(expected_change), places=2)
\ No newline at end of file
+        self.assertAlmostEqual(float(actual_change), float(expected_change), places=2)
+
+class HoldingRefreshEngineTestCase(TestCase):
+    """Test batch refresh holdings dengan harga terakhir per asset"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='refresh_user',
+            email='refresh@test.com',
+            password='testpass123'
+        )
+        self.portfolio = InvestmentPortfolio.objects.create(user=self.user, name='Refresh Portfolio')
+        now = timezone.now()
+        self.holdings = []
+        for index in range(5):
+            asset = Asset.objects.create(symbol=f'RFR{index}', name=f'Refresh {index}', type='stock')
+            if index < 4:
+                AssetPrice.objects.create(asset=asset, price=Decimal('900.00'), timestamp=now - timezone.timedelta(days=1))
+                AssetPrice.objects.create(asset=asset, price=Decimal('1100.00') + index, timestamp=now)
+            self.holdings.append(InvestmentHolding.objects.create(
+                user=self.user,
+                portfolio=self.portfolio,
+                asset=asset,
+                quantity=Decimal('10.00000000'),
+                average_price=Decimal('1000.00'),
+                total_cost=Decimal('10000.00'),
+                current_price=Decimal('1000.00'),
+                current_value=Decimal('10000.00')
+            ))
+    
+    def test_latest_prices_single_query(self):
+        """Test harga terakhir semua asset diambil dalam satu query lalu dari cache"""
+        from invest.quotes import get_latest_prices
+        asset_ids = [holding.asset_id for holding in self.holdings]
+        with self.assertNumQueries(1):
+            prices = get_latest_prices(asset_ids)
+        self.assertEqual(len(prices), 4)
+        self.assertEqual(prices[asset_ids[2]], Decimal('1102.00'))
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(get_latest_prices([str(asset_ids[2])]), {asset_ids[2]: Decimal('1102.00')})
+    
+    def test_refresh_in_chunks(self):
+        """Test refresh per chunk: satu query holdings, satu query harga, satu bulk_update"""
+        from invest.holdings import refresh_holdings
+        queryset = InvestmentHolding.objects.filter(user=self.user)
+        
+        with self.assertNumQueries(3):
+            refresh_holdings(queryset, chunk_size=10)
+        
+        # Chunk kecil menghasilkan angka yang sama; harga asset di-cache antar chunk
+        stats = refresh_holdings(queryset, chunk_size=2)
+        
+        self.assertEqual(stats['holdings_count'], 5)
+        self.assertEqual(stats['holdings_updated'], 4)
+        self.assertEqual(stats['total_value_before'], Decimal('54060.00'))
+        self.assertEqual(stats['total_value_after'], Decimal('54060.00'))
+        
+        holding = InvestmentHolding.objects.get(pk=self.holdings[1].pk)
+        self.assertEqual(holding.current_price, Decimal('1101.00'))
+        self.assertEqual(holding.current_value, Decimal('11010.00'))
+        self.assertEqual(holding.unrealized_pnl, Decimal('1010.00'))
+        
+        untouched = InvestmentHolding.objects.get(pk=self.holdings[4].pk)
+        self.assertEqual(untouched.current_value, Decimal('10000.00'))
+
+
+class AssetQuoteTestCase(TestCase):
+    """Test latest-price store (AssetQuote) dan invalidasi quote cache"""
+    
+    def setUp(self):
+        self.asset = Asset.objects.create(symbol='QUOTE', name='Quote Asset', type='stock')
+        self.now = timezone.now()
+    
+    def add_price(self, price, hours_ago=0):
+        return AssetPrice.objects.create(
+            asset=self.asset,
+            price=Decimal(price),
+            timestamp=self.now - timezone.timedelta(hours=hours_ago)
+        )
+    
+    def test_quote_follows_newest_price(self):
+        """Test quote hanya diganti oleh harga yang lebih baru"""
+        from invest.models import AssetQuote
+        from invest.quotes import get_latest_price
+        
+        self.add_price('1000.00', hours_ago=2)
+        self.assertEqual(get_latest_price(self.asset.pk), Decimal('1000.00'))
+        
+        # Harga backdated tidak menggantikan quote
+        self.add_price('900.00', hours_ago=5)
+        self.assertEqual(get_latest_price(self.asset.pk), Decimal('1000.00'))
+        
+        # Harga baru menginvalidasi cache
+        latest = self.add_price('1200.00')
+        self.assertEqual(get_latest_price(self.asset.pk), Decimal('1200.00'))
+        self.assertEqual(AssetQuote.objects.get(asset=self.asset).timestamp, latest.timestamp)
+        
+        # Menghapus harga terakhir mengembalikan quote ke harga sebelumnya
+        latest.delete()
+        self.assertEqual(get_latest_price(self.asset.pk), Decimal('1000.00'))
+
+    def test_bulk_delete_rebuilds_quote_once(self):
+        """Test delete queryset me-rebuild quote sekali per operasi; cascade dilewati"""
+        from unittest import mock
+        from invest import quotes
+
+        self.add_price('1000.00', hours_ago=3)
+        self.add_price('1100.00', hours_ago=2)
+        self.add_price('1200.00', hours_ago=1)
+
+        with mock.patch.object(quotes, 'rebuild_quotes', wraps=quotes.rebuild_quotes) as rebuild:
+            AssetPrice.objects.filter(asset=self.asset, price__gt=Decimal('1000.00')).delete()
+            rebuild.assert_called_once_with([self.asset.pk])
+            self.assertEqual(quotes.get_latest_price(self.asset.pk), Decimal('1000.00'))
+
+            self.asset.delete()
+            rebuild.assert_called_once()
+
+    def test_bulk_update_quotes(self):
+        """Test update_quotes untuk banyak harga sekaligus (bulk ingest)"""
+        from invest.quotes import get_latest_prices, update_quotes
+        other = Asset.objects.create(symbol='QUOTE2', name='Quote Asset 2', type='stock')
+        prices = [
+            AssetPrice(asset=self.asset, price=Decimal('10.00'), timestamp=self.now - timezone.timedelta(days=1)),
+            AssetPrice(asset=self.asset, price=Decimal('11.00'), timestamp=self.now),
+            AssetPrice(asset=other, price=Decimal('20.00'), timestamp=self.now),
+        ]
+        AssetPrice.objects.bulk_create(prices)
+        
+        self.assertEqual(update_quotes(prices), 2)
+        self.assertEqual(
+            get_latest_prices([self.asset.pk, other.pk]),
+            {self.asset.pk: Decimal('11.00'), other.pk: Decimal('20.00')}
+        )
+
+
+class TimeseriesDownsamplingTestCase(TestCase):
+    """Test LTTB downsampling"""
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        from invest.timeseries import lttb
+        points = [(x, 0) for x in range(100)]
+        points[40] = (40, 50)
+        points[70] = (70, -50)
+
+        sampled = lttb(points, 10)
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual(sampled[0], points[0])
+        self.assertEqual(sampled[-1], points[-1])
+        self.assertIn((40, 50), sampled)
+        self.assertIn((70, -50), sampled)
+        self.assertEqual(lttb(points[:5], 10), points[:5])
+        with self.assertRaises(ValueError):
+            lttb(points, 2)
+
+
+class RiskEngineTestCase(TestCase):
+    """Test risk engine vectorized (invest.risk)"""
+
+    def test_risk_metrics_from_returns(self):
+        import numpy as np
+        from invest.risk import drawdowns, risk_metrics, rolling_metrics
+        returns = np.array([0.1, -0.2, 0.05, 0.1, -0.05])
+
+        # wealth: 1.1, 0.88 -> drawdown 20% dari puncak 1.1
+        self.assertAlmostEqual(float(drawdowns(returns).max()), 0.2)
+        metrics = risk_metrics(returns, benchmark_returns=returns / 2)
+        self.assertAlmostEqual(metrics['max_drawdown'], 20.0)
+        self.assertAlmostEqual(metrics['beta'], 2.0)
+        self.assertEqual(metrics['observations'], 5)
+        self.assertIsNone(risk_metrics(np.array([np.nan]))['volatility'])
+
+        rolling = rolling_metrics(returns, 3)
+        self.assertEqual(len(rolling['volatility']), 3)
+        self.assertAlmostEqual(float(rolling['max_drawdown'][0]), 20.0)
+
+    def test_load_daily_prices_single_query(self):
+        import numpy as np
+        from invest.risk import load_daily_prices, price_risk_metrics
+        first = Asset.objects.create(symbol='RSK1', name='Risk 1', type='stock')
+        second = Asset.objects.create(symbol='RSK2', name='Risk 2', type='stock')
+        today = timezone.localdate()
+        start = today - timezone.timedelta(days=3)
+        noon = timezone.make_aware(timezone.datetime.combine(start, timezone.datetime.min.time())) + timezone.timedelta(hours=12)
+        AssetPrice.objects.bulk_create([
+            AssetPrice(asset=first, price=Decimal(100 + day), timestamp=noon + timezone.timedelta(days=day))
+            for day in range(4)
+        ] + [AssetPrice(asset=second, price=Decimal('50'), timestamp=noon + timezone.timedelta(days=2))])
+
+        with self.assertNumQueries(1):
+            dates, prices = load_daily_prices([first.pk, second.pk], start, today)
+        self.assertEqual(len(dates), 4)
+        self.assertEqual(prices[first.pk].tolist(), [100, 101, 102, 103])
+        # NaN sebelum harga pertama, lalu forward-filled
+        self.assertTrue(np.isnan(prices[second.pk][:2]).all())
+        self.assertEqual(prices[second.pk][2:].tolist(), [50, 50])
+
+        metrics = price_risk_metrics(prices[first.pk])
+        self.assertEqual(metrics['max_drawdown'], 0)
+        self.assertEqual(metrics['price_range']['high'], 103)
+        self.assertEqual(price_risk_metrics(prices[second.pk][:3]), {})
+
+
+class CorrelationMatrixTestCase(TestCase):
+    """Test correlation matrix dari history harga (invest.risk)"""
+
+    def test_correlation_matrix_is_computed_and_cached(self):
+        from invest.risk import correlation_matrix
+        assets = [Asset.objects.create(symbol=f'COR{index}', name=f'Corr {index}', type='stock') for index in range(4)]
+        today = timezone.localdate()
+        noon = timezone.make_aware(timezone.datetime.combine(today, timezone.datetime.min.time())) + timezone.timedelta(hours=12)
+        moves = [1, -2, 3, -1, 2, -3, 1]
+        rows = []
+        for day in range(len(moves) + 1):
+            timestamp = noon - timezone.timedelta(days=len(moves) - day)
+            level = 100 + sum(moves[:day])
+            rows += [
+                AssetPrice(asset=assets[0], price=Decimal(level), timestamp=timestamp),
+                AssetPrice(asset=assets[1], price=Decimal(level * 2), timestamp=timestamp),
+                AssetPrice(asset=assets[2], price=Decimal(300 - 2 * sum(moves[:day])), timestamp=timestamp),
+            ]
+        AssetPrice.objects.bulk_create(rows)
+        ids = [asset.pk for asset in assets]
+
+        with self.assertNumQueries(1):
+            matrix = correlation_matrix(ids, window_days=30)
+        first, second, inverse, empty = (str(asset_id) for asset_id in ids)
+        self.assertEqual(matrix[first][first], 1.0)
+        self.assertEqual(matrix[first][second], 1.0)
+        self.assertLess(matrix[first][inverse], -0.9)
+        # Asset tanpa history tidak ikut dihitung
+        self.assertIsNone(matrix[first][empty])
+        self.assertIsNone(matrix[empty][empty])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(correlation_matrix(reversed(ids), window_days=30), matrix)
+
+
+class CompactPriceStorageTestCase(TestCase):
+    """Test storage compact history harga (INVEST_PRICE_STORAGE = 'compact')"""
+
+    def setUp(self):
+        self.asset = Asset.objects.create(symbol='CMPT', name='Compact Asset', type='stock')
+        self.now = timezone.now()
+
+    def test_backfill_is_idempotent(self):
+        from invest.models import CompactAssetPrice
+        from invest.price_store import sync_compact_prices
+        AssetPrice.objects.bulk_create([
+            AssetPrice(asset=self.asset, price=Decimal(100 + day), timestamp=self.now - timezone.timedelta(days=day))
+            for day in range(7)
+        ])
+
+        stats = sync_compact_prices(chunk_size=3)
+        self.assertEqual(stats, {'rows_scanned': 7, 'chunks': 3})
+        sync_compact_prices(chunk_size=3)
+        self.assertEqual(CompactAssetPrice.objects.filter(asset=self.asset).count(), 7)
+        self.assertEqual(
+            CompactAssetPrice.objects.get(asset=self.asset, timestamp=self.now).price, Decimal('100.00')
+        )
+
+    def test_compact_storage_mirrors_writes_and_serves_history(self):
+        from django.test import override_settings
+        from invest.ingest import PriceIngestor
+        from invest.models import CompactAssetPrice
+        from invest.price_store import price_history
+
+        with override_settings(INVEST_PRICE_STORAGE='compact'):
+            price = AssetPrice.objects.create(asset=self.asset, price=Decimal('10.00'), timestamp=self.now)
+            PriceIngestor().ingest([
+                (2, {'symbol': 'CMPT', 'timestamp': '2025-01-02', 'price': '9.50'}),
+            ])
+            self.assertEqual(CompactAssetPrice.objects.filter(asset=self.asset).count(), 2)
+            self.assertEqual(price_history(self.asset).model, CompactAssetPrice)
+
+            price.delete()
+            self.assertEqual(list(price_history(self.asset).values_list('price', flat=True)), [Decimal('9.50')])
+
+        self.assertEqual(price_history(self.asset).model, AssetPrice)
+
+    def test_ingest_looks_up_exact_keys(self):
+        from invest.ingest import PriceIngestor
+        AssetPrice.objects.bulk_create([
+            AssetPrice(asset=self.asset, price=Decimal(100 + day), timestamp=self.now - timezone.timedelta(days=day))
+            for day in range(5)
+        ])
+        batch = [
+            AssetPrice(asset=self.asset, price=Decimal('1.00'), timestamp=self.now - timezone.timedelta(days=day))
+            for day in (0, 4, 6)
+        ]
+
+        self.assertEqual(
+            PriceIngestor().existing_keys(batch),
+            {(self.asset.pk, self.now), (self.asset.pk, self.now - timezone.timedelta(days=4))}
+        )
+
+    def test_edited_price_moves_compact_row(self):
+        from django.test import override_settings
+        from invest.models import CompactAssetPrice
+
+        with override_settings(INVEST_PRICE_STORAGE='compact'):
+            price = AssetPrice.objects.create(asset=self.asset, price=Decimal('10.00'), timestamp=self.now)
+            price.timestamp = self.now - timezone.timedelta(days=1)
+            price.price = Decimal('11.00')
+            price.save()
+
+            self.assertEqual(
+                list(CompactAssetPrice.objects.filter(asset=self.asset).values_list('timestamp', 'price')),
+                [(price.timestamp, Decimal('11.00'))]
+            )
+
+
+class PortfolioSnapshotTestCase(TestCase):
+    """Test snapshot NAV harian dari replay transaksi dan history harga"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='snapshot_user',
+            email='snapshot@test.com',
+            password='testpass123'
+        )
+        self.portfolio = InvestmentPortfolio.objects.create(user=self.user, name='Snapshot Portfolio')
+        self.asset = Asset.objects.create(symbol='SNAP', name='Snapshot Asset', type='stock')
+        self.today = timezone.localdate()
+        self.days = [self.today - timezone.timedelta(days=offset) for offset in range(4, -1, -1)]
+
+        for day, price in zip(self.days, ['100.00', '110.00', None, '99.00', '120.00']):
+            if price:
+                AssetPrice.objects.create(
+                    asset=self.asset, price=Decimal(price),
+                    timestamp=timezone.make_aware(timezone.datetime.combine(day, timezone.datetime.min.time()))
+                )
+        for day, transaction_type, quantity, amount in [
+            (self.days[0], 'buy', '10', '1000.00'),
+            (self.days[2], 'buy', '10', '1100.00'),
+            (self.days[3], 'sell', '5', '495.00'),
+        ]:
+            self.add_transaction(day, transaction_type, quantity, amount)
+
+    def add_transaction(self, day, transaction_type, quantity, amount):
+        return InvestmentTransaction.objects.create(
+            user=self.user, portfolio=self.portfolio, asset=self.asset,
+            transaction_type=transaction_type, quantity=Decimal(quantity),
+            price=Decimal(amount) / Decimal(quantity), total_amount=Decimal(amount),
+            transaction_date=day
+        )
+
+    def test_replay_and_incremental_build(self):
+        from invest.snapshots import build_snapshots, portfolio_series, series_statistics
+
+        self.assertEqual(build_snapshots(self.portfolio), 5)
+        snapshots = list(self.portfolio.snapshots.order_by('date').values_list('market_value', 'total_cost', 'net_flow'))
+        self.assertEqual(snapshots, [
+            (Decimal('1000.00'), Decimal('1000.00'), Decimal('1000.00')),
+            (Decimal('1100.00'), Decimal('1000.00'), Decimal('0.00')),
+            (Decimal('2200.00'), Decimal('2100.00'), Decimal('1100.00')),
+            (Decimal('1485.00'), Decimal('1575.00'), Decimal('-495.00')),
+            (Decimal('1800.00'), Decimal('1575.00'), Decimal('0.00')),
+        ])
+
+        # Snapshot hari ini sementara: build ulang hanya menulis satu baris
+        self.assertEqual(build_snapshots(self.portfolio), 1)
+
+        stats = series_statistics(portfolio_series([self.portfolio]))
+        self.assertAlmostEqual(stats['max_drawdown'], 10.0)
+        self.assertAlmostEqual(stats['best_day'], (1800 / 1485 - 1) * 100)
+        self.assertAlmostEqual(stats['time_weighted_return'], (0.99 * 1800 / 1485 - 1) * 100)
+
+    def test_backdated_transaction_invalidates_snapshots(self):
+        from invest.snapshots import build_snapshots
+
+        build_snapshots(self.portfolio)
+        self.add_transaction(self.days[1], 'dividend', '1', '50.00')
+        self.assertEqual(self.portfolio.snapshots.count(), 1)
+
+        self.assertEqual(build_snapshots(self.portfolio), 4)
+        self.assertEqual(self.portfolio.snapshots.get(date=self.days[1]).net_flow, Decimal('-50.00'))
+        self.assertEqual(self.portfolio.snapshots.get(date=self.today).market_value, Decimal('1800.00'))
+
+    def test_moved_transaction_invalidates_both_portfolios(self):
+        from invest.snapshots import build_snapshots
+
+        other = InvestmentPortfolio.objects.create(user=self.user, name='Other Portfolio')
+        build_snapshots(self.portfolio)
+        sell = self.portfolio.transactions.get(transaction_type='sell')
+        buy = self.portfolio.transactions.get(transaction_date=self.days[2])
+        # Pindahkan buy kedua (dan sell-nya) ke portfolio lain
+        for transaction in (buy, sell):
+            transaction.portfolio = other
+            transaction.save()
+
+        self.assertEqual(self.portfolio.snapshots.count(), 2)
+        build_snapshots(self.portfolio)
+        self.assertEqual(self.portfolio.snapshots.get(date=self.today).market_value, Decimal('1200.00'))
+        build_snapshots(other)
+        self.assertEqual(other.snapshots.get(date=self.today).market_value, Decimal('600.00'))
+
+    def test_backdated_price_invalidates_snapshots(self):
+        from invest.ingest import PriceIngestor
+        from invest.snapshots import build_snapshots
+
+        build_snapshots(self.portfolio)
+        AssetPrice.objects.create(
+            asset=self.asset, price=Decimal('105.00'),
+            timestamp=timezone.make_aware(timezone.datetime.combine(self.days[2], timezone.datetime.min.time()))
+        )
+        self.assertEqual(self.portfolio.snapshots.count(), 2)
+        self.assertEqual(build_snapshots(self.portfolio), 3)
+        self.assertEqual(self.portfolio.snapshots.get(date=self.days[2]).market_value, Decimal('2100.00'))
+
+        # Harga hari ini tidak menghapus snapshot lama
+        AssetPrice.objects.create(asset=self.asset, price=Decimal('121.00'), timestamp=timezone.now())
+        self.assertEqual(self.portfolio.snapshots.count(), 5)
+
+        # Bulk ingest (prices_changed) menginvalidasi mulai harga paling awal
+        PriceIngestor().ingest([
+            (2, {'symbol': 'SNAP', 'timestamp': self.days[3].isoformat() + 'T12:00:00', 'price': '98'}),
+        ])
+        self.assertEqual(self.portfolio.snapshots.count(), 3)
+        self.assertEqual(build_snapshots(self.portfolio), 2)
+        self.assertEqual(self.portfolio.snapshots.get(date=self.days[3]).market_value, Decimal('1470.00'))
+
+
+class TaxLotEngineTestCase(TestCase):
+    """Test engine lot cost basis dan ledger realized P&L (invest.lots)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='lot_user', email='lot@test.com', password='testpass123')
+        self.portfolio = InvestmentPortfolio.objects.create(user=self.user, name='Lot Portfolio', cost_basis_method='fifo')
+        self.asset = Asset.objects.create(symbol='LOT', name='Lot Asset', type='stock')
+        self.day = timezone.localdate() - timezone.timedelta(days=10)
+
+    def add_transaction(self, offset, transaction_type, quantity, price, fees='0'):
+        quantity, price = Decimal(quantity), Decimal(price)
+        return InvestmentTransaction.objects.create(
+            user=self.user, portfolio=self.portfolio, asset=self.asset,
+            transaction_type=transaction_type, quantity=quantity, price=price,
+            total_amount=quantity * price, fees=Decimal(fees),
+            transaction_date=self.day + timezone.timedelta(days=offset)
+        )
+
+    def realized(self):
+        from invest.models import RealizedGain
+        return sum(RealizedGain.objects.filter(portfolio=self.portfolio).values_list('realized_pnl', flat=True), Decimal('0'))
+
+    def test_cost_basis_methods(self):
+        from invest.lots import open_position
+        self.add_transaction(0, 'buy', '10', '100')
+        self.add_transaction(1, 'buy', '10', '200', fees='10')
+        self.add_transaction(2, 'sell', '15', '300', fees='30')
+
+        # FIFO: 10 @ 100 + 5 @ 201 = 2005; proceeds 4500 - 30
+        self.assertEqual(self.realized(), Decimal('2465.00'))
+        self.assertEqual(open_position(self.portfolio.pk, self.asset.pk), (Decimal('5'), Decimal('1005')))
+
+        self.portfolio.cost_basis_method = 'lifo'
+        self.portfolio.save()
+        # LIFO: 10 @ 201 + 5 @ 100 = 2510
+        self.assertEqual(self.realized(), Decimal('1960.00'))
+        self.assertEqual(self.portfolio.realized_gains.count(), 2)
+
+        self.portfolio.cost_basis_method = 'average'
+        self.portfolio.save()
+        # Average: 15 * 150.5 = 2257.5
+        self.assertEqual(self.realized(), Decimal('2212.50'))
+        quantity, cost = open_position(self.portfolio.pk, self.asset.pk)
+        self.assertEqual((quantity, cost.quantize(Decimal('0.01'))), (Decimal('5'), Decimal('752.50')))
+
+    def test_backdated_changes_replay_from_affected_date(self):
+        from invest.lots import open_position
+        self.add_transaction(0, 'buy', '10', '100')
+        sell = self.add_transaction(5, 'sell', '10', '150')
+        self.assertEqual(self.realized(), Decimal('500.00'))
+
+        # Buy backdated sebelum buy pertama menjadi lot FIFO yang dijual
+        backdated = self.add_transaction(-1, 'buy', '10', '120')
+        self.assertEqual(self.realized(), Decimal('300.00'))
+        self.assertEqual(open_position(self.portfolio.pk, self.asset.pk), (Decimal('10'), Decimal('1000')))
+
+        # Split setelah kedua buy: sell 10 hanya mengkonsumsi setengah lot pertama
+        split = self.add_transaction(2, 'split', '2', '0')
+        self.assertEqual(self.realized(), Decimal('900.00'))
+        self.assertEqual(open_position(self.portfolio.pk, self.asset.pk), (Decimal('30'), Decimal('1600')))
+
+        # Hapus beberapa transaksi sekaligus: undo sampai yang terawal, replay sekali
+        self.portfolio.transactions.filter(pk__in=[backdated.pk, split.pk]).delete()
+        self.assertEqual(self.realized(), Decimal('500.00'))
+
+        sell.quantity = Decimal('4')
+        sell.total_amount = Decimal('600')
+        sell.save()
+        self.assertEqual(self.realized(), Decimal('200.00'))
+        self.assertEqual(open_position(self.portfolio.pk, self.asset.pk), (Decimal('6'), Decimal('600')))
+
+    def test_failed_write_rolls_back_undo(self):
+        from django.db.models.signals import post_save, pre_delete
+        from invest.lots import open_position
+
+        self.add_transaction(0, 'buy', '10', '100')
+        sell = self.add_transaction(5, 'sell', '10', '150')
+
+        def fail(sender, **kwargs):
+            raise RuntimeError('receiver gagal')
+
+        for signal in (post_save, pre_delete):
+            signal.connect(fail, sender=InvestmentTransaction)
+            try:
+                with self.assertRaises(RuntimeError):
+                    if signal is post_save:
+                        self.add_transaction(-1, 'buy', '10', '120')
+                    else:
+                        sell.delete()
+            finally:
+                signal.disconnect(fail, sender=InvestmentTransaction)
+            # Undo ikut dibatalkan bersama write yang gagal
+            self.assertEqual(self.realized(), Decimal('500.00'))
+            self.assertEqual(open_position(self.portfolio.pk, self.asset.pk), (Decimal('0'), Decimal('0')))
+
+        # State delete yang gagal tidak mengganggu delete berikutnya
+        sell.delete()
+        self.assertEqual(self.realized(), Decimal('0'))
+        self.assertEqual(open_position(self.portfolio.pk, self.asset.pk), (Decimal('10'), Decimal('1000')))
+
+
+class HoldingRebuildTestCase(TestCase):
+    """Test rebuild holdings dari transaksi dengan checkpoint per portfolio"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='rebuild_user', email='rebuild@test.com', password='testpass123')
+        self.portfolio = InvestmentPortfolio.objects.create(user=self.user, name='Rebuild Portfolio')
+        self.other = InvestmentPortfolio.objects.create(user=self.user, name='Idle Portfolio')
+        self.asset = Asset.objects.create(symbol='RBLD', name='Rebuild Asset', type='stock')
+        AssetPrice.objects.create(asset=self.asset, price=Decimal('120.00'), timestamp=timezone.now())
+        self.day = timezone.localdate() - timezone.timedelta(days=5)
+        self.buy = self.add_transaction(0, 'buy', '10', '1000.00', fees='10.00')
+        self.sell = self.add_transaction(2, 'sell', '4', '480.00')
+
+    def add_transaction(self, offset, transaction_type, quantity, amount, fees='0'):
+        return InvestmentTransaction.objects.create(
+            user=self.user, portfolio=self.portfolio, asset=self.asset,
+            transaction_type=transaction_type, quantity=Decimal(quantity),
+            price=Decimal(amount) / Decimal(quantity), total_amount=Decimal(amount), fees=Decimal(fees),
+            transaction_date=self.day + timezone.timedelta(days=offset)
+        )
+
+    def test_rebuild_only_changed_portfolios(self):
+        from django.core.management import call_command
+        from invest.holdings import rebuild_holdings
+
+        stats = rebuild_holdings()
+        self.assertEqual(stats['portfolios_count'], 2)
+        self.assertEqual(stats['holdings_created'], 1)
+        holding = InvestmentHolding.objects.get(portfolio=self.portfolio)
+        self.assertEqual(holding.quantity, Decimal('6'))
+        self.assertEqual(holding.total_cost, Decimal('606.00'))
+        self.assertEqual(holding.current_value, Decimal('720.00'))
+
+        # Checkpoint terbaru: tidak ada yang di-replay
+        self.assertEqual(rebuild_holdings()['portfolios_count'], 0)
+
+        # Transaksi backdated hanya menandai portfolio tersebut
+        self.add_transaction(-1, 'buy', '2', '180.00')
+        stats = rebuild_holdings()
+        self.assertEqual((stats['portfolios_count'], stats['transactions_count']), (1, 3))
+        holding.refresh_from_db()
+        # (1010 + 180) * 8 / 12
+        self.assertEqual(holding.quantity, Decimal('8'))
+        self.assertEqual(holding.total_cost, Decimal('793.33'))
+
+        InvestmentTransaction.objects.filter(portfolio=self.portfolio).delete()
+        call_command('rebuild_holdings', stdout=StringIO())
+        self.assertFalse(InvestmentHolding.objects.filter(portfolio=self.portfolio).exists())
@@ -0,0 +1,142 @@
+# ========================================
+# invest/timeseries.py - Downsampling time series harga
+# ========================================
+
+from datetime import timedelta
+
+from django.db.models import F, IntegerField, Max, Min, Sum, Window
+from django.db.models.functions import (
+    Cast, ExtractHour, ExtractMinute, FirstValue, Floor, TruncDay, TruncMonth, TruncWeek
+)
+
+
+BUCKET_TRUNCS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+MAX_BUCKET_MINUTES = 24 * 60
+
+
+def ohlc_buckets(queryset, interval, minutes=None):
+    """
+    Open/high/low/close/volume per bucket, dihitung di database.
+
+    Bucket dibentuk dengan Trunc* (day, week, month) atau, untuk interval
+    'minutes', slot N-menit dalam satu hari (ExtractHour/ExtractMinute).
+    Open dan close diambil dengan window function FirstValue per bucket,
+    sehingga query portable antara SQLite dan PostgreSQL.
+
+    Args:
+        queryset: Queryset AssetPrice (sudah difilter asset dan rentang waktu)
+        interval: 'day', 'week', 'month', atau 'minutes'
+        minutes: Panjang bucket dalam menit untuk interval 'minutes' (1-1440).
+            Bucket dimulai ulang setiap awal hari.
+
+    Returns:
+        list: dict timestamp (awal bucket), open, high, low, close, volume,
+        urut berdasarkan timestamp
+    """
+    queryset = queryset.order_by()
+
+    if interval == 'minutes':
+        if not minutes or not 1 <= minutes <= MAX_BUCKET_MINUTES:
+            raise ValueError(f'minutes harus antara 1 dan {MAX_BUCKET_MINUTES}')
+        queryset = queryset.annotate(
+            bucket_day=TruncDay('timestamp'),
+            # EXTRACT di PostgreSQL menghasilkan numeric (pembagian tidak
+            # dibulatkan), jadi slot di-floor dan di-cast eksplisit
+            bucket_slot=Cast(
+                Floor((ExtractHour('timestamp') * 60 + ExtractMinute('timestamp')) / minutes),
+                output_field=IntegerField()
+            ),
+        )
+        bucket_fields = ['bucket_day', 'bucket_slot']
+    elif interval in BUCKET_TRUNCS:
+        queryset = queryset.annotate(bucket=BUCKET_TRUNCS[interval]('timestamp'))
+        bucket_fields = ['bucket']
+    else:
+        raise ValueError(f'interval tidak dikenal: {interval}')
+
+    partition = [F(field) for field in bucket_fields]
+
+    def window(expression, order_by=None):
+        return Window(expression=expression, partition_by=partition, order_by=order_by)
+
+    rows = queryset.annotate(
+        open=window(FirstValue('price'), F('timestamp').asc()),
+        close=window(FirstValue('price'), F('timestamp').desc()),
+        high=window(Max('price')),
+        low=window(Min('price')),
+        volume_total=window(Sum('volume')),
+    ).values(*bucket_fields, 'open', 'high', 'low', 'close', 'volume_total').distinct()
+
+    buckets = []
+    for row in rows:
+        if interval == 'minutes':
+            start = row['bucket_day'] + timedelta(minutes=int(row['bucket_slot']) * minutes)
+        else:
+            start = row['bucket']
+        buckets.append({
+            'timestamp': start,
+            'open': row['open'],
+            'high': row['high'],
+            'low': row['low'],
+            'close': row['close'],
+            'volume': row['volume_total'],
+        })
+
+    buckets.sort(key=lambda bucket: bucket['timestamp'])
+    return buckets
+
+
+def lttb(points, threshold, x=lambda point: point[0], y=lambda point: point[1]):
+    """
+    Largest-Triangle-Three-Buckets: pilih paling banyak `threshold` titik yang
+    mempertahankan bentuk visual series.
+
+    Args:
+        points: List titik terurut berdasarkan x
+        threshold: Jumlah titik maksimal (minimal 3)
+        x, y: Fungsi untuk mengambil koordinat numerik dari setiap titik
+
+    Returns:
+        list: Subset dari points (objek asli), selalu termasuk titik pertama dan terakhir
+    """
+    count = len(points)
+    if threshold >= count:
+        return list(points)
+    if threshold < 3:
+        raise ValueError('threshold minimal 3')
+
+    xs = [float(x(point)) for point in points]
+    ys = [float(y(point)) for point in points]
+
+    sampled = [points[0]]
+    bucket_size = (count - 2) / (threshold - 2)
+    selected = 0
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Rata-rata bucket berikutnya sebagai titik ketiga segitiga
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        next_size = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / next_size
+        avg_y = sum(ys[next_start:next_end]) / next_size
+
+        ax, ay = xs[selected], ys[selected]
+        best_area, best_index = -1.0, start
+        for index in range(start, end):
+            area = abs((ax - avg_x) * (ys[index] - ay) - (ax - xs[index]) * (avg_y - ay))
+            if area > best_area:
+                best_area, best_index = area, index
+
+        sampled.append(points[best_index])
+        selected = best_index
+
+    sampled.append(points[-1])
+    return sampled
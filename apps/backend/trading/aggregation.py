@@ -0,0 +1,189 @@
+# ========================================
+# trading/aggregation.py - Agregasi Trade dari fill TradeExecution
+# ========================================
+
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Trade, TradeExecution
+
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+UNIT = Decimal('0.00000001')
+
+ENTRY_TYPES = ('entry',)
+EXIT_TYPES = ('exit', 'partial_exit')
+
+# Field Trade yang dihitung engine
+AGGREGATE_FIELDS = [
+    'status', 'total_quantity', 'average_entry_price', 'average_exit_price', 'total_fees',
+    'entry_value', 'exit_quantity', 'exit_value', 'open_quantity', 'open_cost_basis',
+    'gross_realized_pnl', 'realized_pnl', 'pnl_percentage', 'holding_time',
+    'entered_at', 'exited_at', 'updated_at',
+]
+
+
+class ExecutionError(ValueError):
+    """Fill tidak bisa diterapkan ke trade (mis. exit melebihi posisi terbuka)"""
+
+
+def execution_key(execution):
+    """Urutan replay fill: waktu eksekusi, waktu input, lalu id sebagai tie-break"""
+    return (execution.executed_at, execution.created_at, str(execution.pk))
+
+
+def reset_trade(trade):
+    """Kosongkan field agregat trade sebelum replay"""
+    for field in ('total_quantity', 'average_entry_price', 'average_exit_price', 'total_fees',
+                  'entry_value', 'exit_quantity', 'exit_value', 'open_quantity', 'open_cost_basis',
+                  'gross_realized_pnl', 'realized_pnl', 'pnl_percentage'):
+        setattr(trade, field, ZERO)
+    trade.holding_time = None
+    trade.entered_at = None
+    trade.exited_at = None
+    if trade.status in ('open', 'closed'):
+        trade.status = 'planned'
+
+
+def apply_execution(trade, execution):
+    """
+    Terapkan satu fill ke running sums trade (in-place, O(1), tanpa query).
+
+    Entry menambah posisi terbuka dan cost basis-nya. Exit (termasuk
+    partial_exit) menutup sebagian posisi pada average cost posisi terbuka:
+    P&L kotor = (harga exit - average cost) x quantity untuk long, dan
+    kebalikannya untuk short. realized_pnl adalah P&L kotor dikurangi
+    semua fee yang sudah dibayar.
+
+    Raises:
+        ExecutionError: Exit melebihi posisi terbuka
+    """
+    quantity, price = execution.quantity, execution.price
+    value = quantity * price
+
+    if execution.execution_type in ENTRY_TYPES:
+        trade.total_quantity += quantity
+        trade.entry_value += value
+        trade.open_quantity += quantity
+        trade.open_cost_basis += value
+        if trade.entered_at is None or execution.executed_at < trade.entered_at:
+            trade.entered_at = execution.executed_at
+        if trade.status in ('planned', 'closed'):
+            trade.status = 'open'
+            trade.exited_at = None
+            trade.holding_time = None
+
+    elif execution.execution_type in EXIT_TYPES:
+        if quantity > trade.open_quantity:
+            raise ExecutionError(
+                f'Quantity exit {quantity} melebihi posisi terbuka {trade.open_quantity}'
+            )
+        # Average cost posisi terbuka; exit penuh mengambil seluruh sisa cost
+        if quantity == trade.open_quantity:
+            cost = trade.open_cost_basis
+        else:
+            cost = (trade.open_cost_basis * quantity / trade.open_quantity).quantize(UNIT)
+        direction = 1 if trade.side == 'long' else -1
+        trade.gross_realized_pnl += direction * (value - cost)
+        trade.open_cost_basis -= cost
+        trade.open_quantity -= quantity
+        trade.exit_quantity += quantity
+        trade.exit_value += value
+        if trade.open_quantity == 0:
+            trade.status = 'closed'
+            trade.exited_at = execution.executed_at
+            if trade.entered_at is not None:
+                trade.holding_time = trade.exited_at - trade.entered_at
+
+    trade.total_fees += execution.fees
+    _derive(trade)
+    return trade
+
+
+def _derive(trade):
+    """Field turunan dari running sums"""
+    trade.average_entry_price = (
+        (trade.entry_value / trade.total_quantity).quantize(CENT) if trade.total_quantity else ZERO
+    )
+    trade.average_exit_price = (
+        (trade.exit_value / trade.exit_quantity).quantize(CENT) if trade.exit_quantity else ZERO
+    )
+    trade.realized_pnl = (trade.gross_realized_pnl - trade.total_fees).quantize(CENT)
+    # Cost basis bagian posisi yang sudah ditutup
+    closed_cost = trade.entry_value - trade.open_cost_basis
+    trade.pnl_percentage = (
+        (trade.realized_pnl / closed_cost * 100).quantize(Decimal('0.0001')) if closed_cost > 0 else ZERO
+    )
+
+
+def rebuild_trade(trade):
+    """
+    Hitung ulang agregat trade dari seluruh fill (urut waktu eksekusi),
+    mis. setelah fill diedit, dihapus, atau disisipkan di tengah history.
+
+    Returns:
+        int: Jumlah fill yang di-replay
+    """
+    executions = sorted(trade.executions.all(), key=execution_key)
+    reset_trade(trade)
+    for execution in executions:
+        apply_execution(trade, execution)
+    trade.save(update_fields=AGGREGATE_FIELDS)
+    return len(executions)
+
+
+def check_executions(trade, executions):
+    """
+    Replay fill di memory (tanpa menyimpan) untuk validasi history yang
+    diubah, mis. fill yang diedit atau disisipkan di tengah.
+
+    Raises:
+        ExecutionError: Ada exit yang melebihi posisi terbuka
+    """
+    preview = Trade(side=trade.side, status=trade.status)
+    reset_trade(preview)
+    for execution in sorted(executions, key=execution_key):
+        apply_execution(preview, execution)
+    return preview
+
+
+def _is_latest(execution):
+    """Fill berada di akhir history trade (tidak ada fill lain sesudahnya)"""
+    return not TradeExecution.objects.filter(
+        trade_id=execution.trade_id, executed_at__gt=execution.executed_at
+    ).exclude(pk=execution.pk).exists()
+
+
+@receiver(post_save, sender=TradeExecution)
+def aggregate_execution(sender, instance, created, raw=False, **kwargs):
+    """
+    Fill baru di akhir history diterapkan langsung ke running sums trade
+    (O(1)); fill yang diedit atau disisipkan sebelum fill lain memicu
+    rebuild_trade agar urutan average cost tetap benar.
+    """
+    if raw:
+        return
+    with db_transaction.atomic():
+        trade = Trade.objects.select_for_update().get(pk=instance.trade_id)
+        if created and _is_latest(instance):
+            apply_execution(trade, instance)
+            # Counter risiko akun diperbarui dengan delta fill ini (trading.risk)
+            trade._applied_execution = instance
+            trade.save(update_fields=AGGREGATE_FIELDS)
+        else:
+            rebuild_trade(trade)
+
+
+@receiver(post_delete, sender=TradeExecution)
+def reaggregate_after_delete(sender, instance, origin=None, **kwargs):
+    # Fill ikut terhapus karena trade/account/user dihapus: tidak perlu dihitung ulang
+    origin_model = getattr(origin, 'model', type(origin))
+    if origin is not None and origin_model is not TradeExecution:
+        return
+    trade = Trade.objects.filter(pk=instance.trade_id).first()
+    if trade is not None:
+        rebuild_trade(trade)
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class TradingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trading'
+
+    def ready(self):
+        # Agregasi Trade mengikuti fill TradeExecution
+        from . import aggregation  # noqa: F401
+        # Invalidasi cache statistik strategi saat trade ditutup/dibuka ulang
+        from . import statistics  # noqa: F401
+        # Counter exposure dan P&L harian akun mengikuti agregat trade
+        from . import risk  # noqa: F401
+        # Equity curve akun di-append saat trade ditutup
+        from . import equity  # noqa: F401
@@ -0,0 +1,204 @@
+# ========================================
+# trading/equity.py - Equity curve akun dari trade closed
+# ========================================
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import EquityPoint, Trade, TradingAccount
+
+
+ZERO = Decimal('0')
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def build_equity_curve(account_id, batch_size=1000):
+    """
+    Tambahkan titik equity untuk trade closed setelah titik terakhir akun.
+
+    Dilanjutkan dari P&L kumulatif dan puncak titik terakhir, jadi trade yang
+    baru ditutup hanya menambah satu baris. Baris akun dikunci agar dua trade
+    yang ditutup bersamaan tidak menghitung kumulatif dari titik yang sama.
+
+    Returns:
+        int: Jumlah titik yang ditambahkan
+    """
+    with db_transaction.atomic():
+        TradingAccount.objects.select_for_update().filter(pk=account_id).exists()
+
+        last = (
+            EquityPoint.objects.filter(trading_account_id=account_id)
+            .only('closed_at', 'trade_id', 'cumulative_pnl', 'peak_pnl')
+            .order_by('-closed_at', '-trade_id').first()
+        )
+        trades = Trade.objects.filter(trading_account_id=account_id, status='closed', exited_at__isnull=False)
+        cumulative = peak = ZERO
+        if last is not None:
+            trades = trades.filter(
+                Q(exited_at__gt=last.closed_at) | Q(exited_at=last.closed_at, id__gt=last.trade_id)
+            )
+            cumulative, peak = last.cumulative_pnl, last.peak_pnl
+
+        points = []
+        rows = trades.order_by('exited_at', 'id').values_list('id', 'exited_at', 'realized_pnl')
+        for trade_id, exited_at, realized_pnl in rows.iterator(chunk_size=5000):
+            cumulative += realized_pnl
+            peak = max(peak, cumulative)
+            points.append(EquityPoint(
+                trading_account_id=account_id, trade_id=trade_id, closed_at=exited_at,
+                realized_pnl=realized_pnl, cumulative_pnl=cumulative, peak_pnl=peak,
+            ))
+        EquityPoint.objects.bulk_create(points, batch_size=batch_size)
+    return len(points)
+
+
+def invalidate_equity_curve(account_id, from_time=None):
+    """Hapus titik mulai from_time (default semua); build berikutnya melanjutkan dari titik sebelumnya"""
+    points = EquityPoint.objects.filter(trading_account_id=account_id)
+    if from_time is not None:
+        points = points.filter(closed_at__gte=from_time)
+    points.delete()
+
+
+def equity_series(account, start=None, end=None):
+    """
+    Series equity akun (setelah titik yang tertinggal di-build).
+
+    Args:
+        start: Tanggal awal (inklusif, opsional)
+        end: Tanggal akhir (inklusif, opsional)
+
+    Returns:
+        list: dict timestamp, trade_id, realized_pnl, balance, peak, drawdown
+        urut waktu close
+    """
+    build_equity_curve(account.pk)
+    points = EquityPoint.objects.filter(trading_account=account)
+    if start is not None:
+        points = points.filter(closed_at__gte=_start_of_day(start))
+    if end is not None:
+        points = points.filter(closed_at__lt=_start_of_day(end + timedelta(days=1)))
+    rows = points.order_by('closed_at', 'trade_id').values_list(
+        'closed_at', 'trade_id', 'realized_pnl', 'cumulative_pnl', 'peak_pnl'
+    )
+    initial = account.initial_balance
+    return [
+        {
+            'timestamp': closed_at,
+            'trade_id': trade_id,
+            'realized_pnl': realized_pnl,
+            'balance': initial + cumulative,
+            'peak': initial + peak,
+            'drawdown': peak - cumulative,
+        }
+        for closed_at, trade_id, realized_pnl, cumulative, peak in rows
+    ]
+
+
+def drawdown_statistics(series):
+    """
+    Max drawdown dan time-under-water (vectorized) dari series equity.
+
+    Periode under water dimulai di titik puncak terakhir sebelum drawdown dan
+    berakhir di titik pertama yang kembali ke puncak; periode yang belum
+    pulih dihitung sampai titik terakhir.
+
+    Returns:
+        dict: max_drawdown (nominal dan persen dari puncak), waktunya,
+        drawdown saat ini, serta durasi under water terpanjang dan saat ini (hari)
+    """
+    empty = {
+        'max_drawdown': 0.0, 'max_drawdown_percentage': 0.0, 'max_drawdown_at': None,
+        'current_drawdown': 0.0, 'current_drawdown_percentage': 0.0,
+        'max_time_under_water_days': 0.0, 'current_time_under_water_days': 0.0,
+        'under_water_periods': 0,
+    }
+    if not series:
+        return empty
+
+    times = np.array([point['timestamp'].timestamp() for point in series], dtype=float)
+    balance = np.array([float(point['balance']) for point in series], dtype=float)
+    peak = np.array([float(point['peak']) for point in series], dtype=float)
+    drawdown = peak - balance
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown_pct = np.where(peak > 0, drawdown / peak * 100, 0.0)
+
+    # Titik virtual di depan (saldo awal = puncak, drawdown 0) dan sentinel di
+    # belakang; edge naik = titik puncak sebelum under water, edge turun + 1 =
+    # titik pulih (atau sentinel jika belum pulih)
+    count = len(series)
+    under = np.concatenate(([False], drawdown > 0, [False])).astype(int)
+    times = np.concatenate(([times[0]], times))
+    edges = np.flatnonzero(np.diff(under))
+    starts, ends = edges[::2], edges[1::2] + 1
+    durations = (times[np.minimum(ends, count)] - times[starts]) / 86400
+
+    worst = int(np.argmax(drawdown))
+    still_under = bool(drawdown[-1] > 0)
+    return {
+        'max_drawdown': round(float(drawdown[worst]), 2),
+        'max_drawdown_percentage': round(float(drawdown_pct.max()), 2),
+        'max_drawdown_at': series[worst]['timestamp'] if drawdown[worst] > 0 else None,
+        'current_drawdown': round(float(drawdown[-1]), 2),
+        'current_drawdown_percentage': round(float(drawdown_pct[-1]), 2),
+        'max_time_under_water_days': round(float(durations.max()), 2) if durations.size else 0.0,
+        'current_time_under_water_days': round(float(durations[-1]), 2) if still_under else 0.0,
+        'under_water_periods': int(starts.size),
+    }
+
+
+@receiver(post_init, sender=Trade)
+def remember_equity_state(sender, instance, **kwargs):
+    # Lewat __dict__ agar field yang di-defer tidak memicu query
+    instance._loaded_equity_state = tuple(
+        instance.__dict__.get(field)
+        for field in ('status', 'exited_at', 'realized_pnl', 'trading_account_id')
+    )
+
+
+@receiver(post_save, sender=Trade)
+def update_equity_curve(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Trade yang ditutup setelah titik terakhir cukup di-append. Trade closed
+    yang berubah (dibuka ulang, P&L/waktu exit diedit, pindah akun) atau
+    ditutup dengan waktu exit sebelum titik terakhir menghapus titik mulai
+    waktu exit paling awal yang terdampak lalu build melanjutkan dari sana.
+    """
+    previous = (None, None, None, None) if created else instance._loaded_equity_state
+    current = (instance.status, instance.exited_at, instance.realized_pnl, instance.trading_account_id)
+    instance._loaded_equity_state = current
+    if raw or previous == current:
+        return
+    previous_status, previous_exited_at, _, previous_account = previous
+
+    accounts = set()
+    if previous_status == 'closed' and previous_exited_at is not None and previous_account is not None:
+        invalidate_equity_curve(previous_account, previous_exited_at)
+        accounts.add(previous_account)
+    if instance.status == 'closed' and instance.exited_at is not None:
+        # Titik yang sudah ada pada/sesudah waktu exit ini harus di-build ulang
+        invalidate_equity_curve(instance.trading_account_id, instance.exited_at)
+        accounts.add(instance.trading_account_id)
+    for account_id in accounts:
+        build_equity_curve(account_id)
+
+
+@receiver(post_delete, sender=Trade)
+def rebuild_equity_after_delete(sender, instance, origin=None, **kwargs):
+    # Trade ikut terhapus karena akun/user dihapus: titik ikut terhapus (cascade)
+    origin_model = getattr(origin, 'model', type(origin))
+    if origin is not None and origin_model is not Trade:
+        return
+    if instance.status == 'closed' and instance.exited_at is not None:
+        invalidate_equity_curve(instance.trading_account_id, instance.exited_at)
+        build_equity_curve(instance.trading_account_id)
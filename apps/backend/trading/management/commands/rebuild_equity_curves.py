@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from trading.equity import build_equity_curve, invalidate_equity_curve
+from trading.models import TradingAccount
+
+
+class Command(BaseCommand):
+    """
+    Bangun ulang equity curve akun trading dari seluruh trade closed.
+
+    Dipakai untuk backfill trade yang ditutup sebelum equity curve ada (atau
+    trade yang di-import lewat bulk_create tanpa signal). Setelah itu titik
+    equity di-append otomatis oleh trading.equity setiap trade ditutup.
+    """
+    help = 'Bangun ulang equity curve akun trading'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Batasi ke user ID tertentu')
+        parser.add_argument('--account', help='Batasi ke trading account ID tertentu')
+
+    def handle(self, *args, **options):
+        accounts = TradingAccount.objects.all()
+        if options.get('user'):
+            accounts = accounts.filter(user_id=options['user'])
+        if options.get('account'):
+            accounts = accounts.filter(pk=options['account'])
+
+        accounts_count = points_count = 0
+        for account_id in accounts.values_list('pk', flat=True).iterator():
+            with transaction.atomic():
+                invalidate_equity_curve(account_id)
+                points_count += build_equity_curve(account_id)
+            accounts_count += 1
+
+        self.stdout.write(f'{points_count} titik equity ditulis untuk {accounts_count} akun.')
+        self.stdout.write(self.style.SUCCESS('Rebuild equity curve selesai.'))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from trading.aggregation import ExecutionError, rebuild_trade
+from trading.models import Trade, TradingAccount
+from trading.risk import refresh_account_risk
+
+
+class Command(BaseCommand):
+    """
+    Hitung ulang agregat Trade (quantity, harga rata-rata, P&L, holding time)
+    dari seluruh fill TradeExecution.
+
+    Dipakai untuk backfill trade yang dibuat sebelum engine agregasi ada (atau
+    fill yang di-import lewat bulk_create tanpa signal). Setelah itu agregat
+    dijaga otomatis oleh trading.aggregation setiap fill disimpan atau dihapus.
+    Counter risiko akun (exposure, P&L harian) ikut dihitung ulang.
+    """
+    help = 'Hitung ulang agregat trade dari fill'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Batasi ke user ID tertentu')
+        parser.add_argument('--account', help='Batasi ke trading account ID tertentu')
+
+    def handle(self, *args, **options):
+        trades = Trade.objects.all()
+        if options.get('user'):
+            trades = trades.filter(user_id=options['user'])
+        if options.get('account'):
+            trades = trades.filter(trading_account_id=options['account'])
+
+        trades_count = replayed = 0
+        for trade in trades.iterator():
+            try:
+                replayed += rebuild_trade(trade)
+            except ExecutionError as exc:
+                raise CommandError(f'Trade {trade.pk}: {exc}')
+            trades_count += 1
+
+        accounts = TradingAccount.objects.filter(pk__in=trades.values('trading_account_id'))
+        for account_id in accounts.values_list('pk', flat=True):
+            refresh_account_risk(account_id)
+
+        self.stdout.write(f'{replayed} fill di-replay untuk {trades_count} trade.')
+        self.stdout.write(self.style.SUCCESS('Rebuild trade selesai.'))
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from trading.models import TradingAccount
+from trading.performance import rollup_performance
+
+
+class Command(BaseCommand):
+    """
+    Rollup harian TradingPerformance dari trade closed (dijadwalkan tiap malam).
+
+    Tanpa --start/--end hanya kemarin dan hari ini yang dihitung ulang. Rentang
+    apa pun bisa di-backfill ulang dengan aman: row di-upsert dan hari yang
+    tidak lagi punya trade closed dihapus.
+    """
+    help = 'Hitung dan upsert performa harian akun trading'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='Tanggal awal (YYYY-MM-DD)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Tanggal akhir (YYYY-MM-DD)')
+        parser.add_argument('--user', type=int, help='Batasi ke user ID tertentu')
+        parser.add_argument('--account', help='Batasi ke trading account ID tertentu')
+
+    def handle(self, *args, **options):
+        end = options.get('end') or timezone.localdate()
+        start = options.get('start') or end - timedelta(days=1)
+        if start > end:
+            raise CommandError('--start harus sebelum atau sama dengan --end')
+
+        accounts = TradingAccount.objects.all()
+        if options.get('user'):
+            accounts = accounts.filter(user_id=options['user'])
+        if options.get('account'):
+            accounts = accounts.filter(pk=options['account'])
+
+        stats = rollup_performance(start, end, accounts)
+
+        self.stdout.write(
+            f"{stats['rows_upserted']} row di-upsert, {stats['rows_deleted']} row dihapus "
+            f"untuk {stats['accounts_count']} akun ({start} s/d {end})."
+        )
+        self.stdout.write(self.style.SUCCESS('Rollup performa trading selesai.'))
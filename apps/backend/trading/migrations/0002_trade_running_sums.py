@@ -0,0 +1,47 @@
+# Generated by Django 4.1.13 on 2026-10-17 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trade',
+            name='entry_value',
+            field=models.DecimalField(decimal_places=8, default=0, max_digits=24),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='exit_quantity',
+            field=models.DecimalField(decimal_places=8, default=0, max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='exit_value',
+            field=models.DecimalField(decimal_places=8, default=0, max_digits=24),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='gross_realized_pnl',
+            field=models.DecimalField(decimal_places=8, default=0, max_digits=24),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='open_cost_basis',
+            field=models.DecimalField(decimal_places=8, default=0, max_digits=24),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='open_quantity',
+            field=models.DecimalField(decimal_places=8, default=0, max_digits=18),
+        ),
+        migrations.AddIndex(
+            model_name='tradeexecution',
+            index=models.Index(fields=['trade', 'executed_at'], name='trade_execu_trade_i_05db07_idx'),
+        ),
+    ]
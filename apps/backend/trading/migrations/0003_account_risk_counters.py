@@ -0,0 +1,51 @@
+# Generated by Django 4.1.13 on 2026-10-17 14:19
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_open_exposure(apps, schema_editor):
+    TradingAccount = apps.get_model('trading', 'TradingAccount')
+    Trade = apps.get_model('trading', 'Trade')
+    exposures = (
+        Trade.objects.filter(status='open').order_by()
+        .values('trading_account_id').annotate(exposure=Sum('open_cost_basis'))
+    )
+    for row in exposures:
+        TradingAccount.objects.filter(pk=row['trading_account_id']).update(open_exposure=row['exposure'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0002_trade_running_sums'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trade',
+            name='risk_breaches',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='tradingaccount',
+            name='daily_pnl_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tradingaccount',
+            name='daily_realized_pnl',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='tradingaccount',
+            name='open_exposure',
+            field=models.DecimalField(decimal_places=8, default=0, max_digits=24),
+        ),
+        migrations.AddField(
+            model_name='tradingaccount',
+            name='risk_enforcement',
+            field=models.CharField(choices=[('reject', 'Reject'), ('flag', 'Flag Only')], default='reject', max_length=10),
+        ),
+        migrations.RunPython(backfill_open_exposure, migrations.RunPython.noop),
+    ]
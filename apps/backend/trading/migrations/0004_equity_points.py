@@ -0,0 +1,45 @@
+# Generated by Django 4.1.13 on 2026-10-17 14:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0003_account_risk_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquityPoint',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('closed_at', models.DateTimeField()),
+                ('realized_pnl', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('cumulative_pnl', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('peak_pnl', models.DecimalField(decimal_places=2, max_digits=18)),
+            ],
+            options={
+                'db_table': 'trading_equity_points',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['trading_account', 'status', 'exited_at'], name='trades_trading_aefd20_idx'),
+        ),
+        migrations.AddField(
+            model_name='equitypoint',
+            name='trade',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='equity_point', to='trading.trade'),
+        ),
+        migrations.AddField(
+            model_name='equitypoint',
+            name='trading_account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='equity_points', to='trading.tradingaccount'),
+        ),
+        migrations.AddIndex(
+            model_name='equitypoint',
+            index=models.Index(fields=['trading_account', 'closed_at'], name='trading_equ_trading_3ae11b_idx'),
+        ),
+    ]
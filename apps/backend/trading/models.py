@@ -19,6 +19,11 @@ class TradingAccount(models.Model):
         ('futures', 'Futures'),
     ]
 
+    RISK_ENFORCEMENT_CHOICES = [
+        ('reject', 'Reject'),
+        ('flag', 'Flag Only'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='trading_accounts')
     account_name = models.CharField(max_length=255)
@@ -29,6 +34,13 @@ class TradingAccount(models.Model):
     available_margin = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     max_daily_loss = models.DecimalField(max_digits=15, decimal_places=2, blank=True, null=True)
     max_position_size = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)  # percentage
+    risk_enforcement = models.CharField(max_length=10, choices=RISK_ENFORCEMENT_CHOICES, default='reject')
+
+    # Counter risiko berjalan (trading.risk), diperbarui setiap fill
+    open_exposure = models.DecimalField(max_digits=24, decimal_places=8, default=0)
+    daily_realized_pnl = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    daily_pnl_date = models.DateField(blank=True, null=True)
+
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
@@ -122,6 +134,14 @@ class Trade(models.Model):
     average_exit_price = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     total_fees = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     
+    # Running sums engine agregasi fill (lihat trading.aggregation)
+    entry_value = models.DecimalField(max_digits=24, decimal_places=8, default=0)
+    exit_quantity = models.DecimalField(max_digits=18, decimal_places=8, default=0)
+    exit_value = models.DecimalField(max_digits=24, decimal_places=8, default=0)
+    open_quantity = models.DecimalField(max_digits=18, decimal_places=8, default=0)
+    open_cost_basis = models.DecimalField(max_digits=24, decimal_places=8, default=0)
+    gross_realized_pnl = models.DecimalField(max_digits=24, decimal_places=8, default=0)
+    
     # Trade Results
     realized_pnl = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     pnl_percentage = models.DecimalField(max_digits=8, decimal_places=4, default=0)
@@ -134,6 +154,7 @@ class Trade(models.Model):
     execution_quality = models.CharField(max_length=10, choices=EXECUTION_QUALITY_CHOICES, blank=True)
     notes = models.TextField(blank=True)
     screenshot_urls = models.TextField(blank=True, default='[]') 
+    risk_breaches = models.JSONField(default=list, blank=True)  # batas akun yang dilanggar saat entry (mode flag)
     
     # Timestamps
     planned_at = models.DateTimeField(blank=True, null=True)
@@ -148,6 +169,7 @@ class Trade(models.Model):
             models.Index(fields=['user', 'status']),
             models.Index(fields=['user', 'entered_at']),
             models.Index(fields=['trading_account', 'status']),
+            models.Index(fields=['trading_account', 'status', 'exited_at']),
             models.Index(fields=['strategy', 'status']),
         ]
 
@@ -174,6 +196,9 @@ class TradeExecution(models.Model):
 
     class Meta:
         db_table = 'trade_executions'
+        indexes = [
+            models.Index(fields=['trade', 'executed_at']),
+        ]
 
     def __str__(self):
         return f"{self.execution_type} - {self.quantity} @ {self.price}"
@@ -212,3 +237,29 @@ class TradingPerformance(models.Model):
 
     def __str__(self):
         return f"{self.trading_account.account_name} - {self.date}"
+
+
+class EquityPoint(models.Model):
+    """
+    Titik equity curve akun: satu baris per trade closed, urut (closed_at,
+    trade), dipelihara incremental oleh trading.equity.
+
+    P&L kumulatif dan puncaknya disimpan relatif terhadap initial_balance,
+    jadi mengubah saldo awal akun tidak perlu membangun ulang series.
+    """
+    id = models.BigAutoField(primary_key=True)
+    trading_account = models.ForeignKey(TradingAccount, on_delete=models.CASCADE, related_name='equity_points')
+    trade = models.OneToOneField(Trade, on_delete=models.CASCADE, related_name='equity_point')
+    closed_at = models.DateTimeField()
+    realized_pnl = models.DecimalField(max_digits=15, decimal_places=2)
+    cumulative_pnl = models.DecimalField(max_digits=18, decimal_places=2)
+    peak_pnl = models.DecimalField(max_digits=18, decimal_places=2)
+
+    class Meta:
+        db_table = 'trading_equity_points'
+        indexes = [
+            models.Index(fields=['trading_account', 'closed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.trading_account_id} - {self.closed_at}: {self.cumulative_pnl}"
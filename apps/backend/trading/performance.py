@@ -0,0 +1,147 @@
+# ========================================
+# trading/performance.py - Rollup harian TradingPerformance dari trade closed
+# ========================================
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+
+from .models import Trade, TradingAccount, TradingPerformance
+from .signals import performance_changed
+
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+BASIS = Decimal('0.0001')
+
+PERFORMANCE_FIELDS = [
+    'starting_balance', 'ending_balance', 'daily_pnl', 'daily_pnl_percentage',
+    'total_trades', 'winning_trades', 'losing_trades', 'win_rate',
+    'max_drawdown', 'max_risk_per_trade',
+]
+
+
+def daily_trade_stats(accounts, end):
+    """
+    Satu grouped query atas trade closed: statistik per (account, tanggal exit)
+    sampai `end`, urut tanggal.
+
+    Returns:
+        dict: {account_id: [row, ...]} dengan row berisi day, total,
+        wins, losses, pnl, max_risk
+    """
+    rows = (
+        Trade.objects.filter(
+            trading_account__in=accounts, status='closed',
+            exited_at__isnull=False, exited_at__date__lte=end,
+        )
+        .annotate(day=TruncDate('exited_at'))
+        .order_by()
+        .values('trading_account_id', 'day')
+        .annotate(
+            total=Count('id'),
+            wins=Count('id', filter=Q(realized_pnl__gt=0)),
+            losses=Count('id', filter=Q(realized_pnl__lt=0)),
+            pnl=Sum('realized_pnl'),
+            max_risk=Max('planned_risk_amount'),
+        )
+        .order_by('trading_account_id', 'day')
+    )
+    stats = defaultdict(list)
+    for row in rows:
+        stats[row['trading_account_id']].append(row)
+    return stats
+
+
+def build_performance(account, rows, start):
+    """
+    Bangun row TradingPerformance account untuk hari >= start.
+
+    Saldo awal hari = initial_balance + P&L kumulatif hari sebelumnya, jadi
+    seluruh history harian ikut dijalankan (satu row per hari trading, bukan
+    per trade). max_drawdown adalah jarak ending balance dari puncak equity
+    sebelumnya (end-of-day).
+    """
+    balance = peak = account.initial_balance
+    performances = []
+    for row in rows:
+        pnl = row['pnl'] or ZERO
+        starting = balance
+        balance += pnl
+        peak = max(peak, balance)
+        if row['day'] < start:
+            continue
+        performances.append(TradingPerformance(
+            user_id=account.user_id,
+            trading_account=account,
+            date=row['day'],
+            starting_balance=starting,
+            ending_balance=balance,
+            daily_pnl=pnl,
+            daily_pnl_percentage=(pnl / starting * 100).quantize(BASIS) if starting > 0 else ZERO,
+            total_trades=row['total'],
+            winning_trades=row['wins'],
+            losing_trades=row['losses'],
+            win_rate=(Decimal(row['wins']) / row['total'] * 100).quantize(CENT),
+            max_drawdown=(peak - balance).quantize(CENT),
+            max_risk_per_trade=row['max_risk'] or ZERO,
+        ))
+    return performances
+
+
+def rollup_performance(start, end, accounts=None, batch_size=1000):
+    """
+    Hitung dan upsert TradingPerformance harian untuk rentang [start, end].
+
+    Idempotent: row dalam rentang di-upsert dengan
+    bulk_create(update_conflicts=True) dan row hari yang tidak lagi punya
+    trade closed (mis. trade di-reopen atau dihapus) dihapus, jadi rentang
+    yang sama bisa di-backfill ulang kapan saja.
+
+    Args:
+        start: Tanggal awal (inklusif)
+        end: Tanggal akhir (inklusif)
+        accounts: Queryset TradingAccount (default: semua akun)
+
+    Returns:
+        dict: accounts_count, rows_upserted, rows_deleted
+    """
+    if accounts is None:
+        accounts = TradingAccount.objects.all()
+    accounts = list(accounts.only('id', 'user_id', 'initial_balance'))
+
+    stats = daily_trade_stats(accounts, end)
+    performances = []
+    for account in accounts:
+        performances.extend(build_performance(account, stats.get(account.pk, []), start))
+
+    with db_transaction.atomic():
+        TradingPerformance.objects.bulk_create(
+            performances,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['user', 'trading_account', 'date'],
+            update_fields=PERFORMANCE_FIELDS,
+        )
+        stale = TradingPerformance.objects.filter(trading_account__in=accounts, date__range=(start, end))
+        keep = defaultdict(set)
+        for performance in performances:
+            keep[performance.trading_account_id].add(performance.date)
+        stale_ids = [
+            pk for pk, account_id, day in stale.values_list('pk', 'trading_account_id', 'date')
+            if day not in keep[account_id]
+        ]
+        deleted = TradingPerformance.objects.filter(pk__in=stale_ids).delete()[0] if stale_ids else 0
+
+    user_ids = {account.user_id for account in accounts}
+    if user_ids:
+        performance_changed.send(sender=TradingPerformance, user_ids=user_ids)
+
+    return {
+        'accounts_count': len(accounts),
+        'rows_upserted': len(performances),
+        'rows_deleted': deleted,
+    }
@@ -0,0 +1,213 @@
+# ========================================
+# trading/risk.py - Guardrail batas risiko TradingAccount
+# ========================================
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Case, DateField, DecimalField, F, Q, Sum, Value, When
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .aggregation import check_executions
+from .models import Trade, TradingAccount
+
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def daily_realized_pnl(account, day=None):
+    """Realized P&L akun pada `day` (default hari ini) dari counter, tanpa query"""
+    day = day or timezone.localdate()
+    return account.daily_realized_pnl if account.daily_pnl_date == day else ZERO
+
+
+def record_fill(account_id, exposure_delta, realized_delta, day):
+    """
+    Terapkan perubahan satu fill ke counter akun dengan satu UPDATE atomik.
+
+    realized_delta dijumlahkan ke counter harian jika `day` sama dengan hari
+    counter, memulai counter baru jika lebih baru, dan diabaikan jika fill
+    berada di hari yang sudah lewat.
+    """
+    starts_new_day = Q(daily_pnl_date__isnull=True) | Q(daily_pnl_date__lt=day)
+    TradingAccount.objects.filter(pk=account_id).update(
+        open_exposure=F('open_exposure') + exposure_delta,
+        daily_realized_pnl=Case(
+            When(daily_pnl_date=day, then=F('daily_realized_pnl') + realized_delta),
+            When(starts_new_day, then=Value(realized_delta)),
+            default=F('daily_realized_pnl'),
+            output_field=DecimalField(),
+        ),
+        daily_pnl_date=Case(
+            When(starts_new_day, then=Value(day)),
+            default=F('daily_pnl_date'),
+            output_field=DateField(),
+        ),
+    )
+
+
+def refresh_account_risk(account_id, day=None):
+    """
+    Hitung ulang counter akun dari trade, mis. setelah fill diedit, dihapus,
+    atau disisipkan di tengah history.
+
+    Exposure adalah cost basis posisi terbuka semua trade open. P&L harian
+    adalah selisih realized P&L replay fill sampai akhir hari dan sebelum
+    awal hari, hanya untuk trade yang punya fill pada hari itu.
+    """
+    day = day or timezone.localdate()
+    start, end = _start_of_day(day), _start_of_day(day + timedelta(days=1))
+
+    exposure = Trade.objects.filter(trading_account_id=account_id, status='open').aggregate(
+        total=Sum('open_cost_basis')
+    )['total'] or ZERO
+
+    daily_pnl = ZERO
+    trades = Trade.objects.filter(
+        trading_account_id=account_id, executions__executed_at__gte=start, executions__executed_at__lt=end
+    ).distinct().prefetch_related('executions')
+    for trade in trades:
+        executions = list(trade.executions.all())
+        until_end = check_executions(trade, [execution for execution in executions if execution.executed_at < end])
+        before = check_executions(trade, [execution for execution in executions if execution.executed_at < start])
+        daily_pnl += until_end.realized_pnl - before.realized_pnl
+
+    TradingAccount.objects.filter(pk=account_id).update(
+        open_exposure=exposure, daily_realized_pnl=daily_pnl, daily_pnl_date=day
+    )
+
+
+def check_entry(account, value, trade=None):
+    """
+    Cek batas akun untuk entry senilai `value` (O(1), dari counter akun).
+
+    - max_position_size: nilai posisi trade setelah entry melebihi persentase
+      current_balance
+    - max_daily_loss: kerugian realized hari ini sudah mencapai batas, jadi
+      entry baru diblokir (exit tetap boleh)
+
+    Returns:
+        list: Pelanggaran berupa dict limit, limit_value, value, message
+    """
+    breaches = []
+
+    if account.max_position_size is not None and account.current_balance > 0:
+        limit_value = (account.current_balance * account.max_position_size / 100).quantize(CENT)
+        position_value = ((trade.open_cost_basis if trade is not None else ZERO) + value).quantize(CENT)
+        if position_value > limit_value:
+            breaches.append({
+                'limit': 'max_position_size',
+                'limit_value': str(limit_value),
+                'value': str(position_value),
+                'message': f'Nilai posisi {position_value} melebihi {account.max_position_size}% saldo akun ({limit_value})',
+            })
+
+    if account.max_daily_loss is not None:
+        daily_loss = -daily_realized_pnl(account)
+        if daily_loss >= account.max_daily_loss:
+            breaches.append({
+                'limit': 'max_daily_loss',
+                'limit_value': str(account.max_daily_loss),
+                'value': str(daily_loss),
+                'message': f'Kerugian hari ini {daily_loss} sudah mencapai batas harian {account.max_daily_loss}',
+            })
+
+    return breaches
+
+
+def flag_trade(trade, breaches):
+    """Catat pelanggaran di trade (mode flag) tanpa menyentuh field agregat"""
+    flagged_at = timezone.now().isoformat()
+    risk_breaches = list(trade.risk_breaches) + [{**breach, 'flagged_at': flagged_at} for breach in breaches]
+    Trade.objects.filter(pk=trade.pk).update(risk_breaches=risk_breaches, updated_at=timezone.now())
+    trade.risk_breaches = risk_breaches
+
+
+def account_utilization(account):
+    """
+    Utilisasi batas risiko akun dari counter (tanpa scan trade).
+
+    Returns:
+        dict: exposure, P&L harian, dan pemakaian max_daily_loss/max_position_size
+    """
+    today = timezone.localdate()
+    balance = account.current_balance
+    daily_pnl = daily_realized_pnl(account, today)
+    daily_loss = max(-daily_pnl, ZERO)
+
+    result = {
+        'open_exposure': account.open_exposure.quantize(CENT),
+        'exposure_percentage': (account.open_exposure / balance * 100).quantize(CENT) if balance > 0 else None,
+        'date': today,
+        'daily_realized_pnl': daily_pnl,
+        'max_daily_loss': account.max_daily_loss,
+        'daily_loss_used': daily_loss,
+        'daily_loss_utilization': None,
+        'remaining_daily_loss': None,
+        'max_position_size': account.max_position_size,
+        'max_position_value': None,
+        'risk_enforcement': account.risk_enforcement,
+        'entries_blocked': False,
+    }
+    if account.max_daily_loss is not None:
+        result['remaining_daily_loss'] = max(account.max_daily_loss - daily_loss, ZERO)
+        result['entries_blocked'] = daily_loss >= account.max_daily_loss
+        if account.max_daily_loss > 0:
+            result['daily_loss_utilization'] = (daily_loss / account.max_daily_loss * 100).quantize(CENT)
+    if account.max_position_size is not None:
+        result['max_position_value'] = (balance * account.max_position_size / 100).quantize(CENT)
+    return result
+
+
+@receiver(post_init, sender=Trade)
+def remember_risk_state(sender, instance, **kwargs):
+    # Lewat __dict__ agar field yang di-defer tidak memicu query
+    instance._loaded_risk_state = tuple(
+        instance.__dict__.get(field) for field in ('open_cost_basis', 'realized_pnl', 'trading_account_id')
+    )
+
+
+@receiver(post_save, sender=Trade)
+def update_account_risk(sender, instance, created, raw=False, **kwargs):
+    """
+    Fill yang diterapkan O(1) oleh trading.aggregation (ditandai
+    _applied_execution) memperbarui counter akun dengan delta; perubahan
+    lain pada exposure atau realized P&L (replay, pindah akun) menghitung
+    ulang counter akun.
+    """
+    execution = instance.__dict__.pop('_applied_execution', None)
+    previous_exposure, previous_realized, previous_account = instance._loaded_risk_state
+    instance._loaded_risk_state = (instance.open_cost_basis, instance.realized_pnl, instance.trading_account_id)
+    if raw or created:
+        return
+
+    if previous_account != instance.trading_account_id or previous_exposure is None or previous_realized is None:
+        for account_id in {previous_account, instance.trading_account_id} - {None}:
+            refresh_account_risk(account_id)
+        return
+
+    exposure_delta = instance.open_cost_basis - previous_exposure
+    realized_delta = instance.realized_pnl - previous_realized
+    if not exposure_delta and not realized_delta:
+        return
+    if execution is not None:
+        record_fill(instance.trading_account_id, exposure_delta, realized_delta,
+                    timezone.localdate(execution.executed_at))
+    else:
+        refresh_account_risk(instance.trading_account_id)
+
+
+@receiver(post_delete, sender=Trade)
+def refresh_after_trade_delete(sender, instance, origin=None, **kwargs):
+    # Trade ikut terhapus karena akun/user dihapus: counter tidak perlu dihitung ulang
+    origin_model = getattr(origin, 'model', type(origin))
+    if origin is not None and origin_model is not Trade:
+        return
+    refresh_account_risk(instance.trading_account_id)
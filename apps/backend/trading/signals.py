@@ -0,0 +1,12 @@
+# ========================================
+# trading/signals.py - Signal perubahan data untuk operasi bulk
+# ========================================
+
+from django.dispatch import Signal
+
+
+# bulk_create(update_conflicts=True) tidak mengirim post_save, jadi rollup
+# TradingPerformance mengirim signal ini setelah selesai.
+
+# Dikirim dengan user_ids: row TradingPerformance user tersebut berubah
+performance_changed = Signal()
@@ -0,0 +1,301 @@
+# ========================================
+# trading/statistics.py - Statistik strategi dari history Trade closed
+# ========================================
+
+import uuid
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Case, Count, F, FloatField, Q, Sum, When
+from django.db.models.functions import Abs, Cast
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Trade, TradingStrategy
+
+
+# Masa simpan statistik; invalidasi utama lewat version strategi
+STATISTICS_CACHE_TIMEOUT = 60 * 60 * 24
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Dimensi analisis trade yang di-breakdown
+BREAKDOWN_FIELDS = {
+    'emotional_state': Trade.EMOTIONAL_STATE_CHOICES,
+    'setup_quality': Trade.QUALITY_CHOICES,
+    'market_condition': Trade.MARKET_CONDITION_CHOICES,
+    'execution_quality': Trade.EXECUTION_QUALITY_CHOICES,
+}
+
+COUNTERS = ('trades', 'wins', 'losses', 'gross_profit', 'gross_loss', 'r_sum', 'r_count')
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+
+
+def _rounded(value, digits=2):
+    if value is None or not np.isfinite(float(value)):
+        return None
+    return round(float(value), digits)
+
+
+def closed_trades(strategy):
+    """
+    Trade closed strategi beserta risk (1R) dan R-multiple.
+
+    1R adalah planned_risk_amount, atau jarak planned_entry ke
+    planned_stop_loss dikali quantity jika risk amount tidak diisi. Trade
+    tanpa rencana risk tidak punya R-multiple (NULL).
+    """
+    return Trade.objects.filter(strategy=strategy, status='closed').annotate(
+        risk=Case(
+            When(planned_risk_amount__gt=0, then=F('planned_risk_amount')),
+            When(planned_entry__isnull=False, planned_stop_loss__isnull=False,
+                 then=Abs(F('planned_entry') - F('planned_stop_loss')) * F('total_quantity')),
+            default=None,
+        ),
+    ).annotate(
+        r_multiple=Case(
+            When(risk__gt=0, then=Cast('realized_pnl', FloatField()) / Cast('risk', FloatField())),
+            default=None,
+            output_field=FloatField(),
+        ),
+    )
+
+
+def outcome_stats(counters):
+    """
+    Win rate, expectancy, profit factor, dan rata-rata R dari counter
+    (jumlah trade, win/loss, gross profit/loss, jumlah R).
+    """
+    trades, wins, losses = counters['trades'], counters['wins'], counters['losses']
+    gross_profit, gross_loss = counters['gross_profit'], counters['gross_loss']
+    total_pnl = gross_profit + gross_loss
+    average_win = gross_profit / wins if wins else None
+    average_loss = gross_loss / losses if losses else None
+    return {
+        'trades': trades,
+        'winning_trades': wins,
+        'losing_trades': losses,
+        'breakeven_trades': trades - wins - losses,
+        'win_rate': _rounded(wins / trades * 100) if trades else None,
+        'total_pnl': total_pnl.quantize(CENT),
+        'gross_profit': gross_profit.quantize(CENT),
+        'gross_loss': gross_loss.quantize(CENT),
+        'average_win': average_win.quantize(CENT) if average_win is not None else None,
+        'average_loss': average_loss.quantize(CENT) if average_loss is not None else None,
+        # P&L rata-rata per trade = win rate x avg win + loss rate x avg loss
+        'expectancy': (total_pnl / trades).quantize(CENT) if trades else None,
+        'profit_factor': _rounded(gross_profit / -gross_loss) if gross_loss else None,
+        'payoff_ratio': _rounded(average_win / -average_loss) if average_win and average_loss else None,
+        'average_r_multiple': _rounded(counters['r_sum'] / counters['r_count']) if counters['r_count'] else None,
+        'r_multiple_trades': counters['r_count'],
+    }
+
+
+def grouped_counters(trades):
+    """
+    Satu grouped query: counter per kombinasi dimensi analisis.
+
+    Returns:
+        list: dict per grup dengan BREAKDOWN_FIELDS dan COUNTERS
+    """
+    rows = trades.order_by().values(*BREAKDOWN_FIELDS).annotate(
+        trades=Count('id'),
+        wins=Count('id', filter=Q(realized_pnl__gt=0)),
+        losses=Count('id', filter=Q(realized_pnl__lt=0)),
+        gross_profit=Sum('realized_pnl', filter=Q(realized_pnl__gt=0)),
+        gross_loss=Sum('realized_pnl', filter=Q(realized_pnl__lt=0)),
+        r_sum=Sum('r_multiple'),
+        r_count=Count('r_multiple'),
+    )
+    groups = []
+    for row in rows:
+        row['gross_profit'] = row['gross_profit'] or ZERO
+        row['gross_loss'] = row['gross_loss'] or ZERO
+        row['r_sum'] = row['r_sum'] or 0.0
+        groups.append(row)
+    return groups
+
+
+def _empty_counters():
+    return {'trades': 0, 'wins': 0, 'losses': 0, 'gross_profit': ZERO,
+            'gross_loss': ZERO, 'r_sum': 0.0, 'r_count': 0}
+
+
+def rollup_counters(groups, field=None):
+    """
+    Jumlahkan counter grup per nilai `field` (atau seluruhnya jika None).
+
+    Returns:
+        dict: {nilai field: counters}
+    """
+    totals = {}
+    for group in groups:
+        key = group[field] if field else None
+        counters = totals.setdefault(key, _empty_counters())
+        for name in COUNTERS:
+            counters[name] += group[name]
+    return totals
+
+
+def breakdowns(groups):
+    """Statistik per nilai tiap dimensi analisis; nilai kosong dilabeli 'Unspecified'"""
+    results = {}
+    for field, choices in BREAKDOWN_FIELDS.items():
+        labels = dict(choices)
+        totals = rollup_counters(groups, field)
+        results[field] = [
+            {'value': value, 'label': labels.get(value, 'Unspecified'), **outcome_stats(counters)}
+            for value, counters in sorted(totals.items(), key=lambda item: -item[1]['trades'])
+        ]
+    return results
+
+
+def streaks(pnl):
+    """
+    Streak win/loss dari array P&L urut waktu exit (vectorized run-length).
+    Trade breakeven memutus streak.
+    """
+    outcomes = np.sign(np.asarray(pnl, dtype=float)).astype(int)
+    if outcomes.size == 0:
+        return {'max_winning': 0, 'max_losing': 0, 'current': None}
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(outcomes)) + 1))
+    lengths = np.diff(np.concatenate((starts, [outcomes.size])))
+    values = outcomes[starts]
+    wins, losses = lengths[values > 0], lengths[values < 0]
+    current = {1: 'winning', -1: 'losing', 0: 'breakeven'}[int(values[-1])]
+    return {
+        'max_winning': int(wins.max()) if wins.size else 0,
+        'max_losing': int(losses.max()) if losses.size else 0,
+        'current': {'type': current, 'length': int(lengths[-1])},
+    }
+
+
+def _percentiles(values):
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return None
+    return {f'p{q}': _rounded(value) for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def distribution(trades):
+    """
+    Distribusi P&L dan R-multiple, streak, dan max drawdown P&L kumulatif
+    dari satu query values_list urut waktu exit.
+    """
+    rows = list(trades.order_by('exited_at', 'id').values_list('realized_pnl', 'r_multiple'))
+    pnl = np.array([float(row[0]) for row in rows], dtype=float)
+    r_multiples = np.array([np.nan if row[1] is None else row[1] for row in rows], dtype=float)
+
+    equity = np.concatenate(([0.0], np.cumsum(pnl)))
+    max_drawdown = float((np.maximum.accumulate(equity) - equity).max())
+
+    return {
+        'pnl_percentiles': _percentiles(pnl),
+        'r_multiple_percentiles': _percentiles(r_multiples),
+        'streaks': streaks(pnl),
+        'max_drawdown': _rounded(max_drawdown),
+    }
+
+
+def _version_key(strategy_id):
+    return f'trading:strategy-stats-version:{strategy_id}'
+
+
+def statistics_version(strategy_id):
+    """Version token statistik strategi (acak, lihat api.cache.data_version)"""
+    key = _version_key(strategy_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_statistics(*strategy_ids):
+    cache.set_many({_version_key(strategy_id): uuid.uuid4().hex for strategy_id in strategy_ids}, None)
+
+
+def strategy_statistics(strategy):
+    """
+    Statistik strategi dari trade closed: ringkasan, plan vs actual,
+    breakdown per dimensi analisis, distribusi, dan streak.
+
+    Counter dihitung dengan satu grouped query per kombinasi dimensi lalu
+    dijumlahkan di Python untuk ringkasan dan tiap breakdown; distribusi dan
+    streak dihitung vectorized dari satu query P&L/R. Hasil di-cache per
+    strategi sampai strategi diedit atau ada trade strategi itu yang
+    ditutup, dibuka ulang, atau dianalisis ulang.
+
+    Returns:
+        dict: summary, plan_vs_actual, breakdowns, distribution
+    """
+    key = f'trading:strategy-stats:{strategy.pk}:{statistics_version(strategy.pk)}'
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    trades = closed_trades(strategy)
+    groups = grouped_counters(trades)
+    summary = outcome_stats(rollup_counters(groups).get(None, _empty_counters()))
+
+    win_rate_gap = None
+    if strategy.win_rate_target is not None and summary['win_rate'] is not None:
+        win_rate_gap = _rounded(summary['win_rate'] - float(strategy.win_rate_target))
+
+    result = {
+        'summary': summary,
+        'plan_vs_actual': {
+            'win_rate_target': strategy.win_rate_target,
+            'win_rate': summary['win_rate'],
+            'win_rate_gap': win_rate_gap,
+            'risk_reward_ratio': strategy.risk_reward_ratio,
+            'payoff_ratio': summary['payoff_ratio'],
+        },
+        'breakdowns': breakdowns(groups),
+        'distribution': distribution(trades) if summary['trades'] else None,
+    }
+    cache.set(key, result, STATISTICS_CACHE_TIMEOUT)
+    return result
+
+
+@receiver(post_init, sender=Trade)
+def remember_statistics_state(sender, instance, **kwargs):
+    # Status dan strategi saat dimuat, tanpa query tambahan saat save
+    # (lewat __dict__ agar field yang di-defer tidak memicu query)
+    instance._loaded_statistics_state = (instance.__dict__.get('status'), instance.__dict__.get('strategy_id'))
+
+
+@receiver(post_save, sender=Trade)
+def invalidate_on_trade_save(sender, instance, raw=False, **kwargs):
+    """
+    Statistik hanya membaca trade closed: invalidasi jika trade closed
+    sesudah atau sebelum save (ditutup, dibuka ulang, diedit, pindah strategi).
+    """
+    if raw:
+        return
+    previous_status, previous_strategy = instance._loaded_statistics_state
+    strategy_ids = set()
+    if instance.status == 'closed' and instance.strategy_id:
+        strategy_ids.add(instance.strategy_id)
+    if previous_status == 'closed' and previous_strategy:
+        strategy_ids.add(previous_strategy)
+    if strategy_ids:
+        invalidate_statistics(*strategy_ids)
+    instance._loaded_statistics_state = (instance.status, instance.strategy_id)
+
+
+@receiver(post_delete, sender=Trade)
+def invalidate_on_trade_delete(sender, instance, **kwargs):
+    if instance.status == 'closed' and instance.strategy_id:
+        invalidate_statistics(instance.strategy_id)
+
+
+@receiver(post_save, sender=TradingStrategy)
+def invalidate_on_strategy_save(sender, instance, created=False, raw=False, **kwargs):
+    # plan_vs_actual membaca target strategi (win_rate_target, risk_reward_ratio)
+    if not raw and not created:
+        invalidate_statistics(instance.pk)
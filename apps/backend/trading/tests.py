@@ -1,3 +1,434 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from invest.models import Asset
+from trading.aggregation import ExecutionError, apply_execution, rebuild_trade, reset_trade
+from trading.equity import drawdown_statistics, equity_series
+from trading.models import Trade, TradeExecution, TradingAccount, TradingPerformance, TradingStrategy
+from trading.performance import rollup_performance
+from trading.risk import account_utilization, check_entry, daily_realized_pnl, refresh_account_risk
+from trading.statistics import strategy_statistics, streaks
+
+User = get_user_model()
+
+
+class TradingTestCase(TestCase):
+    """Base test case dengan akun, asset, dan helper trade/fill"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='trader', email='trader@example.com', password='testpass123')
+        self.account = TradingAccount.objects.create(
+            user=self.user, account_name='Main', broker='Broker', account_type='stock',
+            initial_balance=Decimal('100000000'), current_balance=Decimal('100000000')
+        )
+        self.asset = Asset.objects.create(symbol='BBCA', name='Bank Central Asia', type='stock')
+        self.start = datetime(2025, 6, 2, 2, 0, tzinfo=dt_timezone.utc)
+    
+    def create_trade(self, side='long'):
+        return Trade.objects.create(user=self.user, trading_account=self.account, asset=self.asset, side=side)
+    
+    def fill(self, trade, execution_type, quantity, price, minutes, fees='0'):
+        return TradeExecution.objects.create(
+            trade=trade, execution_type=execution_type, quantity=Decimal(quantity),
+            price=Decimal(price), fees=Decimal(fees), executed_at=self.start + timedelta(minutes=minutes)
+        )
+
+
+class TradeAggregationTestCase(TradingTestCase):
+    """Test engine agregasi Trade dari fill TradeExecution"""
+    
+    def test_long_scale_in_and_partial_exits(self):
+        """Test long dengan dua entry, partial exit, lalu exit penuh"""
+        trade = self.create_trade()
+        self.fill(trade, 'entry', '100', '9000', 0, fees='1000')
+        self.fill(trade, 'entry', '100', '9200', 10, fees='1000')
+        
+        # Insert fill + lock trade + cek urutan + update trade + update counter
+        # akun (dan savepoint), tidak bergantung pada jumlah fill sebelumnya
+        with self.assertNumQueries(7):
+            self.fill(trade, 'partial_exit', '50', '9500', 20, fees='500')
+        
+        trade.refresh_from_db()
+        self.assertEqual(trade.status, 'open')
+        self.assertEqual(trade.total_quantity, Decimal('200'))
+        self.assertEqual(trade.open_quantity, Decimal('150'))
+        self.assertEqual(trade.average_entry_price, Decimal('9100.00'))
+        # (9500 - 9100) x 50 - fee 2500
+        self.assertEqual(trade.realized_pnl, Decimal('17500.00'))
+        
+        self.fill(trade, 'exit', '150', '9000', 60, fees='1500')
+        trade.refresh_from_db()
+        self.assertEqual(trade.status, 'closed')
+        self.assertEqual(trade.open_quantity, Decimal('0'))
+        self.assertEqual(trade.average_exit_price, Decimal('9125.00'))
+        # 20000 + (9000 - 9100) x 150 - fee 4000
+        self.assertEqual(trade.realized_pnl, Decimal('1000.00'))
+        self.assertEqual(trade.pnl_percentage, Decimal('0.0549'))
+        self.assertEqual(trade.holding_time, timedelta(minutes=60))
+        self.assertEqual(trade.entered_at, self.start)
+    
+    def test_short_side_profits_when_price_falls(self):
+        """Test short: exit di harga lebih rendah menghasilkan profit"""
+        trade = self.create_trade(side='short')
+        self.fill(trade, 'entry', '10', '50000', 0)
+        self.fill(trade, 'partial_exit', '4', '48000', 5)
+        self.fill(trade, 'exit', '6', '51000', 15)
+        
+        trade.refresh_from_db()
+        # 4 x 2000 - 6 x 1000
+        self.assertEqual(trade.realized_pnl, Decimal('2000.00'))
+        self.assertEqual(trade.status, 'closed')
+    
+    def test_backdated_edit_and_delete_replay_trade(self):
+        """Test fill yang disisipkan, diedit, atau dihapus me-replay trade"""
+        trade = self.create_trade()
+        self.fill(trade, 'entry', '100', '1000', 0)
+        exit_fill = self.fill(trade, 'exit', '100', '1100', 30)
+        # Entry disisipkan sebelum exit: exit tidak lagi menutup seluruh posisi
+        self.fill(trade, 'entry', '100', '1200', 10)
+        
+        trade.refresh_from_db()
+        self.assertEqual(trade.status, 'open')
+        self.assertEqual(trade.open_quantity, Decimal('100'))
+        # (1100 - 1100 avg) x 100
+        self.assertEqual(trade.realized_pnl, Decimal('0.00'))
+        
+        exit_fill.price = Decimal('1300')
+        exit_fill.save()
+        trade.refresh_from_db()
+        self.assertEqual(trade.realized_pnl, Decimal('20000.00'))
+        
+        exit_fill.delete()
+        trade.refresh_from_db()
+        self.assertEqual(trade.realized_pnl, Decimal('0.00'))
+        self.assertEqual(trade.exit_quantity, Decimal('0'))
+        self.assertIsNone(trade.exited_at)
+    
+    def test_incremental_matches_rebuild_and_rejects_oversell(self):
+        """Test hasil incremental sama dengan replay penuh; exit > posisi ditolak"""
+        trade = self.create_trade()
+        for minutes, (execution_type, quantity, price) in enumerate([
+            ('entry', '3', '101.37'), ('entry', '7', '99.91'), ('partial_exit', '4', '103.33'),
+            ('entry', '2', '98.5'), ('partial_exit', '5', '97.77'), ('exit', '3', '105.01'),
+        ]):
+            self.fill(trade, execution_type, quantity, price, minutes, fees='0.35')
+        trade.refresh_from_db()
+        incremental = {field: getattr(trade, field) for field in ['realized_pnl', 'open_cost_basis', 'status']}
+        
+        rebuild_trade(trade)
+        trade.refresh_from_db()
+        self.assertEqual(incremental, {field: getattr(trade, field) for field in incremental})
+        self.assertEqual(trade.open_cost_basis, Decimal('0'))
+        
+        preview = Trade(side='long', status='open')
+        reset_trade(preview)
+        with self.assertRaises(ExecutionError):
+            apply_execution(preview, TradeExecution(execution_type='exit', quantity=Decimal('1'),
+                                                    price=Decimal('1'), executed_at=self.start))
+    
+    def test_rebuild_trades_command(self):
+        """Test command rebuild_trades untuk backfill agregat"""
+        trade = self.create_trade()
+        self.fill(trade, 'entry', '10', '100', 0)
+        Trade.objects.filter(pk=trade.pk).update(total_quantity=0, open_quantity=0, entry_value=0)
+        
+        out = StringIO()
+        call_command('rebuild_trades', user=self.user.pk, stdout=out)
+        trade.refresh_from_db()
+        self.assertEqual(trade.total_quantity, Decimal('10'))
+        self.assertIn('1 fill di-replay untuk 1 trade', out.getvalue())
+
+
+class TradingPerformanceRollupTestCase(TradingTestCase):
+    """Test rollup harian TradingPerformance dari trade closed"""
+    
+    def close_trade(self, day, pnl):
+        """Trade long 10 unit @100 yang ditutup pada hari ke-`day` dengan P&L `pnl`"""
+        trade = self.create_trade()
+        minutes = day * 24 * 60
+        self.fill(trade, 'entry', '10', '100', minutes)
+        self.fill(trade, 'exit', '10', str(100 + Decimal(pnl) / 10), minutes + 60)
+        return trade
+    
+    def test_rollup_balances_drawdown_and_stats(self):
+        """Test saldo berjalan, win rate, dan drawdown per hari"""
+        self.close_trade(0, '500')
+        self.close_trade(0, '-200')
+        self.close_trade(1, '-1000')
+        self.close_trade(3, '300')
+        # Trade open tidak ikut rollup
+        open_trade = self.create_trade()
+        self.fill(open_trade, 'entry', '10', '100', 3 * 24 * 60)
+        
+        day = self.start.date()
+        stats = rollup_performance(day, day + timedelta(days=3))
+        self.assertEqual(stats, {'accounts_count': 1, 'rows_upserted': 3, 'rows_deleted': 0})
+        
+        rows = list(TradingPerformance.objects.filter(trading_account=self.account).order_by('date'))
+        self.assertEqual([row.date for row in rows], [day, day + timedelta(days=1), day + timedelta(days=3)])
+        first, second, third = rows
+        self.assertEqual(first.starting_balance, Decimal('100000000'))
+        self.assertEqual(first.daily_pnl, Decimal('300'))
+        self.assertEqual(first.total_trades, 2)
+        self.assertEqual(first.win_rate, Decimal('50.00'))
+        self.assertEqual(second.starting_balance, Decimal('100000300'))
+        self.assertEqual(second.ending_balance, Decimal('99999300'))
+        self.assertEqual(second.max_drawdown, Decimal('1000'))
+        self.assertEqual(third.max_drawdown, Decimal('700'))
+    
+    def test_partial_backfill_is_idempotent_and_removes_stale_days(self):
+        """Test backfill ulang rentang sebagian: saldo awal tetap dari history, row basi dihapus"""
+        self.close_trade(0, '500')
+        later = self.close_trade(2, '100')
+        day = self.start.date()
+        rollup_performance(day, day + timedelta(days=2))
+        
+        # Backfill hanya hari ke-2: saldo awal tetap memperhitungkan hari ke-0
+        rollup_performance(day + timedelta(days=2), day + timedelta(days=2))
+        self.assertEqual(TradingPerformance.objects.count(), 2)
+        row = TradingPerformance.objects.get(date=day + timedelta(days=2))
+        self.assertEqual(row.starting_balance, Decimal('100000500'))
+        
+        # Trade di-reopen: hari ke-2 tidak lagi punya trade closed
+        later.executions.filter(execution_type='exit').delete()
+        stats = rollup_performance(day, day + timedelta(days=2))
+        self.assertEqual(stats['rows_deleted'], 1)
+        self.assertEqual(list(TradingPerformance.objects.values_list('date', flat=True)), [day])
+    
+    def test_rollup_trading_performance_command(self):
+        """Test command rollup_trading_performance"""
+        self.close_trade(0, '500')
+        day = self.start.date()
+        
+        out = StringIO()
+        call_command('rollup_trading_performance', start=day, end=day, user=self.user.pk, stdout=out)
+        call_command('rollup_trading_performance', start=day, end=day, user=self.user.pk, stdout=out)
+        self.assertEqual(TradingPerformance.objects.count(), 1)
+        self.assertIn('1 row di-upsert, 0 row dihapus untuk 1 akun', out.getvalue())
+
+
+class StrategyStatisticsTestCase(TradingTestCase):
+    """Test statistik strategi dari trade closed"""
+    
+    def setUp(self):
+        super().setUp()
+        self.strategy = TradingStrategy.objects.create(
+            user=self.user, name='Breakout', risk_reward_ratio=Decimal('2'), win_rate_target=Decimal('50')
+        )
+        self.minutes = 0
+    
+    def closed_trade(self, pnl, **fields):
+        """Trade long 10 unit @100 ditutup dengan P&L `pnl`, risk 1R = 100"""
+        fields.setdefault('planned_risk_amount', Decimal('100'))
+        trade = Trade.objects.create(
+            user=self.user, trading_account=self.account, asset=self.asset, side='long',
+            strategy=self.strategy, **fields
+        )
+        self.fill(trade, 'entry', '10', '100', self.minutes)
+        self.fill(trade, 'exit', '10', str(100 + Decimal(pnl) / 10), self.minutes + 30)
+        self.minutes += 60
+        return trade
+    
+    def test_summary_breakdowns_and_distribution(self):
+        """Test win rate, expectancy, profit factor, R-multiple, breakdown, dan streak"""
+        self.closed_trade('200', emotional_state='confident', setup_quality='A')
+        self.closed_trade('300', emotional_state='confident', setup_quality='A')
+        self.closed_trade('-100', emotional_state='fomo', setup_quality='C')
+        self.closed_trade('-100', emotional_state='fomo')
+        # R dari jarak entry-stop x quantity jika risk amount kosong
+        self.closed_trade('100', emotional_state='confident', planned_risk_amount=None,
+                          planned_entry=Decimal('100'), planned_stop_loss=Decimal('95'))
+        
+        stats = strategy_statistics(self.strategy)
+        summary = stats['summary']
+        self.assertEqual(summary['trades'], 5)
+        self.assertEqual(summary['win_rate'], 60.0)
+        self.assertEqual(summary['total_pnl'], Decimal('400.00'))
+        self.assertEqual(summary['expectancy'], Decimal('80.00'))
+        self.assertEqual(summary['profit_factor'], 3.0)
+        # R: 2, 3, -1, -1, 100 / (5 x 10) = 2
+        self.assertEqual(summary['average_r_multiple'], 1.0)
+        self.assertEqual(stats['plan_vs_actual']['win_rate_gap'], 10.0)
+        
+        emotions = {row['value']: row for row in stats['breakdowns']['emotional_state']}
+        self.assertEqual(emotions['confident']['win_rate'], 100.0)
+        self.assertEqual(emotions['fomo']['expectancy'], Decimal('-100.00'))
+        self.assertIsNone(emotions['confident']['profit_factor'])
+        setups = {row['value']: row for row in stats['breakdowns']['setup_quality']}
+        self.assertEqual(setups['']['label'], 'Unspecified')
+        self.assertEqual(setups['']['trades'], 2)
+        
+        distribution = stats['distribution']
+        self.assertEqual(distribution['pnl_percentiles']['p50'], 100.0)
+        self.assertEqual(distribution['streaks']['max_winning'], 2)
+        self.assertEqual(distribution['streaks']['max_losing'], 2)
+        self.assertEqual(distribution['streaks']['current'], {'type': 'winning', 'length': 1})
+        self.assertEqual(distribution['max_drawdown'], 200.0)
+    
+    def test_cached_until_trade_closes_or_reopens(self):
+        """Test statistik di-cache dan diinvalidasi saat trade ditutup atau dibuka ulang"""
+        trade = self.closed_trade('200')
+        strategy_statistics(self.strategy)
+        with self.assertNumQueries(0):
+            strategy_statistics(self.strategy)
+        
+        # Fill pada trade lain yang masih open tidak menginvalidasi
+        open_trade = Trade.objects.create(user=self.user, trading_account=self.account, asset=self.asset,
+                                          side='long', strategy=self.strategy)
+        self.fill(open_trade, 'entry', '10', '100', 500)
+        with self.assertNumQueries(0):
+            strategy_statistics(self.strategy)
+        
+        self.fill(open_trade, 'exit', '10', '90', 600)
+        self.assertEqual(strategy_statistics(self.strategy)['summary']['trades'], 2)
+        
+        # Trade dibuka ulang (fill exit dihapus) keluar dari statistik
+        trade.executions.filter(execution_type='exit').delete()
+        self.assertEqual(strategy_statistics(self.strategy)['summary']['trades'], 1)
+    
+    def test_streaks_run_length(self):
+        """Test streak vectorized dengan breakeven yang memutus streak"""
+        self.assertEqual(streaks([1, 2, -1, 0, 3, 4, 5, -2]), {
+            'max_winning': 3, 'max_losing': 1, 'current': {'type': 'losing', 'length': 1}
+        })
+        self.assertEqual(streaks([])['current'], None)
+
+
+class AccountRiskTestCase(TradingTestCase):
+    """Test counter exposure/P&L harian akun dan guardrail entry"""
+    
+    def setUp(self):
+        super().setUp()
+        self.start = timezone.now().replace(hour=1, minute=0, second=0, microsecond=0)
+        self.today = timezone.localdate(self.start)
+    
+    def counters(self):
+        self.account.refresh_from_db()
+        return self.account.open_exposure, daily_realized_pnl(self.account, self.today)
+    
+    def test_counters_follow_fills_and_match_refresh(self):
+        """Test counter diperbarui per fill dan sama dengan hitung ulang penuh"""
+        long_trade = self.create_trade()
+        self.fill(long_trade, 'entry', '10', '100', 0, fees='5')
+        short_trade = self.create_trade(side='short')
+        self.fill(short_trade, 'entry', '4', '50', 5)
+        self.assertEqual(self.counters(), (Decimal('1200'), Decimal('-5')))
+        
+        self.fill(long_trade, 'partial_exit', '5', '90', 10)
+        self.fill(short_trade, 'exit', '4', '40', 15)
+        self.assertEqual(self.counters(), (Decimal('500'), Decimal('-15')))
+        
+        # Edit backdated: trade di-replay dan counter dihitung ulang
+        entry = long_trade.executions.get(execution_type='entry')
+        entry.price = Decimal('80')
+        entry.save()
+        exposure, daily = self.counters()
+        self.assertEqual((exposure, daily), (Decimal('400'), Decimal('85')))
+        refresh_account_risk(self.account.pk, self.today)
+        self.assertEqual(self.counters(), (exposure, daily))
+        
+        # Trade dihapus: exposure-nya keluar dari counter
+        long_trade.delete()
+        self.assertEqual(self.counters(), (Decimal('0'), Decimal('40')))
+    
+    def test_fill_on_previous_day_does_not_touch_daily_counter(self):
+        """Test fill hari sebelumnya tidak mengubah P&L hari ini"""
+        trade = self.create_trade()
+        self.fill(trade, 'entry', '10', '100', 0)
+        self.fill(trade, 'exit', '5', '110', 10)
+        self.fill(trade, 'exit', '5', '120', 24 * 60)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.daily_realized_pnl, Decimal('100'))
+        self.assertEqual(self.account.daily_pnl_date, self.today + timedelta(days=1))
+        self.assertEqual(daily_realized_pnl(self.account, self.today), Decimal('0'))
+    
+    def test_check_entry_limits(self):
+        """Test pelanggaran max_position_size dan max_daily_loss"""
+        self.account.max_position_size = Decimal('1')
+        self.account.max_daily_loss = Decimal('800')
+        self.account.save()
+        trade = self.create_trade()
+        self.fill(trade, 'entry', '100', '9000', 0)
+        self.fill(trade, 'partial_exit', '50', '8990', 5)
+        self.account.refresh_from_db()
+        trade.refresh_from_db()
+        
+        self.assertEqual(check_entry(self.account, Decimal('500000'), trade), [])
+        breaches = check_entry(self.account, Decimal('600000'), trade)
+        self.assertEqual([breach['limit'] for breach in breaches], ['max_position_size'])
+        self.assertEqual(breaches[0]['value'], '1050000.00')
+        
+        self.fill(trade, 'exit', '50', '8990', 10)
+        self.account.refresh_from_db()
+        with self.assertNumQueries(0):
+            breaches = check_entry(self.account, Decimal('1000'))
+        self.assertEqual([breach['limit'] for breach in breaches], ['max_daily_loss'])
+        self.assertTrue(account_utilization(self.account)['entries_blocked'])
+
 
-# Create your tests here.
+class EquityCurveTestCase(TradingTestCase):
+    """Test equity curve akun yang dipelihara incremental"""
+    
+    def close_trade(self, minutes, pnl):
+        """Trade long 10 unit @100 ditutup pada menit ke-`minutes` dengan P&L `pnl`"""
+        trade = self.create_trade()
+        self.fill(trade, 'entry', '10', '100', minutes - 1)
+        self.fill(trade, 'exit', '10', str(100 + Decimal(pnl) / 10), minutes)
+        return trade
+    
+    def curve(self):
+        return list(self.account.equity_points.order_by('closed_at').values_list('cumulative_pnl', 'peak_pnl'))
+    
+    def test_points_appended_and_rebuilt_on_backdated_changes(self):
+        """Test titik di-append saat trade ditutup dan di-build ulang saat history berubah"""
+        day = 24 * 60
+        self.close_trade(day, '100')
+        losing = self.close_trade(2 * day, '-300')
+        self.close_trade(3 * day, '50')
+        self.assertEqual(self.curve(), [
+            (Decimal('100'), Decimal('100')), (Decimal('-200'), Decimal('100')), (Decimal('-150'), Decimal('100')),
+        ])
+        
+        # Trade ditutup sebelum titik terakhir: titik sesudahnya dihitung ulang
+        self.close_trade(2 * day - 60, '400')
+        self.assertEqual([point[0] for point in self.curve()],
+                         [Decimal('100'), Decimal('500'), Decimal('200'), Decimal('250')])
+        
+        # Trade dibuka ulang keluar dari series
+        losing.executions.filter(execution_type='exit').delete()
+        self.assertEqual(self.curve(), [
+            (Decimal('100'), Decimal('100')), (Decimal('500'), Decimal('500')), (Decimal('550'), Decimal('550')),
+        ])
+    
+    def test_drawdown_statistics_vectorized(self):
+        """Test max drawdown dan time-under-water dari series"""
+        day = 24 * 60
+        for offset, pnl in ((1, '1000'), (2, '-500'), (4, '-500'), (5, '1500'), (6, '-200')):
+            self.close_trade(offset * day, pnl)
+        series = equity_series(self.account)
+        self.assertEqual(series[2]['balance'], Decimal('100000000'))
+        
+        stats = drawdown_statistics(series)
+        self.assertEqual(stats['max_drawdown'], 1000.0)
+        self.assertEqual(stats['under_water_periods'], 2)
+        # Puncak hari ke-1, pulih hari ke-5
+        self.assertEqual(stats['max_time_under_water_days'], 4.0)
+        self.assertEqual(stats['current_drawdown'], 200.0)
+        self.assertEqual(stats['current_time_under_water_days'], 1.0)
+        self.assertEqual(drawdown_statistics([])['max_drawdown'], 0.0)
+    
+    def test_rebuild_equity_curves_command(self):
+        """Test command rebuild_equity_curves untuk backfill"""
+        self.close_trade(60, '100')
+        self.account.equity_points.all().delete()
+        
+        out = StringIO()
+        call_command('rebuild_equity_curves', account=str(self.account.pk), stdout=out)
+        self.assertEqual(self.curve(), [(Decimal('100'), Decimal('100'))])
+        self.assertIn('1 titik equity ditulis untuk 1 akun', out.getvalue())
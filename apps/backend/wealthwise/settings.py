@@ -263,6 +263,40 @@ CORS_ALLOW_HEADERS = [
     "x-requested-with",
 ]
 
+# Storage history harga asset: 'default' (asset_prices) atau 'compact'
+# (asset_prices_compact, lihat invest.price_store)
+INVEST_PRICE_STORAGE = 'default'
+
+# Direktori file hasil job background (mis. export dengan ?async=true)
+API_JOB_RESULTS_DIR = BASE_DIR / 'tmp' / 'jobs'
+
+# Cache Django. 'default' local-memory per proses untuk cache yang boleh
+# berbeda antar proses; 'shared' dipakai bersama semua proses (gunicorn,
+# run_jobs, command CLI) untuk data version dan invalidasi. File cache
+# cukup untuk satu host; untuk beberapa host gunakan Redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'wealthwise',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'tmp' / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Alias cache untuk response analytics per user (lihat api.cache); harus
+# backend bersama (dicek oleh api.checks)
+API_RESPONSE_CACHE = 'shared'
+
+# Alias cache untuk versi quote harga terakhir (lihat invest.quotes); harus
+# backend bersama agar ingest_prices dari CLI menginvalidasi proses web
+INVEST_QUOTE_CACHE = 'shared'
+
+# Cache bersama bertahan antar run test, jadi dikosongkan di awal run
+TEST_RUNNER = 'wealthwise.test_runner.TestRunner'
+
 #try:
 from .local_settings import *
 #except ImportError:
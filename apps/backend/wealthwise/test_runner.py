@@ -0,0 +1,17 @@
+from django.core.cache import caches
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    DiscoverRunner yang mengosongkan semua cache sebelum test berjalan.
+
+    Cache bersama (file/Redis) tidak hilang saat proses selesai seperti
+    LocMemCache, jadi data version dan response dari run sebelumnya bisa
+    cocok dengan user id yang sama di run berikutnya.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        for cache in caches.all():
+            cache.clear()